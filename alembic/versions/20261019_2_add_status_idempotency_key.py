@@ -0,0 +1,39 @@
+"""add idempotency key to monitor statuses
+
+Revision ID: 20261019_2
+Revises: 20261019
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_2"
+down_revision: Union[str, None] = "20261019"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add idempotency_key with a partial unique index per monitor."""
+    with op.batch_alter_table("monitor_statuses") as batch_op:
+        batch_op.add_column(sa.Column("idempotency_key", sa.String(), nullable=True))
+    op.create_index(
+        "ix_monitor_statuses_idempotency_key",
+        "monitor_statuses",
+        ["monitor_id", "idempotency_key"],
+        unique=True,
+        postgresql_where=sa.text("idempotency_key IS NOT NULL"),
+        sqlite_where=sa.text("idempotency_key IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Remove idempotency_key and its index."""
+    op.drop_index("ix_monitor_statuses_idempotency_key", table_name="monitor_statuses")
+    with op.batch_alter_table("monitor_statuses") as batch_op:
+        batch_op.drop_column("idempotency_key")
@@ -0,0 +1,35 @@
+"""add timestamp indexes to monitor statuses
+
+Revision ID: 20261019_3
+Revises: 20261019_2
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_3"
+down_revision: Union[str, None] = "20261019_2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index statuses by monitor and time, and by time alone."""
+    op.create_index(
+        "ix_monitor_statuses_monitor_id_timestamp",
+        "monitor_statuses",
+        ["monitor_id", "timestamp"],
+    )
+    op.create_index("ix_monitor_statuses_timestamp", "monitor_statuses", ["timestamp"])
+
+
+def downgrade() -> None:
+    """Remove the timestamp indexes."""
+    op.drop_index("ix_monitor_statuses_timestamp", table_name="monitor_statuses")
+    op.drop_index(
+        "ix_monitor_statuses_monitor_id_timestamp", table_name="monitor_statuses"
+    )
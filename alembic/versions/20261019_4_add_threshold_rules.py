@@ -0,0 +1,46 @@
+"""add threshold rules
+
+Revision ID: 20261019_4
+Revises: 20261019_3
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_4"
+down_revision: Union[str, None] = "20261019_3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the threshold_rules table."""
+    op.create_table(
+        "threshold_rules",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("monitor_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "aggregate",
+            sa.Enum("MEAN", "MAX", "MIN", "LAST", name="ruleaggregate"),
+            nullable=False,
+        ),
+        sa.Column("window_seconds", sa.Float(), nullable=False),
+        sa.Column("warning", sa.Float(), nullable=True),
+        sa.Column("critical", sa.Float(), nullable=True),
+        sa.Column("above", sa.Boolean(), nullable=False),
+        sa.Column("hysteresis", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["monitor_id"], ["monitor.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("monitor_id"),
+    )
+
+
+def downgrade() -> None:
+    """Drop the threshold_rules table."""
+    op.drop_table("threshold_rules")
+    sa.Enum(name="ruleaggregate").drop(op.get_bind(), checkfirst=True)
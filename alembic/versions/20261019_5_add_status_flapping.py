@@ -0,0 +1,34 @@
+"""add flapping flag to monitor statuses
+
+Revision ID: 20261019_5
+Revises: 20261019_4
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_5"
+down_revision: Union[str, None] = "20261019_4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the flapping column; existing statuses were not flapping."""
+    with op.batch_alter_table("monitor_statuses") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "flapping", sa.Boolean(), server_default=sa.false(), nullable=False
+            )
+        )
+
+
+def downgrade() -> None:
+    """Remove the flapping column."""
+    with op.batch_alter_table("monitor_statuses") as batch_op:
+        batch_op.drop_column("flapping")
@@ -0,0 +1,69 @@
+"""add composite monitors
+
+Revision ID: 20261019_6
+Revises: 20261019_5
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_6"
+down_revision: Union[str, None] = "20261019_5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the composite flag and the membership and rollup tables."""
+    with op.batch_alter_table("monitor") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "composite", sa.Boolean(), server_default=sa.false(), nullable=False
+            )
+        )
+    op.create_table(
+        "rollup_edges",
+        sa.Column("composite_id", sa.Integer(), nullable=False),
+        sa.Column("member_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["composite_id"], ["monitor.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["member_id"], ["monitor.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("composite_id", "member_id"),
+    )
+    op.create_index("ix_rollup_edges_member_id", "rollup_edges", ["member_id"])
+    op.create_table(
+        "composite_member_tags",
+        sa.Column("composite_id", sa.Integer(), nullable=False),
+        sa.Column("tag_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["composite_id"], ["monitor.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["tag_id"], ["tags.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("composite_id", "tag_id"),
+    )
+    op.create_index(
+        "ix_composite_member_tags_tag_id", "composite_member_tags", ["tag_id"]
+    )
+    op.create_table(
+        "composite_rollups",
+        sa.Column("composite_id", sa.Integer(), nullable=False),
+        sa.Column("normal", sa.Integer(), nullable=False),
+        sa.Column("warning", sa.Integer(), nullable=False),
+        sa.Column("missing_data", sa.Integer(), nullable=False),
+        sa.Column("critical", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["composite_id"], ["monitor.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("composite_id"),
+    )
+
+
+def downgrade() -> None:
+    """Drop the rollup tables and the composite flag."""
+    op.drop_table("composite_rollups")
+    op.drop_index("ix_composite_member_tags_tag_id", table_name="composite_member_tags")
+    op.drop_table("composite_member_tags")
+    op.drop_index("ix_rollup_edges_member_id", table_name="rollup_edges")
+    op.drop_table("rollup_edges")
+    with op.batch_alter_table("monitor") as batch_op:
+        batch_op.drop_column("composite")
@@ -0,0 +1,81 @@
+"""add webhook subscriptions, outbox and dead letters
+
+Revision ID: 20261019_7
+Revises: 20261019_6
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_7"
+down_revision: Union[str, None] = "20261019_6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the webhook subscription, outbox and dead letter tables."""
+    op.create_table(
+        "webhook_subscriptions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("monitor_id", sa.Integer(), nullable=True),
+        sa.Column("tag_id", sa.Integer(), nullable=True),
+        sa.Column("states", sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(["monitor_id"], ["monitor.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["tag_id"], ["tags.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_webhook_subscriptions_monitor_id", "webhook_subscriptions", ["monitor_id"]
+    )
+    op.create_index(
+        "ix_webhook_subscriptions_tag_id", "webhook_subscriptions", ["tag_id"]
+    )
+    op.create_table(
+        "webhook_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("subscription_id", sa.Integer(), nullable=False),
+        sa.Column("event", sa.JSON(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["subscription_id"], ["webhook_subscriptions.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_webhook_outbox_next_attempt_at", "webhook_outbox", ["next_attempt_at"]
+    )
+    op.create_table(
+        "webhook_dead_letters",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("subscription_id", sa.Integer(), nullable=True),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("event", sa.JSON(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("failed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["subscription_id"], ["webhook_subscriptions.id"], ondelete="SET NULL"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    """Drop the webhook tables."""
+    op.drop_table("webhook_dead_letters")
+    op.drop_index("ix_webhook_outbox_next_attempt_at", table_name="webhook_outbox")
+    op.drop_table("webhook_outbox")
+    op.drop_index("ix_webhook_subscriptions_tag_id", table_name="webhook_subscriptions")
+    op.drop_index(
+        "ix_webhook_subscriptions_monitor_id", table_name="webhook_subscriptions"
+    )
+    op.drop_table("webhook_subscriptions")
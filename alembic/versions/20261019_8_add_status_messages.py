@@ -0,0 +1,77 @@
+"""intern status messages into a status_messages table
+
+Revision ID: 20261019_8
+Revises: 20261019_7
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_8"
+down_revision: Union[str, None] = "20261019_7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Default MESSAGE_INTERN_MAX_LENGTH; longer messages stay inline
+MAX_LENGTH = 256
+
+
+def upgrade() -> None:
+    """Create status_messages and move existing messages into it."""
+    op.create_table(
+        "status_messages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("text"),
+    )
+    with op.batch_alter_table("monitor_statuses") as batch_op:
+        batch_op.add_column(sa.Column("message_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            "monitor_statuses_message_id_fkey",
+            "status_messages",
+            ["message_id"],
+            ["id"],
+        )
+
+    # Compact existing rows: one status_messages row per distinct message,
+    # referenced from every status that carried it inline
+    op.execute(
+        sa.text(
+            "INSERT INTO status_messages (text) "
+            "SELECT DISTINCT message FROM monitor_statuses "
+            "WHERE message IS NOT NULL AND message != '' "
+            "AND length(message) <= :max_length"
+        ).bindparams(max_length=MAX_LENGTH)
+    )
+    # One pass over the table; the rows matched are those whose message was
+    # just inserted, and SET reads the row's values from before the update
+    op.execute(
+        sa.text(
+            "UPDATE monitor_statuses SET message_id = ("
+            "SELECT status_messages.id FROM status_messages "
+            "WHERE status_messages.text = monitor_statuses.message"
+            "), message = NULL "
+            "WHERE message IS NOT NULL AND message != '' "
+            "AND length(message) <= :max_length"
+        ).bindparams(max_length=MAX_LENGTH)
+    )
+
+
+def downgrade() -> None:
+    """Move interned messages back inline and drop status_messages."""
+    op.execute(
+        "UPDATE monitor_statuses SET message = ("
+        "SELECT status_messages.text FROM status_messages "
+        "WHERE status_messages.id = monitor_statuses.message_id"
+        ") WHERE message_id IS NOT NULL"
+    )
+    # Dropping the column drops its foreign key
+    with op.batch_alter_table("monitor_statuses") as batch_op:
+        batch_op.drop_column("message_id")
+    op.drop_table("status_messages")
@@ -0,0 +1,44 @@
+"""add name search indexes to monitors and tags on PostgreSQL
+
+Revision ID: 20261019_9
+Revises: 20261019_8
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_9"
+down_revision: Union[str, None] = "20261019_8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("monitor", "tags")
+
+
+def upgrade() -> None:
+    """Index names by trigram and in code point order on PostgreSQL."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in TABLES:
+        op.create_index(
+            f"ix_{table}_name_trgm",
+            table,
+            [sa.text('(name COLLATE "C") gin_trgm_ops')],
+            postgresql_using="gin",
+        )
+        op.create_index(f"ix_{table}_name_c", table, [sa.text('name COLLATE "C"')])
+
+
+def downgrade() -> None:
+    """Remove the name search indexes; the extension is left installed."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_name_c", table_name=table)
+        op.drop_index(f"ix_{table}_name_trgm", table_name=table)
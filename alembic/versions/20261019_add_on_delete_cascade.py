@@ -0,0 +1,44 @@
+"""add on delete cascade to monitor foreign keys
+
+Revision ID: 20261019
+Revises: 20250330_merge
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019"
+down_revision: Union[str, None] = "20250330_merge"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, constraint, local column, referenced table)
+FOREIGN_KEYS = [
+    ("monitor_statuses", "monitor_statuses_monitor_id_fkey", "monitor_id", "monitor"),
+    ("monitor_tags", "monitor_tags_monitor_id_fkey", "monitor_id", "monitor"),
+    ("monitor_tags", "monitor_tags_tag_id_fkey", "tag_id", "tags"),
+]
+
+
+def _recreate_foreign_keys(ondelete: str | None) -> None:
+    """Recreate the monitor foreign keys with the given ON DELETE action."""
+    for table, constraint, column, referenced in FOREIGN_KEYS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(constraint, type_="foreignkey")
+            batch_op.create_foreign_key(
+                constraint, referenced, [column], ["id"], ondelete=ondelete
+            )
+
+
+def upgrade() -> None:
+    """Delete statuses and tag associations together with their monitor or tag."""
+    _recreate_foreign_keys("CASCADE")
+
+
+def downgrade() -> None:
+    """Restore foreign keys without ON DELETE actions."""
+    _recreate_foreign_keys(None)
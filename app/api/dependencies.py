@@ -2,10 +2,29 @@
 Database dependency module.
 
 This module provides dependencies for database session management in FastAPI routes.
+
+Sessions check a connection out of the pool on their first statement, so a
+request answered from a cache or rejected before its handler runs never holds
+one. Routes of a router created with ``route_class=SessionReleasingRoute``
+close their sessions as soon as the handler returns, so a read's connection is
+back in the pool while the response is serialized and sent.
 """
 
-from typing import Generator
-from app.database import SessionLocal
+import functools
+import inspect
+import math
+import time
+from typing import Callable, Generator
+
+from fastapi import Depends, Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.database import ReadSessionLocal, SessionLocal
+
+# Cookie recording when a client last wrote, for read-your-writes routing
+LAST_WRITE_COOKIE = "monitor_last_write"
 
 
 def get_db() -> Generator:
@@ -25,3 +44,112 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+def get_write_db(response: Response, db: Session = Depends(get_db)) -> Generator:
+    """
+    Yield a primary database session for a handler that writes.
+
+    The response carries a cookie with the write time, so that the client's
+    reads during the read-your-writes window are served by the primary.
+
+    Yields:
+        Generator: SQLAlchemy database session bound to the primary
+    """
+    if settings.READ_YOUR_WRITES_SECONDS > 0:
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            f"{time.time():.3f}",
+            max_age=math.ceil(settings.READ_YOUR_WRITES_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+    yield db
+
+
+def wrote_recently(request: Request) -> bool:
+    """Return whether the client wrote within the read-your-writes window."""
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, ""))
+    except ValueError:
+        return False
+    return time.time() - last_write < settings.READ_YOUR_WRITES_SECONDS
+
+
+def get_read_sessions(request: Request) -> sessionmaker:
+    """
+    Return the session factory for a read-only handler.
+
+    For responses streamed after the handler returns, which must open their
+    own session. Sessions are bound to the read replica when one is configured,
+    unless the client wrote recently and must see its own writes.
+
+    Returns:
+        sessionmaker: Factory of SQLAlchemy database sessions
+    """
+    return SessionLocal if wrote_recently(request) else ReadSessionLocal
+
+
+def get_read_db(request: Request) -> Generator:
+    """
+    Create and yield a database session for a read-only handler.
+
+    The session is bound to the read replica when one is configured, unless
+    the client wrote recently and must see its own writes.
+
+    Yields:
+        Generator: SQLAlchemy database session
+    """
+    db = get_read_sessions(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _close_sessions(arguments: dict) -> None:
+    for value in arguments.values():
+        if isinstance(value, Session):
+            value.close()
+
+
+def release_sessions_after(endpoint: Callable) -> Callable:
+    """
+    Wrap an endpoint so the sessions it is given are closed when it returns.
+
+    Closing is idempotent, so the dependency closing the session again after
+    the response is sent is harmless. Handlers must not return objects that
+    still need the session, such as ORM instances with unloaded attributes.
+
+    Args:
+        endpoint: Path operation function
+
+    Returns:
+        Callable: Wrapper with the endpoint's signature
+    """
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _close_sessions(kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _close_sessions(kwargs)
+
+    return wrapper
+
+
+class SessionReleasingRoute(APIRoute):
+    """Route returning its handler's database connections before serialization."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, release_sessions_after(endpoint), **kwargs)
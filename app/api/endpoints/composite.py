@@ -0,0 +1,97 @@
+"""
+Composite monitor API endpoints module.
+
+This module provides FastAPI route handlers for composite monitors, whose
+states are rolled up from their members (see ``app.rollup``).
+"""
+
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import SessionReleasingRoute, get_write_db
+from app.ingest import publish_rollups
+from app.models.monitor import Monitor, monitor_tags
+from app.payload_cache import payload_cache
+from app.rollup import CycleError, create_composite
+from app.schemas.monitor import CompositeCreate, CompositeResponse
+from app.search import search_index
+from app.state_store import state_store
+from app.tag_cache import tag_cache
+
+router = APIRouter(
+    prefix="/monitor", tags=["monitor"], route_class=SessionReleasingRoute
+)
+
+
+@router.post("/composites/", response_model=CompositeResponse)
+def create_composite_monitor(
+    composite: CompositeCreate, db: Session = Depends(get_write_db)
+):
+    """
+    Create a composite monitor whose state is rolled up from its members.
+
+    Args:
+        composite: Composite creation data
+        db: Database session
+
+    Returns:
+        CompositeResponse: Created composite with its initial state
+
+    Raises:
+        HTTPException: If the monitor already exists, 404 if a member does
+            not exist, or 409 if the membership would form a cycle
+    """
+    existing_monitor = db.query(Monitor).filter(Monitor.name == composite.name).first()
+    if existing_monitor:
+        raise HTTPException(status_code=400, detail="Monitor already exists")
+    member_ids = set(composite.members)
+    found = set(db.scalars(select(Monitor.id).where(Monitor.id.in_(member_ids))))
+    if found != member_ids:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Member monitors not found: {sorted(member_ids - found)}",
+        )
+
+    tag_ids = tag_cache.get_or_create_ids(db, composite.tags)
+    member_tag_ids = tag_cache.get_or_create_ids(db, composite.member_tags)
+    new_monitor = Monitor(name=composite.name, composite=True)
+    db.add(new_monitor)
+    db.flush()
+    monitor_id = new_monitor.id
+    if tag_ids:
+        db.execute(
+            insert(monitor_tags),
+            [
+                {"monitor_id": monitor_id, "tag_id": tag_id}
+                for tag_id in tag_ids.values()
+            ],
+        )
+    try:
+        rollups = create_composite(
+            db,
+            monitor_id,
+            tag_ids.values(),
+            member_ids,
+            member_tag_ids.values(),
+            datetime.now(UTC),
+        )
+    except CycleError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    db.commit()
+
+    state_store.put_monitor(monitor_id, composite.name, tag_ids)
+    publish_rollups(rollups)
+    payload_cache.invalidate()
+    search_index.invalidate()
+    return CompositeResponse(
+        id=monitor_id,
+        name=composite.name,
+        tags=list(tag_ids),
+        members=sorted(member_ids),
+        member_tags=list(member_tag_ids),
+        state=rollups[0].state,
+    )
@@ -0,0 +1,122 @@
+"""
+Status history transfer API endpoints module.
+
+This module provides FastAPI route handlers that export a monitor's full
+status history, archived statuses included, and import status history in bulk.
+"""
+
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.dependencies import (
+    SessionReleasingRoute,
+    get_read_db,
+    get_read_sessions,
+    get_write_db,
+)
+from app.archive import export_statuses
+from app.importer import ImportFormat, import_statuses
+from app.schemas.monitor import ImportResponse
+from app.state_store import as_utc
+from app.statements import MONITOR_NAME
+
+router = APIRouter(
+    prefix="/monitor", tags=["monitor"], route_class=SessionReleasingRoute
+)
+
+# Size up to which an import's body is spooled in memory rather than to disk
+_IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+@router.get("/{monitor_id}/history/export/")
+def export_monitor_history(
+    monitor_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db: Session = Depends(get_read_db),
+    sessions: sessionmaker = Depends(get_read_sessions),
+):
+    """
+    Export a monitor's statuses as NDJSON, oldest first.
+
+    Statuses moved to the archive are included. Each line holds ``monitor``,
+    ``state``, ``message``, ``timestamp`` and ``flapping``.
+
+    Args:
+        monitor_id: ID of the monitor
+        start: Earliest status time to include
+        end: Status time to stop before
+        db: Database session
+        sessions: Session factory for streaming the response
+
+    Returns:
+        StreamingResponse: One JSON status per line
+
+    Raises:
+        HTTPException: If the monitor is not found
+    """
+    name = db.execute(MONITOR_NAME, {"monitor_id": monitor_id}).scalar()
+    if name is None:
+        raise HTTPException(status_code=404, detail="Monitor not found")
+
+    def lines():
+        with sessions() as export_db:
+            for row in export_statuses(export_db, monitor_id, start, end):
+                status = {
+                    "monitor": name,
+                    "state": row.state.value,
+                    "message": row.message,
+                    "timestamp": as_utc(row.timestamp).isoformat(),
+                    "flapping": row.flapping,
+                }
+                yield json.dumps(status) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/import/", response_model=ImportResponse)
+async def import_monitor_statuses(
+    request: Request,
+    import_format: ImportFormat = Query(default=ImportFormat.NDJSON, alias="format"),
+    create: bool = True,
+    db: Session = Depends(get_write_db),
+):
+    """
+    Import status history in bulk from the request body.
+
+    The body is spooled to a temporary file before the import starts, so a
+    slow upload holds no database connection. History exports can be imported
+    as they are. See ``app.importer``.
+
+    Args:
+        request: Request whose body holds the records
+        import_format: ``ndjson`` or ``csv``
+        create: Whether to create monitors that do not exist
+        db: Database session
+
+    Returns:
+        ImportResponse: Records read, written and rejected
+
+    Raises:
+        HTTPException: If the body is not UTF-8 text or is malformed CSV
+    """
+    with tempfile.SpooledTemporaryFile(max_size=_IMPORT_SPOOL_BYTES) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        lines = io.TextIOWrapper(body, encoding="utf-8", newline="")
+        try:
+            summary = await run_in_threadpool(
+                import_statuses, db, lines, import_format, create=create
+            )
+        except (csv.Error, UnicodeDecodeError) as error:
+            raise HTTPException(status_code=400, detail=str(error)) from error
+    return ImportResponse.model_validate(summary)
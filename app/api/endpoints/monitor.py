@@ -4,32 +4,99 @@ Monitor API endpoints module.
 This module provides FastAPI route handlers for the monitoring system.
 """
 
-from io import BytesIO
-from typing import List
+from datetime import UTC, datetime
+from typing import Callable, Dict, Iterable, List
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import Response
-from PIL import Image, ImageDraw
-from sqlalchemy import desc, func, and_
+from sqlalchemy import Row, Select, delete, func, insert, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.api.dependencies import get_db
-from app.models.monitor import Monitor, MonitorStatus, Tag, monitor_tags, MonitorState
+from app.api.dependencies import (
+    SessionReleasingRoute,
+    get_read_db,
+    get_write_db,
+    wrote_recently,
+)
+from app.archive import monitor_history
+from app.badges import (
+    Badge,
+    render_badge_grid_png,
+    render_badge_grid_svg,
+    render_badge_png,
+)
+from app.core.config import settings
+from app.ingest import RecordResult, publish_rollups, record_status
+from app.payload_cache import ALL_MONITORS, PayloadKey, payload_cache
+from app.ratelimit import limit_status_updates
+from app.rollup import attach, detach
+from app.search import search_index
+from app.state_store import MonitorRecord, state_store
+from app.statements import (
+    LATEST_STATUS,
+    LATEST_STATUSES,
+    MONITOR_NAME,
+    latest_statuses_with_tags,
+    tags_by_monitor,
+)
+from app.tag_cache import tag_cache
+from app.models.monitor import (
+    Monitor,
+    MonitorStatus,
+    monitor_tags,
+    MonitorState,
+    ThresholdRule,
+)
 from app.schemas.monitor import (
     MonitorCreate,
     MonitorStatusUpdate,
     MonitorStatusResponse,
+    StateTransition,
+    TransitionPage,
+)
+from app.transitions import (
+    Cursor,
+    decode_cursor,
+    encode_cursor,
+    monitor_transitions,
+    recent_transitions,
 )
 
-router = APIRouter(prefix="/monitor", tags=["monitor"])
+router = APIRouter(
+    prefix="/monitor", tags=["monitor"], route_class=SessionReleasingRoute
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _monitors_with_tag_ids(tag_ids: Iterable[int]) -> Select:
+    """Select the ids of monitors linked to all of the given tag ids."""
+    tag_ids = list(tag_ids)
+    return (
+        select(monitor_tags.c.monitor_id)
+        .where(monitor_tags.c.tag_id.in_(tag_ids))
+        .group_by(monitor_tags.c.monitor_id)
+        .having(func.count() == len(tag_ids))  # pylint: disable=not-callable
+    )
+
+
+def _record_response(record: MonitorRecord) -> MonitorStatusResponse:
+    """Build a status response from an in-memory state store record."""
+    return MonitorStatusResponse(
+        id=record.id,
+        name=record.name,
+        state=record.state,
+        message=record.message,
+        timestamp=record.timestamp,
+        flapping=record.flapping,
+        tags=list(record.tags),
+    )
+
+
 @router.post("/", response_model=MonitorCreate)
-def create_monitor(monitor: MonitorCreate, db: Session = Depends(get_db)):
+def create_monitor(monitor: MonitorCreate, db: Session = Depends(get_write_db)):
     """
     Create a new monitor with optional tags.
 
@@ -47,70 +114,167 @@ def create_monitor(monitor: MonitorCreate, db: Session = Depends(get_db)):
     if existing_monitor:
         raise HTTPException(status_code=400, detail="Monitor already exists")
 
-    new_monitor = Monitor(name=monitor.name)
-
-    # Add tags
-    for tag_name in monitor.tags:
-        tag = db.query(Tag).filter(Tag.name == tag_name).first()
-        if not tag:
-            tag = Tag(name=tag_name)
-            db.add(tag)
-        new_monitor.tags.append(tag)
+    tag_ids = tag_cache.get_or_create_ids(db, monitor.tags)
 
+    new_monitor = Monitor(name=monitor.name)
     db.add(new_monitor)
-    db.commit()
-    db.refresh(new_monitor)
+    db.flush()
+
+    # Link tags by id, without loading Tag objects
+    if tag_ids:
+        db.execute(
+            insert(monitor_tags),
+            [
+                {"monitor_id": new_monitor.id, "tag_id": tag_id}
+                for tag_id in tag_ids.values()
+            ],
+        )
 
     # Create initial status
-    initial_status = MonitorStatus(monitor_id=new_monitor.id, state=MonitorState.NORMAL)
+    created_at = datetime.now(UTC)
+    initial_status = MonitorStatus(
+        monitor_id=new_monitor.id,
+        state=MonitorState.NORMAL,
+        timestamp=created_at,
+    )
     db.add(initial_status)
+    db.flush()
+    # Read the ids before commit expires them, which would take a connection
+    # out of the pool again to reload them
+    monitor_id, status_id = new_monitor.id, initial_status.id
+    rollups = attach(db, monitor_id, tag_ids.values(), MonitorState.NORMAL, created_at)
     db.commit()
 
-    # Return the created monitor with its ID
-    return MonitorCreate(
-        id=new_monitor.id,
-        name=new_monitor.name,
-        tags=[tag.name for tag in new_monitor.tags],
+    state_store.put_monitor(monitor_id, monitor.name, tag_ids)
+    state_store.apply_status(
+        monitor_id, MonitorState.NORMAL, None, created_at, status_id
     )
+    publish_rollups(rollups)
+    payload_cache.invalidate()
+    search_index.invalidate()
+
+    # Return the created monitor with its ID
+    return MonitorCreate(id=monitor_id, name=monitor.name, tags=list(tag_ids))
 
 
-@router.post("/{monitor_id}/state/")
+@router.post("/{monitor_id}/state/", dependencies=[Depends(limit_status_updates)])
 def set_monitor_state(
-    monitor_id: int, status: MonitorStatusUpdate, db: Session = Depends(get_db)
+    monitor_id: int,
+    status: MonitorStatusUpdate,
+    db: Session = Depends(get_write_db),
 ):
     """
     Set the state of a specific monitor.
 
+    Retrying an update with the same idempotency key succeeds without writing
+    a second status; the response then has ``duplicate`` set. While the
+    monitor is flapping and flap suppression is on, changes of state are not
+    written; the response then has ``suppressed`` set. With threshold rules
+    enabled, the state of a monitor that has a rule is derived from its
+    samples and cannot be set.
+
     Args:
         monitor_id: ID of the monitor to update
         status: New status data
         db: Database session
 
     Returns:
-        dict: Success message
+        dict: Success message and whether the update was a duplicate or was
+            suppressed
 
     Raises:
-        HTTPException: If monitor not found
+        HTTPException: If monitor not found, 409 for a composite monitor or a
+            monitor with a threshold rule, or 429 if the client or monitor
+            exceeds its rate limit
     """
     monitor = db.query(Monitor).filter(Monitor.id == monitor_id).first()
     if not monitor:
         raise HTTPException(status_code=404, detail="Monitor not found")
+    if monitor.composite:
+        raise HTTPException(
+            status_code=409, detail="Composite monitor states are rolled up"
+        )
+    if settings.RULES_ENABLED and db.scalar(
+        select(ThresholdRule.id).where(ThresholdRule.monitor_id == monitor.id)
+    ):
+        raise HTTPException(
+            status_code=409, detail="Monitor states are derived from its rule"
+        )
 
-    new_status = MonitorStatus(
-        monitor_id=monitor.id, state=status.state, message=status.message
+    result = record_status(
+        db,
+        monitor.id,
+        status.state,
+        status.message,
+        timestamp=status.timestamp,
+        idempotency_key=status.idempotency_key,
     )
-    db.add(new_status)
-    db.commit()
-    return {"message": "State updated successfully"}
+    return {
+        "message": "State updated successfully",
+        "duplicate": result is RecordResult.DUPLICATE,
+        "suppressed": result is RecordResult.SUPPRESSED,
+    }
+
+
+def latest_status(db: Session, monitor_id: int) -> Row:
+    """
+    Get a monitor's name and latest status.
+
+    Args:
+        db: Database session
+        monitor_id: ID of the monitor
+
+    Returns:
+        Row: Name, state, message and timestamp
+
+    Raises:
+        HTTPException: If monitor or state not found
+    """
+    params = {"monitor_id": monitor_id}
+    latest = db.execute(LATEST_STATUS, params).first()
+    if latest is None:
+        if db.execute(MONITOR_NAME, params).first() is None:
+            raise HTTPException(status_code=404, detail="Monitor not found")
+        raise HTTPException(status_code=404, detail="No state found for this monitor")
+    return latest
+
+
+def _status_responses(rows: Iterable[Row], tags: Dict[int, List[str]]):
+    """Build status responses from latest status rows and tags by monitor id."""
+    return [
+        MonitorStatusResponse(
+            id=row.id,
+            name=row.name,
+            state=row.state,
+            message=row.message,
+            timestamp=row.timestamp,
+            flapping=row.flapping,
+            tags=tags.get(row.id, []),
+        )
+        for row in rows
+    ]
+
+
+def _use_state_store(request: Request) -> bool:
+    """
+    Return whether a current-state read can be answered from the state store.
+
+    The store learns about other workers' writes only when it syncs, so it is
+    bypassed while the client is in its read-your-writes window.
+    """
+    return state_store.loaded and not wrote_recently(request)
 
 
 @router.get("/{monitor_id}/state/", response_model=MonitorStatusResponse)
-def get_monitor_state(monitor_id: int, db: Session = Depends(get_db)):
+def get_monitor_state(
+    monitor_id: int, request: Request, db: Session = Depends(get_read_db)
+):
     """
     Get the current state of a specific monitor.
 
     Args:
         monitor_id: ID of the monitor to query
+        request: Incoming request
         db: Database session
 
     Returns:
@@ -119,93 +283,78 @@ def get_monitor_state(monitor_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If monitor or state not found
     """
-    monitor = db.query(Monitor).filter(Monitor.id == monitor_id).first()
-    if not monitor:
-        raise HTTPException(status_code=404, detail="Monitor not found")
+    if _use_state_store(request):
+        record = state_store.get(monitor_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Monitor not found")
+        return _record_response(record)
 
-    latest_status = (
-        db.query(MonitorStatus)
-        .filter(MonitorStatus.monitor_id == monitor_id)
-        .order_by(desc(MonitorStatus.timestamp))
-        .first()
+    latest = latest_status(db, monitor_id)
+    return MonitorStatusResponse(
+        id=monitor_id,
+        name=latest.name,
+        state=latest.state,
+        message=latest.message,
+        timestamp=latest.timestamp,
+        flapping=latest.flapping,
+        tags=tags_by_monitor(db, [monitor_id]).get(monitor_id, []),
     )
 
-    if not latest_status:
-        raise HTTPException(status_code=404, detail="No state found for this monitor")
 
-    return MonitorStatusResponse(
-        id=monitor_id,
-        name=monitor.name,
-        state=latest_status.state,
-        message=latest_status.message,
-        timestamp=latest_status.timestamp,
-        tags=[tag.name for tag in monitor.tags],
+def _serve_statuses(
+    request: Request,
+    key: PayloadKey,
+    build: Callable[[], List[MonitorStatusResponse]],
+):
+    """
+    Serve a status list from the encoded payload cache.
+
+    The cache is bypassed while the client is in its read-your-writes window,
+    as entries can be up to ``PAYLOAD_CACHE_TTL_SECONDS`` behind other
+    workers' writes.
+
+    Args:
+        request: Incoming request
+        key: Payload cache key of the list
+        build: Returns the statuses when the payload must be rebuilt
+
+    Returns:
+        The statuses, or a response with the encoded payload and its ETag
+    """
+    if not settings.PAYLOAD_CACHE_ENABLED or wrote_recently(request):
+        return build()
+
+    payload = payload_cache.get(key, build)
+    headers = {"ETag": payload.etag}
+    if request.headers.get("if-none-match") == payload.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=payload.body, media_type="application/json", headers=headers
     )
 
 
-@router.get("/statuses/", response_model=List[MonitorStatusResponse])
-def get_all_monitor_states(db: Session = Depends(get_db)):
+def _all_statuses(request: Request, db: Session) -> List[MonitorStatusResponse]:
     """
-    Get the current state of all monitors.
+    Build the current state of all monitors, newest status first.
 
     Args:
+        request: Incoming request
         db: Database session
 
     Returns:
         List[MonitorStatusResponse]: List of monitor status data
-    """
-    try:
-        # Subquery to get the latest status for each monitor
-        latest_status = (
-            db.query(
-                MonitorStatus.monitor_id,
-                func.max(MonitorStatus.timestamp).label("max_timestamp"),
-            )
-            .group_by(MonitorStatus.monitor_id)
-            .subquery()
-        )
 
-        # Main query joining with the subquery
-        latest_states = (
-            db.query(
-                Monitor.id,
-                Monitor.name,
-                MonitorStatus.state,
-                MonitorStatus.message,
-                MonitorStatus.timestamp,
-            )
-            .join(MonitorStatus)
-            .join(
-                latest_status,
-                and_(
-                    Monitor.id == latest_status.c.monitor_id,
-                    MonitorStatus.timestamp == latest_status.c.max_timestamp,
-                ),
-            )
-            .order_by(desc(MonitorStatus.timestamp))
-            .all()
-        )
+    Raises:
+        HTTPException: If the database query fails
+    """
+    if _use_state_store(request):
+        return [_record_response(record) for record in state_store.latest()]
 
-        if not latest_states:
+    try:
+        rows = db.execute(LATEST_STATUSES).all()
+        if not rows:
             return []
-
-        result = []
-        for monitor_id, name, state, message, timestamp in latest_states:
-            monitor = db.query(Monitor).filter(Monitor.id == monitor_id).first()
-            tags = [tag.name for tag in monitor.tags] if monitor else []
-
-            result.append(
-                MonitorStatusResponse(
-                    id=monitor_id,
-                    name=name,
-                    state=state,
-                    message=message,
-                    timestamp=timestamp,
-                    tags=tags,
-                )
-            )
-
-        return result
+        return _status_responses(rows, tags_by_monitor(db))
 
     except SQLAlchemyError as e:
         logger.error("Error retrieving monitor states: %s", str(e))
@@ -214,12 +363,69 @@ def get_all_monitor_states(db: Session = Depends(get_db)):
         ) from e
 
 
+@router.get("/statuses/", response_model=List[MonitorStatusResponse])
+def get_all_monitor_states(request: Request, db: Session = Depends(get_read_db)):
+    """
+    Get the current state of all monitors.
+
+    The encoded list is cached and carries an ETag; a request whose
+    If-None-Match matches it gets a 304 without a body.
+
+    Args:
+        request: Incoming request
+        db: Database session
+
+    Returns:
+        List[MonitorStatusResponse]: List of monitor status data
+    """
+    return _serve_statuses(request, ALL_MONITORS, lambda: _all_statuses(request, db))
+
+
+def _statuses_with_tags(
+    request: Request, db: Session, tags: List[str]
+) -> List[MonitorStatusResponse]:
+    """
+    Build the current state of monitors that have all of the given tags.
+
+    Args:
+        request: Incoming request
+        db: Database session
+        tags: Tags to filter by
+
+    Returns:
+        List[MonitorStatusResponse]: List of monitor statuses, newest first
+    """
+    if _use_state_store(request):
+        return [
+            _record_response(record)
+            for record in state_store.latest(state_store.ids_with_tags(tags))
+        ]
+
+    # A monitor cannot have a tag that does not exist
+    tag_ids = tag_cache.get_ids(db, tags)
+    if len(tag_ids) < len(set(tags)):
+        return []
+
+    rows = latest_statuses_with_tags(db, tag_ids.values())
+    if not rows:
+        return []
+    return _status_responses(rows, tags_by_monitor(db, [row.id for row in rows]))
+
+
 @router.get("/statuses/by-tags/", response_model=List[MonitorStatusResponse])
-def get_monitors_by_tags(tags: List[str] = Query(None), db: Session = Depends(get_db)):
+def get_monitors_by_tags(
+    request: Request,
+    tags: List[str] = Query(None),
+    db: Session = Depends(get_read_db),
+):
     """
     Get monitors filtered by tags.
 
+    Encoded lists of recently requested tag sets are cached like the full
+    status list.
+
     Args:
+        request: Incoming request
         tags: List of tags to filter by (monitors must have all specified tags)
         db: Database session
 
@@ -229,117 +435,120 @@ def get_monitors_by_tags(tags: List[str] = Query(None), db: Session = Depends(ge
     if not tags:
         return []
 
-    # Subquery to find monitors that have all specified tags
-    tag_count = len(tags)
-    monitors_with_all_tags = (
-        db.query(Monitor.id)
-        .join(monitor_tags)
-        .join(Tag)
-        .filter(Tag.name.in_(tags))
-        .group_by(Monitor.id)
-        .having(func.count(Tag.id) == tag_count)  # pylint: disable=not-callable
+    return _serve_statuses(
+        request, frozenset(tags), lambda: _statuses_with_tags(request, db, tags)
     )
 
-    # Subquery to get the latest status for each monitor
-    latest_status = (
-        db.query(
-            MonitorStatus.monitor_id,
-            func.max(MonitorStatus.timestamp).label("max_timestamp"),
-        )
-        .group_by(MonitorStatus.monitor_id)
-        .subquery()
-    )
 
-    # Main query to get monitor details with latest status
+# Most badges rendered into one status wall image
+MAX_WALL_BADGES = 1000
+
+
+def _wall_badges(
+    db: Session, ids: List[int] | None, tags: List[str] | None
+) -> List[Badge]:
+    """
+    Get the name and latest state of the selected monitors in one query.
+
+    Args:
+        db: Database session
+        ids: Monitor ids to include
+        tags: Include monitors that have all of these tags
+
+    Returns:
+        List[Badge]: Names and states ordered by monitor name
+
+    Raises:
+        HTTPException: If neither ids nor tags are given
+    """
+    if not ids and not tags:
+        raise HTTPException(status_code=400, detail="Pass at least one id or tag")
+
+    latest = LATEST_STATUSES.order_by(None).subquery()
     query = (
-        db.query(
-            Monitor.id,
-            Monitor.name,
-            MonitorStatus.state,
-            MonitorStatus.message,
-            MonitorStatus.timestamp,
-        )
-        .join(MonitorStatus)
-        .join(
-            latest_status,
-            and_(
-                Monitor.id == latest_status.c.monitor_id,
-                MonitorStatus.timestamp == latest_status.c.max_timestamp,
-            ),
-        )
-        .filter(Monitor.id.in_(monitors_with_all_tags))
-        .order_by(desc(MonitorStatus.timestamp))
+        select(latest.c.name, latest.c.state)
+        .order_by(latest.c.name)
+        .limit(MAX_WALL_BADGES)
     )
+    if ids:
+        query = query.where(latest.c.id.in_(ids))
+    if tags:
+        tag_ids = tag_cache.get_ids(db, tags)
+        if len(tag_ids) < len(set(tags)):
+            return []
+        query = query.where(latest.c.id.in_(_monitors_with_tag_ids(tag_ids.values())))
 
-    monitors = query.all()
-    result = []
-
-    for monitor_id, name, state, message, timestamp in monitors:
-        monitor = db.query(Monitor).filter(Monitor.id == monitor_id).first()
-        tags = [tag.name for tag in monitor.tags] if monitor else []
+    return [(name, state) for name, state in db.execute(query)]
 
-        result.append(
-            MonitorStatusResponse(
-                id=monitor_id,
-                name=name,
-                state=state,
-                message=message,
-                timestamp=timestamp,
-                tags=tags,
-            )
-        )
 
-    return result
+@router.get("/badges.svg")
+def get_badge_wall_svg(
+    ids: List[int] = Query(None, alias="id"),
+    tags: List[str] = Query(None, alias="tag"),
+    columns: int = Query(default=5, ge=1, le=50),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Get the state badges of many monitors as one SVG image.
 
+    Args:
+        ids: Monitor ids to include
+        tags: Include monitors that have all of these tags
+        columns: Badges per row
+        db: Database session
 
-@router.get("/{monitor_id}/state/badge.png")
-def get_monitor_state_badge(monitor_id: int, db: Session = Depends(get_db)):
-    """Get a monitor's state as a PNG badge."""
-    monitor = db.query(Monitor).filter(Monitor.id == monitor_id).first()
-    if not monitor:
-        raise HTTPException(status_code=404, detail="Monitor not found")
+    Returns:
+        Response: SVG grid of badges ordered by monitor name
 
-    latest_status = (
-        db.query(MonitorStatus)
-        .filter(MonitorStatus.monitor_id == monitor_id)
-        .order_by(desc(MonitorStatus.timestamp))
-        .first()
+    Raises:
+        HTTPException: If no id or tag is given, or no monitor matches
+    """
+    badges = _wall_badges(db, ids, tags)
+    if not badges:
+        raise HTTPException(status_code=404, detail="No monitors found")
+    return Response(
+        content=render_badge_grid_svg(badges, columns), media_type="image/svg+xml"
     )
 
-    if not latest_status:
-        raise HTTPException(status_code=404, detail="No state found for this monitor")
-
-    # Define colors for different states
-    state_colors = {
-        MonitorState.NORMAL: "#4CAF50",  # Green
-        MonitorState.WARNING: "#FFC107",  # Yellow
-        MonitorState.CRITICAL: "#F44336",  # Red
-        MonitorState.MISSING_DATA: "#9E9E9E",  # Gray
-    }
 
-    # Create image
-    badge_height = 20
-    name_width = 100
-    state_width = 80
-    total_width = name_width + state_width
+@router.get("/badges.png")
+def get_badge_wall_png(
+    ids: List[int] = Query(None, alias="id"),
+    tags: List[str] = Query(None, alias="tag"),
+    columns: int = Query(default=5, ge=1, le=50),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Get the state badges of many monitors as one PNG image.
 
-    img = Image.new("RGB", (total_width, badge_height), color="#555555")
-    draw = ImageDraw.Draw(img)
+    Args:
+        ids: Monitor ids to include
+        tags: Include monitors that have all of these tags
+        columns: Badges per row
+        db: Database session
 
-    # Draw state background
-    state_color = state_colors.get(latest_status.state, "#9E9E9E")
-    draw.rectangle([(name_width, 0), (total_width, badge_height)], fill=state_color)
+    Returns:
+        Response: PNG grid of badges ordered by monitor name
 
-    # Draw text
-    draw.text((5, 4), monitor.name[:12], fill="white")
-    draw.text((name_width + 5, 4), latest_status.state.value, fill="white")
+    Raises:
+        HTTPException: If no id or tag is given, or no monitor matches
+    """
+    badges = _wall_badges(db, ids, tags)
+    if not badges:
+        raise HTTPException(status_code=404, detail="No monitors found")
+    return Response(
+        content=render_badge_grid_png(badges, columns), media_type="image/png"
+    )
 
-    # Convert image to bytes
-    img_byte_arr = BytesIO()
-    img.save(img_byte_arr, format="PNG")
-    img_byte_arr.seek(0)
 
-    return Response(content=img_byte_arr.getvalue(), media_type="image/png")
+@router.get("/{monitor_id}/state/badge.png")
+def get_monitor_state_badge(monitor_id: int, db: Session = Depends(get_read_db)):
+    """Get a monitor's state as a PNG badge."""
+    latest = latest_status(db, monitor_id)
+    return Response(
+        content=render_badge_png(latest.name, latest.state),
+        media_type="image/png",
+    )
 
 
 @router.get("/{monitor_id}/history/", response_model=List[MonitorStatusResponse])
@@ -347,7 +556,7 @@ def get_monitor_history(
     monitor_id: int,
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Get paginated history of monitor states.
@@ -361,37 +570,184 @@ def get_monitor_history(
     Returns:
         List[MonitorStatusResponse]: List of historical status records
     """
-    monitor = db.query(Monitor).filter(Monitor.id == monitor_id).first()
-    if not monitor:
+    name = db.execute(MONITOR_NAME, {"monitor_id": monitor_id}).scalar()
+    if name is None:
         raise HTTPException(status_code=404, detail="Monitor not found")
 
-    statuses = (
-        db.query(MonitorStatus)
-        .filter(MonitorStatus.monitor_id == monitor_id)
-        .order_by(desc(MonitorStatus.timestamp))
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-
+    statuses = monitor_history(db, monitor_id, skip, limit)
+    tags = tags_by_monitor(db, [monitor_id]).get(monitor_id, [])
     return [
         MonitorStatusResponse(
             id=monitor_id,
-            name=monitor.name,
+            name=name,
             state=status.state,
             message=status.message,
             timestamp=status.timestamp,
-            tags=[tag.name for tag in monitor.tags],
+            flapping=status.flapping,
+            tags=tags,
         )
         for status in statuses
     ]
 
 
+def _parse_cursor(cursor: str | None) -> Cursor | None:
+    """Decode a transitions cursor from a query parameter."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+def _next_cursor(rows: list, limit: int) -> str | None:
+    """Return the cursor of the next page, or None after the last page."""
+    if len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+
+@router.get("/transitions/", response_model=TransitionPage)
+def get_recent_transitions(
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Get the latest state transitions across all monitors, newest first.
+
+    Args:
+        limit: Maximum number of transitions to return
+        cursor: ``next_cursor`` of the previous page
+        db: Database session
+
+    Returns:
+        TransitionPage: Transitions and the cursor of the next page
+
+    Raises:
+        HTTPException: If the cursor is invalid
+    """
+    rows = recent_transitions(db, limit, _parse_cursor(cursor))
+    return TransitionPage(
+        items=[
+            StateTransition(
+                id=row.monitor_id,
+                name=row.name,
+                state=row.state,
+                previous_state=row.previous_state,
+                message=row.message,
+                timestamp=row.timestamp,
+            )
+            for row in rows
+        ],
+        next_cursor=_next_cursor(rows, limit),
+    )
+
+
+@router.get("/{monitor_id}/transitions/", response_model=TransitionPage)
+def get_monitor_transitions(
+    monitor_id: int,
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Get the state transitions of a monitor, newest first.
+
+    Only statuses whose state differs from the previous status are returned,
+    with the time the monitor spent in each state.
+
+    Args:
+        monitor_id: ID of the monitor
+        limit: Maximum number of transitions to return
+        cursor: ``next_cursor`` of the previous page
+        db: Database session
+
+    Returns:
+        TransitionPage: Transitions and the cursor of the next page
+
+    Raises:
+        HTTPException: If the monitor is not found or the cursor is invalid
+    """
+    monitor = db.query(Monitor).filter(Monitor.id == monitor_id).first()
+    if not monitor:
+        raise HTTPException(status_code=404, detail="Monitor not found")
+
+    before = _parse_cursor(cursor)
+    rows = monitor_transitions(db, monitor_id, limit, before)
+
+    # Each state lasted until the next (newer) transition; the first one on a
+    # later page ended at the last transition of the page before
+    ended_at = before[0] if before else None
+    items = []
+    for row in rows:
+        items.append(
+            StateTransition(
+                id=monitor_id,
+                name=monitor.name,
+                state=row.state,
+                previous_state=row.previous_state,
+                message=row.message,
+                timestamp=row.timestamp,
+                ended_at=ended_at,
+                duration_seconds=(
+                    (ended_at - row.timestamp).total_seconds() if ended_at else None
+                ),
+            )
+        )
+        ended_at = row.timestamp
+
+    return TransitionPage(items=items, next_cursor=_next_cursor(rows, limit))
+
+
+@router.delete("/")
+def delete_monitors_by_tags(
+    tags: List[str] = Query(..., alias="tag"),
+    db: Session = Depends(get_write_db),
+):
+    """
+    Delete every monitor that has all of the given tags.
+
+    The monitors, their statuses and tag associations are removed with a single
+    DELETE in one transaction; dependent rows go through ON DELETE CASCADE.
+    Composites the monitors were members of are rolled up without them.
+
+    Args:
+        tags: Tags a monitor must all have to be deleted
+        db: Database session
+
+    Returns:
+        dict: Success message and number of deleted monitors
+    """
+    tag_ids = tag_cache.get_ids(db, tags)
+    if len(tag_ids) < len(set(tags)):
+        return {"message": "Monitors deleted successfully", "deleted": 0}
+
+    monitors_with_all_tags = _monitors_with_tag_ids(tag_ids.values())
+    rollups = detach(db, db.scalars(monitors_with_all_tags), datetime.now(UTC))
+    result = db.execute(
+        delete(Monitor)
+        .where(Monitor.id.in_(monitors_with_all_tags))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    state_store.remove(state_store.ids_with_tags(tags))
+    publish_rollups(rollups)
+    payload_cache.invalidate()
+    search_index.invalidate()
+
+    return {"message": "Monitors deleted successfully", "deleted": result.rowcount}
+
+
 @router.delete("/{monitor_id}/")
-def delete_monitor(monitor_id: int, db: Session = Depends(get_db)):
+def delete_monitor(monitor_id: int, db: Session = Depends(get_write_db)):
     """
     Delete a monitor and all its associated data.
 
+    Statuses and tag associations are removed by ON DELETE CASCADE, so this is
+    a single DELETE statement, after the monitor is taken out of the rollups of
+    any composites it is a member of.
+
     Args:
         monitor_id: ID of the monitor to delete
         db: Database session
@@ -402,15 +758,19 @@ def delete_monitor(monitor_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If monitor not found
     """
-    monitor = db.query(Monitor).filter(Monitor.id == monitor_id).first()
-    if not monitor:
+    rollups = detach(db, [monitor_id], datetime.now(UTC))
+    result = db.execute(
+        delete(Monitor)
+        .where(Monitor.id == monitor_id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Monitor not found")
-
-    # Delete associated statuses first
-    db.query(MonitorStatus).filter(MonitorStatus.monitor_id == monitor_id).delete()
-
-    # Delete the monitor (this will also handle the monitor_tags associations)
-    db.delete(monitor)
     db.commit()
+    state_store.remove([monitor_id])
+    publish_rollups(rollups)
+    payload_cache.invalidate()
+    search_index.invalidate()
 
     return {"message": "Monitor deleted successfully"}
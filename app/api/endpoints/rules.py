@@ -0,0 +1,191 @@
+"""
+Threshold rule API endpoints module.
+
+This module provides FastAPI route handlers for metric samples and the
+threshold rules that derive monitor states from them.
+"""
+
+import time
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import SessionReleasingRoute, get_read_db, get_write_db
+from app.api.endpoints.monitor import latest_status
+from app.core.config import settings
+from app.models.monitor import Monitor, ThresholdRule
+from app.rules import Rule, Sample, rule_engine
+from app.schemas.monitor import (
+    MetricSample,
+    MonitorSample,
+    SamplesAccepted,
+    ThresholdRuleResponse,
+    ThresholdRuleUpdate,
+)
+
+router = APIRouter(
+    prefix="/monitor", tags=["monitor"], route_class=SessionReleasingRoute
+)
+
+
+def _require_rules() -> None:
+    """Reject samples when threshold rules are disabled."""
+    if not settings.RULES_ENABLED:
+        raise HTTPException(status_code=503, detail="Threshold rules are disabled")
+
+
+def _take_samples(samples: List[Sample]) -> SamplesAccepted:
+    """Queue samples for rule evaluation and count the ignored ones."""
+    accepted = rule_engine.add_samples(samples)
+    return SamplesAccepted(accepted=accepted, ignored=len(samples) - accepted)
+
+
+def _sample_time(sample: MetricSample, now: float) -> float:
+    return sample.timestamp.timestamp() if sample.timestamp else now
+
+
+@router.post("/samples/", response_model=SamplesAccepted, status_code=202)
+def add_samples(samples: List[MonitorSample]):
+    """
+    Queue metric samples of many monitors for threshold rule evaluation.
+
+    Samples are evaluated in batches after the response, without touching the
+    database on the request path; a status is written when a monitor's derived
+    state changes.
+
+    Args:
+        samples: Samples with the monitor each one belongs to
+
+    Returns:
+        SamplesAccepted: Number of samples queued and ignored; samples of
+            monitors without a rule are ignored
+
+    Raises:
+        HTTPException: 503 if threshold rules are disabled
+    """
+    _require_rules()
+    now = time.time()
+    return _take_samples(
+        [
+            (sample.monitor_id, _sample_time(sample, now), sample.value)
+            for sample in samples
+        ]
+    )
+
+
+@router.post("/{monitor_id}/samples/", response_model=SamplesAccepted, status_code=202)
+def add_monitor_samples(monitor_id: int, samples: List[MetricSample]):
+    """
+    Queue metric samples of a monitor for threshold rule evaluation.
+
+    Args:
+        monitor_id: ID of the monitor
+        samples: Samples of the monitor
+
+    Returns:
+        SamplesAccepted: Number of samples queued and ignored; all samples are
+            ignored if the monitor has no rule
+
+    Raises:
+        HTTPException: 503 if threshold rules are disabled
+    """
+    _require_rules()
+    now = time.time()
+    return _take_samples(
+        [(monitor_id, _sample_time(sample, now), sample.value) for sample in samples]
+    )
+
+
+@router.put("/{monitor_id}/rule/", response_model=ThresholdRuleResponse)
+def put_monitor_rule(
+    monitor_id: int,
+    rule: ThresholdRuleUpdate,
+    db: Session = Depends(get_write_db),
+):
+    """
+    Create or replace the threshold rule of a monitor.
+
+    Samples already taken are kept and evaluated against the new thresholds.
+    Other processes pick the rule up within ``RULES_RELOAD_SECONDS``.
+
+    Args:
+        monitor_id: ID of the monitor
+        rule: Thresholds, window and aggregate
+        db: Database session
+
+    Returns:
+        ThresholdRuleResponse: The monitor's rule
+
+    Raises:
+        HTTPException: If the monitor is not found, or 409 for a composite
+            monitor
+    """
+    current_state = latest_status(db, monitor_id).state
+    if db.scalar(select(Monitor.composite).where(Monitor.id == monitor_id)):
+        raise HTTPException(
+            status_code=409, detail="Composite monitor states are rolled up"
+        )
+    existing = (
+        db.query(ThresholdRule).filter(ThresholdRule.monitor_id == monitor_id).first()
+    )
+    if existing is None:
+        existing = ThresholdRule(monitor_id=monitor_id)
+        db.add(existing)
+    for field, value in rule.model_dump().items():
+        setattr(existing, field, value)
+    db.commit()
+
+    rule_engine.put_rule(monitor_id, Rule.from_attributes(rule), current_state)
+    return ThresholdRuleResponse(monitor_id=monitor_id, **rule.model_dump())
+
+
+@router.get("/{monitor_id}/rule/", response_model=ThresholdRuleResponse)
+def get_monitor_rule(monitor_id: int, db: Session = Depends(get_read_db)):
+    """
+    Get the threshold rule of a monitor.
+
+    Args:
+        monitor_id: ID of the monitor
+        db: Database session
+
+    Returns:
+        ThresholdRuleResponse: The monitor's rule
+
+    Raises:
+        HTTPException: If the monitor has no rule
+    """
+    rule = (
+        db.query(ThresholdRule).filter(ThresholdRule.monitor_id == monitor_id).first()
+    )
+    if rule is None:
+        raise HTTPException(status_code=404, detail="No rule for this monitor")
+    return ThresholdRuleResponse.model_validate(rule)
+
+
+@router.delete("/{monitor_id}/rule/")
+def delete_monitor_rule(monitor_id: int, db: Session = Depends(get_write_db)):
+    """
+    Delete the threshold rule of a monitor.
+
+    The monitor keeps its current state and accepts states posted directly.
+
+    Args:
+        monitor_id: ID of the monitor
+        db: Database session
+
+    Returns:
+        dict: Success message
+
+    Raises:
+        HTTPException: If the monitor has no rule
+    """
+    deleted = db.execute(
+        delete(ThresholdRule).where(ThresholdRule.monitor_id == monitor_id)
+    ).rowcount
+    db.commit()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="No rule for this monitor")
+    rule_engine.remove([monitor_id])
+    return {"message": "Rule deleted successfully"}
@@ -0,0 +1,68 @@
+"""
+Search API endpoints module.
+
+This module provides FastAPI route handlers for searching monitor and tag
+names (see ``app.search``).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import SessionReleasingRoute, get_read_db
+from app.schemas.monitor import MonitorResponse, MonitorSearchPage
+from app.search import SearchMode, decode_name_cursor, encode_name_cursor, search
+from app.statements import tags_by_monitor
+
+router = APIRouter(
+    prefix="/monitor", tags=["monitor"], route_class=SessionReleasingRoute
+)
+
+
+@router.get("/search/", response_model=MonitorSearchPage)
+def search_monitors(
+    q: str = Query(min_length=1, max_length=256),
+    mode: SearchMode = SearchMode.SUBSTRING,
+    limit: int = Query(default=50, ge=1, le=1000),
+    cursor: str | None = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Search monitor and tag names, monitors in name order.
+
+    Matching is case-sensitive. In ``glob`` mode, ``*`` matches any characters
+    and ``?`` one character, and the whole name must match.
+
+    Args:
+        q: Text to match
+        mode: ``prefix``, ``substring`` or ``glob``
+        limit: Maximum number of monitors, and of tags, to return
+        cursor: ``next_cursor`` of the previous page
+        db: Database session
+
+    Returns:
+        MonitorSearchPage: Matching monitors with their tags, matching tag
+            names, and the cursor of the next page
+
+    Raises:
+        HTTPException: If the cursor is invalid
+    """
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_name_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from e
+    result = search(db, mode, q, after, limit)
+    tags = tags_by_monitor(db, [monitor_id for monitor_id, _ in result.monitors])
+    return MonitorSearchPage(
+        monitors=[
+            MonitorResponse(id=monitor_id, name=name, tags=tags.get(monitor_id, []))
+            for monitor_id, name in result.monitors
+        ],
+        tags=result.tags,
+        next_cursor=(
+            encode_name_cursor(result.monitors[-1][1])
+            if len(result.monitors) == limit
+            else None
+        ),
+    )
@@ -0,0 +1,143 @@
+"""
+Webhook API endpoints module.
+
+This module provides FastAPI route handlers for webhook subscriptions and the
+events that could not be delivered.
+"""
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import SessionReleasingRoute, get_read_db, get_write_db
+from app.core.config import settings
+from app.models.monitor import Monitor, Tag, WebhookDeadLetter, WebhookSubscription
+from app.schemas.webhook import DeadLetterResponse, WebhookCreate, WebhookResponse
+from app.tag_cache import tag_cache
+
+router = APIRouter(
+    prefix="/webhooks", tags=["webhooks"], route_class=SessionReleasingRoute
+)
+
+
+def _require_webhooks() -> None:
+    """Reject webhook requests unless webhooks are enabled."""
+    if not settings.WEBHOOKS_ENABLED:
+        raise HTTPException(status_code=503, detail="Webhooks are disabled")
+
+
+@router.post("/", response_model=WebhookResponse)
+def create_webhook(webhook: WebhookCreate, db: Session = Depends(get_write_db)):
+    """
+    Subscribe an endpoint to state transitions.
+
+    Events are POSTed as ``{"events": [...]}`` batches once the transition's
+    status is committed.
+
+    Args:
+        webhook: Endpoint URL and filters
+        db: Database session
+
+    Returns:
+        WebhookResponse: Created subscription
+
+    Raises:
+        HTTPException: 404 if the monitor does not exist, or 503 if webhooks
+            are disabled
+    """
+    _require_webhooks()
+    if webhook.monitor_id is not None and db.get(Monitor, webhook.monitor_id) is None:
+        raise HTTPException(status_code=404, detail="Monitor not found")
+    tag_id = None
+    if webhook.tag is not None:
+        tag_id = tag_cache.get_or_create_ids(db, [webhook.tag])[webhook.tag]
+    states = [state.value for state in webhook.states] if webhook.states else None
+    subscription = WebhookSubscription(
+        url=str(webhook.url),
+        monitor_id=webhook.monitor_id,
+        tag_id=tag_id,
+        states=states,
+    )
+    db.add(subscription)
+    db.flush()
+    # Read the id before commit expires it
+    subscription_id = subscription.id
+    db.commit()
+    return WebhookResponse(
+        id=subscription_id,
+        url=str(webhook.url),
+        monitor_id=webhook.monitor_id,
+        tag=webhook.tag,
+        states=states,
+    )
+
+
+@router.get("/", response_model=List[WebhookResponse])
+def list_webhooks(db: Session = Depends(get_read_db)):
+    """
+    List the webhook subscriptions.
+
+    Args:
+        db: Database session
+
+    Returns:
+        List[WebhookResponse]: Subscriptions, oldest first
+    """
+    rows = db.execute(
+        select(
+            WebhookSubscription.id,
+            WebhookSubscription.url,
+            WebhookSubscription.monitor_id,
+            Tag.name.label("tag"),
+            WebhookSubscription.states,
+        )
+        .outerjoin(Tag, Tag.id == WebhookSubscription.tag_id)
+        .order_by(WebhookSubscription.id)
+    )
+    return [WebhookResponse.model_validate(row) for row in rows]
+
+
+@router.delete("/{webhook_id}/")
+def delete_webhook(webhook_id: int, db: Session = Depends(get_write_db)):
+    """
+    Delete a webhook subscription and the events not yet delivered to it.
+
+    Args:
+        webhook_id: ID of the subscription
+        db: Database session
+
+    Returns:
+        dict: Success message
+
+    Raises:
+        HTTPException: If the subscription is not found
+    """
+    deleted = db.execute(
+        delete(WebhookSubscription).where(WebhookSubscription.id == webhook_id)
+    ).rowcount
+    db.commit()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    return {"message": "Webhook deleted successfully"}
+
+
+@router.get("/dead-letters/", response_model=List[DeadLetterResponse])
+def list_dead_letters(
+    limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_read_db)
+):
+    """
+    List events given up on after ``WEBHOOK_MAX_ATTEMPTS`` failed deliveries.
+
+    Args:
+        limit: Maximum number of events
+        db: Database session
+
+    Returns:
+        List[DeadLetterResponse]: Dead-lettered events, newest first
+    """
+    rows = db.scalars(
+        select(WebhookDeadLetter).order_by(WebhookDeadLetter.id.desc()).limit(limit)
+    )
+    return [DeadLetterResponse.model_validate(row) for row in rows]
@@ -0,0 +1,643 @@
+"""
+Status history archive module.
+
+Old statuses are read rarely but keep ``monitor_statuses`` and its indexes
+large. ``archive_statuses`` moves statuses older than a cutoff out of the
+database into compressed columnar files, partitioned by month
+(``YYYY-MM/<first id>-<last id>-<nonce>.msa``), in an ``ArchiveStore``: a local
+directory (``ARCHIVE_PATH``), or any storage with keyed, ranged reads such as
+an object store (``ARCHIVE_BACKEND``). Each monitor's latest status is never
+archived, so current states are unaffected. Run it from a scheduler with
+``python -m app.archive``.
+
+A file holds its rows sorted by monitor and time, in independently compressed
+groups. Its header records the monitor id and time range of every group, so a
+read fetches the header and then only the groups that can match: partitions are
+chosen by month, groups by monitor id and time. Headers are immutable and
+cached per process, and so is the listing of the files for
+``ARCHIVE_LIST_TTL_SECONDS``, so reads do not list the store every time.
+
+``monitor_history`` and ``export_statuses`` read across the database and the
+archive. Files are written before the rows are deleted, so a run interrupted in
+between leaves rows in both places; reads drop the archived copies by status id.
+A run in another process shows up when the listing expires: until then, the
+statuses it moved are missing from reads.
+Idempotency keys are not archived.
+"""
+
+import argparse
+import functools
+import heapq
+import importlib
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import UTC, datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, exists, select
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.monitor import MonitorState, MonitorStatus
+from app.state_store import as_utc
+from app.statements import STATUS_HISTORY, STATUS_MESSAGE, STATUS_MESSAGE_JOIN
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"MSA1"
+_PREAMBLE = struct.Struct("<4sI")
+_SECTIONS = struct.Struct("<7I")
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_STATES = list(MonitorState)
+# Rows per compressed group, the unit of a read
+GROUP_ROWS = 4096
+# Statuses deleted per statement
+_DELETE_CHUNK = 10_000
+
+
+class ArchivedStatus(NamedTuple):
+    """A status read from the archive or the database."""
+
+    id: int
+    monitor_id: int
+    state: MonitorState
+    message: str | None
+    timestamp: datetime
+    flapping: bool
+
+
+class ArchiveStore(ABC):
+    """Storage for archive files, addressed by ``/``-separated keys."""
+
+    @abstractmethod
+    def list_keys(self, prefix: str = "") -> List[str]:
+        """
+        List the keys starting with a prefix.
+
+        Args:
+            prefix: Key prefix, such as a month partition ``2025-01/``
+
+        Returns:
+            List[str]: Matching keys
+        """
+
+    @abstractmethod
+    def read(self, key: str, start: int = 0, length: int | None = None) -> bytes:
+        """
+        Read a byte range of a file.
+
+        Args:
+            key: File key
+            start: Offset of the first byte
+            length: Bytes to read; to the end of the file when omitted
+
+        Returns:
+            bytes: File contents in the range
+        """
+
+    @abstractmethod
+    def write(self, key: str, data: bytes) -> None:
+        """
+        Write a file, making it visible to readers only once complete.
+
+        Args:
+            key: File key
+            data: File contents
+        """
+
+
+class LocalArchiveStore(ArchiveStore):
+    """
+    Archive files in a local directory.
+
+    Args:
+        root: Directory holding the partitions
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def list_keys(self, prefix: str = "") -> List[str]:
+        keys = []
+        for directory, _, files in os.walk(self.root):
+            relative = os.path.relpath(directory, self.root).replace(os.sep, "/")
+            for name in files:
+                key = name if relative == "." else f"{relative}/{name}"
+                if key.startswith(prefix) and not name.startswith("."):
+                    keys.append(key)
+        return keys
+
+    def read(self, key: str, start: int = 0, length: int | None = None) -> bytes:
+        with open(os.path.join(self.root, key), "rb") as file:
+            file.seek(start)
+            return file.read(-1 if length is None else length)
+
+    def write(self, key: str, data: bytes) -> None:
+        path = os.path.join(self.root, key)
+        directory, name = os.path.split(path)
+        os.makedirs(directory, exist_ok=True)
+        partial = os.path.join(directory, f".{name}.partial")
+        with open(partial, "wb") as file:
+            file.write(data)
+        os.replace(partial, path)
+
+
+_store: ArchiveStore | None = None
+
+
+def load_store() -> ArchiveStore | None:
+    """
+    Create the store configured by ``ARCHIVE_BACKEND`` or ``ARCHIVE_PATH``.
+
+    Returns:
+        ArchiveStore | None: New store, or None when archiving is not set up
+    """
+    if settings.ARCHIVE_BACKEND:
+        module_name, _, factory = settings.ARCHIVE_BACKEND.partition(":")
+        return getattr(importlib.import_module(module_name), factory)()
+    if settings.ARCHIVE_PATH:
+        return LocalArchiveStore(settings.ARCHIVE_PATH)
+    return None
+
+
+def get_store() -> ArchiveStore | None:
+    """Return the process-wide archive store, creating it on first use."""
+    global _store  # pylint: disable=global-statement
+    if _store is None:
+        _store = load_store()
+    return _store
+
+
+def set_store(store: ArchiveStore | None) -> None:
+    """Replace the process-wide store; None recreates it from settings."""
+    global _store  # pylint: disable=global-statement
+    _store = store
+    invalidate_months()
+
+
+def _micros(timestamp: datetime) -> int:
+    return (as_utc(timestamp) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _pack_ints(typecode: str, values: Iterable[int]) -> bytes:
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_ints(typecode: str, data: bytes) -> array:
+    unpacked = array(typecode)
+    unpacked.frombytes(data)
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked
+
+
+def _deltas(values: Sequence[int]) -> List[int]:
+    return [value - previous for previous, value in zip([0, *values], values)]
+
+
+def _encode_group(rows: Sequence[ArchivedStatus]) -> bytes:
+    """Compress sorted rows column by column."""
+    texts = list(dict.fromkeys(row.message for row in rows if row.message is not None))
+    codes = {text: code for code, text in enumerate(texts, 1)}
+    sections = [
+        _pack_ints("q", _deltas([row.id for row in rows])),
+        _pack_ints("q", _deltas([row.monitor_id for row in rows])),
+        _pack_ints("q", _deltas([_micros(row.timestamp) for row in rows])),
+        bytes(_STATES.index(row.state) for row in rows),
+        bytes(row.flapping for row in rows),
+        _pack_ints("I", [codes.get(row.message, 0) for row in rows]),
+        json.dumps(texts).encode(),
+    ]
+    return zlib.compress(
+        _SECTIONS.pack(*map(len, sections)) + b"".join(sections), level=6
+    )
+
+
+def _decode_group(data: bytes, monitor_id: int) -> List[ArchivedStatus]:
+    """Decompress the rows of one monitor from a group."""
+    payload = zlib.decompress(data)
+    sections, offset = [], _SECTIONS.size
+    for length in _SECTIONS.unpack_from(payload):
+        sections.append(payload[offset : offset + length])
+        offset += length
+    # Rows are sorted by monitor, so only its slice is materialized
+    monitor_ids = list(accumulate(_unpack_ints("q", sections[1])))
+    first = bisect_left(monitor_ids, monitor_id)
+    last = bisect_right(monitor_ids, monitor_id, first)
+    ids, micros = (
+        list(accumulate(_unpack_ints("q", section)))[first:last]
+        for section in (sections[0], sections[2])
+    )
+    texts = [None, *json.loads(sections[6])]
+    return [
+        ArchivedStatus(
+            status_id,
+            monitor_id,
+            _STATES[state],
+            texts[code],
+            _EPOCH + timedelta(microseconds=micro),
+            bool(flapping),
+        )
+        for status_id, state, code, micro, flapping in zip(
+            ids,
+            sections[3][first:last],
+            _unpack_ints("I", sections[5])[first:last],
+            micros,
+            sections[4][first:last],
+        )
+    ]
+
+
+def encode_file(rows: Iterable[ArchivedStatus]) -> bytes:
+    """
+    Encode statuses as an archive file.
+
+    Args:
+        rows: Statuses to archive
+
+    Returns:
+        bytes: File contents
+    """
+    rows = sorted(
+        rows, key=lambda row: (row.monitor_id, _micros(row.timestamp), row.id)
+    )
+    groups, blobs, offset = [], [], 0
+    for first in range(0, len(rows), GROUP_ROWS):
+        group = rows[first : first + GROUP_ROWS]
+        blob = _encode_group(group)
+        groups.append(
+            {
+                "offset": offset,
+                "length": len(blob),
+                "rows": len(group),
+                "monitors": [group[0].monitor_id, group[-1].monitor_id],
+                "timestamps": [
+                    min(_micros(row.timestamp) for row in group),
+                    max(_micros(row.timestamp) for row in group),
+                ],
+            }
+        )
+        blobs.append(blob)
+        offset += len(blob)
+    header = json.dumps({"rows": len(rows), "groups": groups}).encode()
+    return _PREAMBLE.pack(_MAGIC, len(header)) + header + b"".join(blobs)
+
+
+@functools.lru_cache(maxsize=4096)
+def _header(store: ArchiveStore, key: str) -> dict:
+    """Read a file's header; files are never rewritten, so it is cached."""
+    magic, length = _PREAMBLE.unpack(store.read(key, 0, _PREAMBLE.size))
+    if magic != _MAGIC:
+        raise ValueError(f"{key} is not a status archive file")
+    header = json.loads(store.read(key, _PREAMBLE.size, length))
+    header["data_offset"] = _PREAMBLE.size + length
+    return header
+
+
+def _month_start(month: str) -> datetime:
+    year, number = map(int, month.split("-"))
+    return datetime(year, number, 1, tzinfo=UTC)
+
+
+def _month_end(month: str) -> datetime:
+    start = _month_start(month)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def archive_months(store: ArchiveStore) -> Dict[str, List[str]]:
+    """
+    List the archive's files by month partition.
+
+    Args:
+        store: Archive store
+
+    Returns:
+        Dict[str, List[str]]: File keys by ``YYYY-MM`` partition
+    """
+    months: Dict[str, List[str]] = {}
+    for key in store.list_keys():
+        month, _, name = key.partition("/")
+        if name.endswith(".msa"):
+            months.setdefault(month, []).append(key)
+    return months
+
+
+# Store, time listed and archive_months of the last listing
+_listing: Tuple[ArchiveStore, float, Dict[str, List[str]]] | None = None
+_listing_lock = threading.Lock()
+
+
+def cached_archive_months(store: ArchiveStore) -> Dict[str, List[str]]:
+    """
+    Return ``archive_months``, listing the store at most every
+    ``ARCHIVE_LIST_TTL_SECONDS``.
+
+    Args:
+        store: Archive store
+
+    Returns:
+        Dict[str, List[str]]: File keys by ``YYYY-MM`` partition
+    """
+    global _listing  # pylint: disable=global-statement
+    listing = _listing
+    if (
+        listing is None
+        or listing[0] is not store
+        or time.monotonic() - listing[1] >= settings.ARCHIVE_LIST_TTL_SECONDS
+    ):
+        with _listing_lock:
+            listing = _listing = (store, time.monotonic(), archive_months(store))
+    return listing[2]
+
+
+def invalidate_months() -> None:
+    """Forget the cached listing after files were added or removed."""
+    global _listing  # pylint: disable=global-statement
+    with _listing_lock:
+        _listing = None
+
+
+def read_archive(  # pylint: disable=too-many-locals
+    store: ArchiveStore,
+    keys: Iterable[str],
+    monitor_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> List[ArchivedStatus]:
+    """
+    Read a monitor's archived statuses, fetching only the groups that match.
+
+    Args:
+        store: Archive store
+        keys: Files to read, such as those of one month
+        monitor_id: ID of the monitor
+        start: Earliest time to include
+        end: Time to stop before
+
+    Returns:
+        List[ArchivedStatus]: Matching statuses, in no particular order
+    """
+    low = _micros(start) if start is not None else None
+    high = _micros(end) if end is not None else None
+    rows = []
+    for key in keys:
+        header = _header(store, key)
+        for group in header["groups"]:
+            first, last = group["monitors"]
+            earliest, latest = group["timestamps"]
+            if not first <= monitor_id <= last:
+                continue
+            if (low is not None and latest < low) or (
+                high is not None and earliest >= high
+            ):
+                continue
+            data = store.read(
+                key, header["data_offset"] + group["offset"], group["length"]
+            )
+            rows += [
+                row
+                for row in _decode_group(data, monitor_id)
+                if (low is None or _micros(row.timestamp) >= low)
+                and (high is None or _micros(row.timestamp) < high)
+            ]
+    return rows
+
+
+def _newest_first(row) -> tuple:
+    return (-_micros(row.timestamp), -row.id)
+
+
+def monitor_history(db: Session, monitor_id: int, skip: int, limit: int) -> Sequence:
+    """
+    Read a page of a monitor's statuses, newest first, from the database and
+    the archive.
+
+    Partitions are read newest first, and only while they can hold statuses
+    newer than the last one of the page; once the page is full, only the
+    groups at or after its last status are read.
+
+    Args:
+        db: Database session
+        monitor_id: ID of the monitor
+        skip: Number of statuses to skip
+        limit: Maximum number of statuses
+
+    Returns:
+        Sequence: Rows with id, state, message, timestamp and flapping
+    """
+    store = get_store()
+    if store is None:
+        return db.execute(
+            STATUS_HISTORY, {"monitor_id": monitor_id, "skip": skip, "limit": limit}
+        ).all()
+
+    needed = skip + limit
+    rows = db.execute(
+        STATUS_HISTORY, {"monitor_id": monitor_id, "skip": 0, "limit": needed}
+    ).all()
+    months = cached_archive_months(store)
+    for month in sorted(months, reverse=True):
+        full = len(rows) >= needed
+        if full and as_utc(rows[-1].timestamp) >= _month_end(month):
+            break
+        ids = {row.id for row in rows}
+        start = as_utc(rows[-1].timestamp) if full else None
+        archived = read_archive(store, months[month], monitor_id, start)
+        rows = sorted(
+            [*rows, *(row for row in archived if row.id not in ids)],
+            key=_newest_first,
+        )[:needed]
+    return rows[skip:]
+
+
+# ArchivedStatus fields, with interned messages resolved
+_COLUMNS = (
+    MonitorStatus.id,
+    MonitorStatus.monitor_id,
+    MonitorStatus.state,
+    STATUS_MESSAGE,
+    MonitorStatus.timestamp,
+    MonitorStatus.flapping,
+)
+
+# A monitor's statuses in a time range, oldest first; parameters
+# ``monitor_id``, ``start`` and ``end``
+_STATUS_RANGE = (
+    select(*_COLUMNS)
+    .outerjoin(*STATUS_MESSAGE_JOIN)
+    .where(
+        MonitorStatus.monitor_id == bindparam("monitor_id"),
+        MonitorStatus.timestamp >= bindparam("start"),
+        MonitorStatus.timestamp < bindparam("end"),
+    )
+    .order_by(MonitorStatus.timestamp, MonitorStatus.id)
+)
+
+
+def export_statuses(
+    db: Session,
+    monitor_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Iterator:
+    """
+    Stream a monitor's statuses, oldest first, from the database and the archive.
+
+    The range is read in spans split at the boundaries of archived months, so
+    at most one month of the monitor's archived statuses is held in memory.
+
+    Args:
+        db: Database session, used until the iterator is exhausted
+        monitor_id: ID of the monitor
+        start: Earliest time to include
+        end: Time to stop before
+
+    Yields:
+        Rows with id, monitor_id, state, message, timestamp and flapping
+    """
+    start = as_utc(start) if start is not None else datetime.min.replace(tzinfo=UTC)
+    end = as_utc(end) if end is not None else datetime.max.replace(tzinfo=UTC)
+    store = get_store()
+    months = cached_archive_months(store) if store is not None else {}
+    bounds = {start, end}
+    for month in months:
+        bounds.update(
+            bound
+            for bound in (_month_start(month), _month_end(month))
+            if start < bound < end
+        )
+    bounds = sorted(bounds)
+    for low, high in zip(bounds, bounds[1:]):
+        archived = []
+        keys = months.get(low.strftime("%Y-%m"))
+        if keys:
+            archived = sorted(
+                read_archive(store, keys, monitor_id, low, high),
+                key=lambda row: (_micros(row.timestamp), row.id),
+            )
+        ids = {row.id for row in archived}
+        rows = db.execute(
+            _STATUS_RANGE.execution_options(yield_per=1000),
+            {"monitor_id": monitor_id, "start": low, "end": high},
+        )
+        yield from heapq.merge(
+            archived,
+            (row for row in rows if row.id not in ids),
+            key=lambda row: (_micros(row.timestamp), row.id),
+        )
+
+
+_newer = aliased(MonitorStatus)
+
+# Statuses older than ``cutoff`` that are not their monitor's latest, in id
+# order after ``after``; parameters ``cutoff``, ``after`` and ``limit``
+_ARCHIVABLE = (
+    select(*_COLUMNS)
+    .outerjoin(*STATUS_MESSAGE_JOIN)
+    .where(
+        MonitorStatus.timestamp < bindparam("cutoff"),
+        MonitorStatus.id > bindparam("after"),
+        exists().where(
+            _newer.monitor_id == MonitorStatus.monitor_id,
+            _newer.timestamp > MonitorStatus.timestamp,
+        ),
+    )
+    .order_by(MonitorStatus.id)
+    .limit(bindparam("limit"))
+)
+
+
+def archive_statuses(
+    db: Session, store: ArchiveStore, cutoff: datetime, rows_per_file: int = 100_000
+) -> int:
+    """
+    Move statuses older than a cutoff from the database to the archive.
+
+    Statuses are moved in batches of ``rows_per_file``, each written as one
+    file per month it spans and then deleted and committed, so memory use is
+    bounded by the batch and an interrupted run keeps the batches it finished.
+
+    Args:
+        db: Database session
+        store: Archive store
+        cutoff: Statuses older than this are archived
+        rows_per_file: Statuses read per batch
+
+    Returns:
+        int: Number of statuses archived
+    """
+    archived, after = 0, 0
+    while True:
+        rows = [
+            ArchivedStatus(*row)
+            for row in db.execute(
+                _ARCHIVABLE, {"cutoff": cutoff, "after": after, "limit": rows_per_file}
+            )
+        ]
+        if not rows:
+            return archived
+        by_month: Dict[str, List[ArchivedStatus]] = {}
+        for row in rows:
+            row = row._replace(timestamp=as_utc(row.timestamp))
+            by_month.setdefault(row.timestamp.strftime("%Y-%m"), []).append(row)
+        for month, month_rows in by_month.items():
+            key = (
+                f"{month}/{month_rows[0].id:012d}-{month_rows[-1].id:012d}"
+                f"-{uuid.uuid4().hex[:8]}.msa"
+            )
+            store.write(key, encode_file(month_rows))
+        # Before the rows are deleted, so reads in this process find them
+        invalidate_months()
+        ids = [row.id for row in rows]
+        for first in range(0, len(ids), _DELETE_CHUNK):
+            db.execute(
+                delete(MonitorStatus).where(
+                    MonitorStatus.id.in_(ids[first : first + _DELETE_CHUNK])
+                )
+            )
+        db.commit()
+        archived += len(rows)
+        after = ids[-1]
+        logger.info("Archived %d statuses, up to id %d", archived, after)
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Archive old monitor statuses.")
+    parser.add_argument(
+        "--older-than-days",
+        type=float,
+        default=settings.ARCHIVE_AFTER_DAYS,
+        help="archive statuses older than this (default ARCHIVE_AFTER_DAYS)",
+    )
+    parser.add_argument("--rows-per-file", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    store = get_store()
+    if store is None:
+        parser.error("set ARCHIVE_PATH or ARCHIVE_BACKEND")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    cutoff = datetime.now(UTC) - timedelta(days=args.older_than_days)
+    with SessionLocal() as db:
+        archived = archive_statuses(db, store, cutoff, args.rows_per_file)
+    logger.info("Archived %d statuses older than %s", archived, cutoff.isoformat())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Status badge rendering module.
+
+Pillow is imported on first use so that processes which never render a badge
+(for example Lambda cold starts serving JSON) do not pay for the import.
+
+Badges for a whole status wall are laid out in a grid and served as one SVG or
+PNG image. Each badge only depends on its monitor name and state, so the
+rendered tiles and SVG fragments are cached and a wall is mostly assembled
+from copies.
+"""
+
+from functools import lru_cache
+from io import BytesIO
+from typing import Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from app.models.monitor import MonitorState
+
+# Define colors for different states
+STATE_COLORS = {
+    MonitorState.NORMAL: "#4CAF50",  # Green
+    MonitorState.WARNING: "#FFC107",  # Yellow
+    MonitorState.CRITICAL: "#F44336",  # Red
+    MonitorState.MISSING_DATA: "#9E9E9E",  # Gray
+}
+
+BADGE_HEIGHT = 20
+NAME_WIDTH = 100
+STATE_WIDTH = 80
+BADGE_WIDTH = NAME_WIDTH + STATE_WIDTH
+# Characters of the monitor name that fit in the name section
+NAME_LENGTH = 12
+# Space between badges in a grid
+BADGE_GAP = 4
+# Rendered badges kept in memory, by name and state
+BADGE_CACHE_SIZE = 4096
+
+Badge = Tuple[str, MonitorState]
+
+
+@lru_cache(maxsize=BADGE_CACHE_SIZE)
+def _badge_tile(name: str, state: MonitorState):
+    """Render one badge as a Pillow image; callers must not modify it."""
+    # pylint: disable=import-outside-toplevel
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (BADGE_WIDTH, BADGE_HEIGHT), color="#555555")
+    draw = ImageDraw.Draw(img)
+
+    # Draw state background
+    state_color = STATE_COLORS.get(state, "#9E9E9E")
+    draw.rectangle([(NAME_WIDTH, 0), (BADGE_WIDTH, BADGE_HEIGHT)], fill=state_color)
+
+    # Draw text
+    draw.text((5, 4), name, fill="white")
+    draw.text((NAME_WIDTH + 5, 4), state.value, fill="white")
+    return img
+
+
+def _to_png(img) -> bytes:
+    """Encode a Pillow image as PNG."""
+    img_byte_arr = BytesIO()
+    img.save(img_byte_arr, format="PNG")
+    return img_byte_arr.getvalue()
+
+
+def render_badge_png(name: str, state: MonitorState) -> bytes:
+    """
+    Render a monitor state badge as a PNG image.
+
+    Args:
+        name: Monitor name, truncated to fit the badge
+        state: Monitor state
+
+    Returns:
+        bytes: PNG image data
+    """
+    return _to_png(_badge_tile(name[:NAME_LENGTH], state))
+
+
+def _grid(count: int, columns: int) -> Tuple[int, int, int]:
+    """Return the columns used and the width and height of a badge grid."""
+    columns = max(1, min(columns, count))
+    rows = -(-count // columns)
+    width = columns * BADGE_WIDTH + (columns - 1) * BADGE_GAP
+    height = rows * BADGE_HEIGHT + (rows - 1) * BADGE_GAP
+    return columns, width, height
+
+
+def _offset(index: int, columns: int) -> Tuple[int, int]:
+    """Return the top-left corner of the badge at an index in a grid."""
+    row, column = divmod(index, columns)
+    return column * (BADGE_WIDTH + BADGE_GAP), row * (BADGE_HEIGHT + BADGE_GAP)
+
+
+def render_badge_grid_png(badges: Sequence[Badge], columns: int) -> bytes:
+    """
+    Render badges in a grid as one PNG image.
+
+    Args:
+        badges: Monitor names and states, in display order; at least one
+        columns: Badges per row
+
+    Returns:
+        bytes: PNG image data
+    """
+    # pylint: disable=import-outside-toplevel
+    from PIL import Image
+
+    columns, width, height = _grid(len(badges), columns)
+    sheet = Image.new("RGB", (width, height), color="white")
+    for index, (name, state) in enumerate(badges):
+        sheet.paste(_badge_tile(name[:NAME_LENGTH], state), _offset(index, columns))
+    return _to_png(sheet)
+
+
+@lru_cache(maxsize=BADGE_CACHE_SIZE)
+def _badge_svg(name: str, state: MonitorState) -> str:
+    """Render one badge as an SVG fragment positioned at the origin."""
+    state_color = STATE_COLORS.get(state, "#9E9E9E")
+    return (
+        f"<title>{escape(name)}: {escape(state.value)}</title>"
+        f'<rect width="{NAME_WIDTH}" height="{BADGE_HEIGHT}" fill="#555555"/>'
+        f'<rect x="{NAME_WIDTH}" width="{STATE_WIDTH}" height="{BADGE_HEIGHT}" '
+        f'fill="{state_color}"/>'
+        f'<text x="5" y="14">{escape(name[:NAME_LENGTH])}</text>'
+        f'<text x="{NAME_WIDTH + 5}" y="14">{escape(state.value)}</text>'
+    )
+
+
+def render_badge_grid_svg(badges: Sequence[Badge], columns: int) -> str:
+    """
+    Render badges in a grid as one SVG document.
+
+    Args:
+        badges: Monitor names and states, in display order; at least one
+        columns: Badges per row
+
+    Returns:
+        str: SVG document
+    """
+    columns, width, height = _grid(len(badges), columns)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        'font-family="Verdana,DejaVu Sans,sans-serif" font-size="11" fill="#fff">'
+    ]
+    for index, (name, state) in enumerate(badges):
+        x, y = _offset(index, columns)
+        parts.append(f'<g transform="translate({x},{y})">{_badge_svg(name, state)}</g>')
+    parts.append("</svg>")
+    return "".join(parts)
@@ -4,7 +4,9 @@ Configuration settings module.
 This module manages application-wide configuration settings using Pydantic.
 """
 
-from pydantic import ConfigDict
+from typing import Literal
+
+from pydantic import ConfigDict, Field, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -14,17 +16,165 @@ class Settings(BaseSettings):
 
     Attributes:
         DATABASE_URL: Database connection string
+        DATABASE_READ_URL: Optional read replica used by GET endpoints
+        DB_PREPARE_THRESHOLD: Executions after which psycopg 3 prepares a
+            statement on the server (``postgresql+psycopg://`` URLs); 0
+            disables server-side prepared statements
+        READ_YOUR_WRITES_SECONDS: After a client writes, its reads go to the
+            primary for this many seconds
+        STATUS_MAX_CLOCK_SKEW_SECONDS: How far in the future a client-supplied
+            status timestamp may be
+        TAG_CACHE_SIZE: Tag names whose ids are cached per process
+        RATE_LIMIT_ENABLED: Rate limit status updates
+        RATE_LIMIT_MONITOR_PER_SECOND: Sustained status updates per monitor
+        RATE_LIMIT_MONITOR_BURST: Status updates a monitor may send at once
+        RATE_LIMIT_CLIENT_PER_SECOND: Sustained status updates per client address
+        RATE_LIMIT_CLIENT_BURST: Status updates a client may send at once
+        RATE_LIMIT_TRUSTED_PROXIES: Proxies in front of the application that
+            append to X-Forwarded-For (1 behind the Heroku router); clients
+            are keyed on the address the outermost of them saw, or on the
+            connection's address with 0
+        RATE_LIMIT_BACKEND: "memory", or "module:factory" for a shared backend
+        MAX_CONCURRENT_REQUESTS: Requests a process serves at once before
+            answering 503 (0 for no limit)
+        MAX_CONCURRENT_WRITES: Non-GET requests a process serves at once
+            before answering 503 (0 for no limit); keep it below the pool size
+            so writes cannot take every connection
+        STATE_STORE_ENABLED: Keep every monitor's current state in memory and
+            serve the current-state endpoints from it
+        STATE_STORE_SYNC_SECONDS: Interval for picking up other processes' writes
+        STATE_STORE_RELOAD_SECONDS: Interval between full reloads of the store
+        PAYLOAD_CACHE_ENABLED: Serve the status lists from cached encoded JSON
+        PAYLOAD_CACHE_TTL_SECONDS: Longest a cached status list is served without
+            a write from this process; bounds lag behind other processes
+        PAYLOAD_CACHE_TAG_SETS: Tag sets whose status lists are cached
+        RULES_ENABLED: Accept metric samples and derive monitor states from
+            them with threshold rules
+        RULES_EVALUATION_SECONDS: Interval between evaluations of the rules
+        RULES_RELOAD_SECONDS: Interval for picking up other processes' rule
+            changes and status writes
+        MESSAGE_INTERNING: Store status messages once in ``status_messages``
+            and reference them by id
+        MESSAGE_INTERN_MAX_LENGTH: Longer messages are stored inline
+        MESSAGE_CACHE_SIZE: Message ids cached by text per process
+        ARCHIVE_PATH: Directory of the status history archive
+        ARCHIVE_BACKEND: "module:factory" for an archive store other than a
+            local directory, such as an object store; overrides ARCHIVE_PATH
+        ARCHIVE_AFTER_DAYS: Age past which ``python -m app.archive`` moves
+            statuses to the archive
+        ARCHIVE_LIST_TTL_SECONDS: Longest the listing of the archive files is
+            cached, to pick up other processes' archive runs
+        IMPORT_BATCH_SIZE: Statuses written per transaction by a bulk import
+        SEARCH_INDEX_TTL_SECONDS: Longest the in-memory name search index is
+            used without being rebuilt, to pick up other processes' monitors
+        FLAP_TRANSITIONS: State transitions that make a monitor flapping
+        FLAP_WINDOW_SECONDS: Time within which those transitions must happen
+        FLAP_SUPPRESSION: Hold the published state of flapping monitors instead
+            of writing their transitions
+        FLAP_SWEEP_SECONDS: Interval between checks for monitors that stopped
+            flapping, whose last suppressed update is then written
+        WEBHOOKS_ENABLED: Record state transitions for webhook subscriptions
+            and deliver them from each process
+        WEBHOOK_POLL_SECONDS: Interval between checks for events to deliver
+        WEBHOOK_BATCH_SIZE: Events sent per POST
+        WEBHOOK_TIMEOUT_SECONDS: Time allowed for one POST
+        WEBHOOK_CONNECTIONS_PER_ENDPOINT: Connections kept open per endpoint
+        WEBHOOK_MAX_ATTEMPTS: Failed attempts before an event is dead-lettered
+        WEBHOOK_BACKOFF_SECONDS: Delay before the first retry, doubled for
+            every further one
+        WEBHOOK_MAX_BACKOFF_SECONDS: Longest delay between two attempts
         API_V1_STR: API version prefix
         PROJECT_NAME: Name of the project
         OTEL_EXPORTER_OTLP_ENDPOINT: OpenTelemetry collector endpoint
+        SLOW_QUERY_THRESHOLD_MS: Statements slower than this are logged
+        OTEL_TRACES_SAMPLER_RATIO: Fraction of new traces that are sampled
+        OTEL_TRACES_SAMPLER_PARENT_BASED: Follow the sampling decision of the parent span
+        OTEL_BSP_MAX_QUEUE_SIZE: Spans buffered before new ones are dropped
+        OTEL_BSP_MAX_EXPORT_BATCH_SIZE: Spans sent per export call
+        OTEL_BSP_SCHEDULE_DELAY_MS: Delay between two consecutive exports
+        OTEL_BSP_EXPORT_TIMEOUT_MS: Time allowed for one export call
+        OTEL_SQLCOMMENTER_ENABLED: Append trace context comments to SQL statements
+        OTEL_INSTRUMENT_DB_DRIVER: Also instrument the DB-API driver (psycopg2)
+        STARTUP_PROFILE: "server" for long-running processes, "lambda" for
+            short-lived ones where cold-start time matters
+        DB_CREATE_TABLES_ON_STARTUP: Run create_all at startup; disable when
+            the schema is managed by Alembic (off by default for "lambda")
+        TELEMETRY_ENABLED: Set up tracing at startup (for "lambda", on by
+            default only when an OTLP endpoint is configured)
     """
 
     DATABASE_URL: str
+    DATABASE_READ_URL: str | None = None
+    DB_PREPARE_THRESHOLD: int = Field(default=2, ge=0)
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    STATUS_MAX_CLOCK_SKEW_SECONDS: float = 300.0
+    TAG_CACHE_SIZE: int = 10000
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MONITOR_PER_SECOND: float = Field(default=5.0, gt=0)
+    RATE_LIMIT_MONITOR_BURST: int = Field(default=50, ge=1)
+    RATE_LIMIT_CLIENT_PER_SECOND: float = Field(default=100.0, gt=0)
+    RATE_LIMIT_CLIENT_BURST: int = Field(default=200, ge=1)
+    RATE_LIMIT_TRUSTED_PROXIES: int = Field(default=0, ge=0)
+    RATE_LIMIT_BACKEND: str = "memory"
+    MAX_CONCURRENT_REQUESTS: int = Field(default=0, ge=0)
+    MAX_CONCURRENT_WRITES: int = Field(default=10, ge=0)
+    STATE_STORE_ENABLED: bool = False
+    STATE_STORE_SYNC_SECONDS: float = Field(default=1.0, gt=0)
+    STATE_STORE_RELOAD_SECONDS: float = Field(default=300.0, gt=0)
+    PAYLOAD_CACHE_ENABLED: bool = True
+    PAYLOAD_CACHE_TTL_SECONDS: float = Field(default=1.0, ge=0)
+    PAYLOAD_CACHE_TAG_SETS: int = Field(default=128, ge=0)
+    RULES_ENABLED: bool = False
+    RULES_EVALUATION_SECONDS: float = Field(default=1.0, gt=0)
+    RULES_RELOAD_SECONDS: float = Field(default=60.0, gt=0)
+    MESSAGE_INTERNING: bool = True
+    MESSAGE_INTERN_MAX_LENGTH: int = Field(default=256, ge=1)
+    MESSAGE_CACHE_SIZE: int = Field(default=10000, ge=0)
+    ARCHIVE_PATH: str | None = None
+    ARCHIVE_BACKEND: str | None = None
+    ARCHIVE_AFTER_DAYS: float = Field(default=365.0, gt=0)
+    ARCHIVE_LIST_TTL_SECONDS: float = Field(default=60.0, ge=0)
+    IMPORT_BATCH_SIZE: int = Field(default=10000, ge=1)
+    SEARCH_INDEX_TTL_SECONDS: float = Field(default=10.0, ge=0)
+    FLAP_TRANSITIONS: int = Field(default=5, ge=2)
+    FLAP_WINDOW_SECONDS: float = Field(default=600.0, gt=0)
+    FLAP_SUPPRESSION: bool = False
+    FLAP_SWEEP_SECONDS: float = Field(default=10.0, gt=0)
+    WEBHOOKS_ENABLED: bool = False
+    WEBHOOK_POLL_SECONDS: float = Field(default=1.0, gt=0)
+    WEBHOOK_BATCH_SIZE: int = Field(default=100, ge=1)
+    WEBHOOK_TIMEOUT_SECONDS: float = Field(default=5.0, gt=0)
+    WEBHOOK_CONNECTIONS_PER_ENDPOINT: int = Field(default=4, ge=1)
+    WEBHOOK_MAX_ATTEMPTS: int = Field(default=8, ge=1)
+    WEBHOOK_BACKOFF_SECONDS: float = Field(default=1.0, gt=0)
+    WEBHOOK_MAX_BACKOFF_SECONDS: float = Field(default=600.0, gt=0)
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "Monitor API"
     OTEL_EXPORTER_OTLP_ENDPOINT: str | None = None
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    OTEL_TRACES_SAMPLER_RATIO: float = Field(default=1.0, ge=0.0, le=1.0)
+    OTEL_TRACES_SAMPLER_PARENT_BASED: bool = True
+    OTEL_BSP_MAX_QUEUE_SIZE: int = 2048
+    OTEL_BSP_MAX_EXPORT_BATCH_SIZE: int = 512
+    OTEL_BSP_SCHEDULE_DELAY_MS: float = 5000
+    OTEL_BSP_EXPORT_TIMEOUT_MS: float = 30000
+    OTEL_SQLCOMMENTER_ENABLED: bool = False
+    OTEL_INSTRUMENT_DB_DRIVER: bool = False
+    STARTUP_PROFILE: Literal["server", "lambda"] = "server"
+    DB_CREATE_TABLES_ON_STARTUP: bool = True
+    TELEMETRY_ENABLED: bool = True
 
     model_config = ConfigDict(case_sensitive=True, env_file=".env")
 
+    @model_validator(mode="after")
+    def apply_startup_profile(self) -> "Settings":
+        """Apply the startup profile defaults to settings not set explicitly."""
+        if self.STARTUP_PROFILE == "lambda":
+            if "DB_CREATE_TABLES_ON_STARTUP" not in self.model_fields_set:
+                self.DB_CREATE_TABLES_ON_STARTUP = False
+            if "TELEMETRY_ENABLED" not in self.model_fields_set:
+                self.TELEMETRY_ENABLED = self.OTEL_EXPORTER_OTLP_ENDPOINT is not None
+        return self
+
 
 settings = Settings()
@@ -6,15 +6,69 @@ This module handles database connection and session management.
 
 import logging
 import os
-from sqlalchemy import create_engine
+import sqlite3
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.config import settings
+from app.metrics import instrument_pool
 from app.models.base import Base
+from app.query_stats import instrument_engine
 
 logger = logging.getLogger(__name__)
 
+
+@event.listens_for(Engine, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """
+    Enforce foreign keys on SQLite connections.
+
+    SQLite ignores foreign keys, including ON DELETE CASCADE, unless enabled
+    per connection.
+    """
+    # pylint: disable=unused-argument
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def create_app_engine(url: str, pool_name: str = "primary") -> Engine:
+    """
+    Create an instrumented engine for a configured database URL.
+
+    Args:
+        url: SQLAlchemy database URL (``postgres://`` is accepted)
+        pool_name: Label of the engine's pool in the metrics
+
+    Returns:
+        Engine: SQLAlchemy engine
+    """
+    if url.startswith("sqlite"):
+        # SQLite file or in-memory database, e.g. for tests and benchmarks
+        new_engine = create_engine(url, connect_args={"check_same_thread": False})
+    else:
+        # Configure PostgreSQL engine for production
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql://", 1)
+        connect_args = {}
+        if make_url(url).get_driver_name() == "psycopg":
+            # psycopg 3 prepares statements run repeatedly on a connection,
+            # and None turns that off; psycopg2 never prepares statements
+            connect_args["prepare_threshold"] = settings.DB_PREPARE_THRESHOLD or None
+        new_engine = create_engine(
+            url, pool_size=5, max_overflow=10, connect_args=connect_args
+        )
+
+    # Count statements and time them for per-request instrumentation
+    instrument_engine(new_engine)
+    instrument_pool(new_engine, pool_name)
+    return new_engine
+
+
 # Check if we're running in test mode
 TESTING = os.environ.get("TESTING", "").lower() == "true"
 
@@ -23,18 +77,21 @@ try:
         # Use in-memory SQLite for testing
         logger.info("Using in-memory SQLite database for testing")
         DB_URL = "sqlite:///:memory:"
-        engine = create_engine(DB_URL, connect_args={"check_same_thread": False})
     else:
-        # Configure PostgreSQL engine for production
+        logger.info("Connecting to the primary database")
         DB_URL = settings.DATABASE_URL
-        if DB_URL.startswith("postgres://"):
-            DB_URL = DB_URL.replace("postgres://", "postgresql://", 1)
+    engine = create_app_engine(DB_URL)
 
-        logger.info("Connecting to PostgreSQL database")
-        engine = create_engine(DB_URL, pool_size=5, max_overflow=10)
+    # Optional read replica for GET endpoints; falls back to the primary
+    if settings.DATABASE_READ_URL and not TESTING:
+        logger.info("Connecting to the read replica database")
+        read_engine = create_app_engine(settings.DATABASE_READ_URL, "replica")
+    else:
+        read_engine = engine
 
     # Create SessionLocal class
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
     logger.info("Database connection established successfully")
 
 except SQLAlchemyError as e:
@@ -56,7 +113,14 @@ def init_db() -> None:
         raise
 
 
-# Initialize the database if not testing
-# For tests, we'll initialize in the fixtures
-if not TESTING:
-    init_db()
+def reset_engines_after_fork() -> None:
+    """
+    Drop pooled connections inherited from a parent process.
+
+    Call this in a worker right after fork. The parent's connections are
+    discarded without being closed, since the parent still owns the sockets,
+    and the worker opens its own on first use.
+    """
+    engine.dispose(close=False)
+    if read_engine is not engine:
+        read_engine.dispose(close=False)
@@ -0,0 +1,174 @@
+"""
+Flap detection module.
+
+A monitor is flapping when its last ``FLAP_TRANSITIONS`` state transitions all
+happened within ``FLAP_WINDOW_SECONDS``. Each monitor keeps the times of its
+recent transitions in a fixed-size ring buffer, so every update is checked in
+constant time and memory stays bounded however often the monitor changes.
+
+Statuses are stored with the flag as it was when they were written, so every
+worker and replica reports the flag of a monitor's latest status. With
+``FLAP_SUPPRESSION`` set, updates of a monitor that is already flapping are
+not written: the published state holds until the flapping stops. The last
+suppressed update is held, and ``settled`` hands it back once the monitor's
+transitions have left the window, so a monitor whose agent only reports
+changes catches up with its latest reported state. Late and backfilled updates, older than
+the monitor's current status, are not checked: they are stored in history
+unflagged and never suppressed.
+
+The ring buffers are kept in the memory of each process and only see the
+updates the process handles.
+"""
+
+import threading
+from typing import Dict, List, NamedTuple
+
+from app.core.config import settings
+from app.models.monitor import MonitorState
+
+
+class FlapCheck(NamedTuple):
+    """Outcome of checking an update for flapping."""
+
+    flapping: bool
+    suppressed: bool
+
+
+class HeldUpdate(NamedTuple):
+    """Last update suppressed while a monitor flapped."""
+
+    monitor_id: int
+    state: MonitorState
+    message: str | None
+    timestamp: float
+
+
+class _History:  # pylint: disable=too-few-public-methods
+    """Recent transitions of one monitor."""
+
+    __slots__ = (
+        "transitions",
+        "next",
+        "reported",
+        "latest",
+        "flapping",
+        "published",
+        "held",
+    )
+
+    def __init__(self, size: int):
+        # Ring buffer of transition times; ``next`` is the oldest slot
+        self.transitions: list = [None] * size
+        self.next = 0
+        self.reported: MonitorState | None = None
+        self.latest: float | None = None
+        self.flapping = False
+        # Last state written, and the last update suppressed since then
+        self.published: MonitorState | None = None
+        self.held: HeldUpdate | None = None
+
+
+class FlapDetector:
+    """
+    Flap detection over a ring buffer of recent transitions per monitor.
+
+    Args:
+        transitions: Transitions that make a monitor flapping
+        window_seconds: Time within which they must happen
+        suppress: Whether updates of flapping monitors are withheld
+    """
+
+    def __init__(self, transitions: int, window_seconds: float, suppress: bool):
+        self.transitions = transitions
+        self.window_seconds = window_seconds
+        self.suppress = suppress
+        self._histories: Dict[int, _History] = {}
+        self._lock = threading.Lock()
+
+    def check(
+        self,
+        monitor_id: int,
+        state: MonitorState,
+        timestamp: float,
+        message: str | None = None,
+    ) -> FlapCheck:
+        """
+        Record a reported state and decide how it is written.
+
+        Updates older than the latest one checked are late or backfilled
+        events: they are not recorded, not flagged and never suppressed.
+
+        Args:
+            monitor_id: Monitor id
+            state: Reported state
+            timestamp: Unix time of the report
+            message: Message of the report, held with it if it is suppressed
+
+        Returns:
+            FlapCheck: Whether the monitor is flapping, and whether the update
+                must not be written
+        """
+        with self._lock:
+            history = self._histories.get(monitor_id)
+            if history is None:
+                history = self._histories[monitor_id] = _History(self.transitions)
+            if history.latest is not None and timestamp < history.latest:
+                return FlapCheck(False, False)
+            history.latest = timestamp
+            if history.reported is not None and state != history.reported:
+                history.transitions[history.next] = timestamp
+                history.next = (history.next + 1) % self.transitions
+            history.reported = state
+
+            oldest = history.transitions[history.next]
+            was_flapping = history.flapping
+            history.flapping = (
+                oldest is not None and timestamp - oldest <= self.window_seconds
+            )
+            # The update that starts the flapping is still written, so the
+            # flag is published with it
+            suppressed = self.suppress and was_flapping and history.flapping
+            if suppressed:
+                history.held = HeldUpdate(monitor_id, state, message, timestamp)
+            else:
+                history.published = state
+                history.held = None
+            return FlapCheck(history.flapping, suppressed)
+
+    def settled(self, now: float) -> List[HeldUpdate]:
+        """
+        Take the held updates of monitors that have stopped flapping.
+
+        Updates that would not change the published state are dropped.
+
+        Args:
+            now: Unix time of the check
+
+        Returns:
+            List[HeldUpdate]: Updates to write, each returned once
+        """
+        updates = []
+        with self._lock:
+            for history in self._histories.values():
+                held = history.held
+                if held is None:
+                    continue
+                oldest = history.transitions[history.next]
+                if oldest is not None and now - oldest <= self.window_seconds:
+                    continue
+                history.flapping = False
+                history.held = None
+                if held.state != history.published:
+                    history.published = held.state
+                    updates.append(held)
+        return updates
+
+    def clear(self) -> None:
+        """Forget every monitor's transitions."""
+        with self._lock:
+            self._histories.clear()
+
+
+flap_detector = FlapDetector(
+    settings.FLAP_TRANSITIONS, settings.FLAP_WINDOW_SECONDS, settings.FLAP_SUPPRESSION
+)
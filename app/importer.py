@@ -0,0 +1,396 @@
+"""
+Bulk status import module.
+
+``import_statuses`` loads status history in bulk, from CSV or NDJSON such as a
+history export, with ``python -m app.importer`` or ``POST /monitor/import/``.
+Records name their monitor (see ``StatusImport``); monitors that do not exist
+are created with the tags of their records unless creation is turned off.
+Tags of monitors that already exist are left alone.
+
+Input is read one record at a time and written in batches of
+``IMPORT_BATCH_SIZE``, one transaction each, so memory stays constant however
+long the input is. Each batch resolves its monitor names in one query and its
+messages in one lookup, then loads its rows with ``COPY`` on PostgreSQL, or
+one executemany INSERT elsewhere. Invalid records are skipped and counted.
+
+Imports bypass the per-update path of ``app.ingest``: statuses are not checked
+by the flap detector, their ``flapping`` flag is stored as given, and no
+webhooks fire. Composite rollups, the state store and cached payloads are
+updated once, after the last batch. Statuses of composites are derived, so
+records naming a composite are rejected.
+"""
+
+import argparse
+import csv
+import enum
+import io
+import logging
+import sys
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Set, TextIO, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.ingest import publish_rollups
+from app.messages import intern_messages
+from app.models.monitor import Monitor, MonitorStatus, monitor_tags
+from app.payload_cache import payload_cache
+from app.rollup import composites_of, link_tag_members, recount
+from app.schemas.monitor import StatusImport
+from app.search import search_index
+from app.state_store import state_store
+from app.tag_cache import tag_cache
+
+logger = logging.getLogger(__name__)
+
+# Rejected records described in a summary
+MAX_ERRORS = 10
+# Names per IN list
+_CHUNK = 10_000
+# Separator of the tags in a CSV ``tags`` field
+CSV_TAG_SEPARATOR = ";"
+
+_MONITORS_BY_NAME = select(Monitor.name, Monitor.id, Monitor.composite).where(
+    Monitor.name.in_(bindparam("names", expanding=True))
+)
+_CREATE_MONITORS = insert(Monitor).returning(
+    Monitor.name, Monitor.id, sort_by_parameter_order=True
+)
+_COPY_COLUMNS = (
+    "monitor_id",
+    "state",
+    "message",
+    "message_id",
+    "timestamp",
+    "flapping",
+)
+
+
+class ImportFormat(str, enum.Enum):
+    """Input format of a bulk import."""
+
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+@dataclass
+class ImportSummary:
+    """
+    Progress, then outcome, of a bulk import.
+
+    Attributes:
+        records: Records read
+        written: Statuses written
+        rejected: Records skipped as invalid
+        monitors_created: Monitors created for records naming unknown monitors
+        errors: Descriptions of the first ``MAX_ERRORS`` rejected records
+    """
+
+    records: int = 0
+    written: int = 0
+    rejected: int = 0
+    monitors_created: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def reject(self, line: int, reason: str) -> None:
+        """Count a rejected record, describing it if it is among the first."""
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"line {line}: {reason}")
+
+
+def _csv_fields(lines: TextIO) -> Iterator[Tuple[int, dict]]:
+    """Read CSV records with a header row; empty fields are omitted."""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        fields = {
+            name: value
+            for name, value in row.items()
+            if name is not None and isinstance(value, str) and value
+        }
+        if "tags" in fields:
+            fields["tags"] = [
+                tag for tag in fields["tags"].split(CSV_TAG_SEPARATOR) if tag
+            ]
+        yield reader.line_num, fields
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, detail['loc'])) or 'record'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def _records(
+    lines: TextIO, import_format: ImportFormat, summary: ImportSummary
+) -> Iterator[Tuple[int, StatusImport]]:
+    """Read and validate records, counting and skipping invalid ones."""
+    if import_format is ImportFormat.CSV:
+        raw = _csv_fields(lines)
+        validate = StatusImport.model_validate
+    else:
+        raw = ((number, line) for number, line in enumerate(lines, 1) if line.strip())
+        validate = StatusImport.model_validate_json
+    for line, value in raw:
+        summary.records += 1
+        try:
+            record = validate(value)
+        except ValidationError as error:
+            summary.reject(line, _describe(error))
+        else:
+            yield line, record
+
+
+def _find_monitors(db: Session, names: List[str]) -> Dict[str, Tuple[int, bool]]:
+    """Look up monitors by name, returning their id and whether composite."""
+    found = {}
+    for first in range(0, len(names), _CHUNK):
+        found.update(
+            (name, (monitor_id, bool(composite)))
+            for name, monitor_id, composite in db.execute(
+                _MONITORS_BY_NAME, {"names": names[first : first + _CHUNK]}
+            )
+        )
+    return found
+
+
+def _create_monitors(
+    db: Session, tags: Dict[str, Iterable[str]]
+) -> Tuple[Dict[str, int], Set[int]]:
+    """
+    Create monitors with their tags, as members of their tags' composites.
+
+    Returns the ids of the monitors by name, and the composites they joined.
+    """
+    ids = dict(db.execute(_CREATE_MONITORS, [{"name": name} for name in tags]).all())
+    tag_ids = tag_cache.get_or_create_ids(
+        db, (tag for names in tags.values() for tag in names)
+    )
+    links = {
+        ids[name]: [tag_ids[tag] for tag in dict.fromkeys(names)]
+        for name, names in tags.items()
+    }
+    rows = [
+        {"monitor_id": monitor_id, "tag_id": tag_id}
+        for monitor_id, monitor_tag_ids in links.items()
+        for tag_id in monitor_tag_ids
+    ]
+    if rows:
+        db.execute(insert(monitor_tags), rows)
+    return ids, link_tag_members(db, links)
+
+
+def _copy_values(row: dict) -> tuple:
+    return (
+        row["monitor_id"],
+        # Enums are stored by name
+        row["state"].name,
+        row["message"],
+        row["message_id"],
+        row["timestamp"],
+        row["flapping"],
+    )
+
+
+def _insert_rows(db: Session, rows: List[dict]) -> None:
+    """Insert status rows with COPY where the driver supports it."""
+    driver = db.get_bind().dialect.driver
+    if driver not in ("psycopg2", "psycopg"):
+        db.execute(insert(MonitorStatus), rows)
+        return
+    columns = ", ".join(_COPY_COLUMNS)
+    copy = f"COPY {MonitorStatus.__tablename__} ({columns}) FROM STDIN"
+    cursor = db.connection().connection.cursor()
+    try:
+        if driver == "psycopg":
+            with cursor.copy(copy) as writer:
+                for row in rows:
+                    writer.write_row(_copy_values(row))
+        else:
+            # Unquoted empty CSV fields are NULL
+            data = io.StringIO()
+            csv.writer(data).writerows(_copy_values(row) for row in rows)
+            data.seek(0)
+            cursor.copy_expert(f"{copy} WITH (FORMAT csv)", data)
+    finally:
+        cursor.close()
+
+
+def _write_batch(
+    db: Session,
+    batch: List[Tuple[int, StatusImport]],
+    create: bool,
+    summary: ImportSummary,
+) -> Tuple[Set[int], Set[int]]:
+    """
+    Write a batch of records, without committing.
+
+    Returns the ids of the monitors written, and of the composites that new
+    monitors joined.
+    """
+    names = list(dict.fromkeys(record.monitor for _, record in batch))
+    monitors = _find_monitors(db, names)
+    joined: Set[int] = set()
+    if create:
+        tags: Dict[str, List[str]] = {}
+        for _, record in batch:
+            if record.monitor not in monitors:
+                tags.setdefault(record.monitor, []).extend(record.tags)
+        if tags:
+            created, joined = _create_monitors(db, tags)
+            monitors.update(
+                (name, (monitor_id, False)) for name, monitor_id in created.items()
+            )
+            summary.monitors_created += len(created)
+
+    rows = []
+    for line, record in batch:
+        monitor_id, composite = monitors.get(record.monitor, (None, False))
+        if monitor_id is None:
+            summary.reject(line, f"unknown monitor {record.monitor!r}")
+        elif composite:
+            summary.reject(line, f"{record.monitor!r} is a composite monitor")
+        else:
+            rows.append(
+                {
+                    "monitor_id": monitor_id,
+                    "state": record.state,
+                    "message": record.message or None,
+                    "timestamp": record.timestamp,
+                    "flapping": record.flapping,
+                }
+            )
+    if rows:
+        _insert_rows(db, intern_messages(db, rows))
+        summary.written += len(rows)
+    return {row["monitor_id"] for row in rows}, joined
+
+
+def _log_progress(summary: ImportSummary) -> None:
+    logger.info(
+        "Imported %d of %d records (%d rejected, %d monitors created)",
+        summary.written,
+        summary.records,
+        summary.rejected,
+        summary.monitors_created,
+    )
+
+
+def _finish(db: Session, composite_ids: Set[int], summary: ImportSummary) -> None:
+    """Roll up the composites and refresh the in-memory views after an import."""
+    db.rollback()
+    rollups = recount(db, composite_ids, datetime.now(UTC))
+    db.commit()
+    publish_rollups(rollups)
+    if state_store.loaded:
+        state_store.load(db)
+    payload_cache.invalidate()
+    if summary.monitors_created:
+        search_index.invalidate()
+
+
+def import_statuses(  # pylint: disable=too-many-arguments
+    db: Session,
+    lines: TextIO,
+    import_format: ImportFormat = ImportFormat.NDJSON,
+    *,
+    create: bool = True,
+    batch_size: int | None = None,
+    progress: Callable[[ImportSummary], None] = _log_progress,
+) -> ImportSummary:
+    """
+    Import statuses, committing them batch by batch.
+
+    Rollups and the in-memory views are updated once at the end, including
+    when a batch fails; the batches before it stay written.
+
+    Args:
+        db: Database session
+        lines: Text input, opened with ``newline=""``
+        import_format: Format of the input
+        create: Whether to create monitors that do not exist; records of
+            unknown monitors are rejected otherwise
+        batch_size: Records per transaction; defaults to IMPORT_BATCH_SIZE
+        progress: Called with the running summary after each batch
+
+    Returns:
+        ImportSummary: Outcome of the import
+
+    Raises:
+        csv.Error: If CSV input is malformed
+        UnicodeDecodeError: If the input is not UTF-8
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    summary = ImportSummary()
+    records = _records(lines, import_format, summary)
+    composite_ids: Set[int] = set()
+    try:
+        while batch := list(islice(records, batch_size)):
+            written, joined = _write_batch(db, batch, create, summary)
+            composite_ids |= joined | composites_of(db, written)
+            db.commit()
+            progress(summary)
+    except BaseException:
+        # The database may be what failed; keep its error rather than this one
+        try:
+            _finish(db, composite_ids, summary)
+        except SQLAlchemyError:
+            logger.exception("Rolling up after a failed import failed")
+        raise
+    _finish(db, composite_ids, summary)
+    return summary
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Import monitor status history.")
+    parser.add_argument("file", help="input file, or - for standard input")
+    parser.add_argument(
+        "--format",
+        choices=[import_format.value for import_format in ImportFormat],
+        default=ImportFormat.NDJSON.value,
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.IMPORT_BATCH_SIZE,
+        help="records per transaction (default IMPORT_BATCH_SIZE)",
+    )
+    parser.add_argument(
+        "--no-create",
+        action="store_true",
+        help="reject records of monitors that do not exist",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.file == "-":
+        lines = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    else:
+        lines = open(  # pylint: disable=consider-using-with
+            args.file, encoding="utf-8", newline=""
+        )
+    with lines, SessionLocal() as db:
+        summary = import_statuses(
+            db,
+            lines,
+            ImportFormat(args.format),
+            create=not args.no_create,
+            batch_size=args.batch_size,
+        )
+    for error in summary.errors:
+        logger.warning("Rejected %s", error)
+    _log_progress(summary)
+    return 1 if summary.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
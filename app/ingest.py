@@ -0,0 +1,355 @@
+"""
+Status ingestion module.
+
+All monitor status writes go through ``record_status``. Updates that carry an
+idempotency key are inserted with ``ON CONFLICT DO NOTHING`` against the partial
+unique index on ``(monitor_id, idempotency_key)``, so a retried update costs one
+index probe and writes nothing.
+
+Updates may also carry the time the event happened. The current state of a
+monitor is its status with the latest timestamp, so a late or backfilled event
+is stored in history without replacing a newer state.
+
+Statuses derived by the server, which carry no idempotency key, can be written
+in bulk with ``record_statuses``: one multi-row INSERT and one commit.
+
+Both check every update newer than the monitor's current status with the flap
+detector (see ``app.flapping``): statuses are stored with the monitor's
+flapping flag, and updates suppressed while a monitor flaps are not written
+until it stops: ``FlapSweeper`` then writes the last one with
+``record_settled``. A retried update is recognised by its key before that check, so it is
+reported as a duplicate rather than suppressed. Updates that change the state
+of a composite member are rolled up to its composites in the same transaction
+(see ``app.rollup``), and so are the webhook events of the transitions that
+were written (see ``app.webhooks``). Messages are interned on the way in (see
+``app.messages``).
+"""
+
+import enum
+import logging
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.flapping import FlapCheck, flap_detector
+from app.messages import intern_messages
+from app.metrics import STATUS_DUPLICATES, STATUS_SUPPRESSED, STATUS_UPDATES
+from app.models.monitor import MonitorState, MonitorStatus
+from app.payload_cache import payload_cache
+from app.rollup import RollupStatus, member_changes, propagate
+from app.state_store import as_utc, state_store
+from app.statements import LATEST_TIMESTAMP, STATUS_WITH_KEY, UPSERT_INSERTS
+from app.webhooks import Transition, enqueue, watch
+
+logger = logging.getLogger(__name__)
+
+
+class RecordResult(str, enum.Enum):
+    """Outcome of recording a status update."""
+
+    WRITTEN = "written"
+    DUPLICATE = "duplicate"
+    SUPPRESSED = "suppressed"
+
+
+def _insert_status(db: Session, values: dict) -> int | None:
+    """Insert a status row, returning its id, or None if its key was seen."""
+    (values,) = intern_messages(db, [values])
+    statement = insert(MonitorStatus).values(**values)
+    if values["idempotency_key"] is None:
+        return db.execute(statement).inserted_primary_key[0]
+
+    dialect_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        try:
+            with db.begin_nested():
+                return db.execute(statement).inserted_primary_key[0]
+        except IntegrityError:
+            return None
+
+    return db.scalar(
+        dialect_insert(MonitorStatus)
+        .values(**values)
+        .on_conflict_do_nothing(
+            index_elements=["monitor_id", "idempotency_key"],
+            index_where=MonitorStatus.idempotency_key.isnot(None),
+        )
+        .returning(MonitorStatus.id)
+    )
+
+
+def _check_flapping(
+    db: Session,
+    monitor_id: int,
+    state: MonitorState,
+    message: str | None,
+    timestamp: datetime,
+) -> FlapCheck:
+    """Check an update with the flap detector unless it is backfilled."""
+    current = db.scalar(LATEST_TIMESTAMP, {"monitor_id": monitor_id})
+    if current is not None and as_utc(current) > timestamp:
+        # Stored in history without replacing the current state
+        return FlapCheck(False, False)
+    return flap_detector.check(monitor_id, state, timestamp.timestamp(), message)
+
+
+def _published(values: dict, status_id: int) -> None:
+    """Apply a committed status to the in-memory views of it."""
+    STATUS_UPDATES.labels(state=values["state"].value).inc()
+    state_store.apply_status(
+        values["monitor_id"],
+        values["state"],
+        values["message"],
+        values["timestamp"],
+        status_id,
+        values["flapping"],
+    )
+
+
+def publish_rollups(statuses: Iterable[RollupStatus]) -> None:
+    """
+    Apply committed composite statuses to the in-memory views of them.
+
+    Args:
+        statuses: Statuses written by ``app.rollup``
+    """
+    for status in statuses:
+        STATUS_UPDATES.labels(state=status.state.value).inc()
+        state_store.apply_status(
+            status.monitor_id,
+            status.state,
+            status.message,
+            status.timestamp,
+            status.status_id,
+        )
+
+
+def _transitions(
+    watched: Dict[int, MonitorState | None],
+    written: Iterable[Tuple[dict, int]],
+    rollups: Iterable[RollupStatus],
+) -> List[Transition]:
+    """Collect the transitions of written statuses for the webhook outbox."""
+    transitions = [
+        Transition(
+            values["monitor_id"],
+            watched[values["monitor_id"]],
+            values["state"],
+            values["message"],
+            values["timestamp"],
+            status_id,
+        )
+        for values, status_id in written
+        if values["monitor_id"] in watched
+    ]
+    transitions += [
+        Transition(
+            status.monitor_id,
+            status.previous,
+            status.state,
+            status.message,
+            status.timestamp,
+            status.status_id,
+        )
+        for status in rollups
+    ]
+    return transitions
+
+
+def record_status(  # pylint: disable=too-many-arguments
+    db: Session,
+    monitor_id: int,
+    state: MonitorState,
+    message: str | None = None,
+    *,
+    timestamp: datetime | None = None,
+    idempotency_key: str | None = None,
+) -> RecordResult:
+    """
+    Record a monitor status and commit it.
+
+    Args:
+        db: Database session
+        monitor_id: ID of an existing monitor
+        state: Reported state
+        message: Optional message
+        timestamp: When the event happened; defaults to now
+        idempotency_key: Optional key identifying the update across retries
+
+    Returns:
+        RecordResult: Whether a row was written, or why not
+    """
+    timestamp = (timestamp or datetime.now(UTC)).astimezone(UTC)
+    if idempotency_key is not None and db.scalar(
+        STATUS_WITH_KEY,
+        {"monitor_id": monitor_id, "idempotency_key": idempotency_key},
+    ):
+        STATUS_DUPLICATES.inc()
+        return RecordResult.DUPLICATE
+    flap = _check_flapping(db, monitor_id, state, message, timestamp)
+    if flap.suppressed:
+        STATUS_SUPPRESSED.inc()
+        return RecordResult.SUPPRESSED
+
+    values = {
+        "monitor_id": monitor_id,
+        "state": state,
+        "message": message,
+        "timestamp": timestamp,
+        "idempotency_key": idempotency_key,
+        "flapping": flap.flapping,
+    }
+    if _write_status(db, values) is None:
+        STATUS_DUPLICATES.inc()
+        return RecordResult.DUPLICATE
+    return RecordResult.WRITTEN
+
+
+def _write_status(db: Session, values: dict) -> int | None:
+    """Write and publish one status; return its id, or None if its key was seen."""
+    updates = [(values["monitor_id"], values["state"], values["timestamp"])]
+    changes = member_changes(db, updates)
+    watched = watch(db, updates)
+    status_id = _insert_status(db, values)
+    rollups = []
+    if status_id is not None:
+        rollups = propagate(db, changes, datetime.now(UTC))
+        enqueue(db, _transitions(watched, [(values, status_id)], rollups))
+    db.commit()
+
+    if status_id is not None:
+        _published(values, status_id)
+        publish_rollups(rollups)
+        payload_cache.invalidate()
+    return status_id
+
+
+def record_settled(db: Session, now: float | None = None) -> int:
+    """
+    Write the updates held back while monitors flapped, once they stop.
+
+    Each update is written with its own timestamp and unflagged, unless the
+    monitor has a newer status by now.
+
+    Args:
+        db: Database session
+        now: Unix time of the check; defaults to now
+
+    Returns:
+        int: Number of statuses written
+    """
+    written = 0
+    for held in flap_detector.settled(time.time() if now is None else now):
+        timestamp = datetime.fromtimestamp(held.timestamp, UTC)
+        current = db.scalar(LATEST_TIMESTAMP, {"monitor_id": held.monitor_id})
+        if current is None or as_utc(current) >= timestamp:
+            # Deleted, or superseded by a status written elsewhere
+            continue
+        values = {
+            "monitor_id": held.monitor_id,
+            "state": held.state,
+            "message": held.message,
+            "timestamp": timestamp,
+            "idempotency_key": None,
+            "flapping": False,
+        }
+        try:
+            _write_status(db, values)
+        except IntegrityError:
+            # The monitor was deleted meanwhile
+            db.rollback()
+            continue
+        written += 1
+    return written
+
+
+def record_statuses(
+    db: Session,
+    statuses: Iterable[Tuple[int, MonitorState, str | None]],
+    *,
+    timestamp: datetime | None = None,
+) -> List[int]:
+    """
+    Record statuses of many monitors in one statement and commit them.
+
+    Args:
+        db: Database session
+        statuses: Monitor id, state and message of each status
+        timestamp: When the events happened; defaults to now
+
+    Returns:
+        List[int]: Ids of the monitors whose status was written; the others
+            were suppressed as flapping
+
+    Raises:
+        IntegrityError: If a monitor does not exist; nothing is written
+    """
+    timestamp = (timestamp or datetime.now(UTC)).astimezone(UTC)
+    rows = []
+    for monitor_id, state, message in statuses:
+        flap = flap_detector.check(monitor_id, state, timestamp.timestamp(), message)
+        if flap.suppressed:
+            STATUS_SUPPRESSED.inc()
+            continue
+        rows.append(
+            {
+                "monitor_id": monitor_id,
+                "state": state,
+                "message": message,
+                "timestamp": timestamp,
+                "idempotency_key": None,
+                "flapping": flap.flapping,
+            }
+        )
+    if not rows:
+        return []
+    updates = [(row["monitor_id"], row["state"], timestamp) for row in rows]
+    changes = member_changes(db, updates)
+    watched = watch(db, updates)
+    status_ids = db.scalars(
+        insert(MonitorStatus).returning(MonitorStatus.id, sort_by_parameter_order=True),
+        intern_messages(db, rows),
+    ).all()
+    rollups = propagate(db, changes, datetime.now(UTC))
+    enqueue(db, _transitions(watched, zip(rows, status_ids), rollups))
+    db.commit()
+
+    for row, status_id in zip(rows, status_ids):
+        _published(row, status_id)
+    publish_rollups(rollups)
+    payload_cache.invalidate()
+    return [row["monitor_id"] for row in rows]
+
+
+class FlapSweeper(threading.Thread):
+    """
+    Background thread writing held updates of monitors that stopped flapping.
+
+    Args:
+        session_factory: Creates database sessions for the status writes
+        interval_seconds: Interval between sweeps
+    """
+
+    def __init__(self, session_factory, interval_seconds):
+        super().__init__(name="flap-sweeper", daemon=True)
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval_seconds):
+            try:
+                with self.session_factory() as db:
+                    record_settled(db)
+            except SQLAlchemyError as e:
+                logger.error("Writing settled flapping updates failed: %s", str(e))
+
+    def stop(self) -> None:
+        """Stop the thread and wait for it to finish."""
+        self.stopped.set()
+        self.join()
@@ -3,39 +3,121 @@ Main application module.
 """
 
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 from mangum import Mangum
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from app.core.config import settings
-from app.api.endpoints import monitor
-from app.database import init_db
-from app.telemetry import init_telemetry, instrument_app
+from app.api.dependencies import get_read_db
+from app.api.endpoints import composite, history, monitor, rules, search, webhook
+from app.database import ReadSessionLocal, SessionLocal, engine, init_db, read_engine
+from app.ingest import FlapSweeper
+from app.metrics import MetricsMiddleware, render_metrics
+from app.query_stats import QueryStatsMiddleware
+from app.ratelimit import ConcurrencyLimitMiddleware
+from app.rules import RuleEvaluator, rule_engine
+from app.state_store import StateStoreSyncer, state_store
+from app.telemetry import init_telemetry, instrument_app, instrument_database
+from app.webhooks import WebhookDispatcher
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize database
-try:
-    init_db()
-    logger.info("Database initialized successfully")
-except SQLAlchemyError as e:
-    logger.error("Database initialization failed: %s", str(e))
-    raise
+# Initialize database, unless the schema is managed by Alembic migrations
+if settings.DB_CREATE_TABLES_ON_STARTUP:
+    try:
+        init_db()
+        logger.info("Database initialized successfully")
+    except SQLAlchemyError as e:
+        logger.error("Database initialization failed: %s", str(e))
+        raise
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Start the enabled state store, rule engine, flap sweeper and webhooks."""
+    # Runs in each worker after fork, so every process has its own copy
+    threads = []
+    if settings.STATE_STORE_ENABLED:
+        with ReadSessionLocal() as db:
+            state_store.load(db)
+        logger.info("State store loaded with %d monitors", len(state_store))
+        threads.append(
+            StateStoreSyncer(
+                state_store,
+                ReadSessionLocal,
+                settings.STATE_STORE_SYNC_SECONDS,
+                settings.STATE_STORE_RELOAD_SECONDS,
+            )
+        )
+    if settings.RULES_ENABLED:
+        with SessionLocal() as db:
+            rule_engine.load(db)
+        logger.info("Rule engine loaded with %d rules", len(rule_engine))
+        threads.append(
+            RuleEvaluator(
+                rule_engine,
+                SessionLocal,
+                settings.RULES_EVALUATION_SECONDS,
+                settings.RULES_RELOAD_SECONDS,
+            )
+        )
+    if settings.FLAP_SUPPRESSION:
+        threads.append(FlapSweeper(SessionLocal, settings.FLAP_SWEEP_SECONDS))
+    if settings.WEBHOOKS_ENABLED:
+        threads.append(WebhookDispatcher(SessionLocal))
+
+    for thread in threads:
+        thread.start()
+    try:
+        yield
+    finally:
+        for thread in threads:
+            thread.stop()
+        state_store.clear()
+        rule_engine.clear()
+
 
 app = FastAPI(
-    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    title=settings.PROJECT_NAME,
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
-# Initialize OpenTelemetry
-tracer_provider = init_telemetry(service_name=settings.PROJECT_NAME)
+if settings.TELEMETRY_ENABLED:
+    # Initialize OpenTelemetry
+    tracer_provider = init_telemetry(service_name=settings.PROJECT_NAME)
+
+    # Instrument FastAPI with OpenTelemetry
+    instrument_app(app, tracer_provider)
+
+    # Trace database statements with OpenTelemetry, on the replica too
+    instrument_database(
+        [engine] if read_engine is engine else [engine, read_engine],
+        tracer_provider,
+    )
 
-# Instrument FastAPI with OpenTelemetry
-instrument_app(app, tracer_provider)
+# Report per-request SQL statement counts and database time
+app.add_middleware(QueryStatsMiddleware)
 
-# Add CORS middleware
+# Shed requests above the concurrency limits before they reach a handler
+app.add_middleware(
+    ConcurrencyLimitMiddleware,
+    max_requests=settings.MAX_CONCURRENT_REQUESTS,
+    max_writes=settings.MAX_CONCURRENT_WRITES,
+)
+
+# Record request latency histograms for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Add CORS middleware last, so it is outermost and shed responses get its headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -46,6 +128,11 @@ app.add_middleware(
 
 # Include routers
 app.include_router(monitor.router, prefix=settings.API_V1_STR)
+app.include_router(rules.router, prefix=settings.API_V1_STR)
+app.include_router(composite.router, prefix=settings.API_V1_STR)
+app.include_router(history.router, prefix=settings.API_V1_STR)
+app.include_router(search.router, prefix=settings.API_V1_STR)
+app.include_router(webhook.router, prefix=settings.API_V1_STR)
 
 # Lambda handler
 handler = Mangum(app)
@@ -55,3 +142,9 @@ handler = Mangum(app)
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(db: Session = Depends(get_read_db)):
+    """Prometheus metrics endpoint."""
+    return Response(content=render_metrics(db), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,177 @@
+"""
+Status message interning module.
+
+Most status messages repeat: checks report the same handful of texts over and
+over. With ``MESSAGE_INTERNING`` on, each distinct message up to
+``MESSAGE_INTERN_MAX_LENGTH`` characters is stored once in ``status_messages``
+and statuses reference it by ``message_id``, leaving their inline ``message``
+empty. Longer messages, and statuses written with interning off, keep the text
+inline. Readers select ``STATUS_MESSAGE`` from ``app.statements``, which
+resolves both forms in the query that reads the statuses.
+
+Messages are never updated or deleted, so the text to id mapping is cached for
+the life of the process. Like the tag cache, it only learns ids read back from
+the database, and never from the session that created them, so an id that
+might still be rolled back is never served.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.metrics import record_cache_lookup
+from app.models.monitor import StatusMessage
+from app.statements import UPSERT_INSERTS
+
+# Session.info key of the texts a session created, which are never cached from
+# it
+_CREATED = "created_messages"
+
+# Ids of existing messages; parameter ``texts``
+_MESSAGE_IDS = select(StatusMessage.text, StatusMessage.id).where(
+    StatusMessage.text.in_(bindparam("texts", expanding=True))
+)
+
+
+class MessageCache:
+    """
+    Bounded, thread-safe LRU cache of message texts to message ids.
+
+    Args:
+        maxsize: Maximum number of texts kept
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._ids: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, ids: Dict[str, int]) -> None:
+        with self._lock:
+            for text, message_id in ids.items():
+                self._ids[text] = message_id
+                self._ids.move_to_end(text)
+            while len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+
+    def _create(self, db: Session, texts: List[str]) -> Dict[str, int]:
+        """Insert the texts that do not exist, returning the ids created."""
+        dialect_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if dialect_insert is not None:
+            return dict(
+                db.execute(
+                    dialect_insert(StatusMessage)
+                    .values([{"text": text} for text in texts])
+                    .on_conflict_do_nothing(index_elements=["text"])
+                    .returning(StatusMessage.text, StatusMessage.id)
+                ).all()
+            )
+        created = {}
+        for text in texts:
+            try:
+                with db.begin_nested():
+                    created[text] = db.scalar(
+                        insert(StatusMessage)
+                        .values(text=text)
+                        .returning(StatusMessage.id)
+                    )
+            except IntegrityError:
+                pass
+        return created
+
+    def get_or_create_ids(self, db: Session, texts: Iterable[str]) -> Dict[str, int]:
+        """
+        Look up the ids of message texts, creating the ones that do not exist.
+
+        New messages are flushed but not committed; the caller commits them.
+
+        Args:
+            db: Database session
+            texts: Message texts
+
+        Returns:
+            Dict[str, int]: Message ids by text
+        """
+        ids, missing = {}, []
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                message_id = self._ids.get(text)
+                if message_id is None:
+                    missing.append(text)
+                else:
+                    self._ids.move_to_end(text)
+                    ids[text] = message_id
+                record_cache_lookup("messages", message_id is not None)
+        if not missing:
+            return ids
+
+        found = dict(db.execute(_MESSAGE_IDS, {"texts": missing}).all())
+        # Texts this session created may not be committed yet
+        created = db.info.setdefault(_CREATED, set())
+        self._remember(
+            {
+                text: message_id
+                for text, message_id in found.items()
+                if text not in created
+            }
+        )
+        ids.update(found)
+        new_texts = [text for text in missing if text not in found]
+        if new_texts:
+            new_ids = self._create(db, new_texts)
+            created.update(new_ids)
+            ids.update(new_ids)
+            # Created by a concurrent writer between the lookup and the insert
+            raced = [text for text in new_texts if text not in ids]
+            if raced:
+                ids.update(db.execute(_MESSAGE_IDS, {"texts": raced}).all())
+        return ids
+
+    def invalidate(self) -> None:
+        """Forget all cached messages."""
+        with self._lock:
+            self._ids.clear()
+
+
+message_cache = MessageCache(settings.MESSAGE_CACHE_SIZE)
+
+
+def intern_messages(db: Session, rows: Iterable[dict]) -> List[dict]:
+    """
+    Build the insert parameters of status rows with their messages interned.
+
+    Every returned row has a ``message_id``, so the rows can be inserted
+    together whichever of them were interned.
+
+    Args:
+        db: Database session; the caller commits any messages created
+        rows: Status insert parameters, each with a ``message``
+
+    Returns:
+        List[dict]: Copies of the rows, with ``message`` moved to
+            ``message_id`` where it was interned
+    """
+    rows = list(rows)
+    ids = {}
+    if settings.MESSAGE_INTERNING:
+        texts = [
+            row["message"]
+            for row in rows
+            if row["message"]
+            and len(row["message"]) <= settings.MESSAGE_INTERN_MAX_LENGTH
+        ]
+        if texts:
+            ids = message_cache.get_or_create_ids(db, texts)
+    return [
+        (
+            {**row, "message": None, "message_id": ids[row["message"]]}
+            if row["message"] in ids
+            else {**row, "message_id": None}
+        )
+        for row in rows
+    ]
@@ -0,0 +1,264 @@
+"""
+Prometheus metrics module.
+
+This module defines the application metrics, the ASGI middleware recording
+request latency, database pool instrumentation and the ``/metrics`` exposition.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set before the application starts, every
+worker process writes its samples to that directory and ``/metrics`` aggregates
+them, so any worker can answer a scrape.
+"""
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.monitor import MonitorState
+from app.statements import LATEST_STATUSES
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+STATUS_UPDATES = Counter(
+    "monitor_status_updates_total",
+    "Monitor status updates ingested, by state",
+    ["state"],
+)
+STATUS_DUPLICATES = Counter(
+    "monitor_status_duplicates_total",
+    "Retried status updates dropped by their idempotency key",
+)
+STATUS_SUPPRESSED = Counter(
+    "monitor_status_suppressed_total",
+    "Status updates not written because their monitor is flapping",
+)
+REQUESTS_SHED = Counter(
+    "http_requests_shed_total",
+    "Requests rejected by rate or concurrency limits, by reason",
+    ["reason"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit or miss)",
+    ["cache", "result"],
+)
+RULE_SAMPLES = Counter(
+    "rule_samples_total",
+    "Metric samples taken by threshold rules, by result (evaluated or ignored)",
+    ["result"],
+)
+RULE_EVALUATION = Histogram(
+    "rule_evaluation_seconds",
+    "Time an evaluation pass of the threshold rules takes, without writes",
+)
+WEBHOOK_EVENTS = Counter(
+    "webhook_events_total",
+    "Webhook events by delivery outcome (delivered, retried or dead_lettered)",
+    ["result"],
+)
+WEBHOOK_DELIVERY = Histogram(
+    "webhook_delivery_seconds",
+    "Time webhook POSTs take, including failed ones",
+)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Database connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_CONNECTION_HOLD = Histogram(
+    "db_connection_hold_seconds",
+    "Time database connections stay checked out of the pool, by route",
+    ["pool", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0),
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond the configured pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+
+# ASGI scope of the request being handled, for labelling pool checkouts
+_current_scope: ContextVar[dict | None] = ContextVar("request_scope", default=None)
+
+
+def current_route() -> str:
+    """
+    Return the path template of the route being handled.
+
+    Returns:
+        str: Route template, ``unmatched`` before routing, or ``background``
+            outside of a request
+    """
+    scope = _current_scope.get()
+    if scope is None:
+        return "background"
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Count a cache lookup.
+
+    Args:
+        cache: Name of the cache
+        hit: Whether the lookup was served from the cache
+    """
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def instrument_pool(engine: Engine, name: str = "primary") -> None:
+    """
+    Track checked-out and overflow connections of an engine's pool.
+
+    Args:
+        engine: SQLAlchemy engine whose pool is observed
+        name: Value of the ``pool`` label
+    """
+    pool = engine.pool
+    in_use = DB_POOL_IN_USE.labels(pool=name)
+    overflow_gauge = DB_POOL_OVERFLOW.labels(pool=name)
+
+    def update_overflow():
+        overflow = getattr(pool, "overflow", None)
+        if overflow is not None:
+            overflow_gauge.set(max(overflow(), 0))
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        # pylint: disable=unused-argument
+        in_use.inc()
+        update_overflow()
+        # The route is read at checkout: checkin may run outside the request
+        connection_record.info["checkout"] = (current_route(), time.perf_counter())
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        # pylint: disable=unused-argument
+        in_use.dec()
+        update_overflow()
+        checkout = connection_record.info.pop("checkout", None)
+        if checkout is not None:
+            route, checked_out_at = checkout
+            DB_CONNECTION_HOLD.labels(pool=name, route=route).observe(
+                time.perf_counter() - checked_out_at
+            )
+
+
+_latest = LATEST_STATUSES.order_by(None).subquery()
+# Number of monitors whose latest status is in each state
+_MONITORS_BY_STATE = select(
+    _latest.c.state, func.count()  # pylint: disable=not-callable
+).group_by(_latest.c.state)
+
+
+class MonitorStateCollector:  # pylint: disable=too-few-public-methods
+    """
+    Collector reporting the number of monitors in each state.
+
+    The counts come from the database at scrape time, so every worker reports
+    the same fleet-wide values.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def collect(self):
+        """Yield the ``monitors_by_state`` gauge family."""
+        family = GaugeMetricFamily(
+            "monitors_by_state",
+            "Monitors whose latest status is in each state",
+            labels=["state"],
+        )
+        counts = {state: 0 for state in MonitorState}
+        try:
+            rows = self.db.execute(_MONITORS_BY_STATE).all()
+            counts.update(dict(rows))
+        except SQLAlchemyError as e:
+            logger.error("Failed to count monitors by state: %s", str(e))
+            return
+
+        for state, count in counts.items():
+            family.add_metric([state.value], count)
+        yield family
+
+
+class MetricsMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    ASGI middleware recording request latency by route template.
+
+    Routes are labelled with their path template (``/monitor/{monitor_id}/...``)
+    rather than the concrete URL to keep label cardinality bounded. The same
+    label is applied to the time the request holds database connections.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+        token = _current_scope.set(scope)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=current_route(),
+                status=str(status_code),
+            ).observe(time.perf_counter() - started)
+            _current_scope.reset(token)
+
+
+def render_metrics(db: Session) -> bytes:
+    """
+    Render all metrics in the Prometheus text format.
+
+    Args:
+        db: Database session used for scrape-time database metrics
+
+    Returns:
+        bytes: Exposition payload
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        process_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(process_registry)
+    else:
+        process_registry = REGISTRY
+
+    database_registry = CollectorRegistry()
+    database_registry.register(MonitorStateCollector(db))
+    return generate_latest(process_registry) + generate_latest(database_registry)
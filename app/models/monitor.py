@@ -7,11 +7,53 @@ This module defines SQLAlchemy ORM models for monitors, their states, and tags.
 from datetime import UTC, datetime
 import enum
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Table
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    String,
+    Table,
+    event,
+    text,
+)
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
 
+# Trigram operator classes of the name search indexes
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def _name_search_indexes(table: str) -> tuple:
+    """
+    Indexes for name search on PostgreSQL (see ``app.search``).
+
+    Both index names in the "C" collation that searches compare them in.
+    Trigrams serve substring and glob patterns; code point order serves
+    prefixes and the name order of result pages.
+    """
+    return (
+        Index(
+            f"ix_{table}_name_trgm",
+            text('(name COLLATE "C") gin_trgm_ops'),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index(f"ix_{table}_name_c", text('name COLLATE "C"')).ddl_if(
+            dialect="postgresql"
+        ),
+    )
+
 
 class MonitorState(str, enum.Enum):
     """Monitor state enumeration."""
@@ -22,12 +64,21 @@ class MonitorState(str, enum.Enum):
     MISSING_DATA = "Missing Data"
 
 
+class RuleAggregate(str, enum.Enum):
+    """How a threshold rule reduces the samples in its window to one value."""
+
+    MEAN = "mean"
+    MAX = "max"
+    MIN = "min"
+    LAST = "last"
+
+
 # Association table for monitor-tag many-to-many relationship
 monitor_tags = Table(
     "monitor_tags",
     Base.metadata,
-    Column("monitor_id", Integer, ForeignKey("monitor.id")),
-    Column("tag_id", Integer, ForeignKey("tags.id")),
+    Column("monitor_id", Integer, ForeignKey("monitor.id", ondelete="CASCADE")),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE")),
 )
 
 
@@ -38,16 +89,26 @@ class Monitor(Base):  # pylint: disable=too-few-public-methods
     Attributes:
         id: Unique identifier
         name: Monitor name
+        composite: Whether the state is rolled up from member monitors
         statuses: Relationship to monitor statuses
         tags: Relationship to monitor tags
     """
 
     __tablename__ = "monitor"
+    __table_args__ = _name_search_indexes("monitor")
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
-    statuses = relationship("MonitorStatus", back_populates="monitor")
-    tags = relationship("Tag", secondary=monitor_tags, back_populates="monitors")
+    composite = Column(
+        Boolean, default=False, server_default=text("false"), nullable=False
+    )
+    # Rows in monitor_statuses and monitor_tags are removed by ON DELETE CASCADE
+    statuses = relationship(
+        "MonitorStatus", back_populates="monitor", passive_deletes=True
+    )
+    tags = relationship(
+        "Tag", secondary=monitor_tags, back_populates="monitors", passive_deletes=True
+    )
 
 
 class MonitorStatus(Base):  # pylint: disable=too-few-public-methods
@@ -60,22 +121,60 @@ class MonitorStatus(Base):  # pylint: disable=too-few-public-methods
         state: Current state of the monitor
         message: Additional message for the monitor status
         timestamp: When this state was recorded
+        idempotency_key: Client-supplied key that makes retried updates no-ops
+        flapping: Whether the monitor was flapping when the status was written
+        message_id: Interned message, used instead of ``message`` when set
         monitor: Relationship to the parent monitor
     """
 
     __tablename__ = "monitor_statuses"
+    __table_args__ = (
+        # Latest state, history and transitions of one monitor
+        Index("ix_monitor_statuses_monitor_id_timestamp", "monitor_id", "timestamp"),
+        # Fleet-wide feeds in time order
+        Index("ix_monitor_statuses_timestamp", "timestamp"),
+        # Partial, so updates without a key are not constrained at all
+        Index(
+            "ix_monitor_statuses_idempotency_key",
+            "monitor_id",
+            "idempotency_key",
+            unique=True,
+            postgresql_where=text("idempotency_key IS NOT NULL"),
+            sqlite_where=text("idempotency_key IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    monitor_id = Column(Integer, ForeignKey("monitor.id"))
+    monitor_id = Column(Integer, ForeignKey("monitor.id", ondelete="CASCADE"))
     state = Column(Enum(MonitorState))
     message = Column(String, nullable=True)
     timestamp = Column(
         DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False
     )
+    idempotency_key = Column(String, nullable=True)
+    flapping = Column(
+        Boolean, default=False, server_default=text("false"), nullable=False
+    )
+    message_id = Column(Integer, ForeignKey("status_messages.id"), nullable=True)
 
     monitor = relationship("Monitor", back_populates="statuses")
 
 
+class StatusMessage(Base):  # pylint: disable=too-few-public-methods
+    """
+    Interned status message, stored once and referenced by statuses.
+
+    Attributes:
+        id: Unique identifier
+        text: Message text
+    """
+
+    __tablename__ = "status_messages"
+
+    id = Column(Integer, primary_key=True)
+    text = Column(String, unique=True, nullable=False)
+
+
 class Tag(Base):  # pylint: disable=too-few-public-methods
     """
     Tag model for categorizing monitors.
@@ -87,6 +186,7 @@ class Tag(Base):  # pylint: disable=too-few-public-methods
     """
 
     __tablename__ = "tags"
+    __table_args__ = _name_search_indexes("tags")
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
@@ -94,3 +194,188 @@ class Tag(Base):  # pylint: disable=too-few-public-methods
 
 
 # Rest of your model definitions...
+
+
+class ThresholdRule(Base):  # pylint: disable=too-few-public-methods
+    """
+    Threshold rule deriving a monitor's state from its metric samples.
+
+    Attributes:
+        id: Unique identifier
+        monitor_id: Monitor the rule belongs to; a monitor has at most one rule
+        aggregate: How the samples in the window are reduced to one value
+        window_seconds: Length of the evaluation window
+        warning: Value at which the monitor is Warning, if any
+        critical: Value at which the monitor is Critical, if any
+        above: True if values at or above the thresholds are bad, False if
+            values at or below them are
+        hysteresis: How far past a threshold the value must recover before the
+            state is lowered again
+    """
+
+    __tablename__ = "threshold_rules"
+
+    id = Column(Integer, primary_key=True)
+    monitor_id = Column(
+        Integer,
+        ForeignKey("monitor.id", ondelete="CASCADE"),
+        unique=True,
+        nullable=False,
+    )
+    aggregate = Column(Enum(RuleAggregate), nullable=False)
+    window_seconds = Column(Float, nullable=False)
+    warning = Column(Float, nullable=True)
+    critical = Column(Float, nullable=True)
+    above = Column(Boolean, nullable=False)
+    hysteresis = Column(Float, nullable=False)
+
+
+# Direct members of composite monitors, with the monitors matched by member tags
+# expanded; ``member_id`` rows are looked up on every status change
+rollup_edges = Table(
+    "rollup_edges",
+    Base.metadata,
+    Column(
+        "composite_id",
+        Integer,
+        ForeignKey("monitor.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "member_id",
+        Integer,
+        ForeignKey("monitor.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
+)
+
+# Tags whose monitors, including ones created later, are composite members
+composite_member_tags = Table(
+    "composite_member_tags",
+    Base.metadata,
+    Column(
+        "composite_id",
+        Integer,
+        ForeignKey("monitor.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "tag_id",
+        Integer,
+        ForeignKey("tags.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
+)
+
+
+class CompositeRollup(Base):  # pylint: disable=too-few-public-methods
+    """
+    Number of a composite monitor's members in each state.
+
+    Attributes:
+        composite_id: The composite monitor
+        normal: Members whose current state is Normal
+        warning: Members whose current state is Warning
+        missing_data: Members whose current state is Missing Data
+        critical: Members whose current state is Critical
+    """
+
+    __tablename__ = "composite_rollups"
+
+    composite_id = Column(
+        Integer, ForeignKey("monitor.id", ondelete="CASCADE"), primary_key=True
+    )
+    normal = Column(Integer, default=0, nullable=False)
+    warning = Column(Integer, default=0, nullable=False)
+    missing_data = Column(Integer, default=0, nullable=False)
+    critical = Column(Integer, default=0, nullable=False)
+
+
+class WebhookSubscription(Base):  # pylint: disable=too-few-public-methods
+    """
+    Outbound webhook fired on state transitions.
+
+    A subscription without a monitor or tag matches every monitor.
+
+    Attributes:
+        id: Unique identifier
+        url: Endpoint the events are POSTed to
+        monitor_id: Only transitions of this monitor, if set
+        tag_id: Only transitions of monitors with this tag, if set
+        states: Only transitions into or out of these state values, if set
+    """
+
+    __tablename__ = "webhook_subscriptions"
+
+    id = Column(Integer, primary_key=True)
+    url = Column(String, nullable=False)
+    monitor_id = Column(
+        Integer, ForeignKey("monitor.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    tag_id = Column(
+        Integer, ForeignKey("tags.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    states = Column(JSON, nullable=True)
+
+
+class WebhookOutbox(Base):  # pylint: disable=too-few-public-methods
+    """
+    Webhook event waiting to be delivered, written with the status it reports.
+
+    Attributes:
+        id: Unique identifier, in the order events were recorded
+        subscription_id: Subscription the event is delivered to
+        event: JSON body of the event
+        attempts: Failed delivery attempts so far
+        next_attempt_at: Earliest time of the next attempt; a dispatcher that
+            claims the event pushes it forward while delivering
+        last_error: Error of the last failed attempt
+    """
+
+    __tablename__ = "webhook_outbox"
+    __table_args__ = (
+        # Dispatchers look up the events that are due
+        Index("ix_webhook_outbox_next_attempt_at", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    subscription_id = Column(
+        Integer,
+        ForeignKey("webhook_subscriptions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    event = Column(JSON, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(String, nullable=True)
+
+
+class WebhookDeadLetter(Base):  # pylint: disable=too-few-public-methods
+    """
+    Webhook event given up on after ``WEBHOOK_MAX_ATTEMPTS`` failed attempts.
+
+    Attributes:
+        id: Unique identifier
+        subscription_id: Subscription it was for, unless since deleted
+        url: Endpoint it was POSTed to
+        event: JSON body of the event
+        attempts: Delivery attempts made
+        error: Error of the last attempt
+        failed_at: When it was given up on
+    """
+
+    __tablename__ = "webhook_dead_letters"
+
+    id = Column(Integer, primary_key=True)
+    subscription_id = Column(
+        Integer,
+        ForeignKey("webhook_subscriptions.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    url = Column(String, nullable=False)
+    event = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    error = Column(String, nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=False)
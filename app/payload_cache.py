@@ -0,0 +1,175 @@
+"""
+Encoded status list cache module.
+
+The full status list and the lists for recently requested tag sets are kept as
+encoded JSON bytes with an ETag, so a cache hit is served without serializing
+anything. An entry is rebuilt when this process has written since it was built,
+or after ``PAYLOAD_CACHE_TTL_SECONDS`` to pick up other processes' writes.
+
+A rebuild re-encodes only the monitors whose status changed: every monitor's
+JSON object is kept and reused while its fields stay the same. While one
+request rebuilds an entry, concurrent requests are served the previous payload
+instead of waiting for it.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, List, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.metrics import record_cache_lookup
+from app.schemas.monitor import MonitorStatusResponse
+
+# Key of the full status list; tag set entries are keyed by a frozenset of tags
+ALL_MONITORS = frozenset()
+
+PayloadKey = FrozenSet[str]
+
+
+class CachedPayload:  # pylint: disable=too-few-public-methods
+    """
+    Encoded response body.
+
+    Attributes:
+        body: JSON bytes
+        etag: Quoted strong entity tag of the body
+        generation: Write generation the payload was built at
+        built_at: Monotonic time the payload was built
+    """
+
+    __slots__ = ("body", "etag", "generation", "built_at")
+
+    def __init__(self, body: bytes, generation: int):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.generation = generation
+        self.built_at = time.monotonic()
+
+
+def _encode(status: MonitorStatusResponse) -> bytes:
+    """Encode one status the way FastAPI's JSONResponse would."""
+    return json.dumps(
+        jsonable_encoder(status),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode()
+
+
+class PayloadCache:
+    """
+    Encoded status lists by tag set, with per-monitor fragment reuse.
+
+    Args:
+        ttl: Seconds an entry is served without a local write
+        max_tag_sets: Tag set entries kept besides the full list
+    """
+
+    def __init__(self, ttl: float, max_tag_sets: int):
+        self.ttl = ttl
+        self.max_tag_sets = max_tag_sets
+        self._generation = 0
+        self._entries: OrderedDict[PayloadKey, CachedPayload] = OrderedDict()
+        self._fragments: Dict[int, Tuple[tuple, bytes]] = {}
+        self._build_locks: Dict[PayloadKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Mark every entry stale after a write that may change a status."""
+        with self._lock:
+            self._generation += 1
+
+    def clear(self) -> None:
+        """Drop every entry and encoded fragment."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._fragments.clear()
+
+    def _fresh(self, entry: CachedPayload | None) -> bool:
+        return (
+            entry is not None
+            and entry.generation == self._generation
+            and time.monotonic() - entry.built_at < self.ttl
+        )
+
+    def _fragment(self, status: MonitorStatusResponse) -> bytes:
+        """Return the encoded status, reusing it if the monitor is unchanged."""
+        fields = (
+            status.name,
+            status.state,
+            status.message,
+            status.timestamp,
+            status.flapping,
+            tuple(status.tags),
+        )
+        cached = self._fragments.get(status.id)
+        if cached is not None and cached[0] == fields:
+            return cached[1]
+        fragment = _encode(status)
+        self._fragments[status.id] = (fields, fragment)
+        return fragment
+
+    def encode(self, statuses: List[MonitorStatusResponse]) -> bytes:
+        """Encode a status list as a JSON array, reusing unchanged fragments."""
+        return b"[" + b",".join(self._fragment(status) for status in statuses) + b"]"
+
+    def get(
+        self, key: PayloadKey, build: Callable[[], List[MonitorStatusResponse]]
+    ) -> CachedPayload:
+        """
+        Get the payload for a tag set, building it if it is stale.
+
+        Args:
+            key: ``ALL_MONITORS`` or the frozenset of requested tags
+            build: Returns the statuses when the payload must be rebuilt
+
+        Returns:
+            CachedPayload: Encoded payload
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._fresh(entry):
+                self._entries.move_to_end(key)
+                record_cache_lookup("statuses", True)
+                return entry
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        record_cache_lookup("statuses", False)
+
+        # Serve the stale payload rather than queue behind another rebuild
+        if not build_lock.acquire(blocking=entry is None):
+            return entry
+        try:
+            with self._lock:
+                entry = self._entries.get(key)
+                if self._fresh(entry):
+                    return entry
+                generation = self._generation
+
+            statuses = build()
+            with self._lock:
+                entry = CachedPayload(self.encode(statuses), generation)
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_tag_sets + 1:
+                    evicted = next(k for k in self._entries if k != ALL_MONITORS)
+                    del self._entries[evicted]
+                    self._build_locks.pop(evicted, None)
+                if key == ALL_MONITORS:
+                    # Forget deleted monitors
+                    live = {status.id for status in statuses}
+                    for monitor_id in self._fragments.keys() - live:
+                        del self._fragments[monitor_id]
+            return entry
+        finally:
+            build_lock.release()
+
+
+payload_cache = PayloadCache(
+    settings.PAYLOAD_CACHE_TTL_SECONDS, settings.PAYLOAD_CACHE_TAG_SETS
+)
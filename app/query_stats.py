@@ -0,0 +1,129 @@
+"""
+Per-request SQL statement instrumentation.
+
+This module hooks SQLAlchemy engine events to count statements and total
+database time for each request, reports them as OpenTelemetry span attributes
+and a ``Server-Timing`` header, and logs slow queries.
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from opentelemetry import trace
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """
+    Statement statistics collected while handling one request.
+
+    Attributes:
+        count: Number of SQL statements executed
+        duration: Total time spent executing them, in seconds
+    """
+
+    count: int = 0
+    duration: float = 0.0
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    """Return the statistics of the request being handled, if any."""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # pylint: disable=unused-argument,too-many-arguments,too-many-positional-arguments
+    conn.info.setdefault("query_start_time", []).append((context, time.perf_counter()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # pylint: disable=unused-argument,too-many-arguments,too-many-positional-arguments
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()[1]
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        # Log the statement text only; parameter values may contain user data
+        logger.warning(
+            "Slow query (%.1f ms): %s [parameters redacted]", elapsed_ms, statement
+        )
+
+
+def _handle_error(context):
+    # A statement that raises never reaches after_cursor_execute; errors raised
+    # before its cursor was timed, or outside a statement, have nothing to drop
+    starts = (
+        context.connection.info.get("query_start_time")
+        if context.connection is not None
+        else None
+    )
+    if starts and starts[-1][0] is context.execution_context:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Register statement timing hooks on an engine.
+
+    Args:
+        engine: SQLAlchemy engine to instrument
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    ASGI middleware reporting per-request statement counts and database time.
+
+    The totals are attached to the active span as ``db.statement_count`` and
+    ``db.duration_ms`` and returned in a ``Server-Timing`` header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                duration_ms = stats.duration * 1000
+                trace.get_current_span().set_attributes(
+                    {"db.statement_count": stats.count, "db.duration_ms": duration_ms}
+                )
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (
+                        b"server-timing",
+                        f'db;dur={duration_ms:.3f};desc="{stats.count} queries"'.encode(),
+                    )
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
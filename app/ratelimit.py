@@ -0,0 +1,273 @@
+"""
+Rate limiting and load shedding module.
+
+Status updates are rate limited per monitor and per client with token buckets,
+so one agent stuck in a retry loop is answered with 429 instead of taking
+database connections away from everyone else. Buckets live in process memory by
+default; ``RATE_LIMIT_BACKEND`` names a factory for a backend shared between
+processes instead. Behind proxies, clients are told apart by the
+X-Forwarded-For entry the outermost trusted proxy appended
+(``RATE_LIMIT_TRUSTED_PROXIES``); entries left of it are set by the client and
+never trusted.
+
+``ConcurrencyLimitMiddleware`` caps the requests, and separately the writes,
+that a process serves at once. Excess requests are answered with 503 before
+any handler runs, and so before a database session is taken from the pool.
+"""
+
+import importlib
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.metrics import REQUESTS_SHED
+
+# Methods that do not count against the write concurrency limit
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets."""
+
+    @abstractmethod
+    def acquire(self, key: str, rate: float, burst: int) -> float:
+        """
+        Take a token from a bucket.
+
+        Args:
+            key: Bucket identifier
+            rate: Tokens added per second
+            burst: Bucket capacity, which a new bucket starts with
+
+        Returns:
+            float: 0.0 if a token was taken, otherwise the seconds until one is
+            available
+        """
+
+    @abstractmethod
+    def refund(self, key: str, rate: float, burst: int) -> None:
+        """
+        Put back a token taken by ``acquire``, up to the bucket's capacity.
+
+        Args:
+            key: Bucket identifier
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets in process memory.
+
+    Each worker process limits on its own, so with N workers a client can get
+    up to N times the configured rate.
+
+    Args:
+        maxsize: Buckets kept; the least recently used are dropped, which
+            refills them
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def refund(self, key: str, rate: float, burst: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._buckets:
+                return
+            tokens, updated = self._buckets[key]
+            tokens = min(burst, tokens + (now - updated) * rate + 1)
+            self._buckets[key] = (tokens, now)
+
+    def reset(self) -> None:
+        """Refill every bucket."""
+        with self._lock:
+            self._buckets.clear()
+
+
+_backend: RateLimitBackend | None = None
+
+
+def load_backend(name: str) -> RateLimitBackend:
+    """
+    Create the backend configured by ``RATE_LIMIT_BACKEND``.
+
+    Args:
+        name: ``memory``, or ``module:factory`` naming a callable that returns
+            a ``RateLimitBackend``
+
+    Returns:
+        RateLimitBackend: New backend
+    """
+    if name == "memory":
+        return MemoryRateLimitBackend()
+    module_name, _, factory = name.partition(":")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+def get_backend() -> RateLimitBackend:
+    """Return the process-wide rate limit backend, creating it on first use."""
+    global _backend  # pylint: disable=global-statement
+    if _backend is None:
+        _backend = load_backend(settings.RATE_LIMIT_BACKEND)
+    return _backend
+
+
+def set_backend(backend: RateLimitBackend | None) -> None:
+    """Replace the process-wide backend; None recreates it from settings."""
+    global _backend  # pylint: disable=global-statement
+    _backend = backend
+
+
+def client_address(request: Request) -> str:
+    """
+    Get the address a request came from, as seen by the trusted proxies.
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        str: X-Forwarded-For entry appended by the outermost trusted proxy, or
+        the connection's address without trusted proxies or the header
+    """
+    hops = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if hops:
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for address in header.split(",")
+            if address.strip()
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+def limit_status_updates(request: Request, monitor_id: int) -> None:
+    """
+    Rate limit status updates per client and per monitor.
+
+    Args:
+        request: Incoming request
+        monitor_id: ID of the monitor being updated
+
+    Raises:
+        HTTPException: 429 with ``Retry-After`` if either bucket is empty
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    client = client_address(request)
+    buckets = (
+        (
+            "client",
+            f"client:{client}",
+            settings.RATE_LIMIT_CLIENT_PER_SECOND,
+            settings.RATE_LIMIT_CLIENT_BURST,
+        ),
+        (
+            "monitor",
+            f"monitor:{monitor_id}",
+            settings.RATE_LIMIT_MONITOR_PER_SECOND,
+            settings.RATE_LIMIT_MONITOR_BURST,
+        ),
+    )
+    backend = get_backend()
+    for index, (reason, key, rate, burst) in enumerate(buckets):
+        wait = backend.acquire(key, rate, burst)
+        if wait > 0:
+            # A rejected update must not use up the buckets that allowed it
+            for _, taken, taken_rate, taken_burst in buckets[:index]:
+                backend.refund(taken, taken_rate, taken_burst)
+            REQUESTS_SHED.labels(reason=f"{reason}_rate").inc()
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+class ConcurrencyLimitMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    ASGI middleware shedding requests above per-process concurrency limits.
+
+    Args:
+        app: ASGI application
+        max_requests: Requests served at once; 0 for no limit
+        max_writes: Requests other than GET/HEAD/OPTIONS served at once;
+            0 for no limit
+        exempt_paths: Paths that are never shed, such as health checks
+    """
+
+    def __init__(
+        self,
+        app,
+        max_requests: int = 0,
+        max_writes: int = 0,
+        exempt_paths: tuple = ("/health", "/metrics"),
+    ):
+        self.app = app
+        self.max_requests = max_requests
+        self.max_writes = max_writes
+        self.exempt_paths = exempt_paths
+        # Only touched from the event loop, so plain integers are enough
+        self.requests = 0
+        self.writes = 0
+
+    def _overloaded(self, is_write: bool) -> str | None:
+        """Return the limit a new request would exceed, if any."""
+        if self.max_requests and self.requests >= self.max_requests:
+            return "concurrency"
+        if is_write and self.max_writes and self.writes >= self.max_writes:
+            return "write_concurrency"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        is_write = scope["method"] not in READ_METHODS
+        reason = self._overloaded(is_write)
+        if reason:
+            REQUESTS_SHED.labels(reason=reason).inc()
+            response = JSONResponse(
+                {"detail": "Server is overloaded"},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.requests += 1
+        self.writes += is_write
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.requests -= 1
+            self.writes -= is_write
@@ -0,0 +1,588 @@
+"""
+Composite monitor rollup module.
+
+A composite monitor's state is the worst current state of its members: the
+monitors listed when it was created, and every monitor with one of its member
+tags, including monitors created later. Composites can be members of other
+composites, forming a dependency graph stored as expanded ``rollup_edges``.
+
+States are rolled up incrementally. Each composite keeps the number of its
+members in each state (``CompositeRollup``), so a member changing from one
+state to another is a single-row update of each of its parents, and the
+parent's worst state follows from four counters without reading any member.
+Only when a parent's worst state changes is a status written for it and the
+change passed on to its own parents; propagation stops at the first ancestor
+whose state does not change. Everything happens in the transaction of the
+status write that caused it, so every worker sees consistent rollups.
+Composite statuses are timestamped when they are written rather than with the
+member event's time, so they always become the composite's current status.
+
+Membership changes that would make a composite its own member, directly or
+through other composites, are rejected with ``CycleError``.
+"""
+
+from collections import deque
+from functools import lru_cache
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Set, Tuple
+
+from sqlalchemy import Update, bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.messages import intern_messages
+from app.models.monitor import (
+    CompositeRollup,
+    Monitor,
+    MonitorState,
+    MonitorStatus,
+    composite_member_tags,
+    monitor_tags,
+    rollup_edges,
+)
+from app.statements import LATEST_STATUS, LATEST_STATUSES
+from app.transitions import replaced_states
+
+# States from least to most severe; a composite takes the most severe state
+# any of its members is in
+SEVERITY = (
+    MonitorState.NORMAL,
+    MonitorState.WARNING,
+    MonitorState.MISSING_DATA,
+    MonitorState.CRITICAL,
+)
+_COUNTERS = {
+    MonitorState.NORMAL: CompositeRollup.normal,
+    MonitorState.WARNING: CompositeRollup.warning,
+    MonitorState.MISSING_DATA: CompositeRollup.missing_data,
+    MonitorState.CRITICAL: CompositeRollup.critical,
+}
+
+
+class CycleError(ValueError):
+    """Raised when a membership would make a composite its own member."""
+
+
+class MemberChange(NamedTuple):
+    """A change of a member's current state; None when it joins or leaves."""
+
+    monitor_id: int
+    old: MonitorState | None
+    new: MonitorState | None
+
+
+class RollupStatus(NamedTuple):
+    """A status written for a composite monitor by propagation."""
+
+    monitor_id: int
+    state: MonitorState
+    message: str
+    timestamp: datetime
+    status_id: int
+    previous: MonitorState | None = None
+
+
+def worst_state(counts: Sequence[int]) -> MonitorState:
+    """
+    Return the rolled-up state of member counts.
+
+    Args:
+        counts: Members in each state, in ``SEVERITY`` order
+
+    Returns:
+        MonitorState: The most severe state with a member, or Missing Data
+            for a composite without members
+    """
+    for state, count in zip(reversed(SEVERITY), reversed(counts)):
+        if count > 0:
+            return state
+    return MonitorState.MISSING_DATA
+
+
+def describe(counts: Sequence[int]) -> str:
+    """Return the status message of a composite with the given member counts."""
+    total = sum(counts)
+    if not total:
+        return "No members"
+    state = worst_state(counts)
+    return f"{counts[SEVERITY.index(state)]} of {total} members {state.value}"
+
+
+# Member ids per IN list
+_CHUNK = 10_000
+
+# Propagation runs these once per affected composite, so they are built once
+# rather than per call; parameters ``monitor_id`` and ``rollup_id``
+_PARENTS = select(rollup_edges.c.composite_id).where(
+    rollup_edges.c.member_id == bindparam("monitor_id")
+)
+_INSERT_STATUS = insert(MonitorStatus).returning(MonitorStatus.id)
+
+
+@lru_cache(maxsize=None)
+def _counter_update(old: MonitorState | None, new: MonitorState | None) -> Update:
+    """Build the statement moving one member from ``old`` to ``new``."""
+    values = {}
+    if old is not None:
+        values[_COUNTERS[old].key] = _COUNTERS[old] - 1
+    if new is not None:
+        values[_COUNTERS[new].key] = _COUNTERS[new] + 1
+    return (
+        update(CompositeRollup)
+        .where(CompositeRollup.composite_id == bindparam("rollup_id"))
+        .values(values)
+        .returning(*_COUNTERS.values())
+    )
+
+
+def _parents(db: Session, monitor_id: int) -> List[int]:
+    return list(db.scalars(_PARENTS, {"monitor_id": monitor_id}))
+
+
+def _apply_change(
+    db: Session, composite_id: int, change: MemberChange
+) -> Tuple[MonitorState, MonitorState, Tuple[int, ...]]:
+    """Move one member between counters; return the states before and after."""
+    counts = tuple(
+        db.execute(
+            _counter_update(change.old, change.new), {"rollup_id": composite_id}
+        ).one()
+    )
+    before = list(counts)
+    if change.old is not None:
+        before[SEVERITY.index(change.old)] += 1
+    if change.new is not None:
+        before[SEVERITY.index(change.new)] -= 1
+    return worst_state(before), worst_state(counts), counts
+
+
+def propagate(
+    db: Session,
+    changes: Iterable[MemberChange],
+    timestamp: datetime,
+    skip: Set[int] = frozenset(),
+) -> List[RollupStatus]:
+    """
+    Apply member changes to their composites and on up the graph.
+
+    Args:
+        db: Database session; the caller commits
+        changes: Changes of the members' current states
+        timestamp: Time of the statuses written for composites
+        skip: Composites to leave alone, such as ones being deleted
+
+    Returns:
+        List[RollupStatus]: Statuses written for composites whose state changed
+    """
+    queue = deque(changes)
+    written = []
+    while queue:
+        change = queue.popleft()
+        for composite_id in _parents(db, change.monitor_id):
+            if composite_id in skip:
+                continue
+            before, after, counts = _apply_change(db, composite_id, change)
+            if before is after:
+                continue
+            message = describe(counts)
+            status_id = db.scalar(
+                _INSERT_STATUS,
+                *intern_messages(
+                    db,
+                    [
+                        {
+                            "monitor_id": composite_id,
+                            "state": after,
+                            "message": message,
+                            "timestamp": timestamp,
+                        }
+                    ],
+                ),
+            )
+            written.append(
+                RollupStatus(composite_id, after, message, timestamp, status_id, before)
+            )
+            queue.append(MemberChange(composite_id, before, after))
+    return written
+
+
+def member_changes(
+    db: Session, updates: Iterable[Tuple[int, MonitorState, datetime]]
+) -> List[MemberChange]:
+    """
+    Find the updates that will change the current state of a composite member.
+
+    Call before writing the updates, in the same transaction. Members are
+    locked until commit, so concurrent updates of one member are each
+    counted against the state the other left.
+
+    Args:
+        db: Database session
+        updates: Monitor id, state and timestamp of each update
+
+    Returns:
+        List[MemberChange]: Changes to pass to ``propagate`` once written
+    """
+    updates = list(updates)
+    ids = {monitor_id for monitor_id, _, _ in updates}
+    members = set(
+        db.scalars(
+            select(rollup_edges.c.member_id)
+            .where(rollup_edges.c.member_id.in_(ids))
+            .distinct()
+        )
+    )
+    if not members:
+        return []
+    db.execute(select(Monitor.id).where(Monitor.id.in_(members)).with_for_update())
+
+    updates = [update for update in updates if update[0] in members]
+    replaced = replaced_states(db, updates)
+    return [
+        MemberChange(monitor_id, replaced[monitor_id], state)
+        for monitor_id, state, _ in updates
+        if monitor_id in replaced
+    ]
+
+
+def _current_states(db: Session, monitor_ids: Iterable[int]) -> Dict[int, MonitorState]:
+    states = {}
+    for monitor_id in monitor_ids:
+        latest = db.execute(LATEST_STATUS, {"monitor_id": monitor_id}).first()
+        states[monitor_id] = (
+            latest.state if latest is not None else MonitorState.MISSING_DATA
+        )
+    return states
+
+
+def _descendants(db: Session, monitor_ids: Iterable[int]) -> Set[int]:
+    """Return the monitors and everything below them in the graph."""
+    seen = set(monitor_ids)
+    frontier = set(seen)
+    while frontier:
+        frontier = (
+            set(
+                db.scalars(
+                    select(rollup_edges.c.member_id).where(
+                        rollup_edges.c.composite_id.in_(frontier)
+                    )
+                )
+            )
+            - seen
+        )
+        seen |= frontier
+    return seen
+
+
+def attach(
+    db: Session,
+    monitor_id: int,
+    tag_ids: Iterable[int],
+    state: MonitorState,
+    timestamp: datetime,
+) -> List[RollupStatus]:
+    """
+    Make a new monitor a member of the composites that have one of its tags.
+
+    Args:
+        db: Database session; the caller commits
+        monitor_id: The new monitor
+        tag_ids: Its tag ids
+        state: Its initial state
+        timestamp: Time of the statuses written for composites
+
+    Returns:
+        List[RollupStatus]: Statuses written for composites whose state changed
+    """
+    composite_ids = set(
+        db.scalars(
+            select(composite_member_tags.c.composite_id).where(
+                composite_member_tags.c.tag_id.in_(list(tag_ids))
+            )
+        )
+    )
+    if not composite_ids:
+        return []
+    db.execute(
+        insert(rollup_edges),
+        [
+            {"composite_id": composite_id, "member_id": monitor_id}
+            for composite_id in composite_ids
+        ],
+    )
+    return propagate(db, [MemberChange(monitor_id, None, state)], timestamp)
+
+
+def link_tag_members(db: Session, tag_ids: Dict[int, Iterable[int]]) -> Set[int]:
+    """
+    Make new monitors members of the composites that have one of their tags.
+
+    Unlike ``attach``, nothing is propagated; call ``recount`` once the
+    monitors have statuses.
+
+    Args:
+        db: Database session; the caller commits
+        tag_ids: Tag ids of each new monitor, by monitor id
+
+    Returns:
+        Set[int]: Composites the monitors joined
+    """
+    all_tag_ids = {tag_id for ids in tag_ids.values() for tag_id in ids}
+    if not all_tag_ids:
+        return set()
+    composites_by_tag: Dict[int, Set[int]] = {}
+    for composite_id, tag_id in db.execute(
+        select(
+            composite_member_tags.c.composite_id, composite_member_tags.c.tag_id
+        ).where(composite_member_tags.c.tag_id.in_(all_tag_ids))
+    ):
+        composites_by_tag.setdefault(tag_id, set()).add(composite_id)
+    edges = {
+        (composite_id, monitor_id)
+        for monitor_id, ids in tag_ids.items()
+        for tag_id in ids
+        for composite_id in composites_by_tag.get(tag_id, ())
+    }
+    if edges:
+        db.execute(
+            insert(rollup_edges),
+            [
+                {"composite_id": composite_id, "member_id": monitor_id}
+                for composite_id, monitor_id in edges
+            ],
+        )
+    return {composite_id for composite_id, _ in edges}
+
+
+def _count_members(db: Session, composite_id: int) -> List[int]:
+    """Count a composite's members in each state, in ``SEVERITY`` order."""
+    members = select(rollup_edges.c.member_id).where(
+        rollup_edges.c.composite_id == composite_id
+    )
+    states = {
+        row.id: row.state
+        for row in db.execute(LATEST_STATUSES.where(Monitor.id.in_(members)))
+    }
+    counts = [0] * len(SEVERITY)
+    for member_id in db.scalars(members):
+        counts[SEVERITY.index(states.get(member_id, MonitorState.MISSING_DATA))] += 1
+    return counts
+
+
+def composites_of(db: Session, member_ids: Iterable[int]) -> Set[int]:
+    """
+    Find the composites that monitors are direct members of.
+
+    Args:
+        db: Database session
+        member_ids: Member monitor ids
+
+    Returns:
+        Set[int]: Composite monitor ids
+    """
+    member_ids = list(member_ids)
+    composite_ids: Set[int] = set()
+    for first in range(0, len(member_ids), _CHUNK):
+        composite_ids.update(
+            db.scalars(
+                select(rollup_edges.c.composite_id).where(
+                    rollup_edges.c.member_id.in_(member_ids[first : first + _CHUNK])
+                )
+            )
+        )
+    return composite_ids
+
+
+def recount(
+    db: Session, composite_ids: Iterable[int], timestamp: datetime
+) -> List[RollupStatus]:
+    """
+    Rebuild the counters of composites whose members changed in bulk.
+
+    Each composite's counters are recounted from the current states of all its
+    members, for use after writes that bypassed ``propagate``, such as a bulk
+    import. Composites whose state changes get a status and pass the change on
+    up the graph as usual. The counters are locked first, so updates
+    propagated concurrently are applied either before the recount or on top
+    of it.
+
+    Args:
+        db: Database session; the caller commits
+        composite_ids: Composites to recount, from ``composites_of``
+        timestamp: Time of the statuses written for composites
+
+    Returns:
+        List[RollupStatus]: Statuses written for composites whose state changed
+    """
+    written = []
+    for composite_id in sorted(composite_ids):
+        old = db.execute(
+            select(*_COUNTERS.values())
+            .where(CompositeRollup.composite_id == composite_id)
+            .with_for_update()
+        ).one()
+        counts = _count_members(db, composite_id)
+        if list(old) == counts:
+            continue
+        db.execute(
+            update(CompositeRollup)
+            .where(CompositeRollup.composite_id == composite_id)
+            .values(
+                {
+                    counter.key: count
+                    for counter, count in zip(_COUNTERS.values(), counts)
+                }
+            )
+        )
+        before, after = worst_state(old), worst_state(counts)
+        if before is after:
+            continue
+        message = describe(counts)
+        status_id = db.scalar(
+            _INSERT_STATUS,
+            *intern_messages(
+                db,
+                [
+                    {
+                        "monitor_id": composite_id,
+                        "state": after,
+                        "message": message,
+                        "timestamp": timestamp,
+                    }
+                ],
+            ),
+        )
+        written.append(
+            RollupStatus(composite_id, after, message, timestamp, status_id, before)
+        )
+        written += propagate(db, [MemberChange(composite_id, before, after)], timestamp)
+    return written
+
+
+def create_composite(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    db: Session,
+    monitor_id: int,
+    tag_ids: Iterable[int],
+    member_ids: Iterable[int],
+    member_tag_ids: Iterable[int],
+    timestamp: datetime,
+) -> List[RollupStatus]:
+    """
+    Set up the members and rollup of a composite monitor that was just added.
+
+    Args:
+        db: Database session with the new ``Monitor`` flushed; the caller commits
+        monitor_id: The composite monitor
+        tag_ids: Its own tag ids, which make it a member of other composites
+        member_ids: Monitors listed as members
+        member_tag_ids: Tags whose monitors are members
+        timestamp: Time of the composite's initial status
+
+    Returns:
+        List[RollupStatus]: The composite's initial status, then statuses
+            written for composites it is a member of
+
+    Raises:
+        CycleError: If the composite would end up a member of itself
+    """
+    member_tag_ids = list(member_tag_ids)
+    members = set(member_ids)
+    if member_tag_ids:
+        members |= set(
+            db.scalars(
+                select(monitor_tags.c.monitor_id).where(
+                    monitor_tags.c.tag_id.in_(member_tag_ids)
+                )
+            )
+        )
+    members.discard(monitor_id)
+    parents = set(
+        db.scalars(
+            select(composite_member_tags.c.composite_id).where(
+                composite_member_tags.c.tag_id.in_(list(tag_ids))
+            )
+        )
+    )
+    if parents & _descendants(db, members):
+        raise CycleError("Membership would make the composite a member of itself")
+
+    if member_tag_ids:
+        db.execute(
+            insert(composite_member_tags),
+            [
+                {"composite_id": monitor_id, "tag_id": tag_id}
+                for tag_id in member_tag_ids
+            ],
+        )
+    if members:
+        db.execute(
+            insert(rollup_edges),
+            [{"composite_id": monitor_id, "member_id": member} for member in members],
+        )
+    states = _current_states(db, members)
+    counts = [0] * len(SEVERITY)
+    for state in states.values():
+        counts[SEVERITY.index(state)] += 1
+    db.execute(
+        insert(CompositeRollup).values(
+            composite_id=monitor_id,
+            **{
+                counter.key: count for counter, count in zip(_COUNTERS.values(), counts)
+            },
+        )
+    )
+
+    state, message = worst_state(counts), describe(counts)
+    status_id = db.scalar(
+        _INSERT_STATUS,
+        *intern_messages(
+            db,
+            [
+                {
+                    "monitor_id": monitor_id,
+                    "state": state,
+                    "message": message,
+                    "timestamp": timestamp,
+                }
+            ],
+        ),
+    )
+    written = [RollupStatus(monitor_id, state, message, timestamp, status_id)]
+    if parents:
+        db.execute(
+            insert(rollup_edges),
+            [{"composite_id": parent, "member_id": monitor_id} for parent in parents],
+        )
+        written += propagate(db, [MemberChange(monitor_id, None, state)], timestamp)
+    return written
+
+
+def detach(db: Session, monitor_ids: Iterable[int], timestamp: datetime):
+    """
+    Remove monitors that are about to be deleted from their composites.
+
+    Args:
+        db: Database session; the caller deletes the monitors and commits
+        monitor_ids: Monitors being deleted
+        timestamp: Time of the statuses written for composites
+
+    Returns:
+        List[RollupStatus]: Statuses written for composites whose state changed
+    """
+    deleted = set(monitor_ids)
+    members = set(
+        db.scalars(
+            select(rollup_edges.c.member_id)
+            .where(
+                rollup_edges.c.member_id.in_(deleted),
+                rollup_edges.c.composite_id.notin_(deleted),
+            )
+            .distinct()
+        )
+    )
+    if not members:
+        return []
+    changes = [
+        MemberChange(monitor_id, state, None)
+        for monitor_id, state in _current_states(db, members).items()
+    ]
+    return propagate(db, changes, timestamp, skip=deleted)
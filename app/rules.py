@@ -0,0 +1,508 @@
+"""
+Threshold rule engine module.
+
+When ``RULES_ENABLED`` is set, agents may post raw metric samples instead of
+states, and every monitor with a ``ThresholdRule`` has its state derived from
+them.
+
+Taking samples costs no database work: a request appends them to a pending
+batch under a short lock. ``RuleEvaluator`` evaluates on an interval: it takes
+the whole pending batch at once, folds it into per-monitor sliding windows and
+reduces every window to one value. Windows keep their aggregate up to date as
+samples enter and leave (a running sum for the mean, monotonic queues for the
+maximum and minimum), so a sample costs O(1) amortized however long the window
+is, and an evaluation pass costs O(monitors) on top. A status is written only
+for the monitors whose derived state changed, all of a pass in one statement.
+
+Windows are kept in the memory of the process that receives the samples, so
+all samples of a monitor must reach the same process: ``gunicorn.conf.py``
+refuses to start more than one worker with rules enabled. A process whose
+window has never been fed derives nothing, so other processes sharing the
+database, such as a second deployment, do not overwrite its states. Samples
+are expected in roughly increasing time order; a late sample is used, but only
+leaves the window with the newest sample before it.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import UTC, datetime
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.ingest import RecordResult, record_status, record_statuses
+from app.metrics import RULE_EVALUATION, RULE_SAMPLES
+from app.models.monitor import Monitor, MonitorState, RuleAggregate, ThresholdRule
+from app.statements import LATEST_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# States a rule derives from a value, by severity
+LEVELS = (MonitorState.NORMAL, MonitorState.WARNING, MonitorState.CRITICAL)
+_SEVERITY = {state: level for level, state in enumerate(LEVELS)}
+
+# Latest status of every monitor that has a rule
+_RULE_MONITOR_STATUSES = LATEST_STATUSES.where(
+    Monitor.id.in_(select(ThresholdRule.monitor_id))
+)
+
+# A sample: monitor id, Unix timestamp and value
+Sample = Tuple[int, float, float]
+
+
+class StateChange(NamedTuple):
+    """A derived state that differs from the monitor's current one."""
+
+    monitor_id: int
+    state: MonitorState
+    message: str
+
+
+class Rule:
+    """
+    Thresholds of one monitor.
+
+    Args:
+        aggregate: How the samples in the window are reduced to one value
+        window_seconds: Length of the evaluation window
+        warning: Value at which the monitor is Warning, if any
+        critical: Value at which the monitor is Critical, if any
+        above: True if values at or above the thresholds are bad
+        hysteresis: How far past a threshold the value must recover before the
+            state is lowered again
+    """
+
+    __slots__ = (
+        "aggregate",
+        "window_seconds",
+        "warning",
+        "critical",
+        "above",
+        "hysteresis",
+    )
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        aggregate: RuleAggregate,
+        window_seconds: float,
+        warning: float | None = None,
+        critical: float | None = None,
+        above: bool = True,
+        hysteresis: float = 0.0,
+    ):
+        self.aggregate = RuleAggregate(aggregate)
+        self.window_seconds = window_seconds
+        self.warning = warning
+        self.critical = critical
+        self.above = above
+        self.hysteresis = hysteresis
+
+    @classmethod
+    def from_attributes(cls, source) -> "Rule":
+        """Build a rule from a ``ThresholdRule`` row or schema."""
+        return cls(
+            source.aggregate,
+            source.window_seconds,
+            source.warning,
+            source.critical,
+            source.above,
+            source.hysteresis,
+        )
+
+    def _crosses(self, value: float, threshold: float | None) -> bool:
+        if threshold is None:
+            return False
+        return value >= threshold if self.above else value <= threshold
+
+    def level(self, value: float) -> int:
+        """Return the index in ``LEVELS`` of the state a value maps to."""
+        if self._crosses(value, self.critical):
+            return 2
+        if self._crosses(value, self.warning):
+            return 1
+        return 0
+
+    def derive(self, value: float, current: MonitorState) -> MonitorState:
+        """
+        Derive a monitor's state from its aggregated value.
+
+        The state rises as soon as a threshold is crossed, but is only lowered
+        as far as the value has recovered past the thresholds by the hysteresis.
+
+        Args:
+            value: Aggregated value of the window
+            current: Current state of the monitor
+
+        Returns:
+            MonitorState: Derived state
+        """
+        level = self.level(value)
+        held = _SEVERITY.get(current, 0)
+        if level < held:
+            recovered = self.level(
+                value + self.hysteresis if self.above else value - self.hysteresis
+            )
+            level = max(level, min(held, recovered))
+        return LEVELS[level]
+
+    def describe(self, value: float | None, state: MonitorState) -> str:
+        """Return the status message of a derived state."""
+        if value is None:
+            return f"No samples in the last {self.window_seconds:g}s"
+        message = f"{self.aggregate.value} {value:.6g} over {self.window_seconds:g}s"
+        if state is MonitorState.CRITICAL:
+            return f"{message}, critical at {self.critical:g}"
+        if state is MonitorState.WARNING:
+            return f"{message}, warning at {self.warning:g}"
+        return message
+
+
+class SampleWindow:
+    """
+    Sliding window of one monitor's samples with its aggregate kept current.
+
+    Args:
+        aggregate: Aggregate to maintain
+        created: Unix time the window was created
+    """
+
+    __slots__ = (
+        "aggregate",
+        "created",
+        "fed",
+        "times",
+        "values",
+        "total",
+        "extremes",
+    )
+
+    def __init__(self, aggregate: RuleAggregate, created: float):
+        self.aggregate = aggregate
+        self.created = created
+        # Whether this process has received a sample for the window
+        self.fed = False
+        self.times: deque = deque()
+        self.values: deque = deque()
+        self.total = 0.0
+        # (timestamp, value) pairs with decreasing values for the maximum,
+        # increasing for the minimum; the front is the aggregate
+        self.extremes: deque = deque()
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a sample to the window."""
+        if self.times and timestamp < self.times[-1]:
+            # A late sample stays until the newest one leaves, which keeps the
+            # window in time order
+            timestamp = self.times[-1]
+        self.fed = True
+        self.times.append(timestamp)
+        self.values.append(value)
+        self.total += value
+        extremes = self.extremes
+        if self.aggregate is RuleAggregate.MAX:
+            while extremes and extremes[-1][1] <= value:
+                extremes.pop()
+            extremes.append((timestamp, value))
+        elif self.aggregate is RuleAggregate.MIN:
+            while extremes and extremes[-1][1] >= value:
+                extremes.pop()
+            extremes.append((timestamp, value))
+
+    def evict(self, cutoff: float) -> None:
+        """Drop the samples taken before a Unix time."""
+        times, values = self.times, self.values
+        while times and times[0] < cutoff:
+            times.popleft()
+            self.total -= values.popleft()
+        if not times:
+            # Start the running sum afresh so rounding errors do not build up
+            self.total = 0.0
+        extremes = self.extremes
+        while extremes and extremes[0][0] < cutoff:
+            extremes.popleft()
+
+    def value(self) -> float | None:
+        """Return the aggregate of the samples, or None if there are none."""
+        if not self.times:
+            return None
+        if self.aggregate is RuleAggregate.MEAN:
+            return self.total / len(self.times)
+        if self.aggregate is RuleAggregate.LAST:
+            return self.values[-1]
+        return self.extremes[0][1]
+
+    def rebuilt(self, aggregate: RuleAggregate) -> "SampleWindow":
+        """Return a window with the same samples maintaining another aggregate."""
+        window = SampleWindow(aggregate, self.created)
+        window.fed = self.fed
+        for timestamp, value in zip(self.times, self.values):
+            window.add(timestamp, value)
+        return window
+
+
+class RuleEngine:
+    """Threshold rules, sample windows and derived states of monitors."""
+
+    def __init__(self):
+        self._pending_lock = threading.Lock()
+        self._pending: List[Sample] = []
+        self._lock = threading.Lock()
+        self._rules: Dict[int, Rule] = {}
+        self._windows: Dict[int, SampleWindow] = {}
+        self._states: Dict[int, MonitorState] = {}
+
+    def _set(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        monitor_id: int,
+        rule: Rule,
+        state: MonitorState | None,
+        now: float,
+    ) -> None:
+        """Set a monitor's rule, keeping the samples of a previous one."""
+        window = self._windows.get(monitor_id)
+        if window is None:
+            window = SampleWindow(rule.aggregate, now)
+        elif window.aggregate is not rule.aggregate:
+            window = window.rebuilt(rule.aggregate)
+        self._rules[monitor_id] = rule
+        self._windows[monitor_id] = window
+        if state is not None:
+            self._states[monitor_id] = state
+
+    def load(self, db: Session) -> None:
+        """
+        Load every rule and the current state of the monitors that have one.
+
+        Windows of monitors that keep a rule keep their samples.
+
+        Args:
+            db: Database session
+        """
+        rules = {
+            row.monitor_id: Rule.from_attributes(row)
+            for row in db.scalars(select(ThresholdRule))
+        }
+        states = {row.id: row.state for row in db.execute(_RULE_MONITOR_STATUSES)}
+        now = time.time()
+        with self._lock:
+            self._drop(set(self._rules) - set(rules))
+            for monitor_id, rule in rules.items():
+                self._set(monitor_id, rule, states.get(monitor_id), now)
+
+    def put_rule(
+        self, monitor_id: int, rule: Rule, state: MonitorState | None = None
+    ) -> None:
+        """
+        Set a monitor's rule.
+
+        Args:
+            monitor_id: Monitor the rule belongs to
+            rule: Thresholds of the monitor
+            state: Current state of the monitor, if known
+        """
+        with self._lock:
+            self._set(monitor_id, rule, state, time.time())
+
+    def _drop(self, monitor_ids: Iterable[int]) -> None:
+        for monitor_id in monitor_ids:
+            self._rules.pop(monitor_id, None)
+            self._windows.pop(monitor_id, None)
+            self._states.pop(monitor_id, None)
+
+    def remove(self, monitor_ids: Iterable[int]) -> None:
+        """Drop the rules, samples and states of monitors."""
+        with self._lock:
+            self._drop(monitor_ids)
+
+    def has_rule(self, monitor_id: int) -> bool:
+        """Return whether a monitor has a rule in this process."""
+        return monitor_id in self._rules
+
+    def add_samples(self, samples: Iterable[Sample]) -> int:
+        """
+        Queue samples for the next evaluation.
+
+        Args:
+            samples: Monitor id, Unix timestamp and value of each sample
+
+        Returns:
+            int: Number of samples queued; samples of monitors without a rule
+                are ignored
+        """
+        rules = self._rules
+        accepted = [sample for sample in samples if sample[0] in rules]
+        with self._pending_lock:
+            self._pending.extend(accepted)
+        return len(accepted)
+
+    def evaluate(self, now: float | None = None) -> List[StateChange]:
+        """
+        Fold the pending samples into the windows and derive every state.
+
+        States are not updated until the changes are recorded. A window that
+        has never been fed in this process derives nothing, so workers that do
+        not receive a monitor's samples never overwrite its state.
+
+        Args:
+            now: Unix time of the evaluation; defaults to now
+
+        Returns:
+            List[StateChange]: Monitors whose derived state changed
+        """
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+
+        changes = []
+        with self._lock:
+            windows = self._windows
+            evaluated = 0
+            for monitor_id, timestamp, value in batch:
+                window = windows.get(monitor_id)
+                if window is not None:
+                    window.add(timestamp, value)
+                    evaluated += 1
+
+            states = self._states
+            for monitor_id, rule in self._rules.items():
+                window = windows[monitor_id]
+                window.evict(now - rule.window_seconds)
+                value = window.value()
+                current = states.get(monitor_id, MonitorState.NORMAL)
+                if value is not None:
+                    state = rule.derive(value, current)
+                elif window.fed and now - window.created >= rule.window_seconds:
+                    state = MonitorState.MISSING_DATA
+                else:
+                    # Too early to tell missing data from a new rule, or the
+                    # samples go to another process, which owns the state
+                    continue
+                if state is not current:
+                    changes.append(
+                        StateChange(monitor_id, state, rule.describe(value, state))
+                    )
+
+        RULE_SAMPLES.labels(result="evaluated").inc(evaluated)
+        RULE_SAMPLES.labels(result="ignored").inc(len(batch) - evaluated)
+        RULE_EVALUATION.observe(time.perf_counter() - started)
+        return changes
+
+    def record(
+        self, db: Session, changes: List[StateChange], now: float | None = None
+    ) -> int:
+        """
+        Write a status for each state change and make it the current state.
+
+        The changes are written in one statement; if a monitor was deleted
+        since its rule was loaded, they are written one by one instead and the
+        rules of deleted monitors are dropped. Changes suppressed as flapping
+        are not applied, so they are derived again by the next evaluation.
+
+        Args:
+            db: Database session
+            changes: Changes returned by ``evaluate``
+            now: Unix time of the statuses; defaults to now
+
+        Returns:
+            int: Number of statuses written
+        """
+        timestamp = datetime.fromtimestamp(time.time() if now is None else now, UTC)
+        try:
+            written_ids = set(record_statuses(db, changes, timestamp=timestamp))
+            written = [change for change in changes if change.monitor_id in written_ids]
+        except IntegrityError:
+            db.rollback()
+            written = []
+            for change in changes:
+                try:
+                    result = record_status(db, *change, timestamp=timestamp)
+                except IntegrityError:
+                    db.rollback()
+                    self.remove([change.monitor_id])
+                    continue
+                if result is RecordResult.WRITTEN:
+                    written.append(change)
+
+        with self._lock:
+            for change in written:
+                if change.monitor_id in self._rules:
+                    self._states[change.monitor_id] = change.state
+        return len(written)
+
+    def run(self, db: Session, now: float | None = None) -> int:
+        """
+        Evaluate the rules and record the state changes.
+
+        Args:
+            db: Database session
+            now: Unix time of the evaluation; defaults to now
+
+        Returns:
+            int: Number of statuses written
+        """
+        now = time.time() if now is None else now
+        return self.record(db, self.evaluate(now), now)
+
+    def state(self, monitor_id: int) -> MonitorState | None:
+        """Return the state last derived or loaded for a monitor."""
+        return self._states.get(monitor_id)
+
+    def clear(self) -> None:
+        """Drop every rule, window and pending sample."""
+        with self._pending_lock:
+            self._pending = []
+        with self._lock:
+            self._rules.clear()
+            self._windows.clear()
+            self._states.clear()
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+
+class RuleEvaluator(threading.Thread):
+    """
+    Background thread evaluating the rules of an engine.
+
+    Args:
+        engine: Engine to evaluate
+        session_factory: Creates database sessions for the status writes
+        interval_seconds: Interval between evaluations
+        reload_seconds: Interval between reloads of the rules and states
+    """
+
+    def __init__(
+        self, engine: RuleEngine, session_factory, interval_seconds, reload_seconds
+    ):
+        super().__init__(name="rule-evaluator", daemon=True)
+        self.engine = engine
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.reload_seconds = reload_seconds
+        self.stopped = threading.Event()
+
+    def run(self):
+        since_reload = 0.0
+        while not self.stopped.wait(self.interval_seconds):
+            since_reload += self.interval_seconds
+            try:
+                with self.session_factory() as db:
+                    if since_reload >= self.reload_seconds:
+                        self.engine.load(db)
+                        since_reload = 0.0
+                    self.engine.run(db)
+            except SQLAlchemyError as e:
+                logger.error("Rule evaluation failed: %s", str(e))
+
+    def stop(self) -> None:
+        """Stop the thread and wait for it to finish."""
+        self.stopped.set()
+        self.join()
+
+
+rule_engine = RuleEngine()
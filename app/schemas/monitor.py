@@ -4,12 +4,13 @@ Pydantic schemas for the monitoring system.
 This module defines the data validation and serialization schemas using Pydantic.
 """
 
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 from typing import List
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
-from app.models.monitor import MonitorState
+from app.core.config import settings
+from app.models.monitor import MonitorState, RuleAggregate
 
 
 class MonitorBase(BaseModel):
@@ -29,28 +30,109 @@ class MonitorCreate(MonitorBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+def _check_timestamp(value: datetime | None) -> datetime | None:
+    """Normalise a client timestamp to UTC and reject times in the future."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    value = value.astimezone(UTC)
+    max_skew = timedelta(seconds=settings.STATUS_MAX_CLOCK_SKEW_SECONDS)
+    if value > datetime.now(UTC) + max_skew:
+        raise ValueError("timestamp is in the future")
+    return value
+
+
+class CompositeCreate(MonitorBase):
+    """
+    Schema for creating a composite monitor.
+
+    Its state is the worst state of the ``members`` and of every monitor with
+    one of the ``member_tags``, including monitors created later. Its own
+    ``tags`` make it a member of composites with those member tags.
+    """
+
+    members: List[int] = []
+    member_tags: List[str] = []
+
+
+class CompositeResponse(CompositeCreate):
+    """Schema for a created composite monitor with its rolled-up state."""
+
+    id: int
+    state: MonitorState
+
+
 class MonitorStatusUpdate(BaseModel):
-    """Schema for updating Monitor status."""
+    """
+    Schema for updating Monitor status.
+
+    ``timestamp`` is when the event happened (naive values are taken as UTC);
+    the server time is used when it is omitted. Updates sent again with the same
+    ``idempotency_key`` for the same monitor are ignored.
+    """
 
     state: MonitorState
     message: str | None = None
+    timestamp: datetime | None = None
+    idempotency_key: str | None = Field(default=None, min_length=1, max_length=128)
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator("timestamp")
+    @classmethod
+    def check_timestamp(cls, value: datetime | None) -> datetime | None:
+        """Normalise the timestamp to UTC and reject times in the future."""
+        return _check_timestamp(value)
+
 
 class MonitorStatusResponse(BaseModel):
-    """Schema for Monitor status response."""
+    """
+    Schema for Monitor status response.
+
+    ``flapping`` is set when the monitor was changing state too often at the
+    time of this status.
+    """
 
     id: int
     name: str
     state: MonitorState
     message: str | None = None
     timestamp: datetime
+    flapping: bool = False
     tags: List[str] = []
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class StateTransition(BaseModel):
+    """
+    Schema for a monitor state transition.
+
+    ``ended_at`` and ``duration_seconds`` cover the time until the monitor's
+    next transition; they are None while the state is current, and are only
+    filled in for the transitions of a single monitor.
+    """
+
+    id: int
+    name: str
+    state: MonitorState
+    previous_state: MonitorState | None = None
+    message: str | None = None
+    timestamp: datetime
+    ended_at: datetime | None = None
+    duration_seconds: float | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TransitionPage(BaseModel):
+    """Schema for a page of transitions; pass ``next_cursor`` to get the next."""
+
+    items: List[StateTransition]
+    next_cursor: str | None = None
+
+
 class MonitorResponse(MonitorBase):
     """Schema for Monitor response."""
 
@@ -58,3 +140,129 @@ class MonitorResponse(MonitorBase):
     tags: List[str]
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class MonitorSearchPage(BaseModel):
+    """
+    Schema for a page of name search results; pass ``next_cursor`` to get the next.
+
+    ``tags`` lists the matching tag names, on the first page only.
+    """
+
+    monitors: List[MonitorResponse]
+    tags: List[str] = []
+    next_cursor: str | None = None
+
+
+class ThresholdRuleUpdate(BaseModel):
+    """
+    Schema for setting a monitor's threshold rule.
+
+    The samples of the last ``window_seconds`` are reduced with ``aggregate``
+    and compared with the thresholds: with ``above`` set, values at or above
+    ``critical`` are Critical and at or above ``warning`` Warning; otherwise
+    values at or below them are. A state is only lowered once the value is
+    ``hysteresis`` past its threshold.
+    """
+
+    aggregate: RuleAggregate = RuleAggregate.MEAN
+    window_seconds: float = Field(default=60.0, gt=0)
+    warning: float | None = Field(default=None, allow_inf_nan=False)
+    critical: float | None = Field(default=None, allow_inf_nan=False)
+    above: bool = True
+    hysteresis: float = Field(default=0.0, ge=0, allow_inf_nan=False)
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode="after")
+    def check_thresholds(self) -> "ThresholdRuleUpdate":
+        """Require a threshold, and a critical one beyond the warning one."""
+        if self.warning is None and self.critical is None:
+            raise ValueError("a warning or critical threshold is required")
+        if self.warning is not None and self.critical is not None:
+            if self.above:
+                beyond = self.critical >= self.warning
+            else:
+                beyond = self.critical <= self.warning
+            if not beyond:
+                raise ValueError("critical must be beyond warning")
+        return self
+
+
+class ThresholdRuleResponse(ThresholdRuleUpdate):
+    """Schema for a monitor's threshold rule."""
+
+    monitor_id: int
+
+
+class MetricSample(BaseModel):
+    """
+    Schema for a metric sample of one monitor.
+
+    ``timestamp`` is when the value was measured (naive values are taken as
+    UTC); the server time is used when it is omitted.
+    """
+
+    value: float = Field(allow_inf_nan=False)
+    timestamp: datetime | None = None
+
+    @field_validator("timestamp")
+    @classmethod
+    def check_timestamp(cls, value: datetime | None) -> datetime | None:
+        """Normalise the timestamp to UTC and reject times in the future."""
+        return _check_timestamp(value)
+
+
+class MonitorSample(MetricSample):
+    """Schema for a metric sample in a batch covering many monitors."""
+
+    monitor_id: int
+
+
+class SamplesAccepted(BaseModel):
+    """
+    Schema for the result of posting samples.
+
+    Samples of monitors without a threshold rule in this process are ignored.
+    """
+
+    accepted: int
+    ignored: int = 0
+
+
+class StatusImport(BaseModel):
+    """
+    Schema for one status of a bulk import.
+
+    The fields of a history export line, plus the ``tags`` of monitors the
+    import creates. Naive timestamps are taken as UTC.
+    """
+
+    monitor: str = Field(min_length=1)
+    state: MonitorState
+    message: str | None = None
+    timestamp: datetime
+    flapping: bool = False
+    tags: List[str] = []
+
+    @field_validator("timestamp")
+    @classmethod
+    def check_timestamp(cls, value: datetime) -> datetime:
+        """Normalise the timestamp to UTC and reject times in the future."""
+        return _check_timestamp(value)
+
+
+class ImportResponse(BaseModel):
+    """
+    Schema for the result of a bulk import.
+
+    ``errors`` describes the first rejected records, by line number.
+    """
+
+    records: int
+    written: int
+    rejected: int
+    monitors_created: int
+    errors: List[str] = []
+
+    model_config = ConfigDict(from_attributes=True)
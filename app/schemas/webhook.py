@@ -0,0 +1,50 @@
+"""
+Pydantic schemas for webhook subscriptions and their dead letters.
+"""
+
+from datetime import datetime
+from typing import List
+
+from pydantic import AnyHttpUrl, BaseModel, ConfigDict
+
+from app.models.monitor import MonitorState
+
+
+class WebhookCreate(BaseModel):
+    """
+    Schema for subscribing an endpoint to state transitions.
+
+    Without ``monitor_id`` or ``tag`` every monitor's transitions are sent;
+    with ``states``, only transitions into or out of one of them.
+    """
+
+    url: AnyHttpUrl
+    monitor_id: int | None = None
+    tag: str | None = None
+    states: List[MonitorState] | None = None
+
+
+class WebhookResponse(BaseModel):
+    """Schema for a webhook subscription."""
+
+    id: int
+    url: str
+    monitor_id: int | None = None
+    tag: str | None = None
+    states: List[MonitorState] | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DeadLetterResponse(BaseModel):
+    """Schema for an event given up on after repeated failed deliveries."""
+
+    id: int
+    subscription_id: int | None
+    url: str
+    event: dict
+    attempts: int
+    error: str | None
+    failed_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
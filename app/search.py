@@ -0,0 +1,352 @@
+"""
+Monitor and tag name search module.
+
+``search`` finds the monitors and the tags whose names match a prefix, a
+substring or a glob (``*`` for any characters, ``?`` for one), case-sensitively.
+Monitors are returned a page at a time in code point order of their names,
+resuming after the last name of the previous page; tags, a small vocabulary,
+are returned on the first page only.
+
+On PostgreSQL the names are matched in the database. Every mode is a ``LIKE``
+pattern, compared in the "C" collation: trigram indexes serve substrings and
+globs, and code point order indexes serve prefixes and the order of pages
+(see ``app.models.monitor``). Other databases, and the in-memory state store
+mode, search a ``NameIndex`` instead: the names sorted and joined into one
+string, so that a prefix is a bisection and a substring or glob a single scan
+of the string, started at the page's first name and stopped once the page is
+full. The index is rebuilt after this process creates or deletes monitors, or
+after ``SEARCH_INDEX_TTL_SECONDS`` to pick up other processes' changes.
+"""
+
+import base64
+import binascii
+import enum
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterable, List, NamedTuple, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.metrics import record_cache_lookup
+from app.models.monitor import Monitor, Tag
+
+# Separates the names of an index in its joined string; never part of a name
+_SEPARATOR = "\x00"
+# Sorts after every character, bounding the names that start with a prefix
+_LAST = "\U0010ffff"
+_WILDCARDS = re.compile(r"[*?]+")
+
+
+class SearchMode(str, enum.Enum):
+    """How a search query matches names."""
+
+    PREFIX = "prefix"
+    SUBSTRING = "substring"
+    GLOB = "glob"
+
+
+class SearchResult(NamedTuple):
+    """Monitors and tags whose names match a search."""
+
+    monitors: List[Tuple[int, str]]
+    tags: List[str]
+
+
+def encode_name_cursor(name: str) -> str:
+    """Encode the last monitor name of a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(name.encode()).decode().rstrip("=")
+
+
+def decode_name_cursor(cursor: str) -> str:
+    """
+    Decode a cursor made by ``encode_name_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _literal_prefix(mode: SearchMode, query: str) -> str:
+    """Return the text every matching name starts with."""
+    if mode is SearchMode.PREFIX:
+        return query
+    if mode is SearchMode.GLOB:
+        return _WILDCARDS.split(query, maxsplit=1)[0]
+    return ""
+
+
+def _glob_body(query: str) -> str:
+    """Translate a glob into a regular expression for one name."""
+    return "".join(
+        {"*": f"[^{_SEPARATOR}]*", "?": f"[^{_SEPARATOR}]"}.get(part, re.escape(part))
+        for part in re.split(r"([*?])", query)
+    )
+
+
+class NameIndex:
+    """
+    Names and their ids in code point order, searchable by pattern.
+
+    Args:
+        rows: Name and id pairs
+    """
+
+    __slots__ = ("names", "ids", "_text", "_starts")
+
+    def __init__(self, rows: Iterable[Tuple[str, int]]):
+        pairs = sorted(rows)
+        self.names = [name for name, _ in pairs]
+        self.ids = [row_id for _, row_id in pairs]
+        self._text = _SEPARATOR.join(self.names)
+        # Offset of each name in the joined string
+        self._starts = list(
+            accumulate((len(name) + 1 for name in self.names[:-1]), initial=0)
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _offset(self, position: int) -> int:
+        """Return the offset of a position in the name list, or the end."""
+        if position < len(self._starts):
+            return self._starts[position]
+        return len(self._text)
+
+    def _bounds(self, prefix: str, after: str | None) -> Tuple[int, int]:
+        """Return the range of positions of the names after ``after`` with a prefix."""
+        first = bisect_left(self.names, prefix)
+        if after is not None:
+            first = max(first, bisect_right(self.names, after))
+        if not prefix:
+            return first, len(self)
+        return first, bisect_left(self.names, prefix + _LAST, first)
+
+    def search(
+        self, mode: SearchMode, query: str, after: str | None, limit: int
+    ) -> List[int]:
+        """
+        Find matching names.
+
+        Args:
+            mode: How the query matches
+            query: Text to match
+            after: Return only names after this one
+            limit: Most names returned
+
+        Returns:
+            List[int]: Positions of the matching names, in name order
+        """
+        if _SEPARATOR in query:
+            return []
+        prefix = _literal_prefix(mode, query)
+        first, end = self._bounds(prefix, after)
+        if mode is SearchMode.PREFIX:
+            return list(range(first, min(end, first + limit)))
+
+        start, stop = self._offset(first), self._offset(end)
+        matcher = None
+        needle = query
+        if mode is SearchMode.GLOB:
+            body = _glob_body(query)
+            # The longest literal run after the prefix locates candidates
+            needle = max(_WILDCARDS.split(query[len(prefix) :]), key=len)
+            if not needle:
+                return self._scan(body, start, stop, limit)
+            matcher = re.compile(body)
+        return self._find(needle, matcher, (start, stop), limit)
+
+    def _find(
+        self,
+        needle: str,
+        matcher: re.Pattern | None,
+        span: Tuple[int, int],
+        limit: int,
+    ) -> List[int]:
+        """Find names containing a needle, and matching a pattern if given."""
+        start, stop = span
+        positions: List[int] = []
+        while len(positions) < limit and start < stop:
+            found = self._text.find(needle, start, stop)
+            if found < 0:
+                break
+            position = bisect_right(self._starts, found) - 1
+            if matcher is None or matcher.fullmatch(self.names[position]):
+                positions.append(position)
+            start = self._offset(position + 1)
+        return positions
+
+    def _scan(self, body: str, start: int, stop: int, limit: int) -> List[int]:
+        """Match a regular expression against whole names in one pass."""
+        pattern = re.compile(f"(?<![^{_SEPARATOR}]){body}(?![^{_SEPARATOR}])")
+        positions: List[int] = []
+        for match in pattern.finditer(self._text, start, stop):
+            positions.append(bisect_right(self._starts, match.start()) - 1)
+            if len(positions) == limit:
+                break
+        return positions
+
+
+class SearchIndex:
+    """
+    Name indexes of all monitors and tags, rebuilt when stale.
+
+    Args:
+        ttl: Seconds the indexes are used without a local change
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._generation = 0
+        self._indexes: Tuple[NameIndex, NameIndex] | None = None
+        self._built = (-1, 0.0)
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Mark the indexes stale after monitors or tags are created or deleted."""
+        with self._lock:
+            self._generation += 1
+
+    def clear(self) -> None:
+        """Drop the indexes."""
+        with self._lock:
+            self._generation += 1
+            self._indexes = None
+
+    def _fresh(self) -> bool:
+        generation, built_at = self._built
+        return (
+            self._indexes is not None
+            and generation == self._generation
+            and time.monotonic() - built_at < self.ttl
+        )
+
+    def get(self, db: Session) -> Tuple[NameIndex, NameIndex]:
+        """
+        Get the monitor and tag name indexes, rebuilding them if stale.
+
+        While one request rebuilds them, others use the stale indexes.
+
+        Args:
+            db: Database session used for a rebuild
+
+        Returns:
+            Tuple[NameIndex, NameIndex]: Monitor and tag name indexes
+        """
+        with self._lock:
+            indexes = self._indexes
+            if self._fresh():
+                record_cache_lookup("search", True)
+                return indexes
+        record_cache_lookup("search", False)
+
+        # Use the stale indexes rather than queue behind another rebuild
+        if not self._build_lock.acquire(  # pylint: disable=consider-using-with
+            blocking=indexes is None
+        ):
+            return indexes
+        try:
+            with self._lock:
+                if self._fresh():
+                    return self._indexes
+                generation = self._generation
+            indexes = (
+                NameIndex(db.execute(select(Monitor.name, Monitor.id))),
+                NameIndex(db.execute(select(Tag.name, Tag.id))),
+            )
+            with self._lock:
+                self._indexes = indexes
+                self._built = (generation, time.monotonic())
+            return indexes
+        finally:
+            self._build_lock.release()
+
+
+search_index = SearchIndex(settings.SEARCH_INDEX_TTL_SECONDS)
+
+
+def like_pattern(mode: SearchMode, query: str) -> str:
+    """
+    Translate a search into a ``LIKE`` pattern with ``\\`` as the escape.
+
+    Args:
+        mode: How the query matches
+        query: Text to match
+
+    Returns:
+        str: Pattern matching the same names
+    """
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    if mode is SearchMode.PREFIX:
+        return f"{escaped}%"
+    if mode is SearchMode.SUBSTRING:
+        return f"%{escaped}%"
+    return escaped.replace("*", "%").replace("?", "_")
+
+
+def _search_database(
+    db: Session, mode: SearchMode, query: str, after: str | None, limit: int
+) -> SearchResult:
+    pattern = like_pattern(mode, query)
+    name = Monitor.name.collate("C")
+    monitors = select(Monitor.id, Monitor.name).where(name.like(pattern, escape="\\"))
+    if after is not None:
+        monitors = monitors.where(name > after)
+    monitors = monitors.order_by(name).limit(limit)
+    tags = []
+    if after is None:
+        tag_name = Tag.name.collate("C")
+        tags = db.scalars(
+            select(Tag.name)
+            .where(tag_name.like(pattern, escape="\\"))
+            .order_by(tag_name)
+            .limit(limit)
+        ).all()
+    return SearchResult([tuple(row) for row in db.execute(monitors)], list(tags))
+
+
+def search(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    db: Session,
+    mode: SearchMode,
+    query: str,
+    after: str | None = None,
+    limit: int = 100,
+) -> SearchResult:
+    """
+    Search monitor and tag names.
+
+    Args:
+        db: Database session
+        mode: How the query matches names
+        query: Text to match
+        after: Last monitor name of the previous page
+        limit: Most monitors, and tags, returned
+
+    Returns:
+        SearchResult: Matching monitor ids and names in name order, and on the
+            first page the matching tag names
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql" and not settings.STATE_STORE_ENABLED:
+        return _search_database(db, mode, query, after, limit)
+    monitors, tags = search_index.get(db)
+    return SearchResult(
+        [
+            (monitors.ids[position], monitors.names[position])
+            for position in monitors.search(mode, query, after, limit)
+        ],
+        (
+            [tags.names[position] for position in tags.search(mode, query, None, limit)]
+            if after is None
+            else []
+        ),
+    )
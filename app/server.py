@@ -0,0 +1,21 @@
+"""
+Production server module.
+
+Provides the gunicorn worker class used by ``gunicorn.conf.py``. Each worker
+runs uvicorn; the event loop and HTTP parser are chosen with ``UVICORN_LOOP``
+(``auto``, ``asyncio`` or ``uvloop``) and ``UVICORN_HTTP`` (``auto``, ``h11`` or
+``httptools``). ``auto`` uses uvloop and httptools when they are installed.
+"""
+
+import os
+
+from uvicorn.workers import UvicornWorker
+
+
+class AppUvicornWorker(UvicornWorker):  # pylint: disable=too-few-public-methods
+    """Uvicorn worker with a configurable event loop and HTTP implementation."""
+
+    CONFIG_KWARGS = {
+        "loop": os.getenv("UVICORN_LOOP", "auto"),
+        "http": os.getenv("UVICORN_HTTP", "auto"),
+    }
@@ -0,0 +1,417 @@
+"""
+In-memory state store module.
+
+When ``STATE_STORE_ENABLED`` is set, every worker keeps the current state of
+every monitor (id, name, tags and latest status) in process memory, and the
+current-state endpoints are served from it without a database round trip.
+
+The store is loaded at startup. Writes made by the process are applied as soon
+as they commit. A background thread picks up other processes' writes by reading
+statuses with an id above the highest one seen, and reloads everything
+periodically to catch deleted monitors and status ids that committed out of
+order. Reads can therefore lag other workers' writes by up to
+``STATE_STORE_SYNC_SECONDS``. A sync that finds more than ``SYNC_LIMIT`` new
+statuses, as after a bulk import, reloads everything instead.
+"""
+
+import logging
+import threading
+from datetime import UTC, datetime
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.monitor import Monitor, MonitorState, MonitorStatus
+from app.statements import (
+    LATEST_STATUSES,
+    STATUS_MESSAGE,
+    STATUS_MESSAGE_JOIN,
+    tags_by_monitor,
+)
+
+logger = logging.getLogger(__name__)
+
+# Timestamp of a monitor that has no status yet
+NO_STATUS = datetime.min.replace(tzinfo=UTC)
+# Statuses written since the last sync above which the store is reloaded
+SYNC_LIMIT = 10_000
+
+
+def as_utc(timestamp: datetime) -> datetime:
+    """Return a timestamp as an aware UTC datetime; naive values are UTC."""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=UTC)
+    return timestamp.astimezone(UTC)
+
+
+class MonitorRecord:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """
+    Current state of one monitor.
+
+    Attributes:
+        id: Monitor id
+        name: Monitor name
+        tags: Tag names, shared between monitors with the same tags
+        state: Latest state
+        message: Message of the latest status
+        timestamp: Time of the latest status, in UTC
+        status_id: Id of the latest status, breaking timestamp ties
+        flapping: Whether the monitor was flapping at its latest status
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "tags",
+        "state",
+        "message",
+        "timestamp",
+        "status_id",
+        "flapping",
+    )
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        monitor_id: int,
+        name: str,
+        tags: Tuple[str, ...],
+        state: MonitorState,
+        message: str | None,
+        timestamp: datetime,
+        status_id: int,
+        flapping: bool = False,
+    ):
+        self.id = monitor_id
+        self.name = name
+        self.tags = tags
+        self.state = state
+        self.message = message
+        self.timestamp = as_utc(timestamp)
+        self.status_id = status_id
+        self.flapping = flapping
+
+    def newer_than(self, timestamp: datetime, status_id: int) -> bool:
+        """Return whether this record's status is newer than the given one."""
+        return (self.timestamp, self.status_id) > (as_utc(timestamp), status_id)
+
+
+class StateStore:
+    """Current state of every monitor, indexed by id and by tag."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._records: Dict[int, MonitorRecord] = {}
+        self._by_tag: Dict[str, Set[int]] = {}
+        self._tag_sets: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._last_status_id = 0
+        self.loaded = False
+
+    def _shared_tags(self, tags: Iterable[str]) -> Tuple[str, ...]:
+        """Return one shared tuple per distinct tag set."""
+        key = tuple(sorted(tags))
+        return self._tag_sets.setdefault(key, key)
+
+    def _put(self, record: MonitorRecord) -> None:
+        self._drop(record.id)
+        self._records[record.id] = record
+        for tag in record.tags:
+            self._by_tag.setdefault(tag, set()).add(record.id)
+
+    def _drop(self, monitor_id: int) -> None:
+        record = self._records.pop(monitor_id, None)
+        if record is None:
+            return
+        for tag in record.tags:
+            ids = self._by_tag.get(tag)
+            if ids is not None:
+                ids.discard(monitor_id)
+                if not ids:
+                    del self._by_tag[tag]
+
+    def load(self, db: Session) -> None:
+        """
+        Replace the store's contents with the current state in the database.
+
+        Args:
+            db: Database session
+        """
+        # Read the high-water mark first: statuses committed while loading are
+        # applied again by the next sync, which is harmless
+        last_status_id = db.scalar(select(func.max(MonitorStatus.id))) or 0
+
+        rows = db.execute(LATEST_STATUSES).all()
+        tags = tags_by_monitor(db)
+
+        with self._lock:
+            self._records, self._by_tag, self._tag_sets = {}, {}, {}
+            for row in rows:
+                current = self._records.get(row.id)
+                if current is not None and current.newer_than(
+                    row.timestamp, row.status_id
+                ):
+                    continue
+                self._put(
+                    MonitorRecord(
+                        row.id,
+                        row.name,
+                        self._shared_tags(tags.get(row.id, ())),
+                        row.state,
+                        row.message,
+                        row.timestamp,
+                        row.status_id,
+                        row.flapping,
+                    )
+                )
+            self._last_status_id = last_status_id
+            self.loaded = True
+
+    def sync(self, db: Session) -> int:
+        """
+        Apply statuses written since the last load or sync.
+
+        Args:
+            db: Database session
+
+        Returns:
+            int: Number of statuses read
+        """
+        with self._lock:
+            last_status_id = self._last_status_id
+        rows = db.execute(
+            select(
+                MonitorStatus.id,
+                MonitorStatus.monitor_id,
+                MonitorStatus.state,
+                MonitorStatus.timestamp,
+                MonitorStatus.flapping,
+                STATUS_MESSAGE,
+            )
+            .outerjoin(*STATUS_MESSAGE_JOIN)
+            .where(MonitorStatus.id > last_status_id)
+            .order_by(MonitorStatus.id)
+            .limit(SYNC_LIMIT + 1)
+        ).all()
+        if not rows:
+            return 0
+        if len(rows) > SYNC_LIMIT:
+            # Bulk writes such as an import: reloading reads one row per
+            # monitor rather than every status written
+            self.load(db)
+            return len(rows)
+
+        with self._lock:
+            new_ids = {row.monitor_id for row in rows} - self._records.keys()
+        monitors = {}
+        if new_ids:
+            names = db.execute(
+                select(Monitor.id, Monitor.name).where(Monitor.id.in_(new_ids))
+            )
+            tags = tags_by_monitor(db, new_ids)
+            monitors = {
+                monitor_id: (name, tags.get(monitor_id, ()))
+                for monitor_id, name in names
+            }
+
+        with self._lock:
+            for monitor_id, (name, tags) in monitors.items():
+                self.put_monitor(monitor_id, name, tags)
+            for row in rows:
+                self.apply_status(
+                    row.monitor_id,
+                    row.state,
+                    row.message,
+                    row.timestamp,
+                    row.id,
+                    row.flapping,
+                )
+            self._last_status_id = max(self._last_status_id, rows[-1].id)
+        return len(rows)
+
+    def put_monitor(self, monitor_id: int, name: str, tags: Iterable[str]) -> None:
+        """
+        Add a monitor that has no status yet, or update its name and tags.
+
+        Args:
+            monitor_id: Monitor id
+            name: Monitor name
+            tags: Tag names
+        """
+        if not self.loaded:
+            return
+        with self._lock:
+            current = self._records.get(monitor_id)
+            self._put(
+                MonitorRecord(
+                    monitor_id,
+                    name,
+                    self._shared_tags(tags),
+                    current.state if current else MonitorState.MISSING_DATA,
+                    current.message if current else None,
+                    current.timestamp if current else NO_STATUS,
+                    current.status_id if current else 0,
+                    current.flapping if current else False,
+                )
+            )
+
+    def apply_status(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        monitor_id: int,
+        state: MonitorState,
+        message: str | None,
+        timestamp: datetime,
+        status_id: int,
+        flapping: bool = False,
+    ) -> None:
+        """
+        Apply a committed status unless the monitor already has a newer one.
+
+        Args:
+            monitor_id: Monitor id
+            state: Status state
+            message: Status message
+            timestamp: Status timestamp
+            status_id: Status id
+            flapping: Whether the monitor was flapping at the status
+        """
+        if not self.loaded:
+            return
+        with self._lock:
+            record = self._records.get(monitor_id)
+            if record is None or record.newer_than(timestamp, status_id):
+                return
+            record.state = state
+            record.message = message
+            record.timestamp = as_utc(timestamp)
+            record.status_id = status_id
+            record.flapping = flapping
+
+    def remove(self, monitor_ids: Iterable[int]) -> None:
+        """Forget deleted monitors."""
+        with self._lock:
+            for monitor_id in monitor_ids:
+                self._drop(monitor_id)
+
+    def ids_with_tags(self, tags: Iterable[str]) -> Set[int]:
+        """Return the ids of monitors that have all of the given tags."""
+        with self._lock:
+            sets = [self._by_tag.get(tag, set()) for tag in set(tags)]
+            if not sets:
+                return set()
+            sets.sort(key=len)
+            return set.intersection(*sets)
+
+    def get(self, monitor_id: int) -> MonitorRecord | None:
+        """Return the record of a monitor, or None if it does not exist."""
+        return self._records.get(monitor_id)
+
+    def latest(self, monitor_ids: Iterable[int] | None = None) -> List[MonitorRecord]:
+        """
+        Return records newest status first, like ``/statuses/``.
+
+        Args:
+            monitor_ids: Restrict to these monitors; all monitors when omitted
+
+        Returns:
+            List[MonitorRecord]: Records ordered by status timestamp, descending
+        """
+        with self._lock:
+            if monitor_ids is None:
+                records = list(self._records.values())
+            else:
+                records = [
+                    self._records[monitor_id]
+                    for monitor_id in monitor_ids
+                    if monitor_id in self._records
+                ]
+        records.sort(
+            key=lambda record: (record.timestamp, record.status_id), reverse=True
+        )
+        return records
+
+    def clear(self) -> None:
+        """Empty the store and stop serving from it until the next load."""
+        with self._lock:
+            self._records, self._by_tag, self._tag_sets = {}, {}, {}
+            self._last_status_id = 0
+            self.loaded = False
+
+    def check(self, db: Session) -> List[str]:
+        """
+        Compare the store with the database.
+
+        Args:
+            db: Database session
+
+        Returns:
+            List[str]: One line per difference; empty when consistent
+        """
+        reference = StateStore()
+        reference.load(db)
+        expected = {record.id: record for record in reference.latest()}
+        fields = ("name", "tags", "state", "message", "timestamp", "flapping")
+        differences = []
+        with self._lock:
+            for monitor_id in sorted(expected.keys() | self._records.keys()):
+                want = expected.get(monitor_id)
+                have = self._records.get(monitor_id)
+                if have is None:
+                    differences.append(f"monitor {monitor_id}: missing from the store")
+                elif want is None:
+                    differences.append(f"monitor {monitor_id}: not in the database")
+                else:
+                    differences.extend(
+                        f"monitor {monitor_id} {field}: store has "
+                        f"{getattr(have, field)!r}, database has {getattr(want, field)!r}"
+                        for field in fields
+                        if getattr(have, field) != getattr(want, field)
+                    )
+        return differences
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class StateStoreSyncer(threading.Thread):
+    """
+    Background thread keeping a state store up to date.
+
+    Args:
+        store: Store to keep up to date
+        session_factory: Creates database sessions
+        sync_seconds: Interval between syncs
+        reload_seconds: Interval between full reloads
+    """
+
+    def __init__(
+        self, store: StateStore, session_factory, sync_seconds, reload_seconds
+    ):
+        super().__init__(name="state-store-sync", daemon=True)
+        self.store = store
+        self.session_factory = session_factory
+        self.sync_seconds = sync_seconds
+        self.reload_seconds = reload_seconds
+        self.stopped = threading.Event()
+
+    def run(self):
+        since_reload = 0.0
+        while not self.stopped.wait(self.sync_seconds):
+            since_reload += self.sync_seconds
+            try:
+                with self.session_factory() as db:
+                    if since_reload >= self.reload_seconds:
+                        self.store.load(db)
+                        since_reload = 0.0
+                    else:
+                        self.store.sync(db)
+            except SQLAlchemyError as e:
+                logger.error("State store sync failed: %s", str(e))
+
+    def stop(self) -> None:
+        """Stop the thread and wait for it to finish."""
+        self.stopped.set()
+        self.join()
+
+
+state_store = StateStore()
@@ -0,0 +1,178 @@
+"""
+Prebuilt statements for the hot read paths.
+
+The statements are built once at import with named bound parameters, and
+executed with the values of each request. SQLAlchemy keys its compiled SQL
+cache on the statement, so after the first execution a request skips statement
+construction and compilation entirely; only the parameters change.
+
+``lambda_stmt`` was measured as well (``python -m benchmarks.statements``):
+executed through an ORM session, the lambda statement is re-resolved on every
+call, which made it slower than the ``Query`` API it would replace.
+"""
+
+from typing import Dict, Iterable, List
+
+from sqlalchemy import bindparam, desc, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+
+from app.models.monitor import (
+    Monitor,
+    MonitorStatus,
+    StatusMessage,
+    Tag,
+    monitor_tags,
+)
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# A status's message, whether interned or stored inline; select it with the
+# outer join below
+STATUS_MESSAGE = func.coalesce(StatusMessage.text, MonitorStatus.message).label(
+    "message"
+)
+STATUS_MESSAGE_JOIN = (StatusMessage, StatusMessage.id == MonitorStatus.message_id)
+
+# Name of a monitor; parameter ``monitor_id``
+MONITOR_NAME = select(Monitor.name).where(Monitor.id == bindparam("monitor_id"))
+
+# Name and latest status of a monitor in one row; parameter ``monitor_id``
+LATEST_STATUS = (
+    select(
+        Monitor.name,
+        MonitorStatus.state,
+        STATUS_MESSAGE,
+        MonitorStatus.timestamp,
+        MonitorStatus.flapping,
+    )
+    .join(MonitorStatus, MonitorStatus.monitor_id == Monitor.id)
+    .outerjoin(*STATUS_MESSAGE_JOIN)
+    .where(Monitor.id == bindparam("monitor_id"))
+    .order_by(desc(MonitorStatus.timestamp), desc(MonitorStatus.id))
+    .limit(1)
+)
+
+# Timestamp of a monitor's latest status; parameter ``monitor_id``
+LATEST_TIMESTAMP = select(func.max(MonitorStatus.timestamp)).where(
+    MonitorStatus.monitor_id == bindparam("monitor_id")
+)
+
+# Id of a monitor's status written with an idempotency key; parameters
+# ``monitor_id`` and ``idempotency_key``
+STATUS_WITH_KEY = select(MonitorStatus.id).where(
+    MonitorStatus.monitor_id == bindparam("monitor_id"),
+    MonitorStatus.idempotency_key == bindparam("idempotency_key"),
+)
+
+# Id of the latest status of the monitor in the enclosing statement; statuses
+# with the same timestamp are ordered by id. Correlated, so each monitor costs
+# one probe of the (monitor_id, timestamp) index
+_newer = aliased(MonitorStatus)
+_LATEST_STATUS_ID = (
+    select(_newer.id)
+    .where(_newer.monitor_id == Monitor.id)
+    .order_by(desc(_newer.timestamp), desc(_newer.id))
+    .limit(1)
+    .correlate(Monitor)
+    .scalar_subquery()
+)
+
+# Every monitor's latest status, newest first: id, name, state, message,
+# timestamp, flapping and status_id
+LATEST_STATUSES = (
+    select(
+        Monitor.id,
+        Monitor.name,
+        MonitorStatus.state,
+        STATUS_MESSAGE,
+        MonitorStatus.timestamp,
+        MonitorStatus.flapping,
+        MonitorStatus.id.label("status_id"),
+    )
+    .select_from(Monitor)
+    .join(MonitorStatus, MonitorStatus.id == _LATEST_STATUS_ID)
+    .outerjoin(*STATUS_MESSAGE_JOIN)
+    .order_by(desc(MonitorStatus.timestamp), desc(MonitorStatus.id))
+)
+
+# LATEST_STATUSES of monitors linked to all of the tag ids; parameters
+# ``tag_ids`` and ``tag_count``, the number of tag ids
+LATEST_STATUSES_WITH_TAGS = LATEST_STATUSES.where(
+    Monitor.id.in_(
+        select(monitor_tags.c.monitor_id)
+        .where(monitor_tags.c.tag_id.in_(bindparam("tag_ids", expanding=True)))
+        .group_by(monitor_tags.c.monitor_id)
+        .having(func.count() == bindparam("tag_count"))  # pylint: disable=not-callable
+    )
+)
+
+# A page of a monitor's statuses, newest first; parameters ``monitor_id``,
+# ``skip`` and ``limit``
+STATUS_HISTORY = (
+    select(
+        MonitorStatus.id,
+        MonitorStatus.state,
+        STATUS_MESSAGE,
+        MonitorStatus.timestamp,
+        MonitorStatus.flapping,
+    )
+    .outerjoin(*STATUS_MESSAGE_JOIN)
+    .where(MonitorStatus.monitor_id == bindparam("monitor_id"))
+    .order_by(desc(MonitorStatus.timestamp), desc(MonitorStatus.id))
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+
+# Monitor ids with their tag names
+TAG_NAMES = (
+    select(monitor_tags.c.monitor_id, Tag.name)
+    .join(Tag, Tag.id == monitor_tags.c.tag_id)
+    .order_by(Tag.name)
+)
+
+# TAG_NAMES of some monitors; parameter ``monitor_ids``
+MONITOR_TAG_NAMES = TAG_NAMES.where(
+    monitor_tags.c.monitor_id.in_(bindparam("monitor_ids", expanding=True))
+)
+
+
+def latest_statuses_with_tags(db: Session, tag_ids: Iterable[int]) -> List:
+    """
+    Read the latest status of monitors linked to all of the given tag ids.
+
+    Args:
+        db: Database session
+        tag_ids: Tag ids
+
+    Returns:
+        List: ``LATEST_STATUSES`` rows, newest first
+    """
+    tag_ids = list(tag_ids)
+    return db.execute(
+        LATEST_STATUSES_WITH_TAGS, {"tag_ids": tag_ids, "tag_count": len(tag_ids)}
+    ).all()
+
+
+def tags_by_monitor(
+    db: Session, monitor_ids: Iterable[int] | None = None
+) -> Dict[int, List[str]]:
+    """
+    Read tag names by monitor id in one query.
+
+    Args:
+        db: Database session
+        monitor_ids: Monitors to read tags of; all monitors when omitted
+
+    Returns:
+        Dict[int, List[str]]: Sorted tag names by monitor id
+    """
+    if monitor_ids is None:
+        rows = db.execute(TAG_NAMES)
+    else:
+        rows = db.execute(MONITOR_TAG_NAMES, {"monitor_ids": list(monitor_ids)})
+    tags: Dict[int, List[str]] = {}
+    for monitor_id, name in rows:
+        tags.setdefault(monitor_id, []).append(name)
+    return tags
@@ -0,0 +1,118 @@
+"""
+Tag name cache module.
+
+The tag vocabulary is small and tags are never renamed, so the name to id
+mapping is cached for the life of the process. Only tags read back from the
+database are cached: names that do not exist are looked up again every time,
+and tags are invalidated when they are created so an uncommitted id is never
+served.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.metrics import record_cache_lookup
+from app.models.monitor import Tag
+
+
+def unique_names(names: Iterable[str]) -> List[str]:
+    """Return names without duplicates, keeping their first-seen order."""
+    return list(dict.fromkeys(names))
+
+
+class TagCache:
+    """
+    Bounded, thread-safe LRU cache of tag names to tag ids.
+
+    Args:
+        maxsize: Maximum number of names kept
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._ids: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, ids: Dict[str, int]) -> None:
+        with self._lock:
+            for name, tag_id in ids.items():
+                self._ids[name] = tag_id
+                self._ids.move_to_end(name)
+            while len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+
+    def get_ids(self, db: Session, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Look up the ids of existing tags.
+
+        Args:
+            db: Database session used for names that are not cached
+            names: Tag names
+
+        Returns:
+            Dict[str, int]: Ids of the tags that exist, by name
+        """
+        ids, missing = {}, []
+        with self._lock:
+            for name in unique_names(names):
+                tag_id = self._ids.get(name)
+                if tag_id is None:
+                    missing.append(name)
+                else:
+                    self._ids.move_to_end(name)
+                    ids[name] = tag_id
+                record_cache_lookup("tags", tag_id is not None)
+
+        if missing:
+            found = dict(
+                db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(missing))).all()
+            )
+            self._remember(found)
+            ids.update(found)
+        return ids
+
+    def get_or_create_ids(self, db: Session, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Look up the ids of tags, creating the ones that do not exist.
+
+        New tags are flushed but not committed; the caller commits them.
+
+        Args:
+            db: Database session
+            names: Tag names
+
+        Returns:
+            Dict[str, int]: Tag ids by name, in the order the names were given
+        """
+        names = unique_names(names)
+        ids = self.get_ids(db, names)
+        new_tags = [Tag(name=name) for name in names if name not in ids]
+        if new_tags:
+            db.add_all(new_tags)
+            db.flush()
+            # Not cached until committed; the next lookup reads them back
+            self.invalidate(tag.name for tag in new_tags)
+            ids.update({tag.name: tag.id for tag in new_tags})
+        return {name: ids[name] for name in names}
+
+    def invalidate(self, names: Iterable[str] | None = None) -> None:
+        """
+        Forget cached tags.
+
+        Args:
+            names: Tag names to forget; all tags when omitted
+        """
+        with self._lock:
+            if names is None:
+                self._ids.clear()
+                return
+            for name in names:
+                self._ids.pop(name, None)
+
+
+tag_cache = TagCache(settings.TAG_CACHE_SIZE)
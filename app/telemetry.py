@@ -1,14 +1,43 @@
 """
 OpenTelemetry configuration module.
+
+Exporters and instrumentors are imported only when they are used, since the
+OTLP gRPC exporter alone adds noticeably to process start-up time.
 """
 
 import os
 from opentelemetry import trace
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, Sampler, TraceIdRatioBased
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+from app.core.config import settings
+
+
+def build_sampler() -> Sampler:
+    """
+    Build the trace sampler from settings.
+
+    A ratio below 1.0 caps span creation and export overhead under load. When
+    parent-based sampling is enabled, spans follow the decision of an incoming
+    trace context and the ratio only applies to new root spans.
+    """
+    sampler = TraceIdRatioBased(settings.OTEL_TRACES_SAMPLER_RATIO)
+    if settings.OTEL_TRACES_SAMPLER_PARENT_BASED:
+        return ParentBased(root=sampler)
+    return sampler
+
+
+def build_span_processor(exporter) -> BatchSpanProcessor:
+    """Wrap an exporter in a batch processor sized from settings."""
+    return BatchSpanProcessor(
+        exporter,
+        max_queue_size=settings.OTEL_BSP_MAX_QUEUE_SIZE,
+        schedule_delay_millis=settings.OTEL_BSP_SCHEDULE_DELAY_MS,
+        max_export_batch_size=settings.OTEL_BSP_MAX_EXPORT_BATCH_SIZE,
+        export_timeout_millis=settings.OTEL_BSP_EXPORT_TIMEOUT_MS,
+    )
 
 
 def init_telemetry(service_name: str):
@@ -21,25 +50,30 @@ def init_telemetry(service_name: str):
     )
 
     # Create a tracer provider
-    tracer_provider = TracerProvider(resource=resource)
+    tracer_provider = TracerProvider(resource=resource, sampler=build_sampler())
 
     # In test environment, use console exporter
     if os.getenv("TESTING"):
-        span_processor = BatchSpanProcessor(ConsoleSpanExporter())
+        span_processor = build_span_processor(ConsoleSpanExporter())
     else:
         # Get OpenTelemetry collector endpoint from environment
         collector_endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
 
         if collector_endpoint:
+            # pylint: disable=import-outside-toplevel
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+                OTLPSpanExporter,
+            )
+
             # Create an OTLP exporter for the collector
             otlp_exporter = OTLPSpanExporter(
                 endpoint=collector_endpoint,
                 insecure=True,  # Set to False in production with proper TLS
             )
-            span_processor = BatchSpanProcessor(otlp_exporter)
+            span_processor = build_span_processor(otlp_exporter)
         else:
             # Use console exporter for local development
-            span_processor = BatchSpanProcessor(ConsoleSpanExporter())
+            span_processor = build_span_processor(ConsoleSpanExporter())
 
     tracer_provider.add_span_processor(span_processor)
 
@@ -55,6 +89,9 @@ def instrument_app(app, tracer_provider=None):
     if os.getenv("TESTING"):
         return
 
+    # pylint: disable=import-outside-toplevel
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
     FastAPIInstrumentor.instrument_app(
         app,
         tracer_provider=tracer_provider,
@@ -64,3 +101,36 @@ def instrument_app(app, tracer_provider=None):
         # Optional: Configure header sanitization for sensitive data
         http_capture_headers_sanitize_fields=["authorization", "cookie", "set-cookie"],
     )
+
+
+def instrument_database(engines, tracer_provider=None):
+    """
+    Instrument SQLAlchemy engines so each statement gets a client span.
+
+    The engines are instrumented in one call: the instrumentor only
+    instruments once per process, so a second call would be ignored.
+
+    The DB-API driver can be instrumented as well, which adds driver-level
+    spans underneath the SQLAlchemy ones; it is off by default because it
+    roughly doubles the span volume for every query.
+    """
+    # Skip instrumentation in test environment
+    if os.getenv("TESTING"):
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+
+    engines = list(engines)
+    SQLAlchemyInstrumentor().instrument(
+        engines=engines,
+        tracer_provider=tracer_provider,
+        enable_commenter=settings.OTEL_SQLCOMMENTER_ENABLED,
+    )
+
+    if settings.OTEL_INSTRUMENT_DB_DRIVER and any(
+        engine.dialect.driver == "psycopg2" for engine in engines
+    ):
+        from opentelemetry.instrumentation.psycopg2 import Psycopg2Instrumentor
+
+        Psycopg2Instrumentor().instrument(tracer_provider=tracer_provider)
@@ -0,0 +1,183 @@
+"""
+State transition queries module.
+
+A transition is a status whose state differs from the monitor's previous
+status; a monitor's first status is a transition from no state. Transitions
+are served newest first, in pages continued from a keyset cursor holding the
+``(timestamp, id)`` of the last row served, so a page deep into the history
+costs the same as the first one.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import Row, Select, and_, func, or_, select
+from sqlalchemy.orm import Session, aliased
+
+from app.models.monitor import Monitor, MonitorState, MonitorStatus, StatusMessage
+from app.state_store import as_utc
+from app.statements import LATEST_STATUS
+
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(timestamp: datetime, status_id: int) -> str:
+    """Encode the position of a status as an opaque cursor."""
+    raw = f"{timestamp.isoformat()}|{status_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Decode a cursor made by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, status_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(status_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def replaced_states(
+    db: Session, updates: Iterable[Tuple[int, MonitorState, datetime]]
+) -> Dict[int, MonitorState | None]:
+    """
+    Find the updates that will be transitions once written.
+
+    Call before writing the updates, in the same transaction. Updates that
+    repeat the current state, or are older than the current status and so do
+    not replace it, are left out.
+
+    Args:
+        db: Database session
+        updates: Monitor id, state and timestamp of each update
+
+    Returns:
+        Dict[int, MonitorState | None]: State each transition replaces, by
+            monitor id; None for a monitor without statuses
+    """
+    replaced = {}
+    for monitor_id, state, timestamp in updates:
+        latest = db.execute(LATEST_STATUS, {"monitor_id": monitor_id}).first()
+        if latest is not None and as_utc(latest.timestamp) > timestamp:
+            continue
+        old = latest.state if latest is not None else None
+        if old is not state:
+            replaced[monitor_id] = old
+    return replaced
+
+
+def _older_than(status, position: Cursor):
+    """Filter statuses that come after a position in newest-first order."""
+    timestamp, status_id = position
+    return or_(
+        status.timestamp < timestamp,
+        and_(status.timestamp == timestamp, status.id < status_id),
+    )
+
+
+def _transitions_page(statuses: Select, limit: int) -> Select:
+    """Keep the statuses whose state changed, newest first."""
+    statuses = statuses.subquery()
+    # Interned messages are resolved for the rows of the page only
+    columns = [c for c in statuses.c if c.key not in ("message", "message_id")]
+    return (
+        select(
+            *columns,
+            func.coalesce(StatusMessage.text, statuses.c.message).label("message"),
+        )
+        .outerjoin(StatusMessage, StatusMessage.id == statuses.c.message_id)
+        .where(
+            or_(
+                statuses.c.previous_state.is_(None),
+                statuses.c.state != statuses.c.previous_state,
+            )
+        )
+        .order_by(statuses.c.timestamp.desc(), statuses.c.id.desc())
+        .limit(limit)
+    )
+
+
+def monitor_transitions(
+    db: Session, monitor_id: int, limit: int, before: Cursor | None = None
+) -> List[Row]:
+    """
+    Get a page of one monitor's transitions.
+
+    Args:
+        db: Database session
+        monitor_id: ID of the monitor
+        limit: Maximum number of transitions
+        before: Cursor of the last transition of the previous page
+
+    Returns:
+        List[Row]: Rows with id, state, previous_state, message and timestamp
+    """
+    # LAG over time is LEAD in newest-first order. Windowing in the order the
+    # page is read lets the database walk the (monitor_id, timestamp) index
+    # backwards and stop as soon as the page is full.
+    previous_state = func.lead(MonitorStatus.state, type_=MonitorStatus.state.type)
+    statuses = select(
+        MonitorStatus.id,
+        MonitorStatus.state,
+        MonitorStatus.message,
+        MonitorStatus.message_id,
+        MonitorStatus.timestamp,
+        previous_state.over(
+            order_by=(MonitorStatus.timestamp.desc(), MonitorStatus.id.desc())
+        ).label("previous_state"),
+    ).where(MonitorStatus.monitor_id == monitor_id)
+    if before is not None:
+        statuses = statuses.where(_older_than(MonitorStatus, before))
+    return db.execute(_transitions_page(statuses, limit)).all()
+
+
+def recent_transitions(
+    db: Session, limit: int, before: Cursor | None = None
+) -> List[Row]:
+    """
+    Get a page of transitions across all monitors.
+
+    Args:
+        db: Database session
+        limit: Maximum number of transitions
+        before: Cursor of the last transition of the previous page
+
+    Returns:
+        List[Row]: Rows with id, monitor_id, name, state, previous_state,
+        message and timestamp
+    """
+    # A window partitioned by monitor would sort the whole table before the
+    # first row comes out. Looking up each status's predecessor through the
+    # (monitor_id, timestamp) index instead lets the outer query walk the
+    # timestamp index and stop once the page is full.
+    previous = aliased(MonitorStatus)
+    previous_state = (
+        select(previous.state)
+        .where(
+            previous.monitor_id == MonitorStatus.monitor_id,
+            _older_than(previous, (MonitorStatus.timestamp, MonitorStatus.id)),
+        )
+        .order_by(previous.timestamp.desc(), previous.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    statuses = select(
+        MonitorStatus.id,
+        MonitorStatus.monitor_id,
+        Monitor.name,
+        MonitorStatus.state,
+        MonitorStatus.message,
+        MonitorStatus.message_id,
+        MonitorStatus.timestamp,
+        previous_state.label("previous_state"),
+    ).join(Monitor, Monitor.id == MonitorStatus.monitor_id)
+    if before is not None:
+        statuses = statuses.where(_older_than(MonitorStatus, before))
+    return db.execute(_transitions_page(statuses, limit)).all()
@@ -0,0 +1,452 @@
+"""
+Webhook delivery module.
+
+Subscriptions fire on state transitions: statuses that change their monitor's
+current state, whether posted, derived by a threshold rule or rolled up to a
+composite. A subscription can be limited to one monitor, to the monitors with
+a tag, and to transitions into or out of some states.
+
+Events go through a transactional outbox. The write that records a status
+inserts a ``WebhookOutbox`` row for every matching subscription in the same
+transaction, so an event exists exactly when its status was committed, and the
+request itself does no network I/O. ``WebhookDispatcher`` runs an asyncio loop
+in a background thread of each process. It claims due events, leasing them by
+pushing their ``next_attempt_at`` forward (on PostgreSQL, rows another
+dispatcher is claiming are skipped), and POSTs them up to
+``WEBHOOK_BATCH_SIZE`` at a time through a connection pool kept per endpoint.
+Subscriptions are delivered concurrently, so a slow receiver only holds up its
+own events. A failed POST is retried with exponential backoff, and after
+``WEBHOOK_MAX_ATTEMPTS`` its events are moved to ``WebhookDeadLetter``.
+
+Delivery is at least once: events whose delivery was cut short are sent again
+when their lease runs out, so receivers should drop repeats by ``status_id``.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+import httpx
+from sqlalchemy import Row, bindparam, delete, insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.metrics import WEBHOOK_DELIVERY, WEBHOOK_EVENTS
+from app.models.monitor import (
+    Monitor,
+    MonitorState,
+    WebhookDeadLetter,
+    WebhookOutbox,
+    WebhookSubscription,
+    monitor_tags,
+)
+from app.state_store import as_utc
+from app.transitions import replaced_states
+
+logger = logging.getLogger(__name__)
+
+# Batches a dispatcher claims at once; their lease covers delivering all of
+# them one after the other
+_BATCHES_PER_CLAIM = 10
+
+# Subscriptions of each monitor in ``monitor_ids``: monitor id and name,
+# subscription id and states
+_SUBSCRIPTIONS = (
+    select(
+        Monitor.id.label("monitor_id"),
+        Monitor.name,
+        WebhookSubscription.id,
+        WebhookSubscription.states,
+    )
+    .join(
+        WebhookSubscription,
+        (
+            or_(
+                WebhookSubscription.monitor_id.is_(None),
+                WebhookSubscription.monitor_id == Monitor.id,
+            )
+            & or_(
+                WebhookSubscription.tag_id.is_(None),
+                WebhookSubscription.tag_id.in_(
+                    select(monitor_tags.c.tag_id).where(
+                        monitor_tags.c.monitor_id == Monitor.id
+                    )
+                ),
+            )
+        ),
+    )
+    .where(Monitor.id.in_(bindparam("monitor_ids", expanding=True)))
+)
+_SUBSCRIBED = select(_SUBSCRIPTIONS.subquery().c.monitor_id).distinct()
+
+
+class Transition(NamedTuple):
+    """A written status that changed its monitor's state."""
+
+    monitor_id: int
+    previous: MonitorState | None
+    state: MonitorState
+    message: str | None
+    timestamp: datetime
+    status_id: int
+
+
+def watch(
+    db: Session, updates: Iterable[Tuple[int, MonitorState, datetime]]
+) -> Dict[int, MonitorState | None]:
+    """
+    Find the updates that will be transitions of monitors with subscriptions.
+
+    Call before writing the updates, in the same transaction.
+
+    Args:
+        db: Database session
+        updates: Monitor id, state and timestamp of each update
+
+    Returns:
+        Dict[int, MonitorState | None]: Current state of each monitor whose
+            update is a transition to deliver, None if it has no status
+    """
+    if not settings.WEBHOOKS_ENABLED:
+        return {}
+    updates = list(updates)
+    subscribed = set(
+        db.scalars(
+            _SUBSCRIBED, {"monitor_ids": list({update[0] for update in updates})}
+        )
+    )
+    return replaced_states(
+        db, [update for update in updates if update[0] in subscribed]
+    )
+
+
+def _event(transition: Transition, monitor_name: str) -> dict:
+    """Build the JSON body of a transition's event."""
+    return {
+        "status_id": transition.status_id,
+        "monitor_id": transition.monitor_id,
+        "monitor": monitor_name,
+        "previous_state": (
+            transition.previous.value if transition.previous is not None else None
+        ),
+        "state": transition.state.value,
+        "message": transition.message,
+        "timestamp": as_utc(transition.timestamp).isoformat(),
+    }
+
+
+def enqueue(db: Session, transitions: Iterable[Transition]) -> int:
+    """
+    Add the events of written transitions to the outbox.
+
+    Args:
+        db: Database session with the statuses written; the caller commits
+        transitions: Transitions found by ``watch``, or rolled up to composites
+
+    Returns:
+        int: Events added, one per transition and matching subscription
+    """
+    transitions = list(transitions)
+    if not settings.WEBHOOKS_ENABLED or not transitions:
+        return 0
+    subscriptions: Dict[int, List[Row]] = {}
+    for row in db.execute(
+        _SUBSCRIPTIONS,
+        {"monitor_ids": list({transition.monitor_id for transition in transitions})},
+    ):
+        subscriptions.setdefault(row.monitor_id, []).append(row)
+
+    now = datetime.now(UTC)
+    events = []
+    for transition in transitions:
+        for subscription in subscriptions.get(transition.monitor_id, ()):
+            states = subscription.states
+            if (
+                states is not None
+                and transition.state not in states
+                and transition.previous not in states
+            ):
+                continue
+            events.append(
+                {
+                    "subscription_id": subscription.id,
+                    "event": _event(transition, subscription.name),
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                }
+            )
+    if events:
+        db.execute(insert(WebhookOutbox), events)
+    return len(events)
+
+
+class _Delivery(NamedTuple):
+    """Claimed events of one subscription, oldest first."""
+
+    subscription_id: int
+    url: str
+    rows: List[Row]
+
+
+# pylint: disable-next=too-many-instance-attributes
+class WebhookDispatcher(threading.Thread):
+    """
+    Background thread delivering the outbox from an asyncio event loop.
+
+    Args:
+        session_factory: Creates database sessions for claiming events
+        poll_seconds: Interval between checks for due events when idle
+        batch_size: Events sent per POST
+        timeout_seconds: Time allowed for one POST
+        connections_per_endpoint: Connections pooled per endpoint
+        max_attempts: Failed attempts before events are dead-lettered
+        backoff_seconds: Delay before the first retry, doubled for every
+            further one
+        max_backoff_seconds: Longest delay between two attempts
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        session_factory,
+        *,
+        poll_seconds: float = settings.WEBHOOK_POLL_SECONDS,
+        batch_size: int = settings.WEBHOOK_BATCH_SIZE,
+        timeout_seconds: float = settings.WEBHOOK_TIMEOUT_SECONDS,
+        connections_per_endpoint: int = settings.WEBHOOK_CONNECTIONS_PER_ENDPOINT,
+        max_attempts: int = settings.WEBHOOK_MAX_ATTEMPTS,
+        backoff_seconds: float = settings.WEBHOOK_BACKOFF_SECONDS,
+        max_backoff_seconds: float = settings.WEBHOOK_MAX_BACKOFF_SECONDS,
+    ):
+        super().__init__(name="webhook-dispatcher", daemon=True)
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.timeout_seconds = timeout_seconds
+        self.connections_per_endpoint = connections_per_endpoint
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._clients: Dict[Tuple[str, str, int | None], httpx.AsyncClient] = {}
+        self._busy: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopping: asyncio.Event | None = None
+        self._ready = threading.Event()
+
+    def backoff(self, attempts: int) -> float:
+        """Return the delay in seconds after a number of failed attempts."""
+        return min(self.backoff_seconds * 2 ** (attempts - 1), self.max_backoff_seconds)
+
+    def _client(self, url: str) -> httpx.AsyncClient:
+        """Return the pooled client of a URL's endpoint."""
+        parsed = httpx.URL(url)
+        key = (parsed.scheme, parsed.host, parsed.port)
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = httpx.AsyncClient(
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.connections_per_endpoint,
+                    max_keepalive_connections=self.connections_per_endpoint,
+                ),
+            )
+        return client
+
+    def _claim(self, busy: frozenset) -> List[_Delivery]:
+        """Lease due events of subscriptions not being delivered to."""
+        now = datetime.now(UTC)
+        query = (
+            select(
+                WebhookOutbox.id,
+                WebhookOutbox.subscription_id,
+                WebhookOutbox.event,
+                WebhookOutbox.attempts,
+                WebhookSubscription.url,
+            )
+            .join(
+                WebhookSubscription,
+                WebhookSubscription.id == WebhookOutbox.subscription_id,
+            )
+            .where(WebhookOutbox.next_attempt_at <= now)
+            .order_by(WebhookOutbox.id)
+            .limit(self.batch_size * _BATCHES_PER_CLAIM)
+            .with_for_update(of=WebhookOutbox, skip_locked=True)
+        )
+        if busy:
+            query = query.where(WebhookOutbox.subscription_id.notin_(busy))
+        with self.session_factory() as db:
+            rows = db.execute(query).all()
+            if not rows:
+                return []
+            lease = self.timeout_seconds * (_BATCHES_PER_CLAIM + 1)
+            db.execute(
+                update(WebhookOutbox)
+                .where(WebhookOutbox.id.in_([row.id for row in rows]))
+                .values(next_attempt_at=now + timedelta(seconds=lease))
+            )
+            db.commit()
+
+        deliveries: Dict[int, _Delivery] = {}
+        for row in rows:
+            delivery = deliveries.get(row.subscription_id)
+            if delivery is None:
+                delivery = deliveries[row.subscription_id] = _Delivery(
+                    row.subscription_id, row.url, []
+                )
+            delivery.rows.append(row)
+        return list(deliveries.values())
+
+    def _delivered(self, batch: List[Row]) -> None:
+        with self.session_factory() as db:
+            db.execute(
+                delete(WebhookOutbox).where(
+                    WebhookOutbox.id.in_([row.id for row in batch])
+                )
+            )
+            db.commit()
+        WEBHOOK_EVENTS.labels(result="delivered").inc(len(batch))
+
+    def _failed(
+        self, delivery: _Delivery, batch: List[Row], rest: List[Row], error: str
+    ) -> None:
+        """Schedule a failed batch for retry or dead-letter it."""
+        now = datetime.now(UTC)
+        retries, dead, dead_ids = [], [], []
+        for row in batch:
+            attempts = row.attempts + 1
+            if attempts >= self.max_attempts:
+                dead_ids.append(row.id)
+                dead.append(
+                    {
+                        "subscription_id": delivery.subscription_id,
+                        "url": delivery.url,
+                        "event": row.event,
+                        "attempts": attempts,
+                        "error": error,
+                        "failed_at": now,
+                    }
+                )
+            else:
+                retries.append(
+                    {
+                        "id": row.id,
+                        "attempts": attempts,
+                        "next_attempt_at": now
+                        + timedelta(seconds=self.backoff(attempts)),
+                        "last_error": error,
+                    }
+                )
+        retry_at = min((retry["next_attempt_at"] for retry in retries), default=now)
+
+        with self.session_factory() as db:
+            if retries:
+                db.execute(update(WebhookOutbox), retries)
+            if rest:
+                # Not attempted, but the endpoint is failing; try them with
+                # the failed batch rather than when their lease runs out
+                db.execute(
+                    update(WebhookOutbox)
+                    .where(WebhookOutbox.id.in_([row.id for row in rest]))
+                    .values(next_attempt_at=retry_at)
+                )
+            if dead:
+                db.execute(insert(WebhookDeadLetter), dead)
+                db.execute(delete(WebhookOutbox).where(WebhookOutbox.id.in_(dead_ids)))
+            db.commit()
+        WEBHOOK_EVENTS.labels(result="retried").inc(len(retries))
+        WEBHOOK_EVENTS.labels(result="dead_lettered").inc(len(dead))
+        logger.warning(
+            "Webhook delivery to subscription %d failed: %s",
+            delivery.subscription_id,
+            error,
+        )
+
+    async def _post(self, url: str, events: List[dict]) -> str | None:
+        """POST a batch of events; return the error if it was not accepted."""
+        started = time.perf_counter()
+        try:
+            response = await self._client(url).post(url, json={"events": events})
+        except httpx.HTTPError as e:
+            return str(e) or type(e).__name__
+        finally:
+            WEBHOOK_DELIVERY.observe(time.perf_counter() - started)
+        if response.is_success:
+            return None
+        return f"HTTP {response.status_code}"
+
+    async def _deliver(self, delivery: _Delivery) -> None:
+        """Send a subscription's claimed events, one batch after the other."""
+        rows = delivery.rows
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start : start + self.batch_size]
+                error = await self._post(delivery.url, [row.event for row in batch])
+                if error is None:
+                    await asyncio.to_thread(self._delivered, batch)
+                else:
+                    rest = rows[start + self.batch_size :]
+                    await asyncio.to_thread(self._failed, delivery, batch, rest, error)
+                    break
+        except SQLAlchemyError as e:
+            logger.error("Recording a webhook delivery failed: %s", str(e))
+        finally:
+            self._busy.discard(delivery.subscription_id)
+
+    async def dispatch(self) -> int:
+        """
+        Claim due events and start delivering them.
+
+        Returns:
+            int: Events claimed
+        """
+        deliveries = await asyncio.to_thread(self._claim, frozenset(self._busy))
+        for delivery in deliveries:
+            self._busy.add(delivery.subscription_id)
+            task = asyncio.create_task(self._deliver(delivery))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return sum(len(delivery.rows) for delivery in deliveries)
+
+    async def drain(self) -> None:
+        """Wait for the deliveries in flight to finish."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def aclose(self) -> None:
+        """Finish the deliveries in flight and close the connection pools."""
+        await self.drain()
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._ready.set()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    claimed = await self.dispatch()
+                except SQLAlchemyError as e:
+                    logger.error("Claiming webhook events failed: %s", str(e))
+                    claimed = 0
+                if not claimed:
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), self.poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            await self.aclose()
+
+    def run(self):
+        asyncio.run(self._serve())
+
+    def stop(self) -> None:
+        """Stop the thread once its deliveries in flight are done."""
+        self._ready.wait()
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self.join()
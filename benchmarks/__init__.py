@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the Monitor API.
+
+Each module in this package is runnable with ``python -m benchmarks.<name>`` and
+emits its results as JSON so runs can be compared against a stored baseline.
+"""
@@ -0,0 +1,204 @@
+"""
+Latency and throughput benchmark for the API hot paths.
+
+Seeds a synthetic fleet into SQLite or PostgreSQL, then drives the application
+in-process with the FastAPI test client and reports latency percentiles per
+endpoint.
+
+Usage:
+    python -m benchmarks.api --monitors 1000 --history 20 --output results.json
+    python -m benchmarks.api --database-url postgresql://localhost/monitor_bench --reset
+    python -m benchmarks.api --baseline results.json --tolerance 0.2
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.common import (
+    compare_results,
+    environment_info,
+    load_results,
+    report_failures,
+    scenarios,
+    summarize,
+    write_results,
+)
+from benchmarks.seed import (
+    FleetSpec,
+    add_fleet_arguments,
+    fleet_spec_from_args,
+    seed_fleet,
+)
+
+
+def run_benchmark(  # pylint: disable=too-many-arguments,too-many-locals,too-many-statements
+    database_url: str,
+    spec: FleetSpec,
+    *,
+    iterations: int,
+    warmup: int = 5,
+    reset: bool = False,
+    only: List[str] | None = None,
+) -> dict:
+    """
+    Seed a fleet and measure every scenario against it.
+
+    Args:
+        database_url: SQLAlchemy URL of the database to benchmark
+        spec: Fleet shape to seed
+        iterations: Measured requests per scenario
+        warmup: Unmeasured requests per scenario
+        reset: Drop and recreate all tables before seeding
+        only: Restrict the run to these scenario names
+
+    Returns:
+        dict: Result document with ``meta`` and per-scenario ``results``
+    """
+    # The application reads its settings at import time; span export is
+    # disabled so console spans do not mix with the JSON results
+    os.environ.setdefault("DATABASE_URL", database_url)
+    os.environ.setdefault("TESTING", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    # Every benchmark request comes from the same client
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # pylint: disable=import-outside-toplevel
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, func, select
+    from sqlalchemy.orm import sessionmaker
+
+    from app.api.dependencies import get_db, get_read_db
+    from app.main import app
+    from app.messages import message_cache
+    from app.models.base import Base
+    from app.models.monitor import Monitor
+    from app.tag_cache import tag_cache
+
+    connect_args = (
+        {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    )
+    engine = create_engine(database_url, connect_args=connect_args)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with session_factory() as db:
+        if db.scalar(select(func.count(Monitor.id))):  # pylint: disable=not-callable
+            raise SystemExit("Database is not empty; rerun with --reset to reseed it")
+        seed_started = time.perf_counter()
+        fleet = seed_fleet(db, spec)
+        seed_seconds = time.perf_counter() - seed_started
+    # Tag and message ids from a previous run in this process may belong to
+    # another database
+    tag_cache.invalidate()
+    message_cache.invalidate()
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous_overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+
+    rng = random.Random(spec.seed)
+    results: Dict[str, dict] = {}
+    try:
+        with TestClient(app) as client:
+            for name, request in scenarios(fleet):
+                if only and name not in only:
+                    continue
+                for _ in range(warmup):
+                    request(client, rng)
+
+                latencies = []
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    request_started = time.perf_counter()
+                    response = request(client, rng)
+                    latencies.append(time.perf_counter() - request_started)
+                    if response.status_code >= 400:
+                        raise RuntimeError(
+                            f"{name} failed with {response.status_code}: {response.text}"
+                        )
+                results[name] = summarize(latencies, time.perf_counter() - started)
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(previous_overrides)
+        engine.dispose()
+
+    return {
+        "meta": {
+            **environment_info(),
+            "dialect": engine.dialect.name,
+            "monitors": spec.monitors,
+            "tags": spec.tags,
+            "tags_per_monitor": spec.tags_per_monitor,
+            "history": spec.history,
+            "iterations": iterations,
+            "seed": spec.seed,
+            "seed_seconds": round(seed_seconds, 3),
+        },
+        "results": results,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument(
+        "--database-url",
+        help="SQLAlchemy URL; defaults to a fresh SQLite file in a temp directory",
+    )
+    parser.add_argument("--reset", action="store_true", help="drop tables first")
+    add_fleet_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", action="append", help="scenario to run (repeatable)")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="compare against a previous JSON result")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed relative slowdown versus the baseline (default 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    spec = fleet_spec_from_args(args)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database_url = args.database_url or f"sqlite:///{tmpdir}/monitor-bench.db"
+        results = run_benchmark(
+            database_url,
+            spec,
+            iterations=args.iterations,
+            warmup=args.warmup,
+            reset=args.reset,
+            only=args.only,
+        )
+
+    write_results(results, args.output)
+
+    if args.baseline:
+        return report_failures(
+            compare_results(results, load_results(args.baseline), args.tolerance)
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
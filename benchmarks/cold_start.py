@@ -0,0 +1,200 @@
+"""
+Cold-start benchmark for the Lambda handler.
+
+Starts fresh interpreters that import ``app.main`` and serve one request through
+the Mangum handler, and reports import time, first-request latency and which
+heavy optional modules were loaded along the way.
+
+Usage:
+    python -m benchmarks.cold_start --runs 10 --output cold_start.json
+    python -m benchmarks.cold_start --max-import-ms 1500 --max-first-request-ms 200
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+from benchmarks.common import (
+    compare_results,
+    environment_info,
+    load_results,
+    report_failures,
+    summarize,
+    write_results,
+)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that a cold start serving JSON should not need to import
+HEAVY_MODULES = ("PIL", "grpc", "opentelemetry.exporter.otlp.proto.grpc")
+
+CHILD_SCRIPT = """
+import json, sys, time
+
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+class Context:
+    function_name = "monitor-api"
+    aws_request_id = "cold-start-benchmark"
+
+path = sys.argv[1]
+event = {
+    "version": "2.0",
+    "routeKey": "$default",
+    "rawPath": path,
+    "rawQueryString": "",
+    "headers": {"host": "localhost", "accept": "application/json"},
+    "requestContext": {
+        "http": {
+            "method": "GET",
+            "path": path,
+            "protocol": "HTTP/1.1",
+            "sourceIp": "127.0.0.1",
+            "userAgent": "cold-start-benchmark",
+        },
+        "stage": "$default",
+    },
+    "isBase64Encoded": False,
+}
+response = app.main.handler(event, Context())
+done = time.perf_counter()
+
+print("COLD_START_RESULT " + json.dumps({
+    "import_s": imported - started,
+    "first_request_s": done - imported,
+    "status": response["statusCode"],
+    "heavy_modules": [name for name in %r if name in sys.modules],
+}), flush=True)
+""" % (HEAVY_MODULES,)
+
+
+def prepare_database(database_url: str) -> None:
+    """Create the schema once so child processes can skip create_all."""
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy import create_engine
+
+    from app.models.monitor import Monitor
+
+    engine = create_engine(database_url)
+    Monitor.metadata.create_all(bind=engine)
+    engine.dispose()
+
+
+def measure_cold_start(database_url: str, runs: int, path: str, profile: str) -> dict:
+    """
+    Measure import time and first-request latency in fresh interpreters.
+
+    Args:
+        database_url: SQLAlchemy URL the application connects to
+        runs: Number of interpreters to start
+        path: Request path served through the Lambda handler
+        profile: Value of STARTUP_PROFILE for the child processes
+
+    Returns:
+        dict: Result document with ``meta`` and ``results``
+    """
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "STARTUP_PROFILE": profile,
+        "PYTHONPATH": str(REPO_ROOT),
+    }
+    env.pop("TESTING", None)
+
+    import_times, request_times, heavy_modules = [], [], set()
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT, path],
+            cwd=REPO_ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # Console span exporters may print to stdout as well
+        line = next(
+            line
+            for line in completed.stdout.splitlines()
+            if line.startswith("COLD_START_RESULT ")
+        )
+        sample = json.loads(line.split(" ", 1)[1])
+        if sample["status"] >= 400:
+            raise RuntimeError(f"{path} returned {sample['status']}")
+        import_times.append(sample["import_s"])
+        request_times.append(sample["first_request_s"])
+        heavy_modules.update(sample["heavy_modules"])
+
+    return {
+        "meta": {
+            **environment_info(),
+            "runs": runs,
+            "path": path,
+            "startup_profile": profile,
+            "heavy_modules_imported": sorted(heavy_modules),
+        },
+        "results": {
+            "import": summarize(import_times, sum(import_times)),
+            "first_request": summarize(request_times, sum(request_times)),
+        },
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument(
+        "--database-url",
+        help="SQLAlchemy URL; defaults to a fresh SQLite file in a temp directory",
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/api/v1/monitor/statuses/")
+    parser.add_argument("--profile", default="lambda", choices=["server", "lambda"])
+    parser.add_argument("--max-import-ms", type=float, help="fail above this p50")
+    parser.add_argument(
+        "--max-first-request-ms", type=float, help="fail above this p50"
+    )
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="compare against a previous JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database_url = args.database_url or f"sqlite:///{tmpdir}/cold-start.db"
+        prepare_database(database_url)
+        results = measure_cold_start(database_url, args.runs, args.path, args.profile)
+
+    write_results(results, args.output)
+
+    failures = []
+    if results["meta"]["heavy_modules_imported"] and args.profile == "lambda":
+        failures.append(
+            "heavy modules imported: "
+            + ", ".join(results["meta"]["heavy_modules_imported"])
+        )
+    budgets = (
+        ("import", args.max_import_ms),
+        ("first_request", args.max_first_request_ms),
+    )
+    for name, budget in budgets:
+        if budget is not None and results["results"][name]["p50_ms"] > budget:
+            failures.append(
+                f"{name} p50 {results['results'][name]['p50_ms']:.1f} ms "
+                f"exceeds budget {budget:.1f} ms"
+            )
+    if args.baseline:
+        failures.extend(
+            compare_results(results, load_results(args.baseline), args.tolerance)
+        )
+
+    return report_failures(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
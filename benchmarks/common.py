@@ -0,0 +1,171 @@
+"""
+Shared helpers for the benchmark scripts.
+
+This module provides latency summaries, JSON result output and baseline
+comparison used by every benchmark in the package, and the API scenarios driven
+both in-process (``benchmarks.api``) and over HTTP (``benchmarks.load``).
+"""
+
+import json
+import math
+import platform
+import sys
+from datetime import UTC, datetime
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Latency statistics compared against a baseline run
+COMPARED_STATS = ("p50_ms", "p95_ms")
+# Prefix of the monitor endpoints the scenarios call
+API = "/api/v1/monitor"
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """
+    Return the nearest-rank percentile of a list of samples.
+
+    Args:
+        samples: Measured values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        float: Value at the requested percentile, or 0.0 for no samples
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: Sequence[float], elapsed: float) -> Dict[str, float]:
+    """
+    Summarize request latencies measured in seconds.
+
+    Args:
+        latencies: Per-request latencies in seconds
+        elapsed: Wall-clock seconds spent issuing the requests
+
+    Returns:
+        dict: Count, throughput and latency percentiles in milliseconds
+    """
+    count = len(latencies)
+    return {
+        "count": count,
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 3),
+    }
+
+
+def environment_info() -> Dict[str, str]:
+    """Describe the interpreter and platform a benchmark ran on."""
+    # pylint: disable=import-outside-toplevel
+    import sqlalchemy
+
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "run_at": datetime.now(UTC).isoformat(),
+    }
+
+
+def write_results(results: dict, output: str | None) -> None:
+    """
+    Write benchmark results as JSON to a file, or to stdout.
+
+    Args:
+        results: Benchmark results
+        output: Destination path, or None for stdout
+    """
+    payload = json.dumps(results, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Compare two benchmark result documents.
+
+    Args:
+        current: Results of this run
+        baseline: Results of a previous run
+        tolerance: Allowed relative slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        List[str]: One message per regressed statistic; empty when none regressed
+    """
+    regressions = []
+    for name, stats in current.get("results", {}).items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        for stat in COMPARED_STATS:
+            before, after = previous.get(stat), stats.get(stat)
+            if not before or after is None:
+                continue
+            if after > before * (1 + tolerance):
+                regressions.append(
+                    f"{name} {stat}: {before:.3f} -> {after:.3f} "
+                    f"(+{(after / before - 1) * 100:.1f}%)"
+                )
+    return regressions
+
+
+def report_failures(failures: List[str]) -> int:
+    """Print regression lines to stderr and return the process exit code."""
+    for line in failures:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def load_results(path: str) -> dict:
+    """Load a benchmark result document from a JSON file."""
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def scenarios(fleet: dict) -> List[Tuple[str, Callable]]:
+    """Build the list of (name, request function) pairs to measure."""
+    monitor_ids = fleet["monitor_ids"]
+    tag_names = fleet["tag_names"]
+    states = ["Normal", "Warning", "Critical"]
+    by_tags_query = "&".join(f"tags={name}" for name in tag_names[:1])
+
+    return [
+        (
+            "set_monitor_state",
+            lambda client, rng: client.post(
+                f"{API}/{rng.choice(monitor_ids)}/state/",
+                json={"state": rng.choice(states), "message": "benchmark"},
+            ),
+        ),
+        ("get_all_statuses", lambda client, rng: client.get(f"{API}/statuses/")),
+        (
+            "get_statuses_by_tags",
+            lambda client, rng: client.get(f"{API}/statuses/by-tags/?{by_tags_query}"),
+        ),
+        (
+            "get_monitor_history",
+            lambda client, rng: client.get(
+                f"{API}/{rng.choice(monitor_ids)}/history/?limit=20"
+            ),
+        ),
+        (
+            "get_monitor_badge",
+            lambda client, rng: client.get(
+                f"{API}/{rng.choice(monitor_ids)}/state/badge.png"
+            ),
+        ),
+        (
+            "get_badge_wall",
+            lambda client, rng: client.get(f"{API}/badges.svg?tag={tag_names[0]}"),
+        ),
+    ]
@@ -0,0 +1,203 @@
+"""
+Concurrent HTTP load benchmark against a running server.
+
+Creates a small fleet of monitors through the API, then sends requests from
+several concurrent clients for a fixed time and reports throughput and latency
+percentiles per scenario. Use it to compare server configurations, for example
+one gunicorn worker against one per core:
+
+    WEB_CONCURRENCY=1 gunicorn -c gunicorn.conf.py app.main:app
+    python -m benchmarks.load --concurrency 32 --output one_worker.json
+
+    gunicorn -c gunicorn.conf.py app.main:app
+    python -m benchmarks.load --concurrency 32 --baseline one_worker.json
+
+Usage:
+    python -m benchmarks.load --base-url http://localhost:8000 --duration 30
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import httpx
+
+from benchmarks.common import (
+    API,
+    compare_results,
+    environment_info,
+    load_results,
+    report_failures,
+    scenarios,
+    summarize,
+    write_results,
+)
+
+
+def create_fleet(client: httpx.Client, monitors: int, tags: int) -> dict:
+    """
+    Create monitors with unique names through the API.
+
+    Args:
+        client: Client for the server under test
+        monitors: Number of monitors to create
+        tags: Number of distinct tags spread over the monitors
+
+    Returns:
+        dict: ``monitor_ids`` and ``tag_names`` of the created fleet
+    """
+    run_id = uuid.uuid4().hex[:8]
+    tag_names = [f"load-{run_id}-tag-{i}" for i in range(tags)]
+    monitor_ids = []
+    for i in range(monitors):
+        response = client.post(
+            f"{API}/",
+            json={"name": f"load-{run_id}-{i}", "tags": [tag_names[i % tags]]},
+        )
+        response.raise_for_status()
+        monitor_ids.append(response.json()["id"])
+    return {"monitor_ids": monitor_ids, "tag_names": tag_names}
+
+
+def drive(
+    base_url: str, request: Callable, concurrency: int, duration: float
+) -> Dict[str, float]:
+    """
+    Send requests from concurrent clients for a fixed time.
+
+    Args:
+        base_url: URL of the server under test
+        request: Function issuing one request with a client and a random generator
+        concurrency: Number of clients sending requests at the same time
+        duration: Seconds to keep sending requests
+
+    Returns:
+        dict: Latency and throughput summary across all clients
+    """
+    latencies: List[float] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client_loop(seed: int) -> None:
+        rng = random.Random(seed)
+        local = []
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = request(client, rng)
+                local.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors.append(f"{response.status_code}: {response.text[:200]}")
+                    break
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client_loop, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    if errors:
+        raise RuntimeError(errors[0])
+    return summarize(latencies, elapsed)
+
+
+def run_load(  # pylint: disable=too-many-arguments
+    base_url: str,
+    *,
+    concurrency: int,
+    duration: float,
+    monitors: int = 50,
+    tags: int = 5,
+    only: List[str] | None = None,
+) -> dict:
+    """
+    Create a fleet on a running server and load every scenario in turn.
+
+    Args:
+        base_url: URL of the server under test
+        concurrency: Number of concurrent clients
+        duration: Seconds to load each scenario
+        monitors: Number of monitors to create
+        tags: Number of distinct tags
+        only: Restrict the run to these scenario names
+
+    Returns:
+        dict: Result document with ``meta`` and per-scenario ``results``
+    """
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        fleet = create_fleet(client, monitors, tags)
+
+    results = {}
+    for name, request in scenarios(fleet):
+        if only and name not in only:
+            continue
+        results[name] = drive(base_url, request, concurrency, duration)
+
+    return {
+        "meta": {
+            **environment_info(),
+            "base_url": base_url,
+            "client_cpus": os.cpu_count(),
+            "concurrency": concurrency,
+            "duration_s": duration,
+            "monitors": monitors,
+        },
+        "results": results,
+    }
+
+
+def print_speedups(results: dict, baseline: dict) -> None:
+    """Print each scenario's throughput relative to a baseline run."""
+    for name, stats in results["results"].items():
+        before = baseline["results"].get(name, {}).get("throughput_rps")
+        if before:
+            print(
+                f"{name}: {stats['throughput_rps']:.1f} req/s "
+                f"({stats['throughput_rps'] / before:.2f}x baseline)",
+                file=sys.stderr,
+            )
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--monitors", type=int, default=50)
+    parser.add_argument("--tags", type=int, default=5)
+    parser.add_argument("--only", action="append", help="scenario to run (repeatable)")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="compare against a previous JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run_load(
+        args.base_url,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        monitors=args.monitors,
+        tags=args.tags,
+        only=args.only,
+    )
+    write_results(results, args.output)
+
+    failures = []
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        print_speedups(results, baseline)
+        failures = compare_results(results, baseline, args.tolerance)
+
+    return report_failures(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Composite rollup propagation benchmark.
+
+Builds composite hierarchies in SQLite and times member state updates through
+``record_status``, which rolls each change up to the affected composites. Two
+shapes are measured: a deep chain of nested composites over a few members, and
+a single wide composite over many members. For comparison, each update is also
+followed by a full recompute that reads the current state of every member of
+every composite above the updated monitor, which is what a rollup without
+counters would have to do.
+
+Usage:
+    python -m benchmarks.rollup --depth 50 --width 10000 --output rollup.json
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from typing import List
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.ingest import record_status
+from app.models.base import Base
+from app.models.monitor import Monitor, MonitorState, MonitorStatus, rollup_edges
+from app.rollup import SEVERITY, create_composite, worst_state
+from app.statements import LATEST_STATUSES
+from benchmarks.common import environment_info, summarize, write_results
+
+
+def _build(db: Session, depth: int, width: int) -> tuple:
+    """Add ``width`` members under a chain of ``depth`` composites."""
+    now = datetime.now(UTC)
+    member_ids = list(
+        db.scalars(
+            insert(Monitor).returning(Monitor.id, sort_by_parameter_order=True),
+            [{"name": f"member-{i}"} for i in range(width)],
+        )
+    )
+    db.execute(
+        insert(MonitorStatus),
+        [
+            {"monitor_id": member_id, "state": MonitorState.NORMAL, "timestamp": now}
+            for member_id in member_ids
+        ],
+    )
+    composite_ids = []
+    members = member_ids
+    for level in range(depth):
+        composite = Monitor(name=f"composite-{level}", composite=True)
+        db.add(composite)
+        db.flush()
+        create_composite(db, composite.id, [], members, [], now)
+        composite_ids.append(composite.id)
+        members = [composite.id]
+    db.commit()
+    return member_ids, composite_ids
+
+
+def _recompute(db: Session, composite_ids: List[int]) -> None:
+    """Roll every composite up from the current states of all its members."""
+    for composite_id in composite_ids:
+        members = select(rollup_edges.c.member_id).where(
+            rollup_edges.c.composite_id == composite_id
+        )
+        counts = [0] * len(SEVERITY)
+        for row in db.execute(LATEST_STATUSES.where(Monitor.id.in_(members))):
+            counts[SEVERITY.index(row.state)] += 1
+        worst_state(counts)
+
+
+def measure_hierarchy(  # pylint: disable=too-many-locals
+    database_url: str, depth: int, width: int, updates: int, seed: int = 0
+) -> dict:
+    """
+    Build one hierarchy and time member updates against it.
+
+    Args:
+        database_url: SQLAlchemy URL of an empty database
+        depth: Nested composites above the members
+        width: Members of the innermost composite
+        updates: Member state updates to time
+        seed: Random seed for the updates
+
+    Returns:
+        dict: ``update`` and ``recompute`` latency summaries, and the
+            composite statuses written per update
+    """
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    rng = random.Random(seed)
+    timings = {"update": [], "recompute": []}
+
+    with session_factory() as db:
+        member_ids, composite_ids = _build(db, depth, width)
+        statuses_before = db.query(MonitorStatus).count()
+        for _ in range(updates):
+            member_id = rng.choice(member_ids)
+            started = time.perf_counter()
+            record_status(db, member_id, rng.choice(SEVERITY))
+            timings["update"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            _recompute(db, composite_ids)
+            timings["recompute"].append(time.perf_counter() - started)
+        composite_statuses = db.query(MonitorStatus).count() - statuses_before - updates
+    engine.dispose()
+
+    results = {
+        stage: summarize(latencies, sum(latencies))
+        for stage, latencies in timings.items()
+    }
+    results["composite_statuses_per_update"] = round(composite_statuses / updates, 3)
+    return results
+
+
+def measure_rollup(
+    database_url_prefix: str, depth: int, width: int, updates: int, seed: int = 0
+) -> dict:
+    """
+    Time rollup propagation in a deep and a wide hierarchy.
+
+    Args:
+        database_url_prefix: SQLAlchemy URL prefix; the shape name and
+            ``.db`` are appended for each shape's database
+        depth: Nested composites in the deep hierarchy, over 10 members
+        width: Members of the single composite in the wide hierarchy
+        updates: Member state updates to time per shape
+        seed: Random seed for the updates
+
+    Returns:
+        dict: Result document with ``meta`` and ``results`` per shape
+    """
+    shapes = {"deep": (depth, 10), "wide": (1, width)}
+    return {
+        "meta": {
+            **environment_info(),
+            "shapes": {
+                name: {"depth": shape[0], "width": shape[1]}
+                for name, shape in shapes.items()
+            },
+            "updates": updates,
+            "seed": seed,
+        },
+        "results": {
+            name: measure_hierarchy(
+                f"{database_url_prefix}{name}.db", *shape, updates, seed
+            )
+            for name, shape in shapes.items()
+        },
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--depth", type=int, default=50)
+    parser.add_argument("--width", type=int, default=10_000)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = measure_rollup(
+            f"sqlite:///{tmpdir}/rollup-",
+            args.depth,
+            args.width,
+            args.updates,
+            seed=args.seed,
+        )
+
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Threshold rule engine throughput benchmark.
+
+Seeds a fleet where every monitor has a threshold rule, then replays a
+simulated stream of metric samples second by second: each second's samples
+arrive as bulk request bodies, are parsed with the request schema, queued in
+the rule engine, and evaluated in one pass that writes the state changes to
+SQLite. Reports the time of each stage and the sustained samples per second.
+
+Usage:
+    python -m benchmarks.rules --monitors 10000 --rate 50000 --output rules.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.monitor import RuleAggregate, ThresholdRule
+from app.rules import RuleEngine
+from app.schemas.monitor import MonitorSample
+from benchmarks.common import environment_info, summarize, write_results
+from benchmarks.seed import (
+    FleetSpec,
+    add_fleet_arguments,
+    fleet_spec_from_args,
+    seed_fleet,
+)
+
+# Parses a bulk samples request body
+SAMPLE_BATCH = TypeAdapter(List[MonitorSample])
+
+
+def measure_rules(  # pylint: disable=too-many-arguments,too-many-locals
+    database_url: str,
+    spec: FleetSpec,
+    rate: int,
+    seconds: int,
+    *,
+    request_size: int = 1000,
+) -> dict:
+    """
+    Seed a fleet with rules and replay a sample stream through the engine.
+
+    Args:
+        database_url: SQLAlchemy URL of an empty database
+        spec: Fleet shape to seed
+        rate: Samples per simulated second
+        seconds: Simulated seconds to replay
+        request_size: Samples per bulk request body
+
+    Returns:
+        dict: Result document with ``meta`` and ``results`` per stage;
+            ``meta.samples_per_second`` is the sustained rate with and without
+            request parsing
+    """
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    rng = random.Random(spec.seed)
+    aggregates = list(RuleAggregate)
+
+    with session_factory() as db:
+        monitor_ids = seed_fleet(db, spec)["monitor_ids"]
+        db.execute(
+            insert(ThresholdRule),
+            [
+                {
+                    "monitor_id": monitor_id,
+                    "aggregate": rng.choice(aggregates),
+                    "window_seconds": 10.0,
+                    "warning": 80.0,
+                    "critical": 90.0,
+                    "above": True,
+                    "hysteresis": 5.0,
+                }
+                for monitor_id in monitor_ids
+            ],
+        )
+        db.commit()
+        rules = RuleEngine()
+        rules.load(db)
+
+        # Each monitor drifts around its own level, so some cross thresholds
+        levels = {monitor_id: rng.uniform(40, 100) for monitor_id in monitor_ids}
+        timings = {"parse": [], "ingest": [], "evaluate": []}
+        written = 0
+        start = time.time()
+        for second in range(seconds):
+            now = start + second
+            bodies = []
+            for offset in range(0, rate, request_size):
+                bodies.append(
+                    json.dumps(
+                        [
+                            {
+                                "monitor_id": (monitor_id := rng.choice(monitor_ids)),
+                                "value": levels[monitor_id] + rng.gauss(0, 5),
+                            }
+                            for _ in range(min(request_size, rate - offset))
+                        ]
+                    )
+                )
+
+            for body in bodies:
+                started = time.perf_counter()
+                samples = SAMPLE_BATCH.validate_json(body)
+                timings["parse"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                rules.add_samples(
+                    [(sample.monitor_id, now, sample.value) for sample in samples]
+                )
+                timings["ingest"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            written += rules.run(db, now)
+            timings["evaluate"].append(time.perf_counter() - started)
+    engine.dispose()
+
+    results = {
+        stage: summarize(latencies, sum(latencies))
+        for stage, latencies in timings.items()
+    }
+    total = rate * seconds
+    engine_seconds = sum(timings["ingest"]) + sum(timings["evaluate"])
+    return {
+        "meta": {
+            **environment_info(),
+            **asdict(spec),
+            "rate": rate,
+            "seconds": seconds,
+            "request_size": request_size,
+            "statuses_written": written,
+            "samples_per_second": {
+                "engine": round(total / engine_seconds, 1),
+                "with_parsing": round(
+                    total / (engine_seconds + sum(timings["parse"])), 1
+                ),
+            },
+        },
+        "results": results,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    add_fleet_arguments(parser, monitors=10_000, history=1)
+    parser.add_argument("--rate", type=int, default=50_000)
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--request-size", type=int, default=1000)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = measure_rules(
+            f"sqlite:///{tmpdir}/rules.db",
+            fleet_spec_from_args(args),
+            args.rate,
+            args.seconds,
+            request_size=args.request_size,
+        )
+
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Synthetic fleet seeding for benchmarks.
+
+This module bulk-loads monitors, tags and status history directly through
+SQLAlchemy Core so that large fleets can be created in seconds.
+"""
+
+import argparse
+import random
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.monitor import Monitor, MonitorState, MonitorStatus, Tag, monitor_tags
+
+# Rows per executemany batch
+BATCH_SIZE = 5000
+
+
+@dataclass
+class FleetSpec:
+    """
+    Shape of a synthetic fleet.
+
+    Attributes:
+        monitors: Number of monitors
+        tags: Size of the tag vocabulary
+        tags_per_monitor: Tags attached to each monitor
+        history: Status rows per monitor
+        seed: Random seed so runs are reproducible
+    """
+
+    monitors: int = 1000
+    tags: int = 20
+    tags_per_monitor: int = 3
+    history: int = 20
+    seed: int = 42
+
+
+def add_fleet_arguments(parser: argparse.ArgumentParser, **defaults) -> None:
+    """
+    Add command-line options for the fleet shape.
+
+    Args:
+        parser: Parser to extend
+        defaults: Defaults overriding the ``FleetSpec`` ones, by field name
+    """
+    spec = FleetSpec(**defaults)
+    parser.add_argument("--monitors", type=int, default=spec.monitors)
+    parser.add_argument("--tags", type=int, default=spec.tags)
+    parser.add_argument("--tags-per-monitor", type=int, default=spec.tags_per_monitor)
+    parser.add_argument("--history", type=int, default=spec.history)
+    parser.add_argument("--seed", type=int, default=spec.seed)
+
+
+def fleet_spec_from_args(args: argparse.Namespace) -> FleetSpec:
+    """Build the fleet shape from options added by ``add_fleet_arguments``."""
+    return FleetSpec(
+        monitors=args.monitors,
+        tags=args.tags,
+        tags_per_monitor=args.tags_per_monitor,
+        history=args.history,
+        seed=args.seed,
+    )
+
+
+def _insert_batched(db: Session, table, rows: List[dict]) -> None:
+    """Insert rows with executemany in fixed-size batches."""
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(table), rows[start : start + BATCH_SIZE])
+
+
+def seed_fleet(db: Session, spec: FleetSpec) -> Dict[str, List]:
+    """
+    Seed a synthetic fleet into an empty database.
+
+    Args:
+        db: Database session
+        spec: Fleet shape
+
+    Returns:
+        dict: Seeded ``monitor_ids`` and ``tag_names``
+    """
+    rng = random.Random(spec.seed)
+    states = list(MonitorState)
+
+    tag_names = [f"tag-{i}" for i in range(spec.tags)]
+    _insert_batched(db, Tag.__table__, [{"name": name} for name in tag_names])
+    tag_ids = dict(db.execute(select(Tag.name, Tag.id)).all())
+
+    _insert_batched(
+        db,
+        Monitor.__table__,
+        [{"name": f"bench-monitor-{i}"} for i in range(spec.monitors)],
+    )
+    monitor_ids = list(db.execute(select(Monitor.id).order_by(Monitor.id)).scalars())
+
+    per_monitor = min(spec.tags_per_monitor, spec.tags)
+    _insert_batched(
+        db,
+        monitor_tags,
+        [
+            {"monitor_id": monitor_id, "tag_id": tag_ids[tag_name]}
+            for monitor_id in monitor_ids
+            for tag_name in rng.sample(tag_names, per_monitor)
+        ],
+    )
+
+    now = datetime.now(UTC)
+    status_rows = []
+    for monitor_id in monitor_ids:
+        for depth in range(spec.history, 0, -1):
+            status_rows.append(
+                {
+                    "monitor_id": monitor_id,
+                    "state": rng.choice(states),
+                    "message": f"synthetic status {depth}",
+                    "timestamp": now - timedelta(minutes=depth),
+                }
+            )
+        if len(status_rows) >= BATCH_SIZE:
+            _insert_batched(db, MonitorStatus.__table__, status_rows)
+            status_rows = []
+    _insert_batched(db, MonitorStatus.__table__, status_rows)
+
+    db.commit()
+    return {"monitor_ids": monitor_ids, "tag_names": tag_names}
@@ -0,0 +1,122 @@
+"""
+Memory footprint and lookup benchmark for the in-memory state store.
+
+Seeds a synthetic fleet, loads it into a ``StateStore`` and reports the memory
+the store holds, the load time, lookup latencies and the result of the
+consistency check against the database.
+
+Usage:
+    python -m benchmarks.state_store --monitors 100000 --output state_store.json
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.state_store import StateStore
+from benchmarks.common import environment_info, summarize, write_results
+from benchmarks.seed import (
+    FleetSpec,
+    add_fleet_arguments,
+    fleet_spec_from_args,
+    seed_fleet,
+)
+
+
+def measure_state_store(  # pylint: disable=too-many-locals
+    database_url: str, spec: FleetSpec, lookups: int
+) -> dict:
+    """
+    Seed a fleet, load it into a state store and measure it.
+
+    Args:
+        database_url: SQLAlchemy URL of an empty database
+        spec: Fleet shape to seed
+        lookups: Measured lookups per operation
+
+    Returns:
+        dict: Result document with ``meta`` and ``results``
+    """
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as db:
+        fleet = seed_fleet(db, spec)
+
+        store = StateStore()
+        started = time.perf_counter()
+        store.load(db)
+        load_seconds = time.perf_counter() - started
+
+        # Tracing slows allocation down, so memory is measured on a second load
+        tracemalloc.start()
+        measured = StateStore()
+        measured.load(db)
+        memory_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del measured
+
+        differences = store.check(db)
+    engine.dispose()
+
+    rng = random.Random(spec.seed)
+    operations = {
+        "get": lambda: store.get(rng.choice(fleet["monitor_ids"])),
+        "by_tag": lambda: store.latest(
+            store.ids_with_tags([rng.choice(fleet["tag_names"])])
+        ),
+    }
+    results = {}
+    for name, operation in operations.items():
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(lookups):
+            lookup_started = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - lookup_started)
+        results[name] = summarize(latencies, time.perf_counter() - started)
+
+    return {
+        "meta": {
+            **environment_info(),
+            "monitors": spec.monitors,
+            "tags": spec.tags,
+            "tags_per_monitor": spec.tags_per_monitor,
+            "history": spec.history,
+            "load_seconds": round(load_seconds, 3),
+            "memory_bytes": memory_bytes,
+            "bytes_per_monitor": round(memory_bytes / max(len(store), 1), 1),
+            "inconsistencies": len(differences),
+        },
+        "results": results,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    add_fleet_arguments(parser, monitors=100_000, history=3)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    spec = fleet_spec_from_args(args)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = measure_state_store(
+            f"sqlite:///{tmpdir}/state-store.db", spec, args.lookups
+        )
+
+    write_results(results, args.output)
+    return 1 if results["meta"]["inconsistencies"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
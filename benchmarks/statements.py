@@ -0,0 +1,275 @@
+"""
+Per-request statement overhead benchmark.
+
+Runs the database work of the hot read endpoints against a small SQLite fleet
+in three variants: as it was written with the ORM ``Query`` API, with the same
+statements wrapped in ``lambda_stmt``, and with the prebuilt statements of
+``app.statements``. Reports the Python time spent per request outside of the
+driver's ``execute``: statement construction, compilation and result
+processing.
+
+Usage:
+    python -m benchmarks.statements --iterations 2000 --output statements.json
+"""
+
+import argparse
+import random
+from dataclasses import asdict
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import and_, create_engine, desc, event, func, lambda_stmt, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.base import Base
+from app.models.monitor import Monitor, MonitorStatus, Tag, monitor_tags
+from app.statements import (
+    LATEST_STATUS,
+    LATEST_STATUSES,
+    MONITOR_NAME,
+    STATUS_HISTORY,
+    latest_statuses_with_tags,
+    tags_by_monitor,
+)
+from benchmarks.common import environment_info, summarize, write_results
+from benchmarks.seed import (
+    FleetSpec,
+    add_fleet_arguments,
+    fleet_spec_from_args,
+    seed_fleet,
+)
+
+# Database work of one request, given a session, a monitor id and tag ids
+Work = Callable[[Session, int, List[int]], object]
+
+
+def _query_latest_statuses(db: Session, tag_ids: List[int] | None):
+    # pylint: disable=duplicate-code
+    latest = (
+        db.query(
+            MonitorStatus.monitor_id,
+            func.max(MonitorStatus.timestamp).label("max_timestamp"),
+        )
+        .group_by(MonitorStatus.monitor_id)
+        .subquery()
+    )
+    query = (
+        db.query(
+            Monitor.id,
+            Monitor.name,
+            MonitorStatus.state,
+            MonitorStatus.message,
+            MonitorStatus.timestamp,
+        )
+        .join(MonitorStatus)
+        .join(
+            latest,
+            and_(
+                Monitor.id == latest.c.monitor_id,
+                MonitorStatus.timestamp == latest.c.max_timestamp,
+            ),
+        )
+        .order_by(desc(MonitorStatus.timestamp))
+    )
+    if tag_ids is not None:
+        with_all_tags = (
+            select(monitor_tags.c.monitor_id)
+            .where(monitor_tags.c.tag_id.in_(tag_ids))
+            .group_by(monitor_tags.c.monitor_id)
+            .having(func.count() == len(tag_ids))  # pylint: disable=not-callable
+        )
+        query = query.filter(Monitor.id.in_(with_all_tags))
+    rows = query.all()
+    result = []
+    for row in rows:
+        monitor = db.query(Monitor).filter(Monitor.id == row.id).first()
+        result.append((row, [tag.name for tag in monitor.tags]))
+    return result
+
+
+def _query_latest_state(db: Session, monitor_id: int, _tag_ids):
+    monitor = db.query(Monitor).filter(Monitor.id == monitor_id).first()
+    status = (
+        db.query(MonitorStatus)
+        .filter(MonitorStatus.monitor_id == monitor_id)
+        .order_by(desc(MonitorStatus.timestamp))
+        .first()
+    )
+    return monitor.name, status.state, [tag.name for tag in monitor.tags]
+
+
+def _query_history(db: Session, monitor_id: int, _tag_ids):
+    monitor = db.query(Monitor).filter(Monitor.id == monitor_id).first()
+    statuses = (
+        db.query(MonitorStatus)
+        .filter(MonitorStatus.monitor_id == monitor_id)
+        .order_by(desc(MonitorStatus.timestamp))
+        .offset(0)
+        .limit(10)
+        .all()
+    )
+    return [(monitor.name, status.state, monitor.tags) for status in statuses]
+
+
+def _lambda_latest_state(db: Session, monitor_id: int, _tag_ids):
+    row = db.execute(
+        lambda_stmt(
+            lambda: select(Monitor.name, MonitorStatus.state)
+            .join(MonitorStatus, MonitorStatus.monitor_id == Monitor.id)
+            .where(Monitor.id == monitor_id)
+            .order_by(desc(MonitorStatus.timestamp))
+            .limit(1)
+        )
+    ).first()
+    tags = db.execute(
+        lambda_stmt(
+            lambda: select(Tag.name)
+            .join(monitor_tags, monitor_tags.c.tag_id == Tag.id)
+            .where(monitor_tags.c.monitor_id == monitor_id)
+        )
+    ).all()
+    return row.name, row.state, tags
+
+
+def _prebuilt_latest_statuses(db: Session, tag_ids: List[int] | None):
+    if tag_ids is None:
+        rows = db.execute(LATEST_STATUSES).all()
+        tags = tags_by_monitor(db)
+    else:
+        rows = latest_statuses_with_tags(db, tag_ids)
+        tags = tags_by_monitor(db, [row.id for row in rows])
+    return [(row, tags.get(row.id, [])) for row in rows]
+
+
+def _prebuilt_latest_state(db: Session, monitor_id: int, _tag_ids):
+    row = db.execute(LATEST_STATUS, {"monitor_id": monitor_id}).first()
+    return row.name, row.state, tags_by_monitor(db, [monitor_id])
+
+
+def _prebuilt_history(db: Session, monitor_id: int, _tag_ids):
+    name = db.execute(MONITOR_NAME, {"monitor_id": monitor_id}).scalar()
+    statuses = db.execute(
+        STATUS_HISTORY, {"monitor_id": monitor_id, "skip": 0, "limit": 10}
+    ).all()
+    tags = tags_by_monitor(db, [monitor_id])
+    return [(name, status.state, tags) for status in statuses]
+
+
+# Endpoint database work before ("query") and after ("prebuilt") the
+# conversion; "lambda" is the lambda_stmt alternative, for one path
+PATHS: Dict[str, Dict[str, Work]] = {
+    "latest_state": {
+        "query": _query_latest_state,
+        "lambda": _lambda_latest_state,
+        "prebuilt": _prebuilt_latest_state,
+    },
+    "statuses": {
+        "query": lambda db, _id, _tags: _query_latest_statuses(db, None),
+        "prebuilt": lambda db, _id, _tags: _prebuilt_latest_statuses(db, None),
+    },
+    "by_tags": {
+        "query": lambda db, _id, tag_ids: _query_latest_statuses(db, tag_ids),
+        "prebuilt": lambda db, _id, tag_ids: _prebuilt_latest_statuses(db, tag_ids),
+    },
+    "history": {"query": _query_history, "prebuilt": _prebuilt_history},
+}
+
+
+def measure_statements(  # pylint: disable=too-many-locals
+    database_url: str, spec: FleetSpec, iterations: int, warmup: int = 20
+) -> dict:
+    """
+    Seed a fleet and measure the Python overhead of each path and variant.
+
+    Args:
+        database_url: SQLAlchemy URL of an empty database
+        spec: Fleet shape to seed
+        iterations: Measured requests per path and variant
+        warmup: Unmeasured requests first, filling the statement caches
+
+    Returns:
+        dict: Result document with ``meta`` and ``results`` keyed
+            ``<path>.<variant>``; ``meta.speedups`` holds the ratio of the
+            mean ``query`` and ``prebuilt`` overheads per path
+    """
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    driver_time = [0.0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, *_args):
+        conn.info["benchmark_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, *_args):
+        driver_time[0] += time.perf_counter() - conn.info.pop("benchmark_started")
+
+    with session_factory() as db:
+        fleet = seed_fleet(db, spec)
+        tag_ids = db.scalars(
+            select(Tag.id).where(Tag.name.in_(fleet["tag_names"][:1]))
+        ).all()
+
+    rng = random.Random(spec.seed)
+
+    def run_once(work: Work) -> float:
+        with session_factory() as db:
+            driver_time[0] = 0.0
+            started = time.perf_counter()
+            work(db, rng.choice(fleet["monitor_ids"]), tag_ids)
+            return time.perf_counter() - started - driver_time[0]
+
+    results = {}
+    for path, variants in PATHS.items():
+        for variant, work in variants.items():
+            for _ in range(warmup):
+                run_once(work)
+            started = time.perf_counter()
+            overheads = [run_once(work) for _ in range(iterations)]
+            results[f"{path}.{variant}"] = summarize(
+                overheads, time.perf_counter() - started
+            )
+    engine.dispose()
+
+    return {
+        "meta": {
+            **environment_info(),
+            **asdict(spec),
+            "speedups": {
+                path: round(
+                    results[f"{path}.query"]["mean_ms"]
+                    / max(results[f"{path}.prebuilt"]["mean_ms"], 1e-6),
+                    2,
+                )
+                for path in PATHS
+            },
+        },
+        "results": results,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    add_fleet_arguments(parser, monitors=50, history=5)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = measure_statements(
+            f"sqlite:///{tmpdir}/statements.db",
+            fleet_spec_from_args(args),
+            args.iterations,
+        )
+
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Gunicorn configuration for production.
+
+Runs one uvicorn worker per core by default:
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Settings are read from the environment:
+
+    PORT: Port to listen on (default 8000)
+    WEB_CONCURRENCY: Number of worker processes (default: one per core); must
+        be 1 with RULES_ENABLED, whose sample windows live in a worker's memory
+    GUNICORN_PRELOAD: Import the application once in the master before forking
+        (default true), which saves memory and start-up time per worker
+    GUNICORN_TIMEOUT: Seconds before a silent worker is restarted (default 30)
+    FORWARDED_ALLOW_IPS: Proxy addresses whose X-Forwarded-For and
+        X-Forwarded-Proto headers set the client address and scheme
+        (default 127.0.0.1); "*" behind the Heroku router, whose addresses
+        vary. Rate limits key clients with RATE_LIMIT_TRUSTED_PROXIES instead
+    UVICORN_LOOP, UVICORN_HTTP: Event loop and HTTP parser, see app/server.py
+    PROMETHEUS_MULTIPROC_DIR: Directory for per-worker metric files
+"""
+
+# pylint: disable=invalid-name,unused-argument,import-outside-toplevel
+
+import multiprocessing
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "app.server.AppUvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+accesslog = "-"
+
+
+def on_starting(server):
+    """Refuse to start several workers with threshold rules enabled."""
+    from app.core.config import settings
+
+    if settings.RULES_ENABLED and server.cfg.workers > 1:
+        # Each worker would evaluate the samples it happens to receive and
+        # overwrite the states derived by the others
+        raise RuntimeError(
+            "RULES_ENABLED keeps metric samples in the memory of one worker; "
+            f"set WEB_CONCURRENCY=1 instead of {server.cfg.workers}"
+        )
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connections."""
+    # With preload_app the engines were created in the master; otherwise the
+    # worker imports the application after this hook and there is nothing to do
+    if "app.database" in sys.modules:
+        from app.database import reset_engines_after_fork
+
+        reset_engines_after_fork()
+
+
+def child_exit(server, worker):
+    """Drop the live gauge samples of a worker that exited."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
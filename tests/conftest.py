@@ -10,8 +10,18 @@ from sqlalchemy.pool import StaticPool
 
 # Import Base first to avoid circular import
 from app.models.base import Base
-from app.api.dependencies import get_db
+from app.api.dependencies import get_db, get_read_db, get_read_sessions
+from app.archive import set_store
+from app.flapping import flap_detector
 from app.main import app
+from app.messages import message_cache
+from app.query_stats import instrument_engine
+from app.payload_cache import payload_cache
+from app.ratelimit import set_backend
+from app.rules import rule_engine
+from app.search import search_index
+from app.state_store import state_store
+from app.tag_cache import tag_cache
 
 # Create in-memory SQLite database for testing
 SQLALCHEMY_DATABASE_URL = "sqlite://"
@@ -21,6 +31,7 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+instrument_engine(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -28,6 +39,15 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 def fixture_db_session():
     """Create a fresh database session for each test."""
     Base.metadata.create_all(bind=engine)
+    tag_cache.invalidate()
+    message_cache.invalidate()
+    set_backend(None)
+    set_store(None)
+    state_store.clear()
+    payload_cache.clear()
+    search_index.clear()
+    rule_engine.clear()
+    flap_detector.clear()
     session = TestingSessionLocal()
     try:
         yield session
@@ -47,6 +67,8 @@ def fixture_client(db_session):
             db_session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_read_sessions] = lambda: TestingSessionLocal
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -0,0 +1,218 @@
+"""
+Tests for the status history archive.
+"""
+
+import json
+from datetime import UTC, datetime, timedelta
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, func, select
+
+from app import archive
+from app.archive import (
+    ArchivedStatus,
+    LocalArchiveStore,
+    archive_statuses,
+    encode_file,
+    read_archive,
+    set_store,
+)
+from app.models.monitor import MonitorState, MonitorStatus
+
+OLD = datetime(2025, 1, 30, 12, 0, tzinfo=UTC)
+
+
+class _CountingStore(LocalArchiveStore):
+    """Local store counting its reads and listings."""
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.reads = 0
+        self.listings = 0
+
+    def list_keys(self) -> List[str]:
+        self.listings += 1
+        return super().list_keys()
+
+    def read(self, key: str, start: int = 0, length: int | None = None) -> bytes:
+        self.reads += 1
+        return super().read(key, start, length)
+
+
+@pytest.fixture(name="store")
+def fixture_store(tmp_path):
+    """Archive to a temporary directory."""
+    store = _CountingStore(str(tmp_path))
+    set_store(store)
+    yield store
+    set_store(None)
+
+
+def _post(client: TestClient, monitor_id: int, state: str, timestamp: datetime):
+    response = client.post(
+        f"/api/v1/monitor/{monitor_id}/state/",
+        json={
+            "state": state,
+            "message": f"at {timestamp:%d %b}",
+            "timestamp": timestamp.isoformat(),
+        },
+    )
+    assert response.status_code == 200
+
+
+def _history(client: TestClient, monitor_id: int, skip: int = 0, limit: int = 100):
+    response = client.get(
+        f"/api/v1/monitor/{monitor_id}/history/?skip={skip}&limit={limit}"
+    )
+    return [(status["state"], status["message"]) for status in response.json()]
+
+
+def _export(client: TestClient, monitor_id: int, query: str = "") -> list:
+    response = client.get(f"/api/v1/monitor/{monitor_id}/history/export/{query}")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_file_round_trip_skips_groups(store, monkeypatch):
+    """Test that files decode losslessly and reads fetch matching groups only."""
+    monkeypatch.setattr(archive, "GROUP_ROWS", 4)
+    rows = [
+        ArchivedStatus(
+            status_id,
+            monitor_id,
+            list(MonitorState)[status_id % 4],
+            None if status_id % 3 else f"message {status_id % 2}",
+            OLD + timedelta(minutes=status_id),
+            status_id % 5 == 0,
+        )
+        for status_id in range(1, 41)
+        for monitor_id in [status_id % 4 + 1]
+    ]
+    store.write("2025-01/part.msa", encode_file(reversed(rows)))
+
+    every = read_archive(store, ["2025-01/part.msa"], 2)
+    assert sorted(every) == [row for row in rows if row.monitor_id == 2]
+
+    # The header is cached; 3 of the 10 groups can hold matching rows
+    store.reads = 0
+    window = read_archive(
+        store,
+        ["2025-01/part.msa"],
+        3,
+        start=OLD + timedelta(minutes=10),
+        end=OLD + timedelta(minutes=20),
+    )
+    assert [row.id for row in window] == [10, 14, 18]
+    assert store.reads == 3
+
+
+def test_history_reads_across_archive(
+    client: TestClient, db_session, sample_monitor, store
+):
+    """Test that archived statuses are still served by history and export."""
+    monitor_id = sample_monitor["id"]
+    states = ["Normal", "Warning", "Critical"]
+    for day in range(9):
+        _post(client, monitor_id, states[day % 3], OLD + timedelta(days=day * 5))
+    # Leave an old status as the latest, which is never archived
+    db_session.execute(
+        delete(MonitorStatus).where(MonitorStatus.timestamp > datetime(2026, 1, 1))
+    )
+    db_session.commit()
+    before = _history(client, monitor_id)
+    exported = _export(client, monitor_id)
+
+    archived = archive_statuses(
+        db_session, store, datetime(2026, 1, 1, tzinfo=UTC), rows_per_file=4
+    )
+    assert archived == 8
+    assert sorted(key.split("/")[0] for key in store.list_keys()) == [
+        "2025-01",
+        "2025-02",
+        "2025-02",
+        "2025-03",
+    ]
+    db_session.expire_all()
+    remaining = db_session.scalar(
+        select(func.count()).where(MonitorStatus.monitor_id == monitor_id)
+    )
+    assert remaining == 1
+
+    assert _history(client, monitor_id) == before
+    assert _history(client, monitor_id, skip=3, limit=4) == before[3:7]
+    assert client.get(f"/api/v1/monitor/{monitor_id}/state/").json()["state"] == (
+        "Critical"
+    )
+    assert _export(client, monitor_id) == exported
+    assert [status["timestamp"] for status in exported[:2]] == [
+        "2025-01-30T12:00:00+00:00",
+        "2025-02-04T12:00:00+00:00",
+    ]
+    query = "?start=2025-02-01T00:00:00Z&end=2025-03-01T00:00:00Z"
+    assert [status["message"] for status in _export(client, monitor_id, query)] == [
+        "at 04 Feb",
+        "at 09 Feb",
+        "at 14 Feb",
+        "at 19 Feb",
+        "at 24 Feb",
+    ]
+
+
+def test_interrupted_archive_not_duplicated(
+    client: TestClient, db_session, sample_monitor, store
+):
+    """Test that statuses both archived and still in the database are read once."""
+    monitor_id = sample_monitor["id"]
+    for day in range(3):
+        _post(client, monitor_id, "Warning", OLD + timedelta(days=day))
+    before = _history(client, monitor_id)
+
+    rows = db_session.execute(
+        select(
+            MonitorStatus.id,
+            MonitorStatus.monitor_id,
+            MonitorStatus.state,
+            MonitorStatus.message,
+            MonitorStatus.timestamp,
+            MonitorStatus.flapping,
+        ).where(MonitorStatus.monitor_id == monitor_id)
+    ).all()
+    # A file written by a run that stopped before deleting its rows
+    store.write(
+        "2025-01/interrupted.msa",
+        encode_file(ArchivedStatus(*row[:3], "at 30 Jan", *row[4:]) for row in rows),
+    )
+    archive.invalidate_months()
+
+    assert _history(client, monitor_id) == before
+    assert len(_export(client, monitor_id)) == len(before)
+
+
+def test_listing_cached_and_full_page_bounded(
+    client: TestClient, db_session, sample_monitor, store, monkeypatch
+):
+    """Test that reads reuse the listing and a full page skips older groups."""
+    monitor_id = sample_monitor["id"]
+    for day in range(6):
+        _post(client, monitor_id, "Warning", OLD + timedelta(days=day))
+    archive_statuses(
+        db_session, store, datetime(2025, 2, 3, tzinfo=UTC), rows_per_file=2
+    )
+    listings = store.listings
+    store.reads = 0
+
+    # The database fills the page, so the February group is not decompressed
+    assert _history(client, monitor_id, limit=3) == [
+        ("Normal", None),
+        ("Warning", "at 04 Feb"),
+        ("Warning", "at 03 Feb"),
+    ]
+    assert store.reads == 2
+    assert len(_export(client, monitor_id)) == 7
+    assert store.listings == listings + 1
+
+    monkeypatch.setattr(archive.settings, "ARCHIVE_LIST_TTL_SECONDS", 0)
+    _history(client, monitor_id)
+    assert store.listings == listings + 2
@@ -0,0 +1,122 @@
+"""
+Tests for the benchmark helpers.
+"""
+
+from benchmarks.api import run_benchmark
+from benchmarks.cold_start import prepare_database, measure_cold_start
+from benchmarks.common import compare_results, percentile, summarize
+from benchmarks.rollup import measure_rollup
+from benchmarks.rules import measure_rules
+from benchmarks.seed import FleetSpec
+from benchmarks.state_store import measure_state_store
+from benchmarks.statements import PATHS, measure_statements
+
+
+def test_percentile_nearest_rank():
+    """Test nearest-rank percentile selection."""
+    samples = [5, 1, 4, 2, 3]
+    assert percentile(samples, 50) == 3
+    assert percentile(samples, 100) == 5
+    assert percentile(samples, 1) == 1
+    assert percentile([], 95) == 0.0
+
+
+def test_summarize_reports_milliseconds_and_throughput():
+    """Test that latency summaries are in milliseconds with throughput."""
+    stats = summarize([0.001, 0.002, 0.003, 0.004], elapsed=0.01)
+    assert stats["count"] == 4
+    assert stats["throughput_rps"] == 400.0
+    assert stats["p50_ms"] == 2.0
+    assert stats["max_ms"] == 4.0
+
+
+def test_compare_results_flags_regressions():
+    """Test that slowdowns beyond the tolerance are reported."""
+    baseline = {"results": {"get_all_statuses": {"p50_ms": 10.0, "p95_ms": 20.0}}}
+    current = {"results": {"get_all_statuses": {"p50_ms": 11.0, "p95_ms": 30.0}}}
+    regressions = compare_results(current, baseline, tolerance=0.2)
+    assert len(regressions) == 1
+    assert "p95_ms" in regressions[0]
+    assert not compare_results(baseline, baseline, tolerance=0.0)
+
+
+def test_run_benchmark_small_fleet(tmp_path):
+    """Test an end-to-end benchmark run against a SQLite file."""
+    spec = FleetSpec(monitors=5, tags=3, tags_per_monitor=2, history=3)
+    results = run_benchmark(
+        f"sqlite:///{tmp_path}/bench.db", spec, iterations=3, warmup=1
+    )
+    assert results["meta"]["dialect"] == "sqlite"
+    assert set(results["results"]) == {
+        "set_monitor_state",
+        "get_all_statuses",
+        "get_statuses_by_tags",
+        "get_monitor_history",
+        "get_monitor_badge",
+        "get_badge_wall",
+    }
+    for stats in results["results"].values():
+        assert stats["count"] == 3
+        assert stats["p95_ms"] > 0
+
+
+def test_lambda_cold_start_skips_heavy_imports(tmp_path):
+    """Test that a Lambda cold start serves JSON without Pillow or gRPC."""
+    database_url = f"sqlite:///{tmp_path}/cold-start.db"
+    prepare_database(database_url)
+
+    results = measure_cold_start(
+        database_url, runs=1, path="/api/v1/monitor/statuses/", profile="lambda"
+    )
+    assert results["meta"]["heavy_modules_imported"] == []
+    assert results["results"]["import"]["p50_ms"] > 0
+    assert results["results"]["first_request"]["count"] == 1
+
+
+def test_state_store_benchmark_small_fleet(tmp_path):
+    """Test the state store footprint benchmark on a small fleet."""
+    spec = FleetSpec(monitors=20, tags=4, tags_per_monitor=2, history=2)
+    results = measure_state_store(f"sqlite:///{tmp_path}/store.db", spec, lookups=5)
+
+    assert results["meta"]["inconsistencies"] == 0
+    assert results["meta"]["memory_bytes"] > 0
+    assert set(results["results"]) == {"get", "by_tag"}
+
+
+def test_statements_benchmark_small_fleet(tmp_path):
+    """Test the statement overhead benchmark on a small fleet."""
+    spec = FleetSpec(monitors=5, tags=3, tags_per_monitor=2, history=3)
+    results = measure_statements(
+        f"sqlite:///{tmp_path}/statements.db", spec, iterations=3, warmup=1
+    )
+
+    assert set(results["meta"]["speedups"]) == set(PATHS)
+    assert "latest_state.lambda" in results["results"]
+    for stats in results["results"].values():
+        assert stats["count"] == 3
+
+
+def test_rules_benchmark_small_fleet(tmp_path):
+    """Test the rule engine throughput benchmark on a small fleet."""
+    spec = FleetSpec(monitors=20, tags=3, tags_per_monitor=1, history=1)
+    results = measure_rules(
+        f"sqlite:///{tmp_path}/rules.db", spec, rate=100, seconds=2, request_size=30
+    )
+
+    assert results["meta"]["statuses_written"] > 0
+    assert set(results["results"]) == {"parse", "ingest", "evaluate"}
+    assert results["results"]["parse"]["count"] == 8
+    assert results["results"]["evaluate"]["count"] == 2
+
+
+def test_rollup_benchmark_small_hierarchies(tmp_path):
+    """Test the rollup propagation benchmark on small hierarchies."""
+    results = measure_rollup(
+        f"sqlite:///{tmp_path}/rollup-", depth=5, width=20, updates=10
+    )
+
+    assert set(results["results"]) == {"deep", "wide"}
+    for shape in results["results"].values():
+        assert shape["update"]["count"] == 10
+        assert shape["recompute"]["count"] == 10
+    assert results["meta"]["shapes"]["deep"] == {"depth": 5, "width": 10}
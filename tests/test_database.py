@@ -47,3 +47,33 @@ def test_database_table_creation_error():
         mock_create_all.side_effect = SQLAlchemyError("Table creation failed")
         with pytest.raises(SQLAlchemyError):
             init_db()
+
+
+def test_reset_engines_after_fork():
+    """Test that engines still hand out connections after a post-fork reset."""
+    with database.engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+
+    database.reset_engines_after_fork()
+
+    with database.engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT 1").scalar() == 1
+
+
+@pytest.mark.parametrize(
+    "url, connect_args",
+    [
+        ("postgresql+psycopg://db/monitor", {"prepare_threshold": 2}),
+        ("postgresql+psycopg2://db/monitor", {}),
+    ],
+)
+def test_prepared_statements_only_for_psycopg3(url, connect_args):
+    """Test that server-side prepared statements are enabled for psycopg 3."""
+    with (
+        patch("app.database.create_engine") as mock_create_engine,
+        patch("app.database.instrument_engine"),
+        patch("app.database.instrument_pool"),
+    ):
+        database.create_app_engine(url)
+
+    assert mock_create_engine.call_args.kwargs["connect_args"] == connect_args
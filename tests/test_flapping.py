@@ -0,0 +1,156 @@
+"""
+Tests for flap detection and suppression.
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.flapping import FlapDetector, flap_detector
+from app.ingest import record_settled
+from app.models.monitor import MonitorState, MonitorStatus
+
+STATES = [MonitorState.NORMAL, MonitorState.WARNING]
+
+
+def _post_states(client: TestClient, monitor_id: int, count: int, start: datetime):
+    """Alternate a monitor between Warning and Normal, one second apart."""
+    responses = []
+    for i in range(count):
+        responses.append(
+            client.post(
+                f"/api/v1/monitor/{monitor_id}/state/",
+                json={
+                    "state": STATES[(i + 1) % 2].value,
+                    "timestamp": (start + timedelta(seconds=i)).isoformat(),
+                },
+            ).json()
+        )
+    return responses
+
+
+def test_flapping_needs_transitions_within_window():
+    """Test that a monitor flaps after enough transitions in the window only."""
+    detector = FlapDetector(transitions=3, window_seconds=10, suppress=False)
+    checks = [detector.check(1, STATES[i % 2], float(i)).flapping for i in range(5)]
+    assert checks == [False, False, False, True, True]
+
+    # Steady reports let the oldest transition leave the window
+    assert detector.check(1, STATES[0], 12.0).flapping
+    assert not detector.check(1, STATES[0], 14.0).flapping
+
+    slow = [detector.check(2, STATES[i % 2], i * 6.0).flapping for i in range(6)]
+    assert not any(slow)
+
+    # Late updates are neither recorded nor flagged
+    assert detector.check(1, STATES[1], 3.0) == (False, False)
+    assert not detector.check(1, STATES[0], 16.0).flapping
+
+
+def test_flapping_flag_in_responses(client: TestClient, sample_monitor):
+    """Test that statuses written while flapping carry the flag."""
+    monitor_id = sample_monitor["id"]
+    # After the monitor's initial status, which is timestamped now
+    start = datetime.now(UTC) + timedelta(seconds=1)
+
+    _post_states(client, monitor_id, 7, start)
+
+    state = client.get(f"/api/v1/monitor/{monitor_id}/state/").json()
+    history = client.get(f"/api/v1/monitor/{monitor_id}/history/").json()
+    assert state["flapping"] is True
+    assert [status["flapping"] for status in history] == [True, True] + [False] * 6
+    client.cookies.clear()
+    assert client.get("/api/v1/monitor/statuses/").json()[0]["flapping"] is True
+
+
+def test_suppression_holds_published_state(
+    client: TestClient, sample_monitor, db_session, monkeypatch
+):
+    """Test that suppression stops writing transitions until flapping ends."""
+    monkeypatch.setattr(flap_detector, "suppress", True)
+    monkeypatch.setattr(flap_detector, "window_seconds", 30)
+    monitor_id = sample_monitor["id"]
+    start = datetime.now(UTC) + timedelta(seconds=1)
+
+    responses = _post_states(client, monitor_id, 10, start)
+
+    assert [r["suppressed"] for r in responses] == [False] * 6 + [True] * 4
+    state = client.get(f"/api/v1/monitor/{monitor_id}/state/").json()
+    assert state["state"] == "Normal"
+    assert state["flapping"] is True
+    assert db_session.query(MonitorStatus).count() == 7
+
+    # Once the transitions are older than the window, updates are written
+    later = start + timedelta(seconds=40)
+    response = client.post(
+        f"/api/v1/monitor/{monitor_id}/state/",
+        json={"state": "Warning", "timestamp": later.isoformat()},
+    ).json()
+    assert response["suppressed"] is False
+    state = client.get(f"/api/v1/monitor/{monitor_id}/state/").json()
+    assert (state["state"], state["flapping"]) == ("Warning", False)
+
+
+def test_last_suppressed_state_written_when_flapping_ends(
+    client: TestClient, sample_monitor, db_session, monkeypatch
+):
+    """Test that a held state differing from the published one is caught up."""
+    monkeypatch.setattr(flap_detector, "suppress", True)
+    monkeypatch.setattr(flap_detector, "window_seconds", 30)
+    monitor_id = sample_monitor["id"]
+    start = datetime.now(UTC) + timedelta(seconds=1)
+
+    responses = _post_states(client, monitor_id, 9, start)
+
+    assert [r["suppressed"] for r in responses] == [False] * 6 + [True] * 3
+    url = f"/api/v1/monitor/{monitor_id}/state/"
+    assert client.get(url).json()["state"] == "Normal"
+    # Still flapping
+    assert record_settled(db_session, (start + timedelta(seconds=10)).timestamp()) == 0
+
+    assert record_settled(db_session, (start + timedelta(seconds=40)).timestamp()) == 1
+    state = client.get(url).json()
+    assert (state["state"], state["flapping"]) == ("Warning", False)
+    assert state["timestamp"].startswith(
+        (start + timedelta(seconds=8)).replace(tzinfo=None).isoformat()[:19]
+    )
+    assert record_settled(db_session, (start + timedelta(seconds=50)).timestamp()) == 0
+
+
+def test_backfill_and_retries_are_not_suppressed(
+    client: TestClient, sample_monitor, db_session, monkeypatch
+):
+    """Test that backfilled and retried updates of a flapping monitor are kept."""
+    monkeypatch.setattr(flap_detector, "suppress", True)
+    monkeypatch.setattr(flap_detector, "window_seconds", 30)
+    monitor_id = sample_monitor["id"]
+    start = datetime.now(UTC) + timedelta(seconds=1)
+    update = {
+        "state": "Critical",
+        "timestamp": (start + timedelta(seconds=5)).isoformat(),
+        "idempotency_key": "evt-1",
+    }
+    url = f"/api/v1/monitor/{monitor_id}/state/"
+
+    _post_states(client, monitor_id, 5, start)
+    assert client.post(url, json=update).json()["suppressed"] is False
+    assert client.post(url, json=update).json()["duplicate"] is True
+    flapping = _post_states(client, monitor_id, 1, start + timedelta(seconds=6))
+    assert flapping[0]["suppressed"] is True
+
+    backfilled = client.post(
+        url,
+        json={
+            "state": "Warning",
+            "message": "from yesterday",
+            "timestamp": (start - timedelta(days=1)).isoformat(),
+        },
+    ).json()
+    assert backfilled["suppressed"] is False
+    history = client.get(f"/api/v1/monitor/{monitor_id}/history/").json()
+    assert (history[-1]["message"], history[-1]["flapping"]) == (
+        "from yesterday",
+        False,
+    )
+    assert client.get(url).json()["state"] == "Critical"
+    assert db_session.query(MonitorStatus).count() == 8
@@ -0,0 +1,236 @@
+"""
+Tests for bulk status imports.
+"""
+
+import io
+import json
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from app.importer import ImportFormat, _insert_rows, import_statuses
+from app.models.monitor import Monitor, MonitorState, MonitorStatus
+
+START = datetime(2026, 1, 5, 9, 30, tzinfo=UTC)
+
+
+def _line(monitor: str, state: str, minutes: int, **fields) -> str:
+    timestamp = (START + timedelta(minutes=minutes)).isoformat()
+    record = {"monitor": monitor, "state": state, "timestamp": timestamp, **fields}
+    return json.dumps(record) + "\n"
+
+
+def _import(client: TestClient, body: str, query: str = "") -> dict:
+    response = client.post(f"/api/v1/monitor/import/{query}", content=body)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _state(client: TestClient, monitor_id: int) -> dict:
+    return client.get(f"/api/v1/monitor/{monitor_id}/state/").json()
+
+
+def test_import_creates_monitors_and_rolls_up(client: TestClient, db_session):
+    """Test that imported statuses create monitors and update composites once."""
+    db_id = client.post("/api/v1/monitor/", json={"name": "db"}).json()["id"]
+    site = client.post(
+        "/api/v1/monitor/composites/",
+        json={"name": "site", "members": [db_id], "member_tags": ["api"]},
+    ).json()
+    future = (datetime.now(UTC) + timedelta(days=1)).isoformat()
+
+    body = "".join(
+        [
+            _line("db", "Warning", 0, message="slow"),
+            _line("api-1", "Normal", 1, tags=["api", "eu"]),
+            "not json\n",
+            _line("api-1", "Critical", 2, message="down", flapping=True),
+            _line("site", "Normal", 3),
+            json.dumps({"monitor": "db", "state": "Normal", "timestamp": future}),
+        ]
+    )
+    summary = _import(client, body)
+    assert summary["records"] == 6
+    assert summary["written"] == 3
+    assert summary["rejected"] == 3
+    assert summary["monitors_created"] == 1
+    assert [error.split(":")[0] for error in summary["errors"]] == [
+        "line 3",
+        "line 6",
+        "line 5",
+    ]
+    assert "'site' is a composite monitor" in summary["errors"][2]
+
+    api_1 = db_session.scalar(select(Monitor.id).where(Monitor.name == "api-1"))
+    state = _state(client, api_1)
+    assert (state["state"], state["message"], state["flapping"]) == (
+        "Critical",
+        "down",
+        True,
+    )
+    assert sorted(state["tags"]) == ["api", "eu"]
+    # Older than the monitor's creation status, so history only
+    assert _state(client, db_id)["state"] == "Normal"
+    history = client.get(f"/api/v1/monitor/{db_id}/history/").json()
+    assert history[-1]["message"] == "slow"
+
+    site_state = _state(client, site["id"])
+    assert site_state["state"] == "Critical"
+    assert site_state["message"] == "1 of 2 members Critical"
+
+
+def test_import_csv_in_batches(db_session):
+    """Test that CSV imports commit batch by batch and report progress."""
+    rows = [
+        f"svc-{n % 3},Warning,{START + timedelta(minutes=n)},,a;b" for n in range(7)
+    ]
+    lines = io.StringIO("monitor,state,timestamp,message,tags\n" + "\n".join(rows))
+    progress = []
+
+    summary = import_statuses(
+        db_session,
+        lines,
+        ImportFormat.CSV,
+        batch_size=3,
+        progress=lambda summary: progress.append(summary.written),
+    )
+    assert (summary.records, summary.written, summary.rejected) == (7, 7, 0)
+    assert summary.monitors_created == 3
+    assert progress == [3, 6, 7]
+    assert db_session.scalar(select(func.count(MonitorStatus.id))) == 7
+
+    lines = io.StringIO("monitor,state,timestamp\nsvc-9,Normal,2026-01-01T00:00:00\n")
+    summary = import_statuses(db_session, lines, ImportFormat.CSV, create=False)
+    assert summary.errors == ["line 2: unknown monitor 'svc-9'"]
+
+
+def test_export_imports_back(client: TestClient, sample_monitor):
+    """Test that a history export can be imported as it is."""
+    monitor_id = sample_monitor["id"]
+    for minutes, state in enumerate(["Warning", "Critical"]):
+        client.post(
+            f"/api/v1/monitor/{monitor_id}/state/",
+            json={
+                "state": state,
+                "message": state.lower(),
+                "timestamp": (START + timedelta(minutes=minutes)).isoformat(),
+            },
+        )
+    exported = client.get(f"/api/v1/monitor/{monitor_id}/history/export/").text
+    client.delete(f"/api/v1/monitor/{monitor_id}/")
+
+    summary = _import(client, exported)
+    assert (summary["written"], summary["monitors_created"]) == (3, 1)
+    monitors = client.get("/api/v1/monitor/statuses/").json()
+    assert [monitor["name"] for monitor in monitors] == ["test-monitor"]
+    new_id = monitors[0]["id"]
+    reexported = client.get(f"/api/v1/monitor/{new_id}/history/export/").text
+    assert reexported == exported
+
+
+COPY_ROWS = [
+    {
+        "monitor_id": 1,
+        "state": MonitorState.MISSING_DATA,
+        "message": 'disk "sda", full',
+        "message_id": None,
+        "timestamp": START,
+        "flapping": True,
+    },
+    {
+        "monitor_id": 2,
+        "state": MonitorState.NORMAL,
+        "message": None,
+        "message_id": 7,
+        "timestamp": START + timedelta(minutes=1),
+        "flapping": False,
+    },
+]
+COPY = (
+    "COPY monitor_statuses "
+    "(monitor_id, state, message, message_id, timestamp, flapping) FROM STDIN"
+)
+
+
+class _FakeCursor:
+    """DB-API cursor recording what is sent to it with COPY."""
+
+    def __init__(self):
+        self.statement = None
+        self.rows = []
+        self.data = None
+        self.closed = False
+
+    @contextmanager
+    def copy(self, statement):
+        """psycopg 3: rows are written one by one."""
+        self.statement = statement
+        yield SimpleNamespace(write_row=self.rows.append)
+
+    def copy_expert(self, statement, data):
+        """psycopg2: the data is a file."""
+        self.statement = statement
+        self.data = data.read()
+
+    def close(self):
+        """Close the cursor."""
+        self.closed = True
+
+
+def _session_with_driver(driver: str, cursor: _FakeCursor):
+    """Stand in for a session on a PostgreSQL driver, down to its cursor."""
+    return SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(driver=driver)),
+        connection=lambda: SimpleNamespace(
+            connection=SimpleNamespace(cursor=lambda: cursor)
+        ),
+    )
+
+
+def test_copy_rows_with_psycopg():
+    """Test that psycopg 3 is sent each row's values, enums by name."""
+    cursor = _FakeCursor()
+
+    _insert_rows(_session_with_driver("psycopg", cursor), COPY_ROWS)
+
+    assert cursor.statement == COPY
+    assert cursor.rows == [
+        (1, "MISSING_DATA", 'disk "sda", full', None, START, True),
+        (2, "NORMAL", None, 7, START + timedelta(minutes=1), False),
+    ]
+    assert cursor.closed
+
+
+def test_copy_rows_with_psycopg2():
+    """Test that psycopg2 is sent CSV in which missing values are unquoted."""
+    cursor = _FakeCursor()
+
+    _insert_rows(_session_with_driver("psycopg2", cursor), COPY_ROWS)
+
+    assert cursor.statement == f"{COPY} WITH (FORMAT csv)"
+    assert cursor.data == (
+        '1,MISSING_DATA,"disk ""sda"", full",,2026-01-05 09:30:00+00:00,True\r\n'
+        "2,NORMAL,,7,2026-01-05 09:31:00+00:00,False\r\n"
+    )
+    assert cursor.closed
+
+
+def test_failed_import_keeps_its_error(db_session, monkeypatch):
+    """Test that a failure while rolling up does not hide the import's error."""
+
+    def fail(statement):
+        def raise_error(*_args):
+            raise OperationalError(statement, {}, Exception("connection lost"))
+
+        return raise_error
+
+    monkeypatch.setattr("app.importer._insert_rows", fail("COPY"))
+    monkeypatch.setattr("app.importer.recount", fail("recount"))
+
+    with pytest.raises(OperationalError, match="COPY"):
+        import_statuses(db_session, io.StringIO(_line("db", "Normal", 0)))
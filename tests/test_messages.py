@@ -0,0 +1,95 @@
+"""
+Tests for status message interning.
+"""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.messages import MessageCache
+from app.models.monitor import MonitorStatus, StatusMessage
+
+
+def _set(client: TestClient, monitor_id: int, state: str, message: str):
+    client.post(
+        f"/api/v1/monitor/{monitor_id}/state/",
+        json={"state": state, "message": message},
+    )
+
+
+def _stored(db_session):
+    db_session.expire_all()
+    return db_session.execute(
+        select(MonitorStatus.message, MonitorStatus.message_id)
+        .where(MonitorStatus.message_id.isnot(None) | MonitorStatus.message.isnot(None))
+        .order_by(MonitorStatus.id)
+    ).all()
+
+
+def test_messages_stored_once(client: TestClient, db_session, sample_monitor):
+    """Test that repeated messages share one row and read back as text."""
+    monitor_id = sample_monitor["id"]
+    for state in ["Warning", "Critical", "Warning"]:
+        _set(client, monitor_id, state, "disk 91% full")
+    _set(client, monitor_id, "Normal", "recovered")
+
+    assert db_session.scalars(select(StatusMessage.text)).all() == [
+        "disk 91% full",
+        "recovered",
+    ]
+    stored = _stored(db_session)
+    assert [message for message, _ in stored] == [None] * 4
+    assert len({message_id for _, message_id in stored}) == 2
+
+    history = client.get(f"/api/v1/monitor/{monitor_id}/history/").json()
+    assert [status["message"] for status in history[:4]] == [
+        "recovered",
+        "disk 91% full",
+        "disk 91% full",
+        "disk 91% full",
+    ]
+    state = client.get(f"/api/v1/monitor/{monitor_id}/state/").json()
+    assert state["message"] == "recovered"
+    transitions = client.get(f"/api/v1/monitor/{monitor_id}/transitions/").json()
+    assert transitions["items"][0]["message"] == "recovered"
+    statuses = client.get("/api/v1/monitor/statuses/by-tags/?tags=test").json()
+    assert statuses[0]["message"] == "recovered"
+
+
+def test_long_and_uninterned_messages_inline(
+    client: TestClient, db_session, sample_monitor, monkeypatch
+):
+    """Test that long messages, and any with interning off, stay inline."""
+    monitor_id = sample_monitor["id"]
+    monkeypatch.setattr("app.core.config.settings.MESSAGE_INTERN_MAX_LENGTH", 8)
+    _set(client, monitor_id, "Warning", "a message too long to intern")
+    monkeypatch.setattr("app.core.config.settings.MESSAGE_INTERNING", False)
+    _set(client, monitor_id, "Critical", "short")
+
+    assert _stored(db_session) == [
+        ("a message too long to intern", None),
+        ("short", None),
+    ]
+    assert not db_session.scalars(select(StatusMessage)).all()
+    history = client.get(f"/api/v1/monitor/{monitor_id}/history/").json()
+    assert history[0]["message"] == "short"
+
+
+def test_cache_skips_uncommitted_ids(db_session):
+    """Test that ids are cached only once read by a session that did not create them."""
+    session_factory = sessionmaker(bind=db_session.get_bind())
+    cache = MessageCache(maxsize=2)
+
+    with session_factory() as db:
+        cache.get_or_create_ids(db, ["lost"])
+        db.rollback()
+    with session_factory() as db:
+        created = cache.get_or_create_ids(db, ["lost", "kept"])
+        # Read back by the session that created them: still not cached
+        assert cache.get_or_create_ids(db, ["kept"]) == {"kept": created["kept"]}
+        db.commit()
+    assert not cache._ids  # pylint: disable=protected-access
+
+    with session_factory() as db:
+        assert cache.get_or_create_ids(db, ["kept", "lost"]) == created
+    assert dict(cache._ids) == created  # pylint: disable=protected-access
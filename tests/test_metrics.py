@@ -0,0 +1,162 @@
+"""
+Tests for the Prometheus metrics endpoint.
+"""
+
+import re
+
+import pytest
+from fastapi import routing
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import dependencies
+from app.main import app
+from app.messages import message_cache
+from app.metrics import MonitorStateCollector, instrument_pool
+from app.models.base import Base
+from app.payload_cache import payload_cache
+from app.tag_cache import tag_cache
+
+
+@pytest.fixture(name="pooled_client")
+def fixture_pooled_client(tmp_path, monkeypatch):
+    """Create a test client whose sessions use an instrumented connection pool."""
+    # Tag ids, message ids and payloads cached by earlier tests refer to another
+    # database
+    tag_cache.invalidate()
+    message_cache.invalidate()
+    payload_cache.clear()
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pooled.db", connect_args={"check_same_thread": False}
+    )
+    instrument_pool(engine, "tests")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(dependencies, "SessionLocal", session_factory)
+    monkeypatch.setattr(dependencies, "ReadSessionLocal", session_factory)
+    app.dependency_overrides.clear()
+    with TestClient(app) as test_client:
+        yield test_client
+    engine.dispose()
+
+
+def test_metrics_endpoint_reports_route_latency(client: TestClient):
+    """Test that request latency is labelled with the route template."""
+    client.post("/api/v1/monitor/", json={"name": "test-monitor", "tags": ["test"]})
+    client.get("/api/v1/monitor/1/state/")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert re.search(
+        r'http_request_duration_seconds_count\{method="GET",'
+        r'route="[^"]*/monitor/\{monitor_id\}/state/",status="200"\}',
+        response.text,
+    )
+    assert "monitors_by_state" in response.text
+
+
+def test_status_updates_counted_by_state(client: TestClient):
+    """Test that ingested status updates are counted per state."""
+    client.post("/api/v1/monitor/", json={"name": "test-monitor", "tags": ["test"]})
+    labels = {"state": "Critical"}
+    before = REGISTRY.get_sample_value("monitor_status_updates_total", labels) or 0
+
+    client.post("/api/v1/monitor/1/state/", json={"state": "Critical"})
+    client.post("/api/v1/monitor/1/state/", json={"state": "Critical"})
+
+    after = REGISTRY.get_sample_value("monitor_status_updates_total", labels)
+    assert after - before == 2
+
+
+def test_monitor_state_collector_counts_latest_states(client: TestClient, db_session):
+    """Test that monitors are counted by their latest state only."""
+    for name in ("monitor1", "monitor2", "monitor3"):
+        client.post("/api/v1/monitor/", json={"name": name, "tags": ["test"]})
+    client.post("/api/v1/monitor/1/state/", json={"state": "Critical"})
+    client.post("/api/v1/monitor/2/state/", json={"state": "Warning"})
+    client.post("/api/v1/monitor/2/state/", json={"state": "Critical"})
+
+    collector = MonitorStateCollector(db_session)
+    family = next(collector.collect())
+    counts = {sample.labels["state"]: sample.value for sample in family.samples}
+    assert counts == {"Normal": 1, "Warning": 0, "Critical": 2, "Missing Data": 0}
+
+
+def test_pool_connections_in_use_gauge():
+    """Test that pool checkouts and checkins move the in-use gauge."""
+    engine = create_engine("sqlite://")
+    instrument_pool(engine, "test")
+    labels = {"pool": "test"}
+    before = REGISTRY.get_sample_value("db_pool_connections_in_use", labels) or 0
+
+    connection = engine.connect()
+    assert REGISTRY.get_sample_value("db_pool_connections_in_use", labels) == before + 1
+    connection.close()
+    assert REGISTRY.get_sample_value("db_pool_connections_in_use", labels) == before
+    engine.dispose()
+
+
+def _hold_count(route: str) -> float:
+    """Count connection checkouts of the test pool by routes ending with a path."""
+    return sum(
+        sample.value
+        for metric in REGISTRY.collect()
+        if metric.name == "db_connection_hold_seconds"
+        for sample in metric.samples
+        if sample.name.endswith("_count")
+        and sample.labels["pool"] == "tests"
+        and sample.labels["route"].endswith(route)
+    )
+
+
+def test_connection_hold_time_by_route(pooled_client: TestClient):
+    """Test that connection hold time is labelled with the route template."""
+    pooled_client.post(
+        "/api/v1/monitor/", json={"name": "test-monitor", "tags": ["test"]}
+    )
+    route = "/monitor/{monitor_id}/state/"
+    before = _hold_count(route)
+
+    pooled_client.get("/api/v1/monitor/1/state/")
+
+    assert _hold_count(route) == before + 1
+
+
+def test_connection_released_before_serialization(
+    pooled_client: TestClient, monkeypatch
+):
+    """Test that a read returns its connection before the response is encoded."""
+    pooled_client.post(
+        "/api/v1/monitor/", json={"name": "test-monitor", "tags": ["test"]}
+    )
+    in_use = []
+    serialize_response = routing.serialize_response
+
+    async def recording_serialize_response(*args, **kwargs):
+        in_use.append(
+            REGISTRY.get_sample_value("db_pool_connections_in_use", {"pool": "tests"})
+        )
+        return await serialize_response(*args, **kwargs)
+
+    monkeypatch.setattr(routing, "serialize_response", recording_serialize_response)
+    pooled_client.get("/api/v1/monitor/1/state/")
+
+    assert in_use == [0]
+
+
+def test_cache_hit_checks_out_no_connection(pooled_client: TestClient):
+    """Test that a request served from a cache never takes a connection."""
+    pooled_client.post(
+        "/api/v1/monitor/", json={"name": "test-monitor", "tags": ["test"]}
+    )
+    pooled_client.cookies.clear()
+    pooled_client.get("/api/v1/monitor/statuses/")
+    before = _hold_count("/monitor/statuses/")
+
+    response = pooled_client.get("/api/v1/monitor/statuses/")
+
+    assert response.status_code == 200
+    assert _hold_count("/monitor/statuses/") == before
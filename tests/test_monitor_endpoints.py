@@ -2,7 +2,16 @@
 Tests for monitor endpoints.
 """
 
+from datetime import UTC, datetime
+from io import BytesIO
+
 from fastapi.testclient import TestClient
+from PIL import Image
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.badges import BADGE_GAP, BADGE_HEIGHT, BADGE_WIDTH
+from app.models.monitor import MonitorStatus, monitor_tags
 
 
 def test_create_monitor(client: TestClient):
@@ -71,6 +80,74 @@ def test_set_monitor_state_invalid_monitor(client: TestClient):
     assert "Monitor not found" in response.json()["detail"]
 
 
+def test_set_monitor_state_retry_is_idempotent(client: TestClient, db_session: Session):
+    """Test that retrying an update with the same idempotency key writes once."""
+    client.post("/api/v1/monitor/", json={"name": "test-monitor"})
+    client.post("/api/v1/monitor/", json={"name": "other-monitor"})
+    update = {"state": "Critical", "message": "Disk full", "idempotency_key": "evt-1"}
+
+    first = client.post("/api/v1/monitor/1/state/", json=update)
+    retry = client.post("/api/v1/monitor/1/state/", json=update)
+    other = client.post("/api/v1/monitor/2/state/", json=update)
+
+    assert first.status_code == retry.status_code == other.status_code == 200
+    assert first.json()["duplicate"] is False
+    assert retry.json()["duplicate"] is True
+    # Keys are scoped to a monitor
+    assert other.json()["duplicate"] is False
+
+    count = db_session.scalar(
+        select(func.count())  # pylint: disable=not-callable
+        .select_from(MonitorStatus)
+        .where(MonitorStatus.idempotency_key == "evt-1")
+    )
+    assert count == 2
+
+
+def test_set_monitor_state_backfill_keeps_current_state(client: TestClient):
+    """Test that an event older than the current state only goes to history."""
+    client.post("/api/v1/monitor/", json={"name": "test-monitor"})
+    client.post("/api/v1/monitor/1/state/", json={"state": "Critical"})
+
+    response = client.post(
+        "/api/v1/monitor/1/state/",
+        json={"state": "Warning", "timestamp": "2024-01-01T12:00:00+02:00"},
+    )
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/monitor/1/state/").json()["state"] == "Critical"
+    history = client.get("/api/v1/monitor/1/history/").json()
+    assert history[-1]["state"] == "Warning"
+    assert history[-1]["timestamp"].startswith("2024-01-01T10:00:00")
+
+
+def test_set_monitor_state_tied_timestamps(client: TestClient):
+    """Test that of statuses with the same timestamp the last written wins."""
+    client.post("/api/v1/monitor/", json={"name": "test-monitor", "tags": ["test"]})
+    timestamp = datetime.now(UTC).isoformat()
+    for state in ("Critical", "Normal"):
+        client.post(
+            "/api/v1/monitor/1/state/", json={"state": state, "timestamp": timestamp}
+        )
+
+    assert client.get("/api/v1/monitor/1/state/").json()["state"] == "Normal"
+    for url in ("/api/v1/monitor/statuses/", "/api/v1/monitor/statuses/by-tags/"):
+        statuses = client.get(url, params={"tags": ["test"]}).json()
+        assert [(status["id"], status["state"]) for status in statuses] == [
+            (1, "Normal")
+        ]
+
+
+def test_set_monitor_state_rejects_future_timestamp(client: TestClient):
+    """Test that timestamps beyond the allowed clock skew are rejected."""
+    client.post("/api/v1/monitor/", json={"name": "test-monitor"})
+    response = client.post(
+        "/api/v1/monitor/1/state/",
+        json={"state": "Normal", "timestamp": "2999-01-01T00:00:00Z"},
+    )
+    assert response.status_code == 422
+
+
 def test_get_monitor_state(client: TestClient):
     """Test getting a monitor's state."""
     # First create a monitor
@@ -153,6 +230,45 @@ def test_get_monitor_state_badge_invalid_monitor(client: TestClient):
     assert "Monitor not found" in response.json()["detail"]
 
 
+def test_get_badge_wall_svg(client: TestClient):
+    """Test rendering the badges of all monitors with a tag as one SVG."""
+    client.post("/api/v1/monitor/", json={"name": "web", "tags": ["prod"]})
+    client.post("/api/v1/monitor/", json={"name": "db", "tags": ["prod"]})
+    client.post("/api/v1/monitor/", json={"name": "staging", "tags": ["stage"]})
+    client.post("/api/v1/monitor/2/state/", json={"state": "Critical"})
+
+    response = client.get("/api/v1/monitor/badges.svg?tag=prod")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/svg+xml"
+    svg = response.text
+    assert svg.startswith("<svg")
+    assert svg.index("<title>db: Critical</title>") < svg.index(
+        "<title>web: Normal</title>"
+    )
+    assert "staging" not in svg
+
+
+def test_get_badge_wall_png(client: TestClient):
+    """Test rendering badges by id as a PNG grid."""
+    for name in ("a", "b", "c"):
+        client.post("/api/v1/monitor/", json={"name": name})
+
+    response = client.get("/api/v1/monitor/badges.png?id=1&id=2&id=3&columns=2")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    with Image.open(BytesIO(response.content)) as image:
+        assert image.size == (2 * BADGE_WIDTH + BADGE_GAP, 2 * BADGE_HEIGHT + BADGE_GAP)
+
+
+def test_get_badge_wall_errors(client: TestClient):
+    """Test badge walls without a selection or without matching monitors."""
+    assert client.get("/api/v1/monitor/badges.svg").status_code == 400
+    response = client.get("/api/v1/monitor/badges.svg?tag=unknown")
+    assert response.status_code == 404
+
+
 def test_get_monitors_by_tags(client: TestClient):
     """Test getting monitors filtered by tags."""
     # Create monitors with different tags
@@ -418,3 +534,166 @@ def test_monitor_history_with_messages(client: TestClient):
     assert data[0]["message"] == "Service restored"
     assert data[1]["state"] == "Critical"
     assert data[1]["message"] == "Service unavailable"
+
+
+def test_delete_monitor_removes_statuses_and_tag_links(
+    client: TestClient, db_session: Session
+):
+    """Test that deleting a monitor cascades to its statuses and tag links."""
+    response = client.post(
+        "/api/v1/monitor/", json={"name": "cascade-monitor", "tags": ["test"]}
+    )
+    monitor_id = response.json()["id"]
+    client.post(f"/api/v1/monitor/{monitor_id}/state/", json={"state": "Warning"})
+
+    response = client.delete(f"/api/v1/monitor/{monitor_id}/")
+    assert response.status_code == 200
+
+    statuses = db_session.scalar(
+        select(func.count())  # pylint: disable=not-callable
+        .select_from(MonitorStatus)
+        .where(MonitorStatus.monitor_id == monitor_id)
+    )
+    links = db_session.scalar(
+        select(func.count())  # pylint: disable=not-callable
+        .select_from(monitor_tags)
+        .where(monitor_tags.c.monitor_id == monitor_id)
+    )
+    assert statuses == 0
+    assert links == 0
+
+
+def test_delete_monitors_by_tags(client: TestClient):
+    """Test bulk deletion of the monitors that have all given tags."""
+    client.post("/api/v1/monitor/", json={"name": "monitor1", "tags": ["prod", "web"]})
+    client.post("/api/v1/monitor/", json={"name": "monitor2", "tags": ["prod", "db"]})
+    client.post("/api/v1/monitor/", json={"name": "monitor3", "tags": ["dev", "web"]})
+
+    response = client.delete("/api/v1/monitor/?tag=prod&tag=web")
+    assert response.status_code == 200
+    assert response.json()["deleted"] == 1
+
+    response = client.delete("/api/v1/monitor/?tag=prod")
+    assert response.json()["deleted"] == 1
+
+    response = client.get("/api/v1/monitor/statuses/")
+    assert [monitor["name"] for monitor in response.json()] == ["monitor3"]
+
+
+def test_delete_monitors_by_tags_requires_tag(client: TestClient):
+    """Test that bulk deletion refuses to run without a tag filter."""
+    client.post("/api/v1/monitor/", json={"name": "monitor1", "tags": ["prod"]})
+
+    response = client.delete("/api/v1/monitor/")
+    assert response.status_code == 422
+
+    response = client.get("/api/v1/monitor/statuses/")
+    assert len(response.json()) == 1
+
+
+def _post_states(client: TestClient, monitor_id: int, states: list):
+    """Post (state, timestamp) pairs for a monitor."""
+    for state, timestamp in states:
+        response = client.post(
+            f"/api/v1/monitor/{monitor_id}/state/",
+            json={"state": state, "timestamp": timestamp},
+        )
+        assert response.status_code == 200
+
+
+def test_monitor_transitions(client: TestClient):
+    """Test that only state changes are returned, with their durations."""
+    client.post("/api/v1/monitor/", json={"name": "test-monitor"})
+    # The initial Normal status is stamped now, after all of these
+    _post_states(
+        client,
+        1,
+        [
+            ("Warning", "2024-01-01T00:00:00Z"),
+            ("Warning", "2024-01-01T00:01:00Z"),
+            ("Critical", "2024-01-01T00:05:00Z"),
+            ("Normal", "2024-01-01T01:05:00Z"),
+        ],
+    )
+
+    response = client.get("/api/v1/monitor/1/transitions/")
+    assert response.status_code == 200
+    page = response.json()
+    assert page["next_cursor"] is None
+    assert [
+        (item["previous_state"], item["state"], item["duration_seconds"])
+        for item in page["items"]
+    ] == [
+        ("Critical", "Normal", None),
+        ("Warning", "Critical", 3600.0),
+        (None, "Warning", 300.0),
+    ]
+
+
+def test_monitor_transitions_pagination(client: TestClient):
+    """Test keyset pagination of a monitor's transitions."""
+    client.post("/api/v1/monitor/", json={"name": "test-monitor"})
+    _post_states(
+        client,
+        1,
+        [
+            ("Warning", "2024-01-01T00:00:00Z"),
+            ("Critical", "2024-01-01T00:05:00Z"),
+            ("Warning", "2024-01-01T00:06:00Z"),
+        ],
+    )
+
+    first = client.get("/api/v1/monitor/1/transitions/?limit=2").json()
+    assert [item["state"] for item in first["items"]] == ["Normal", "Warning"]
+    assert first["next_cursor"]
+
+    second = client.get(
+        f"/api/v1/monitor/1/transitions/?limit=2&cursor={first['next_cursor']}"
+    ).json()
+    assert [item["state"] for item in second["items"]] == ["Critical", "Warning"]
+    # The first state on a later page ended where the previous page stopped
+    assert second["items"][0]["duration_seconds"] == 60.0
+    assert second["items"][1]["previous_state"] is None
+
+    third = client.get(
+        f"/api/v1/monitor/1/transitions/?limit=2&cursor={second['next_cursor']}"
+    ).json()
+    assert third == {"items": [], "next_cursor": None}
+
+
+def test_monitor_transitions_errors(client: TestClient):
+    """Test transitions of a missing monitor and with an invalid cursor."""
+    assert client.get("/api/v1/monitor/999/transitions/").status_code == 404
+    client.post("/api/v1/monitor/", json={"name": "test-monitor"})
+    response = client.get("/api/v1/monitor/1/transitions/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_recent_transitions(client: TestClient):
+    """Test the fleet-wide transition feed."""
+    client.post("/api/v1/monitor/", json={"name": "db"})
+    client.post("/api/v1/monitor/", json={"name": "web"})
+    _post_states(
+        client,
+        1,
+        [("Warning", "2024-01-01T00:00:00Z"), ("Warning", "2024-01-01T00:02:00Z")],
+    )
+    _post_states(client, 2, [("Critical", "2024-01-01T00:01:00Z")])
+
+    first = client.get("/api/v1/monitor/transitions/?limit=3").json()
+    second = client.get(
+        f"/api/v1/monitor/transitions/?limit=3&cursor={first['next_cursor']}"
+    ).json()
+
+    # The initial Normal statuses are the newest; db's repeated Warning is not a
+    # transition
+    assert [
+        (item["name"], item["previous_state"], item["state"])
+        for item in first["items"] + second["items"]
+    ] == [
+        ("web", "Critical", "Normal"),
+        ("db", "Warning", "Normal"),
+        ("web", None, "Critical"),
+        ("db", None, "Warning"),
+    ]
+    assert second["next_cursor"] is None
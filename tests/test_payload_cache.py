@@ -0,0 +1,132 @@
+"""
+Tests for the encoded status list cache.
+"""
+
+from datetime import UTC, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models.monitor import MonitorState
+from app.payload_cache import ALL_MONITORS, PayloadCache
+from app.schemas.monitor import MonitorStatusResponse
+
+
+def _status(monitor_id: int, state=MonitorState.NORMAL) -> MonitorStatusResponse:
+    return MonitorStatusResponse(
+        id=monitor_id,
+        name=f"monitor-{monitor_id}",
+        state=state,
+        message="ünïcode",
+        timestamp=datetime(2026, 10, 19, tzinfo=UTC),
+        tags=["db"],
+    )
+
+
+@pytest.fixture(name="cached_client")
+def fixture_cached_client(client: TestClient):
+    """Create two monitors and forget the client's last write."""
+    for name, tags in (("web-1", ["web"]), ("db-1", ["db", "prod"])):
+        client.post("/api/v1/monitor/", json={"name": name, "tags": tags})
+    client.cookies.clear()
+    return client
+
+
+def test_cached_body_matches_uncached(cached_client: TestClient, monkeypatch):
+    """Test that cached payloads are byte-identical to serialized responses."""
+    urls = ["/api/v1/monitor/statuses/", "/api/v1/monitor/statuses/by-tags/?tags=db"]
+    cached = [cached_client.get(url) for url in urls]
+
+    monkeypatch.setattr("app.core.config.settings.PAYLOAD_CACHE_ENABLED", False)
+    uncached = [cached_client.get(url) for url in urls]
+
+    for hit, miss in zip(cached, uncached):
+        assert hit.status_code == 200
+        assert hit.headers["content-type"] == "application/json"
+        assert "etag" in hit.headers
+        assert "etag" not in miss.headers
+        assert hit.content == miss.content
+
+
+def test_cache_hit_runs_no_query(cached_client: TestClient):
+    """Test that a cached list is served without a database query."""
+    cached_client.get("/api/v1/monitor/statuses/")
+
+    response = cached_client.get("/api/v1/monitor/statuses/")
+
+    assert 'desc="0 queries"' in response.headers["server-timing"]
+
+
+def test_if_none_match(cached_client: TestClient):
+    """Test that a matching If-None-Match gets a 304 without a body."""
+    etag = cached_client.get("/api/v1/monitor/statuses/").headers["etag"]
+
+    response = cached_client.get(
+        "/api/v1/monitor/statuses/", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not response.content
+
+
+def test_status_update_invalidates(cached_client: TestClient):
+    """Test that a status update is visible on the next read."""
+    before = cached_client.get("/api/v1/monitor/statuses/")
+
+    cached_client.post(
+        "/api/v1/monitor/1/state/", json={"state": "Critical", "message": "down"}
+    )
+    cached_client.cookies.clear()
+    after = cached_client.get("/api/v1/monitor/statuses/")
+
+    assert after.headers["etag"] != before.headers["etag"]
+    assert after.json()[0]["state"] == "Critical"
+
+
+def test_recent_writer_bypasses_cache(cached_client: TestClient):
+    """Test that a client in its read-your-writes window is not served a payload."""
+    cached_client.get("/api/v1/monitor/statuses/")
+    cached_client.post("/api/v1/monitor/", json={"name": "new", "tags": []})
+
+    response = cached_client.get("/api/v1/monitor/statuses/")
+
+    assert "etag" not in response.headers
+    assert len(response.json()) == 3
+
+
+def test_unchanged_fragments_are_reused():
+    """Test that a rebuild re-encodes only the statuses that changed."""
+    cache = PayloadCache(ttl=60, max_tag_sets=1)
+    fragments = cache._fragments  # pylint: disable=protected-access
+    cache.get(ALL_MONITORS, lambda: [_status(1), _status(2)])
+    before = {monitor_id: fragment for monitor_id, (_, fragment) in fragments.items()}
+
+    cache.invalidate()
+    cache.get(ALL_MONITORS, lambda: [_status(1), _status(2, MonitorState.CRITICAL)])
+
+    assert fragments[1][1] is before[1]
+    assert fragments[2][1] != before[2]
+
+
+def test_tag_sets_are_bounded():
+    """Test that the least recently used tag sets are evicted, not the full list."""
+    cache = PayloadCache(ttl=60, max_tag_sets=1)
+    cache.get(ALL_MONITORS, lambda: [_status(1)])
+    cache.get(frozenset(["db"]), lambda: [_status(1)])
+    cache.get(frozenset(["web"]), list)
+
+    assert list(cache._entries) == [  # pylint: disable=protected-access
+        ALL_MONITORS,
+        frozenset(["web"]),
+    ]
+
+
+def test_stale_payload_expires():
+    """Test that entries are rebuilt after the TTL without a local write."""
+    cache = PayloadCache(ttl=0, max_tag_sets=1)
+    first = cache.get(ALL_MONITORS, lambda: [_status(1)])
+
+    second = cache.get(ALL_MONITORS, lambda: [])
+
+    assert first.body != second.body == b"[]"
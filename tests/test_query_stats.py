@@ -0,0 +1,60 @@
+"""
+Tests for per-request query instrumentation.
+"""
+
+import logging
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+
+
+def _server_timing(response) -> tuple[float, int]:
+    """Parse the db entry of a Server-Timing header into (ms, count)."""
+    match = re.search(
+        r'db;dur=([\d.]+);desc="(\d+) queries"', response.headers["server-timing"]
+    )
+    assert match, response.headers["server-timing"]
+    return float(match.group(1)), int(match.group(2))
+
+
+def test_server_timing_counts_statements(client: TestClient):
+    """Test that each response reports its statement count and DB time."""
+    client.post("/api/v1/monitor/", json={"name": "test-monitor", "tags": ["test"]})
+
+    response = client.get("/api/v1/monitor/1/state/")
+    assert response.status_code == 200
+    duration_ms, count = _server_timing(response)
+    assert count >= 2
+    assert duration_ms > 0
+
+
+def test_server_timing_without_database_work(client: TestClient):
+    """Test that requests without SQL report zero statements."""
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert _server_timing(response) == (0.0, 0)
+
+
+def test_slow_query_logged_without_parameters(db_session, monkeypatch, caplog):
+    """Test that slow statements are logged with parameters redacted."""
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.query_stats"):
+        db_session.execute(text("SELECT :secret"), {"secret": "hunter2"})
+
+    assert "Slow query" in caplog.text
+    assert "SELECT ?" in caplog.text
+    assert "hunter2" not in caplog.text
+
+
+def test_failed_statement_drops_its_start_time(db_session):
+    """Test that a statement that raises leaves no start time on its connection."""
+    with pytest.raises(OperationalError):
+        db_session.execute(text("SELECT * FROM no_such_table"))
+    db_session.rollback()
+
+    assert not db_session.connection().info.get("query_start_time")
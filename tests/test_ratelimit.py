@@ -0,0 +1,164 @@
+"""
+Tests for rate limiting and load shedding.
+"""
+
+import asyncio
+
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.api.endpoints.monitor import router
+from app.main import app
+from app.ratelimit import (
+    ConcurrencyLimitMiddleware,
+    MemoryRateLimitBackend,
+    limit_status_updates,
+    load_backend,
+)
+
+
+def test_memory_backend_token_bucket(monkeypatch):
+    """Test that buckets allow a burst, then refill at the configured rate."""
+    now = [1000.0]
+    monkeypatch.setattr("app.ratelimit.time.monotonic", lambda: now[0])
+    backend = MemoryRateLimitBackend()
+
+    assert [backend.acquire("key", 2.0, 3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert backend.acquire("key", 2.0, 3) == 0.5
+    assert backend.acquire("other", 2.0, 3) == 0.0
+
+    now[0] += 0.5
+    assert backend.acquire("key", 2.0, 3) == 0.0
+
+
+def test_load_backend_from_import_path():
+    """Test that a backend can be named by its factory's import path."""
+    backend = load_backend("app.ratelimit:MemoryRateLimitBackend")
+    assert isinstance(backend, MemoryRateLimitBackend)
+
+
+def test_rate_limit_runs_before_session():
+    """Test that the rate limit is checked before a database session is opened."""
+    route = next(
+        route
+        for route in router.routes
+        if route.path.endswith("/{monitor_id}/state/") and "POST" in route.methods
+    )
+    assert route.dependant.dependencies[0].call is limit_status_updates
+
+
+def test_status_updates_rate_limited_per_monitor(client: TestClient, monkeypatch):
+    """Test that a monitor over its limit gets 429 without affecting others."""
+    monkeypatch.setattr(settings, "RATE_LIMIT_MONITOR_BURST", 2)
+    monkeypatch.setattr(settings, "RATE_LIMIT_MONITOR_PER_SECOND", 0.1)
+    client.post("/api/v1/monitor/", json={"name": "noisy"})
+    client.post("/api/v1/monitor/", json={"name": "quiet"})
+
+    statuses = [
+        client.post("/api/v1/monitor/1/state/", json={"state": "Warning"})
+        for _ in range(3)
+    ]
+    assert [response.status_code for response in statuses] == [200, 200, 429]
+    assert statuses[-1].headers["retry-after"] == "10"
+
+    response = client.post("/api/v1/monitor/2/state/", json={"state": "Warning"})
+    assert response.status_code == 200
+
+
+def test_status_updates_rate_limited_per_client(client: TestClient, monkeypatch):
+    """Test that one client is limited across all monitors."""
+    monkeypatch.setattr(settings, "RATE_LIMIT_CLIENT_BURST", 1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_CLIENT_PER_SECOND", 1.0)
+    client.post("/api/v1/monitor/", json={"name": "db"})
+    client.post("/api/v1/monitor/", json={"name": "web"})
+
+    first = client.post("/api/v1/monitor/1/state/", json={"state": "Warning"})
+    second = client.post("/api/v1/monitor/2/state/", json={"state": "Warning"})
+
+    assert (first.status_code, second.status_code) == (200, 429)
+    assert second.headers["retry-after"] == "1"
+
+
+def test_rejected_update_refunds_client_token(client: TestClient, monkeypatch):
+    """Test that an update rejected for its monitor leaves the client's budget."""
+    monkeypatch.setattr(settings, "RATE_LIMIT_CLIENT_BURST", 2)
+    monkeypatch.setattr(settings, "RATE_LIMIT_CLIENT_PER_SECOND", 0.01)
+    monkeypatch.setattr(settings, "RATE_LIMIT_MONITOR_BURST", 1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_MONITOR_PER_SECOND", 0.01)
+    client.post("/api/v1/monitor/", json={"name": "db"})
+    client.post("/api/v1/monitor/", json={"name": "web"})
+
+    statuses = [
+        client.post(f"/api/v1/monitor/{monitor_id}/state/", json={"state": "Warning"})
+        for monitor_id in (1, 1, 1, 2)
+    ]
+    assert [response.status_code for response in statuses] == [200, 429, 429, 200]
+
+
+def test_clients_keyed_on_trusted_forwarded_hop(client: TestClient, monkeypatch):
+    """Test that clients behind a proxy get their own buckets."""
+    monkeypatch.setattr(settings, "RATE_LIMIT_CLIENT_BURST", 1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_CLIENT_PER_SECOND", 1.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", 1)
+    client.post("/api/v1/monitor/", json={"name": "db"})
+
+    def post(forwarded_for):
+        return client.post(
+            "/api/v1/monitor/1/state/",
+            json={"state": "Warning"},
+            headers={"X-Forwarded-For": forwarded_for},
+        ).status_code
+
+    assert post("203.0.113.1") == 200
+    assert post("203.0.113.2") == 200
+    # Entries left of the proxy's are set by the client
+    assert post("198.51.100.7, 203.0.113.1") == 429
+
+
+def test_concurrency_limit_sheds_excess_writes():
+    """Test that writes above the limit get 503 while reads still pass."""
+
+    async def scenario():
+        release = asyncio.Event()
+        sent = []
+
+        async def slow_app(scope, receive, send):  # pylint: disable=unused-argument
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = ConcurrencyLimitMiddleware(slow_app, max_writes=1)
+
+        async def call(method):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            async def receive():
+                return {"type": "http.request", "body": b""}
+
+            scope = {"type": "http", "method": method, "path": "/", "headers": []}
+            await middleware(scope, receive, send)
+            sent.append((method, messages[0]["status"]))
+
+        first = asyncio.create_task(call("POST"))
+        await asyncio.sleep(0)
+        await call("POST")
+        read = asyncio.create_task(call("GET"))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, read)
+        return sent, middleware.writes
+
+    sent, writes_in_flight = asyncio.run(scenario())
+    assert sent[0] == ("POST", 503)
+    assert sorted(sent[1:]) == [("GET", 200), ("POST", 200)]
+    assert writes_in_flight == 0
+
+
+def test_cors_wraps_concurrency_limit():
+    """Test that 503s from the concurrency limit carry CORS headers."""
+    classes = [middleware.cls for middleware in app.user_middleware]
+    assert classes.index(CORSMiddleware) < classes.index(ConcurrencyLimitMiddleware)
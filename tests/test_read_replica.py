@@ -0,0 +1,83 @@
+"""
+Tests for read replica routing.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import dependencies
+from app.api.dependencies import LAST_WRITE_COOKIE
+from app.core.config import settings
+from app.main import app
+from app.messages import message_cache
+from app.models.base import Base
+from app.payload_cache import payload_cache
+from app.tag_cache import tag_cache
+
+
+@pytest.fixture(name="replica_client")
+def fixture_replica_client(tmp_path, monkeypatch):
+    """Create a test client backed by separate primary and replica databases."""
+    factories = {}
+    for name in ("primary", "replica"):
+        engine = create_engine(
+            f"sqlite:///{tmp_path}/{name}.db",
+            connect_args={"check_same_thread": False},
+        )
+        Base.metadata.create_all(bind=engine)
+        factories[name] = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    monkeypatch.setattr(dependencies, "SessionLocal", factories["primary"])
+    monkeypatch.setattr(dependencies, "ReadSessionLocal", factories["replica"])
+    app.dependency_overrides.clear()
+    tag_cache.invalidate()
+    message_cache.invalidate()
+    payload_cache.clear()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_reads_use_replica(replica_client: TestClient):
+    """Test that GET endpoints read from the replica."""
+    response = replica_client.post(
+        "/api/v1/monitor/", json={"name": "test-monitor", "tags": ["test"]}
+    )
+    assert response.status_code == 200
+    replica_client.cookies.clear()
+
+    # The write went to the primary; the (unreplicated) replica is still empty
+    response = replica_client.get("/api/v1/monitor/statuses/")
+    assert response.json() == []
+    response = replica_client.get("/api/v1/monitor/1/state/")
+    assert response.status_code == 404
+
+
+def test_client_reads_its_own_writes(replica_client: TestClient):
+    """Test that a client's reads go to the primary right after it writes."""
+    response = replica_client.post(
+        "/api/v1/monitor/", json={"name": "test-monitor", "tags": ["test"]}
+    )
+    assert LAST_WRITE_COOKIE in response.cookies
+
+    response = replica_client.get("/api/v1/monitor/statuses/")
+    assert [monitor["name"] for monitor in response.json()] == ["test-monitor"]
+
+
+def test_read_your_writes_window_expires(replica_client: TestClient, monkeypatch):
+    """Test that reads return to the replica once the window has passed."""
+    replica_client.post("/api/v1/monitor/", json={"name": "test-monitor"})
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 0.0)
+
+    response = replica_client.get("/api/v1/monitor/statuses/")
+    assert response.json() == []
+
+
+def test_failed_write_sets_no_cookie(replica_client: TestClient):
+    """Test that rejected writes do not pin the client to the primary."""
+    response = replica_client.post(
+        "/api/v1/monitor/999/state/", json={"state": "Normal"}
+    )
+    assert response.status_code == 404
+    assert LAST_WRITE_COOKIE not in response.cookies
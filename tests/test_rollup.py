@@ -0,0 +1,132 @@
+"""
+Tests for composite monitors and their rollups.
+"""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.models.monitor import MonitorStatus
+from app.rollup import describe, worst_state
+
+
+def _monitor(client: TestClient, name: str, tags=()) -> int:
+    response = client.post("/api/v1/monitor/", json={"name": name, "tags": list(tags)})
+    return response.json()["id"]
+
+
+def _composite(client: TestClient, name: str, **fields):
+    return client.post("/api/v1/monitor/composites/", json={"name": name, **fields})
+
+
+def _set(client: TestClient, monitor_id: int, state: str):
+    return client.post(f"/api/v1/monitor/{monitor_id}/state/", json={"state": state})
+
+
+def _state(client: TestClient, monitor_id: int) -> dict:
+    return client.get(f"/api/v1/monitor/{monitor_id}/state/").json()
+
+
+def test_worst_state():
+    """Test that the most severe member state wins."""
+    assert worst_state([3, 0, 0, 0]).value == "Normal"
+    assert worst_state([3, 1, 1, 0]).value == "Missing Data"
+    assert worst_state([0, 0, 0, 0]).value == "Missing Data"
+    assert describe([2, 1, 0, 0]) == "1 of 3 members Warning"
+    assert describe([0, 0, 0, 0]) == "No members"
+
+
+def test_composite_rolls_up_members(client: TestClient):
+    """Test that a composite follows the worst state of its members."""
+    db_id = _monitor(client, "db")
+    web_id = _monitor(client, "web")
+    response = _composite(client, "site", members=[db_id, web_id])
+    assert response.status_code == 200
+    site = response.json()
+    assert site["state"] == "Normal"
+    assert site["members"] == sorted([db_id, web_id])
+
+    _set(client, db_id, "Warning")
+    _set(client, web_id, "Critical")
+    state = _state(client, site["id"])
+    assert state["state"] == "Critical"
+    assert state["message"] == "1 of 2 members Critical"
+
+    _set(client, web_id, "Normal")
+    assert _state(client, site["id"])["state"] == "Warning"
+
+
+def test_member_tags_include_later_monitors(client: TestClient):
+    """Test that monitors created with a member tag join the composite."""
+    _monitor(client, "api-1", ["api"])
+    site_id = _composite(client, "api", member_tags=["api"]).json()["id"]
+    api_2 = _monitor(client, "api-2", ["api"])
+
+    _set(client, api_2, "Critical")
+    state = _state(client, site_id)
+    assert state["state"] == "Critical"
+    assert state["message"] == "1 of 2 members Critical"
+
+
+def test_propagation_stops_at_unchanged_ancestors(client: TestClient, db_session):
+    """Test that nested composites are only written when their state changes."""
+    leaf_a = _monitor(client, "leaf-a")
+    leaf_b = _monitor(client, "leaf-b")
+    inner_id = _composite(client, "inner", members=[leaf_a], tags=["region"]).json()[
+        "id"
+    ]
+    outer_id = _composite(
+        client, "outer", members=[leaf_b], member_tags=["region"]
+    ).json()["id"]
+
+    def statuses(monitor_id):
+        return db_session.scalar(
+            select(func.count()).where(MonitorStatus.monitor_id == monitor_id)
+        )
+
+    _set(client, leaf_b, "Critical")
+    assert _state(client, outer_id)["state"] == "Critical"
+    outer_statuses = statuses(outer_id)
+
+    # Inner changes, but outer stays Critical and gets no new status
+    _set(client, leaf_a, "Warning")
+    assert _state(client, inner_id)["state"] == "Warning"
+    assert statuses(outer_id) == outer_statuses
+
+    _set(client, leaf_b, "Normal")
+    assert _state(client, outer_id)["state"] == "Warning"
+
+
+def test_cycles_rejected(client: TestClient):
+    """Test that a composite cannot become a member of itself."""
+    top_id = _composite(client, "top", member_tags=["tier"]).json()["id"]
+    middle_id = _composite(client, "middle", members=[top_id]).json()["id"]
+
+    response = _composite(client, "bottom", members=[middle_id], tags=["tier"])
+    assert response.status_code == 409
+    assert client.get("/api/v1/monitor/statuses/by-tags/?tags=tier").json() == []
+
+
+def test_composite_state_is_derived(client: TestClient):
+    """Test that composites reject direct states and unknown members."""
+    site_id = _composite(client, "site").json()["id"]
+    assert _state(client, site_id)["state"] == "Missing Data"
+    assert _set(client, site_id, "Normal").status_code == 409
+    assert _composite(client, "broken", members=[9999]).status_code == 404
+    assert _composite(client, "site").status_code == 400
+
+
+def test_deleted_members_leave_rollup(client: TestClient):
+    """Test that deleting a member rolls the composite up without it."""
+    ok_id = _monitor(client, "ok")
+    bad_id = _monitor(client, "bad", ["flaky"])
+    site_id = _composite(client, "site", members=[ok_id, bad_id]).json()["id"]
+    _set(client, bad_id, "Critical")
+    assert _state(client, site_id)["state"] == "Critical"
+
+    client.delete("/api/v1/monitor/?tag=flaky")
+    state = _state(client, site_id)
+    assert state["state"] == "Normal"
+    assert state["message"] == "1 of 1 members Normal"
+
+    client.delete(f"/api/v1/monitor/{ok_id}/")
+    assert _state(client, site_id)["state"] == "Missing Data"
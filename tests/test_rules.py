@@ -0,0 +1,228 @@
+"""
+Tests for the threshold rule engine.
+"""
+
+import runpy
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models.monitor import (
+    MonitorState,
+    MonitorStatus,
+    RuleAggregate,
+    StatusMessage,
+)
+from app.rules import Rule, RuleEngine, SampleWindow, rule_engine
+
+GUNICORN_CONF = Path(__file__).parent.parent / "gunicorn.conf.py"
+
+RULE = {"aggregate": "mean", "window_seconds": 60, "warning": 80, "critical": 90}
+
+
+@pytest.fixture(name="rules_client")
+def fixture_rules_client(client: TestClient, sample_monitor, monkeypatch):
+    """Enable threshold rules and give the sample monitor a rule."""
+    monkeypatch.setattr("app.core.config.settings.RULES_ENABLED", True)
+    response = client.put(
+        f"/api/v1/monitor/{sample_monitor['id']}/rule/",
+        json={**RULE, "hysteresis": 5},
+    )
+    assert response.status_code == 200
+    return client
+
+
+def test_rule_hysteresis():
+    """Test that states rise at a threshold and fall only past the hysteresis."""
+    rule = Rule(RuleAggregate.MEAN, 60, warning=80, critical=90, hysteresis=5)
+
+    assert rule.derive(91, MonitorState.NORMAL) is MonitorState.CRITICAL
+    assert rule.derive(87, MonitorState.CRITICAL) is MonitorState.CRITICAL
+    assert rule.derive(84, MonitorState.CRITICAL) is MonitorState.WARNING
+    assert rule.derive(76, MonitorState.WARNING) is MonitorState.WARNING
+    assert rule.derive(50, MonitorState.CRITICAL) is MonitorState.NORMAL
+
+
+def test_rule_below():
+    """Test that rules with ``above`` unset alarm on low values."""
+    rule = Rule(RuleAggregate.MIN, 60, warning=20, critical=10, above=False)
+
+    assert rule.derive(25, MonitorState.NORMAL) is MonitorState.NORMAL
+    assert rule.derive(15, MonitorState.NORMAL) is MonitorState.WARNING
+    assert rule.derive(10, MonitorState.NORMAL) is MonitorState.CRITICAL
+
+
+@pytest.mark.parametrize(
+    "aggregate,expected",
+    [
+        (RuleAggregate.MEAN, 4.0),
+        (RuleAggregate.MAX, 6.0),
+        (RuleAggregate.MIN, 2.0),
+        (RuleAggregate.LAST, 4.0),
+    ],
+)
+def test_window_aggregates(aggregate, expected):
+    """Test that aggregates follow samples leaving the window."""
+    window = SampleWindow(aggregate, created=0)
+    for timestamp, value in enumerate([9.0, 2.0, 6.0, 4.0]):
+        window.add(timestamp, value)
+
+    window.evict(1)
+
+    assert window.value() == expected
+    window.evict(10)
+    assert window.value() is None
+
+
+def test_writes_only_state_changes(rules_client: TestClient, db_session):
+    """Test that a status is written when the derived state changes, only."""
+    monitor_id = 1
+    now = time.time()
+
+    rules_client.post(
+        f"/api/v1/monitor/{monitor_id}/samples/",
+        json=[{"value": 95}, {"value": 85}],
+    )
+    assert rule_engine.run(db_session, now) == 1
+    rules_client.post(f"/api/v1/monitor/{monitor_id}/samples/", json=[{"value": 92}])
+    assert rule_engine.run(db_session, now) == 0
+
+    statuses = db_session.query(MonitorStatus).order_by(MonitorStatus.id).all()
+    assert [status.state for status in statuses] == [
+        MonitorState.NORMAL,
+        MonitorState.CRITICAL,
+    ]
+    assert (
+        db_session.get(StatusMessage, statuses[-1].message_id).text
+        == "mean 90 over 60s, critical at 90"
+    )
+
+
+def test_missing_data_after_window(db_session, sample_monitor):
+    """Test that a rule whose samples stop for a window reports missing data."""
+    engine = RuleEngine()
+    engine.load(db_session)
+    engine.put_rule(sample_monitor["id"], Rule(RuleAggregate.MAX, 10, critical=1))
+    now = time.time()
+
+    assert not engine.evaluate(now + 10)
+    engine.add_samples([(sample_monitor["id"], now + 10, 0)])
+    assert not engine.evaluate(now + 10)
+    changes = engine.evaluate(now + 21)
+
+    assert [change.state for change in changes] == [MonitorState.MISSING_DATA]
+
+
+@pytest.mark.usefixtures("rules_client")
+def test_engines_sharing_database(db_session):
+    """Test that an engine without samples leaves the state to the one with them."""
+    monitor_id = 1
+    owner, other = RuleEngine(), RuleEngine()
+    owner.load(db_session)
+    other.load(db_session)
+    now = time.time()
+
+    for elapsed in (0, 30, 60, 90, 120):
+        owner.add_samples([(monitor_id, now + elapsed, 95)])
+        owner.run(db_session, now + elapsed)
+        other.run(db_session, now + elapsed)
+        # Reloads pick up the states written by the other engine
+        owner.load(db_session)
+        other.load(db_session)
+
+    statuses = db_session.query(MonitorStatus).order_by(MonitorStatus.id).all()
+    assert [status.state for status in statuses] == [
+        MonitorState.NORMAL,
+        MonitorState.CRITICAL,
+    ]
+
+
+@pytest.mark.parametrize("rules_enabled,workers", [(True, 2), (False, 2), (True, 1)])
+def test_gunicorn_refuses_workers_with_rules(rules_enabled, workers, monkeypatch):
+    """Test that gunicorn only starts one worker with threshold rules enabled."""
+    monkeypatch.setattr("app.core.config.settings.RULES_ENABLED", rules_enabled)
+    on_starting = runpy.run_path(str(GUNICORN_CONF))["on_starting"]
+    server = SimpleNamespace(cfg=SimpleNamespace(workers=workers))
+
+    if rules_enabled and workers > 1:
+        with pytest.raises(RuntimeError, match="WEB_CONCURRENCY=1"):
+            on_starting(server)
+    else:
+        on_starting(server)
+
+
+def test_bulk_samples_ignore_monitors_without_rule(rules_client: TestClient):
+    """Test that bulk samples of monitors without a rule are ignored."""
+    response = rules_client.post(
+        "/api/v1/monitor/samples/",
+        json=[{"monitor_id": 1, "value": 1.5}, {"monitor_id": 2, "value": 3}],
+    )
+
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 1, "ignored": 1}
+
+
+def test_state_of_monitor_with_rule_cannot_be_set(rules_client: TestClient):
+    """Test that posted states are refused while a rule derives the state."""
+    url = "/api/v1/monitor/1/state/"
+    response = rules_client.post(url, json={"state": "Normal"})
+    assert response.status_code == 409
+
+    rules_client.delete("/api/v1/monitor/1/rule/")
+    assert rules_client.post(url, json={"state": "Normal"}).status_code == 200
+
+
+def test_samples_rejected_when_disabled(client: TestClient, sample_monitor):
+    """Test that samples are refused while threshold rules are disabled."""
+    response = client.post(
+        f"/api/v1/monitor/{sample_monitor['id']}/samples/", json=[{"value": 1}]
+    )
+
+    assert response.status_code == 503
+
+
+def test_rule_crud(rules_client: TestClient):
+    """Test reading, replacing and deleting a monitor's rule."""
+    url = "/api/v1/monitor/1/rule/"
+    assert rules_client.get(url).json()["hysteresis"] == 5
+
+    rules_client.put(url, json={"critical": 10, "above": False})
+    assert rules_client.get(url).json() == {
+        "monitor_id": 1,
+        "aggregate": "mean",
+        "window_seconds": 60.0,
+        "warning": None,
+        "critical": 10.0,
+        "above": False,
+        "hysteresis": 0.0,
+    }
+
+    assert rules_client.delete(url).status_code == 200
+    assert rules_client.get(url).status_code == 404
+    assert not rule_engine.has_rule(1)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"aggregate": "mean"},
+        {"warning": 90, "critical": 80},
+        {"warning": 10, "critical": 20, "above": False},
+        {"critical": 1, "window_seconds": 0},
+    ],
+)
+def test_invalid_rules(rules_client: TestClient, body):
+    """Test that rules without thresholds or with crossed ones are rejected."""
+    response = rules_client.put("/api/v1/monitor/1/rule/", json=body)
+
+    assert response.status_code == 422
+
+
+def test_rule_for_unknown_monitor(client: TestClient):
+    """Test that a rule cannot be set on a monitor that does not exist."""
+    response = client.put("/api/v1/monitor/999/rule/", json={"critical": 1})
+
+    assert response.status_code == 404
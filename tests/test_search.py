@@ -0,0 +1,78 @@
+"""
+Tests for monitor and tag name search.
+"""
+
+import fnmatch
+
+from fastapi.testclient import TestClient
+
+from app.search import NameIndex, SearchMode, like_pattern
+
+NAMES = ["api-eu-1", "api-eu-2", "api-us-1", "db-eu", "web_api", "x%y", "queue"]
+
+
+def _search(client: TestClient, query: str, mode: str = "substring", **params):
+    response = client.get(
+        "/api/v1/monitor/search/", params={"q": query, "mode": mode, **params}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_name_index_matches_reference():
+    """Test that index searches match plain string matching, in name order."""
+    index = NameIndex((name, position) for position, name in enumerate(NAMES))
+    references = {
+        SearchMode.PREFIX: str.startswith,
+        SearchMode.SUBSTRING: lambda name, query: query in name,
+        SearchMode.GLOB: fnmatch.fnmatchcase,
+    }
+    queries = ["api", "eu", "-1", "api*", "*-?", "*u*", "d?-*", "x%y", "%", ""]
+    for mode, matches in references.items():
+        for query in queries:
+            expected = sorted(name for name in NAMES if matches(name, query))
+            found = [index.names[p] for p in index.search(mode, query, None, 100)]
+            assert found == expected, (mode, query)
+            # Paging resumes after the last name returned
+            first = [index.names[p] for p in index.search(mode, query, None, 2)]
+            rest = index.search(mode, query, first[-1] if first else None, 100)
+            assert first + [index.names[p] for p in rest] == expected
+
+
+def test_like_patterns_escape_wildcards():
+    """Test that searches translate to LIKE patterns matching the same names."""
+    assert like_pattern(SearchMode.PREFIX, "api_") == "api\\_%"
+    assert like_pattern(SearchMode.SUBSTRING, "5%") == "%5\\%%"
+    assert like_pattern(SearchMode.GLOB, "web_*-?") == "web\\_%-_"
+
+
+def test_search_endpoint_pages_and_follows_changes(client: TestClient):
+    """Test that the endpoint pages monitors, lists tags and sees new monitors."""
+    for name in NAMES:
+        client.post("/api/v1/monitor/", json={"name": name, "tags": ["region-eu"]})
+
+    page = _search(client, "-eu", limit=2)
+    assert [monitor["name"] for monitor in page["monitors"]] == [
+        "api-eu-1",
+        "api-eu-2",
+    ]
+    assert page["monitors"][0]["tags"] == ["region-eu"]
+    assert page["tags"] == ["region-eu"]
+    page = _search(client, "-eu", limit=2, cursor=page["next_cursor"])
+    assert [monitor["name"] for monitor in page["monitors"]] == ["db-eu"]
+    assert page["tags"] == []
+    assert page["next_cursor"] is None
+
+    created = client.post("/api/v1/monitor/", json={"name": "api-eu-0"}).json()
+    page = _search(client, "api-*-?", "glob")
+    assert [monitor["name"] for monitor in page["monitors"]] == [
+        "api-eu-0",
+        "api-eu-1",
+        "api-eu-2",
+        "api-us-1",
+    ]
+    client.delete(f"/api/v1/monitor/{created['id']}/")
+    assert len(_search(client, "api-", "prefix")["monitors"]) == 3
+
+    response = client.get("/api/v1/monitor/search/?q=api&cursor=_w")
+    assert response.status_code == 400
@@ -0,0 +1,148 @@
+"""
+Tests for the in-memory state store.
+"""
+
+import time
+from datetime import UTC, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import LAST_WRITE_COOKIE
+from app.models.monitor import Monitor, MonitorState, MonitorStatus, Tag
+from app.state_store import state_store
+
+
+@pytest.fixture(name="store_client")
+def fixture_store_client(client: TestClient, db_session: Session):
+    """Create two monitors, then serve current state from a loaded store."""
+    client.post("/api/v1/monitor/", json={"name": "db", "tags": ["prod", "sql"]})
+    client.post("/api/v1/monitor/", json={"name": "web", "tags": ["prod"]})
+    client.post(
+        "/api/v1/monitor/1/state/", json={"state": "Critical", "message": "Disk full"}
+    )
+    state_store.load(db_session)
+    # Outside of the read-your-writes window, which bypasses the store
+    client.cookies.clear()
+    yield client
+    state_store.clear()
+
+
+def _without_timestamps(statuses: list) -> list:
+    return [
+        {key: value for key, value in status.items() if key != "timestamp"}
+        for status in statuses
+    ]
+
+
+def test_store_serves_current_state_without_queries(store_client: TestClient):
+    """Test that current-state endpoints are answered from memory."""
+    response = store_client.get("/api/v1/monitor/1/state/")
+    assert response.json()["state"] == "Critical"
+    assert response.json()["message"] == "Disk full"
+    assert 'desc="0 queries"' in response.headers["server-timing"]
+
+    response = store_client.get("/api/v1/monitor/statuses/by-tags/?tags=prod&tags=sql")
+    assert [status["name"] for status in response.json()] == ["db"]
+    assert 'desc="0 queries"' in response.headers["server-timing"]
+
+    assert store_client.get("/api/v1/monitor/999/state/").status_code == 404
+
+
+def test_store_matches_database(store_client: TestClient, db_session: Session):
+    """Test that the store gives the same answers as the database."""
+    from_store = store_client.get("/api/v1/monitor/statuses/").json()
+    state_store.clear()
+    from_db = store_client.get("/api/v1/monitor/statuses/").json()
+
+    assert _without_timestamps(from_store) == [
+        {**status, "tags": sorted(status["tags"])}
+        for status in _without_timestamps(from_db)
+    ]
+    state_store.load(db_session)
+    assert not state_store.check(db_session)
+
+
+def test_write_path_updates_store(store_client: TestClient, db_session: Session):
+    """Test that writes in this process are applied to the store."""
+    store_client.post("/api/v1/monitor/2/state/", json={"state": "Warning"})
+    store_client.post("/api/v1/monitor/", json={"name": "cache", "tags": ["prod"]})
+    # A late event does not replace the current state
+    store_client.post(
+        "/api/v1/monitor/2/state/",
+        json={"state": "Critical", "timestamp": "2024-01-01T00:00:00Z"},
+    )
+
+    assert store_client.get("/api/v1/monitor/2/state/").json()["state"] == "Warning"
+    assert store_client.get("/api/v1/monitor/3/state/").json()["state"] == "Normal"
+    assert not state_store.check(db_session)
+
+    store_client.delete("/api/v1/monitor/1/")
+    store_client.delete("/api/v1/monitor/?tag=prod")
+    assert len(state_store) == 0
+    assert not state_store.check(db_session)
+
+
+def test_recent_writer_bypasses_store(store_client: TestClient, db_session: Session):
+    """Test that a client that just wrote reads past a store that has not synced."""
+    # Written through another worker, whose store is the one that knows
+    db_session.add(
+        MonitorStatus(
+            monitor_id=1, state=MonitorState.NORMAL, timestamp=datetime.now(UTC)
+        )
+    )
+    db_session.commit()
+    assert store_client.get("/api/v1/monitor/1/state/").json()["state"] == "Critical"
+
+    store_client.cookies.set(LAST_WRITE_COOKIE, str(time.time()))
+
+    assert store_client.get("/api/v1/monitor/1/state/").json()["state"] == "Normal"
+    for url in ("/api/v1/monitor/statuses/", "/api/v1/monitor/statuses/by-tags/"):
+        statuses = store_client.get(url, params={"tags": ["sql"]}).json()
+        assert [status["state"] for status in statuses if status["id"] == 1] == [
+            "Normal"
+        ]
+
+
+@pytest.mark.usefixtures("store_client")
+@pytest.mark.parametrize("sync_limit", [10_000, 1])
+def test_sync_picks_up_other_writers(db_session: Session, sync_limit, monkeypatch):
+    """Test that statuses written by other processes are applied, or reloaded."""
+    monkeypatch.setattr("app.state_store.SYNC_LIMIT", sync_limit)
+    monitor = Monitor(
+        name="queue", tags=[db_session.query(Tag).filter_by(name="prod").one()]
+    )
+    db_session.add(monitor)
+    db_session.flush()
+    now = datetime.now(UTC)
+    db_session.add_all(
+        [
+            MonitorStatus(
+                monitor_id=monitor.id, state=MonitorState.NORMAL, timestamp=now
+            ),
+            MonitorStatus(monitor_id=2, state=MonitorState.WARNING, timestamp=now),
+        ]
+    )
+    db_session.commit()
+    assert state_store.check(db_session)
+
+    assert state_store.sync(db_session) == 2
+
+    assert state_store.get(monitor.id).tags == ("prod",)
+    assert state_store.get(2).state == MonitorState.WARNING
+    assert not state_store.check(db_session)
+    assert state_store.sync(db_session) == 0
+
+
+@pytest.mark.usefixtures("store_client")
+def test_check_reports_differences(db_session: Session):
+    """Test that the consistency check lists stale records."""
+    state_store.get(1).state = MonitorState.NORMAL
+    state_store.remove([2])
+
+    assert state_store.check(db_session) == [
+        "monitor 1 state: store has <MonitorState.NORMAL: 'Normal'>, "
+        "database has <MonitorState.CRITICAL: 'Critical'>",
+        "monitor 2: missing from the store",
+    ]
@@ -0,0 +1,69 @@
+"""
+Tests for the tag name cache.
+"""
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy.orm import Session
+
+from app.models.monitor import Tag
+from app.tag_cache import TagCache, tag_cache
+
+
+def test_get_ids_caches_existing_tags(db_session: Session):
+    """Test that existing tags are cached and unknown names are not."""
+    db_session.add_all([Tag(name="db"), Tag(name="web")])
+    db_session.commit()
+    cache = TagCache(maxsize=10)
+
+    def lookups(result):
+        return (
+            REGISTRY.get_sample_value(
+                "cache_requests_total", {"cache": "tags", "result": result}
+            )
+            or 0.0
+        )
+
+    hits, misses = lookups("hit"), lookups("miss")
+    assert set(cache.get_ids(db_session, ["db", "web", "missing"])) == {"db", "web"}
+    assert set(cache.get_ids(db_session, ["web", "db", "missing"])) == {"db", "web"}
+
+    assert lookups("hit") - hits == 2
+    assert lookups("miss") - misses == 4
+
+
+def test_cache_is_bounded(db_session: Session):
+    """Test that the least recently used names are evicted."""
+    db_session.add_all([Tag(name=name) for name in ("a", "b", "c")])
+    db_session.commit()
+    cache = TagCache(maxsize=2)
+
+    cache.get_ids(db_session, ["a", "b"])
+    cache.get_ids(db_session, ["a"])
+    cache.get_ids(db_session, ["c"])
+
+    assert list(cache._ids) == ["a", "c"]  # pylint: disable=protected-access
+
+
+def test_get_or_create_ids(db_session: Session):
+    """Test that missing tags are created and not cached before commit."""
+    db_session.add(Tag(name="db"))
+    db_session.commit()
+    cache = TagCache(maxsize=10)
+
+    ids = cache.get_or_create_ids(db_session, ["web", "db", "web"])
+
+    assert list(ids) == ["web", "db"]
+    assert "web" not in cache._ids  # pylint: disable=protected-access
+    db_session.rollback()
+    assert not cache.get_ids(db_session, ["web"])
+
+
+def test_filter_by_unknown_tag(client: TestClient):
+    """Test filtering by a tag that no monitor has."""
+    client.post("/api/v1/monitor/", json={"name": "test-monitor", "tags": ["db"]})
+
+    response = client.get("/api/v1/monitor/statuses/by-tags/?tags=db&tags=nope")
+
+    assert response.json() == []
+    assert "nope" not in tag_cache._ids  # pylint: disable=protected-access
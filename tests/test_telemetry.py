@@ -0,0 +1,92 @@
+"""
+Tests for OpenTelemetry configuration.
+"""
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.instrumentation.dependencies import get_dependency_conflicts
+from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.sdk.trace.sampling import Decision
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.telemetry import build_sampler, instrument_database
+
+TRACE_ID = 0x0123456789ABCDEF0123456789ABCDEF
+
+
+def _parent_context(sampled: bool):
+    """Build a context whose remote parent span has the given sampled flag."""
+    parent = trace.SpanContext(
+        trace_id=TRACE_ID,
+        span_id=0x0123456789ABCDEF,
+        is_remote=True,
+        trace_flags=trace.TraceFlags(
+            trace.TraceFlags.SAMPLED if sampled else trace.TraceFlags.DEFAULT
+        ),
+    )
+    return trace.set_span_in_context(trace.NonRecordingSpan(parent))
+
+
+def test_sampler_ratio_drops_new_root_spans(monkeypatch):
+    """Test that a zero ratio drops root spans."""
+    monkeypatch.setattr(settings, "OTEL_TRACES_SAMPLER_RATIO", 0.0)
+    result = build_sampler().should_sample(None, TRACE_ID, "GET /statuses/")
+    assert result.decision == Decision.DROP
+
+
+def test_parent_based_sampler_follows_parent(monkeypatch):
+    """Test that parent-based sampling keeps spans of sampled parents."""
+    monkeypatch.setattr(settings, "OTEL_TRACES_SAMPLER_RATIO", 0.0)
+    sampler = build_sampler()
+
+    sampled = sampler.should_sample(_parent_context(True), TRACE_ID, "child")
+    assert sampled.decision == Decision.RECORD_AND_SAMPLE
+
+    unsampled = sampler.should_sample(_parent_context(False), TRACE_ID, "child")
+    assert unsampled.decision == Decision.DROP
+
+
+def test_ratio_only_sampler_ignores_parent(monkeypatch):
+    """Test that disabling parent-based sampling applies the ratio everywhere."""
+    monkeypatch.setattr(settings, "OTEL_TRACES_SAMPLER_RATIO", 0.0)
+    monkeypatch.setattr(settings, "OTEL_TRACES_SAMPLER_PARENT_BASED", False)
+    result = build_sampler().should_sample(_parent_context(True), TRACE_ID, "child")
+    assert result.decision == Decision.DROP
+
+
+@pytest.mark.skipif(
+    get_dependency_conflicts(SQLAlchemyInstrumentor().instrumentation_dependencies())
+    is not None,
+    reason="installed SQLAlchemy is not supported by the instrumentor",
+)
+def test_instrument_database_traces_every_engine(monkeypatch):
+    """Test that statements on the replica engine get spans as well."""
+    monkeypatch.delenv("TESTING", raising=False)
+    # Set by the API benchmark, which runs in the same process
+    monkeypatch.delenv("OTEL_SDK_DISABLED", raising=False)
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    primary = create_engine("sqlite://")
+    replica = create_engine("sqlite://")
+
+    instrument_database([primary, replica], tracer_provider)
+    try:
+        for engine, statement in ((primary, "SELECT 1"), (replica, "SELECT 2")):
+            with engine.connect() as connection:
+                connection.execute(text(statement))
+    finally:
+        SQLAlchemyInstrumentor().uninstrument()
+
+    statements = [
+        span.attributes["db.statement"]
+        for span in exporter.get_finished_spans()
+        if "db.statement" in span.attributes
+    ]
+    assert statements == ["SELECT 1", "SELECT 2"]
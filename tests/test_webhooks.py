@@ -0,0 +1,229 @@
+"""
+Tests for webhook subscriptions, the outbox and the dispatcher.
+"""
+
+import json
+import threading
+import time
+from datetime import UTC, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.monitor import WebhookOutbox
+from app.state_store import as_utc
+from app.webhooks import WebhookDispatcher
+
+
+class _Receiver(BaseHTTPRequestHandler):
+    """Records POSTed bodies; answers with the status and delay set per path."""
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Record the body and answer."""
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.received.append((self.path, body))
+        time.sleep(self.server.delays.get(self.path, 0))
+        self.send_response(self.server.statuses.get(self.path, 200))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep the test output quiet."""
+
+
+@pytest.fixture(name="stub")
+def fixture_stub():
+    """Run a local HTTP endpoint receiving webhooks."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Receiver)
+    server.received, server.statuses, server.delays = [], {}, {}
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(name="webhooks_client")
+def fixture_webhooks_client(client: TestClient, monkeypatch):
+    """Enable webhooks."""
+    monkeypatch.setattr("app.core.config.settings.WEBHOOKS_ENABLED", True)
+    return client
+
+
+def _subscribe(client: TestClient, url: str, **filters) -> int:
+    response = client.post("/api/v1/webhooks/", json={"url": url, **filters})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def _set(client: TestClient, monitor_id: int, state: str):
+    client.post(f"/api/v1/monitor/{monitor_id}/state/", json={"state": state})
+
+
+def _dispatcher(db_session, **options) -> WebhookDispatcher:
+    return WebhookDispatcher(sessionmaker(bind=db_session.get_bind()), **options)
+
+
+def _outbox(db_session):
+    db_session.expire_all()
+    return db_session.scalars(select(WebhookOutbox).order_by(WebhookOutbox.id)).all()
+
+
+def test_transitions_enqueued_for_matching_subscriptions(
+    webhooks_client: TestClient, db_session, sample_monitor
+):
+    """Test that transitions are queued once per matching subscription."""
+    client = webhooks_client
+    monitor_id = sample_monitor["id"]
+    other_id = client.post("/api/v1/monitor/", json={"name": "other"}).json()["id"]
+    every = _subscribe(client, "http://example.com/all")
+    critical = _subscribe(
+        client, "http://example.com/critical", tag="test", states=["Critical"]
+    )
+    _subscribe(client, "http://example.com/other", monitor_id=other_id)
+
+    for state in ["Warning", "Warning", "Critical", "Normal"]:
+        _set(client, monitor_id, state)
+
+    events = [(row.subscription_id, row.event) for row in _outbox(db_session)]
+    assert [(sub, event["state"]) for sub, event in events] == [
+        (every, "Warning"),
+        (every, "Critical"),
+        (critical, "Critical"),
+        (every, "Normal"),
+        (critical, "Normal"),
+    ]
+    event = events[0][1]
+    assert event["monitor"] == "test-monitor"
+    assert event["previous_state"] == "Normal"
+    assert event["status_id"] > 0
+
+
+async def test_dispatcher_batches_events(
+    webhooks_client: TestClient, db_session, sample_monitor, stub
+):
+    """Test that due events are POSTed in batches and removed once accepted."""
+    _subscribe(webhooks_client, f"{stub.url}/hook")
+    for state in ["Warning", "Critical", "Normal"]:
+        _set(webhooks_client, sample_monitor["id"], state)
+
+    dispatcher = _dispatcher(db_session, batch_size=2)
+    assert await dispatcher.dispatch() == 3
+    await dispatcher.aclose()
+
+    assert [len(body["events"]) for _, body in stub.received] == [2, 1]
+    states = [event["state"] for _, body in stub.received for event in body["events"]]
+    assert states == ["Warning", "Critical", "Normal"]
+    assert not _outbox(db_session)
+
+
+async def test_failed_deliveries_back_off_then_dead_letter(
+    webhooks_client: TestClient, db_session, sample_monitor, stub
+):
+    """Test that failures are retried with backoff, then dead-lettered."""
+    stub.statuses["/down"] = 503
+    _subscribe(webhooks_client, f"{stub.url}/down")
+    _set(webhooks_client, sample_monitor["id"], "Critical")
+    dispatcher = _dispatcher(db_session, max_attempts=2, backoff_seconds=0.2)
+
+    await dispatcher.dispatch()
+    await dispatcher.drain()
+    (row,) = _outbox(db_session)
+    assert row.attempts == 1
+    assert row.last_error == "HTTP 503"
+    assert as_utc(row.next_attempt_at) > datetime.now(UTC)
+    assert await dispatcher.dispatch() == 0
+
+    time.sleep(0.25)
+    assert await dispatcher.dispatch() == 1
+    await dispatcher.aclose()
+    assert not _outbox(db_session)
+    assert len(stub.received) == 2
+
+    (dead,) = webhooks_client.get("/api/v1/webhooks/dead-letters/").json()
+    assert dead["attempts"] == 2
+    assert dead["error"] == "HTTP 503"
+    assert dead["event"]["state"] == "Critical"
+
+
+async def test_slow_endpoint_does_not_hold_up_others(
+    webhooks_client: TestClient, db_session, sample_monitor, stub
+):
+    """Test that a receiver slower than the timeout only delays its own events."""
+    stub.delays["/slow"] = 1.0
+    _subscribe(webhooks_client, f"{stub.url}/slow")
+    _subscribe(webhooks_client, f"{stub.url}/fast")
+    started = time.perf_counter()
+    _set(webhooks_client, sample_monitor["id"], "Warning")
+    assert time.perf_counter() - started < 0.5
+
+    dispatcher = _dispatcher(db_session, timeout_seconds=0.2)
+    started = time.perf_counter()
+    await dispatcher.dispatch()
+    await dispatcher.aclose()
+    assert time.perf_counter() - started < 0.8
+
+    assert sorted(path for path, _ in stub.received) == ["/fast", "/slow"]
+    (row,) = _outbox(db_session)
+    assert row.attempts == 1
+    assert row.last_error == "ReadTimeout"
+
+
+def test_dispatcher_thread_delivers(
+    webhooks_client: TestClient, db_session, sample_monitor, stub
+):
+    """Test that the background thread polls the outbox until stopped."""
+    _subscribe(webhooks_client, f"{stub.url}/hook")
+    _set(webhooks_client, sample_monitor["id"], "Critical")
+    # Started after the writes: the test engine shares one connection
+    dispatcher = _dispatcher(db_session, poll_seconds=0.05)
+    dispatcher.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not stub.received and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        dispatcher.stop()
+    assert not dispatcher.is_alive()
+    assert stub.received[0][1]["events"][0]["state"] == "Critical"
+
+
+def test_webhook_crud(webhooks_client: TestClient, sample_monitor):
+    """Test creating, listing and deleting subscriptions."""
+    client = webhooks_client
+    webhook_id = _subscribe(
+        client,
+        "http://example.com/hook",
+        monitor_id=sample_monitor["id"],
+        tag="test",
+        states=["Warning"],
+    )
+    (listed,) = client.get("/api/v1/webhooks/").json()
+    assert listed == {
+        "id": webhook_id,
+        "url": "http://example.com/hook",
+        "monitor_id": sample_monitor["id"],
+        "tag": "test",
+        "states": ["Warning"],
+    }
+    missing = client.post(
+        "/api/v1/webhooks/", json={"url": "http://example.com", "monitor_id": 999}
+    )
+    assert missing.status_code == 404
+    assert (
+        client.post("/api/v1/webhooks/", json={"url": "not a url"}).status_code == 422
+    )
+
+    assert client.delete(f"/api/v1/webhooks/{webhook_id}/").status_code == 200
+    assert client.delete(f"/api/v1/webhooks/{webhook_id}/").status_code == 404
+    assert client.get("/api/v1/webhooks/").json() == []
+
+
+def test_webhooks_disabled(client: TestClient):
+    """Test that subscriptions are refused unless webhooks are enabled."""
+    response = client.post("/api/v1/webhooks/", json={"url": "http://example.com"})
+    assert response.status_code == 503